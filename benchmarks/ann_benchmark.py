@@ -0,0 +1,124 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of recall@k and query latency of the "ivf" vector store against an exact search.
+
+Usage:
+    python -m benchmarks.ann_benchmark --size 100000 --probes 1 4 8 16 32 --json-output results.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Set
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from benchmarks.vector_search_benchmark import time_ms
+from coded_tools.rag.ivf_vector_store import IvfVectorStore
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from tests.coded_tools.rag.corpora import make_clustered_corpus
+
+
+def search_ids(store, queries: List[List[float]], k: int) -> List[Set[str]]:
+    """
+    :return: Ids of the k results of each query
+    """
+    return [{doc.id for doc in store.similarity_search_by_vector(query, k)} for query in queries]
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def benchmark_probe(
+    ivf_store: IvfVectorStore,
+    n_probe: int,
+    queries: List[List[float]],
+    exact_ids: List[Set[str]],
+    exact_p50: float,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """
+    :param ivf_store: Store with a built index
+    :param n_probe: Number of lists probed per query
+    :param queries: Query vectors, one timed query each
+    :param exact_ids: Ids found by an exact search for each query
+    :param exact_p50: Median latency of the exact search in milliseconds
+    :param args: Parsed command line arguments
+    :return: Result dictionary of the n_probe value
+    """
+    ivf_store.n_probe = n_probe
+    ivf_ids: List[Set[str]] = search_ids(ivf_store, queries, args.k)
+    recall: float = statistics.mean(len(found & expected) / args.k for found, expected in zip(ivf_ids, exact_ids))
+    p50: float = statistics.median(
+        time_ms(lambda query=query: ivf_store.similarity_search_by_vector(query, args.k)) for query in queries
+    )
+    print(f"n_probe {n_probe:>4} | recall@{args.k} {recall:6.3f} | {p50:8.3f} ms | speedup {exact_p50 / p50:6.1f}x")
+    return {
+        "corpus_size": len(ivf_store),
+        "dimensions": args.dimensions,
+        "n_lists": len(ivf_store.centroids),
+        "n_probe": n_probe,
+        "k": args.k,
+        f"recall_at_{args.k}": recall,
+        "ivf_p50_ms": p50,
+        "exact_p50_ms": exact_p50,
+        "speedup": exact_p50 / p50,
+    }
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=200, help="Number of topics of the synthetic corpus")
+    parser.add_argument("--lists", type=int, help="Number of IVF lists. Default to the square root of --size.")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    corpus: np.ndarray = make_clustered_corpus(args.size + args.queries, args.dimensions, args.clusters)
+    vectors: np.ndarray = corpus[: args.size]
+    queries: List[List[float]] = corpus[args.size :].tolist()
+
+    texts: List[str] = [f"chunk {i}" for i in range(args.size)]
+    ids: List[str] = [str(i) for i in range(args.size)]
+    exact_store = NumpyVectorStore(embedding=FakeEmbeddings(size=args.dimensions))
+    exact_store.add_vectors(vectors, texts, ids=ids)
+    exact_ids: List[Set[str]] = search_ids(exact_store, queries, args.k)
+    exact_p50: float = statistics.median(
+        time_ms(lambda query=query: exact_store.similarity_search_by_vector(query, args.k)) for query in queries
+    )
+
+    ivf_store = IvfVectorStore(embedding=FakeEmbeddings(size=args.dimensions), n_lists=args.lists)
+    ivf_store.add_vectors(vectors, texts, ids=ids)
+    start: float = time.perf_counter()
+    ivf_store.build_index()
+    build_seconds: float = time.perf_counter() - start
+
+    print(f"exact search: {exact_p50:8.3f} ms | IVF index built in {build_seconds:.2f} s")
+    results: List[Dict[str, Any]] = [
+        benchmark_probe(ivf_store, n_probe, queries, exact_ids, exact_p50, args) for n_probe in args.probes
+    ]
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
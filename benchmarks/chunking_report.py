@@ -0,0 +1,176 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Report of chunk count, embedding token cost and retrieval quality for each chunking strategy.
+
+Strategies are given as strategy:chunk_size:chunk_overlap. Retrieval quality needs a
+JSON lines file of {"query": ..., "answer": ...} objects, where the answer is a short
+text found in the document. A query is a hit when one of its top k chunks contains the answer.
+
+Usage:
+    python -m benchmarks.chunking_report --pdf handbook.pdf --queries handbook_queries.jsonl \\
+        --strategies token:100:50 token:400:40 paragraph:400:0 page:800:0 heading:400:0
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.rag.chunking import ChunkingConfig
+from coded_tools.rag.chunking import get_text_splitter
+from coded_tools.rag.chunking import get_token_counter
+from coded_tools.rag.embeddings_provider import create_embeddings
+from coded_tools.rag.embeddings_provider import get_embeddings_providers
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.pdf_loader import load_pdfs
+
+# USD per million tokens of text-embedding-3-small
+DEFAULT_PRICE_PER_MILLION_TOKENS = 0.02
+
+
+def parse_strategy(value: str) -> ChunkingConfig:
+    """
+    :param value: strategy:chunk_size:chunk_overlap
+    :return: The chunking configuration
+    """
+    strategy, chunk_size, chunk_overlap = value.split(":")
+    return ChunkingConfig(strategy=strategy, chunk_size=int(chunk_size), chunk_overlap=int(chunk_overlap))
+
+
+def normalize(text: str) -> str:
+    """Lower-case the text and collapse whitespace, so that answers match across line breaks."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+async def retrieval_quality(
+    chunks: List[Document], queries: List[Dict[str, str]], embeddings: Embeddings, k: int
+) -> Dict[str, float]:
+    """
+    :param chunks: The chunks of the documents
+    :param queries: {"query": ..., "answer": ...} objects
+    :param embeddings: Embeddings of the chunks and queries
+    :param k: Number of chunks retrieved per query
+    :return: Hit rate at k and mean reciprocal rank
+    """
+    store: NumpyVectorStore = await NumpyVectorStore.afrom_documents(chunks, embeddings)
+    reciprocal_ranks: List[float] = []
+    for query in queries:
+        results: List[Document] = await store.asimilarity_search(query["query"], k=k)
+        answer: str = normalize(query["answer"])
+        rank: Optional[int] = next(
+            (rank for rank, doc in enumerate(results, start=1) if answer in normalize(doc.page_content)), None
+        )
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return {
+        f"hit_rate_at_{k}": sum(1 for value in reciprocal_ranks if value > 0) / len(queries),
+        "mrr": sum(reciprocal_ranks) / len(queries),
+    }
+
+
+async def report_strategy(
+    config: ChunkingConfig, documents: List[Document], queries: List[Dict[str, str]], args: argparse.Namespace
+) -> Dict[str, Any]:
+    """
+    :param config: The chunking configuration
+    :param documents: The loaded documents
+    :param queries: {"query": ..., "answer": ...} objects, possibly empty
+    :param args: Parsed command line arguments
+    :return: Result dictionary of the configuration
+    """
+    chunks: List[Document] = get_text_splitter(config).split_documents(documents)
+    count_tokens = get_token_counter(config.encoding_name)
+    source_tokens: int = sum(count_tokens(doc.page_content) for doc in documents)
+    embedded_tokens: int = sum(count_tokens(chunk.page_content) for chunk in chunks)
+    result: Dict[str, Any] = {
+        **config.to_dict(),
+        "chunks": len(chunks),
+        "mean_chunk_tokens": embedded_tokens / max(1, len(chunks)),
+        "embedded_tokens": embedded_tokens,
+        # Tokens embedded per token of source text. Above 1 because of overlap.
+        "token_overhead": embedded_tokens / max(1, source_tokens),
+        "embedding_cost_usd": embedded_tokens * args.price_per_million_tokens / 1_000_000,
+    }
+    if queries:
+        embeddings_args: Dict[str, Any] = {"provider": args.embeddings}
+        if args.model:
+            embeddings_args["model"] = args.model
+        embeddings: Embeddings = create_embeddings(embeddings_args)
+        result.update(await retrieval_quality(chunks, queries, embeddings, args.k))
+    return result
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    :param args: Parsed command line arguments
+    :return: Result dictionary of each strategy
+    """
+    documents: List[Document] = await load_pdfs(args.pdf)
+    for path in args.text:
+        with open(path, "r", encoding="utf-8") as text_file:
+            documents.append(Document(page_content=text_file.read(), metadata={"source": path}))
+
+    queries: List[Dict[str, str]] = []
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as queries_file:
+            queries = [json.loads(line) for line in queries_file if line.strip()]
+
+    return [await report_strategy(parse_strategy(value), documents, queries, args) for value in args.strategies]
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="*", default=[], help="Paths or URLs of PDF files")
+    parser.add_argument("--text", nargs="*", default=[], help="Paths of plain text or markdown files")
+    parser.add_argument("--queries", help="JSON lines file of {'query': ..., 'answer': ...} objects")
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        default=["token:100:50", "token:400:40", "paragraph:400:0", "page:800:0", "heading:400:0"],
+    )
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument(
+        "--embeddings",
+        choices=get_embeddings_providers(),
+        default="openai",
+        help="'hashing' runs offline, with a retrieval quality close to a keyword search",
+    )
+    parser.add_argument("--model", help="Model of the openai or sentence_transformers provider")
+    parser.add_argument("--price-per-million-tokens", type=float, default=DEFAULT_PRICE_PER_MILLION_TOKENS)
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = asyncio.run(run(args))
+    for result in results:
+        line: str = (
+            f"{result['strategy']:>9} {result['chunk_size']:>5}/{result['chunk_overlap']:<4}"
+            f" | {result['chunks']:>7} chunks | {result['embedded_tokens']:>9} tokens"
+            f" (x{result['token_overhead']:.2f}) | ${result['embedding_cost_usd']:.5f}"
+        )
+        if "mrr" in result:
+            line += f" | hit@{args.k} {result[f'hit_rate_at_{args.k}']:.3f} | MRR {result['mrr']:.3f}"
+        print(line)
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of Confluence page fetching throughput against the fetch concurrency, using a local mock
+Confluence server. The server adds a latency to every request, returns at most --page-size pages per
+request, and answers 429 Too Many Requests with a Retry-After header beyond --max-concurrent requests
+in flight or beyond --requests-per-second.
+
+Usage:
+    python -m benchmarks.confluence_fetch_benchmark --pages 2000 --latency-ms 50 --concurrency 1 4 8 16
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+from langchain_core.documents import Document
+
+from coded_tools.rag.confluence_fetcher import ConfluenceFetcher
+from tests.coded_tools.rag.mock_confluence import MockConfluenceServer
+from tests.coded_tools.rag.mock_confluence import make_loader
+
+
+async def fetch(url: str, concurrency: int) -> Dict[str, Any]:
+    """
+    :param url: Base URL of the Confluence server
+    :param concurrency: Maximum number of concurrent requests of the fetcher
+    :return: Result dictionary of the fetch
+    """
+    fetcher = ConfluenceFetcher(make_loader(url, max_pages=1_000_000), max_concurrency=concurrency)
+    start: float = time.perf_counter()
+    documents: List[Document] = await fetcher.aload()
+    seconds: float = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "pages": len(documents),
+        "seconds": seconds,
+        "pages_per_second": len(documents) / seconds,
+        **fetcher.stats(),
+    }
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=25, help="Pages returned per request by the server")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--max-concurrent", type=int, default=6, help="0 for no concurrency limit")
+    parser.add_argument("--requests-per-second", type=float, default=0.0, help="0 for no rate limit")
+    parser.add_argument("--retry-after", default="1", help="Retry-After header of throttled responses")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for concurrency in args.concurrency:
+        with MockConfluenceServer(
+            pages=args.pages,
+            page_size=args.page_size,
+            latency_ms=args.latency_ms,
+            max_concurrent=args.max_concurrent,
+            requests_per_second=args.requests_per_second,
+            retry_after=args.retry_after,
+        ) as server:
+            result: Dict[str, Any] = asyncio.run(fetch(server.url, concurrency))
+            result["server_peak_concurrent"] = server.peak_concurrent
+        results.append(result)
+        print(
+            f"concurrency {concurrency:>3} | {result['pages']} pages in {result['seconds']:7.2f} s "
+            f"| {result['pages_per_second']:8.1f} pages/s | {result['requests']} requests "
+            f"| {result['throttled']} throttled | final limit {result['concurrency']}"
+        )
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of ingestion throughput against an embeddings backend with a simulated request latency.
+
+Compares, on the same backend and chunks:
+    baseline: all chunks split first, then embedded in sequential requests of 1000 texts
+        as OpenAIEmbeddings sends them, then stored
+    pipeline: the streaming IngestionPipeline, with the given batch sizes and embedding concurrency
+
+Exits with status 1 if the default pipeline is slower than the baseline by more than --max-regression,
+so that the benchmark can gate CI.
+
+Usage:
+    python -m benchmarks.ingestion_benchmark --docs 200 --request-ms 150 --json-output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import CharacterTextSplitter
+from langchain_text_splitters import TextSplitter
+
+from coded_tools.rag.embedding_batcher import BatchedEmbeddings
+from coded_tools.rag.ingestion_pipeline import DEFAULT_EMBED_BATCH_SIZE
+from coded_tools.rag.ingestion_pipeline import DEFAULT_EMBED_CONCURRENCY
+from coded_tools.rag.ingestion_pipeline import IngestionPipeline
+
+# Texts per request of OpenAIEmbeddings, whose requests are sent one after another
+BASELINE_REQUEST_TEXTS = 1000
+WORDS = "policy budget travel employee vendor contract refund invoice approval expense".split()
+
+
+class LatencyEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings whose asynchronous requests take a fixed round trip plus a time per text."""
+
+    request_ms: float = 150.0
+    text_ms: float = 0.2
+    requests: int = 0
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.requests += 1
+        await asyncio.sleep((self.request_ms + self.text_ms * len(texts)) / 1000.0)
+        return self.embed_documents(texts)
+
+
+def make_documents(count: int, words: int) -> List[Document]:
+    """
+    :param count: Number of documents
+    :param words: Number of words per document
+    :return: Synthetic documents
+    """
+    return [
+        Document(page_content=" ".join(f"{WORDS[(doc + word) % len(WORDS)]}{word}" for word in range(words)))
+        for doc in range(count)
+    ]
+
+
+async def iter_documents(documents: List[Document]) -> AsyncIterator[Document]:
+    """Yield the documents as a loader would."""
+    for document in documents:
+        yield document
+
+
+async def store(chunks: List[Document], store_ms: float):
+    """Simulate storing a batch, at store_ms per 1000 chunks."""
+    await asyncio.sleep(store_ms * len(chunks) / 1000.0 / 1000.0)
+
+
+async def run_baseline(
+    embeddings: LatencyEmbeddings, splitter: TextSplitter, documents: List[Document], store_ms: float
+) -> int:
+    """
+    :return: Number of chunks ingested the way the vector stores were built before the streaming pipeline
+    """
+    chunks: List[Document] = splitter.split_documents(documents)
+    for start in range(0, len(chunks), BASELINE_REQUEST_TEXTS):
+        batch: List[Document] = chunks[start : start + BASELINE_REQUEST_TEXTS]
+        await embeddings.aembed_documents([chunk.page_content for chunk in batch])
+        await store(batch, store_ms)
+    return len(chunks)
+
+
+# pylint: disable=too-many-arguments
+async def run_pipeline(
+    embeddings: Any,
+    splitter: TextSplitter,
+    documents: List[Document],
+    store_ms: float,
+    *,
+    batch_size: int,
+    embed_concurrency: int,
+) -> int:
+    """
+    :return: Number of chunks ingested through the IngestionPipeline
+    """
+    pipeline = IngestionPipeline(embeddings, splitter, batch_size=batch_size, embed_concurrency=embed_concurrency)
+
+    async def sink(chunks: List[Document], _vectors: List[List[float]]):
+        await store(chunks, store_ms)
+
+    return (await pipeline.run(iter_documents(documents), sink)).store.items
+
+
+def benchmark_case(
+    name: str, args: argparse.Namespace, documents: List[Document], batch_size: int = 0, embed_concurrency: int = 0
+) -> Dict[str, Any]:
+    """
+    :param name: Name of the case
+    :param args: Parsed command line arguments
+    :param documents: The documents to ingest
+    :param batch_size: Chunks per embedding request of the pipeline, 0 for the baseline
+    :param embed_concurrency: Embedding requests in flight at once in the pipeline
+    :return: Result dictionary of the case
+    """
+    backend = LatencyEmbeddings(size=args.dimensions, request_ms=args.request_ms, text_ms=args.text_ms)
+    splitter = CharacterTextSplitter(separator=" ", chunk_size=args.chunk_size, chunk_overlap=0)
+    start: float = time.perf_counter()
+    if batch_size:
+        embeddings: Any = BatchedEmbeddings(backend) if args.batched else backend
+        chunks: int = asyncio.run(
+            run_pipeline(
+                embeddings,
+                splitter,
+                documents,
+                args.store_ms,
+                batch_size=batch_size,
+                embed_concurrency=embed_concurrency,
+            )
+        )
+    else:
+        chunks = asyncio.run(run_baseline(backend, splitter, documents, args.store_ms))
+    seconds: float = time.perf_counter() - start
+    result: Dict[str, Any] = {
+        "case": name,
+        "batch_size": batch_size,
+        "embed_concurrency": embed_concurrency,
+        "chunks": chunks,
+        "requests": backend.requests,
+        "seconds": seconds,
+        "chunks_per_second": chunks / seconds,
+    }
+    print(f"{name:<28} | {chunks:>7} chunks | {backend.requests:>5} requests | {result['chunks_per_second']:9.1f}/s")
+    return result
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--words", type=int, default=2000, help="Words per document")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Characters per chunk")
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--request-ms", type=float, default=150.0, help="Round trip of each embedding request")
+    parser.add_argument("--text-ms", type=float, default=0.2, help="Embedding time per text of a request")
+    parser.add_argument("--store-ms", type=float, default=50.0, help="Time to store 1000 chunks")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, DEFAULT_EMBED_BATCH_SIZE])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, DEFAULT_EMBED_CONCURRENCY])
+    parser.add_argument("--batched", action="store_true", help="Send the requests through BatchedEmbeddings")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="Accepted relative loss of throughput")
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    documents: List[Document] = make_documents(args.docs, args.words)
+    results: List[Dict[str, Any]] = [benchmark_case("baseline", args, documents)]
+    for batch_size in args.batch_sizes:
+        for embed_concurrency in args.concurrency:
+            results.append(
+                benchmark_case(
+                    f"pipeline {batch_size} x{embed_concurrency}",
+                    args,
+                    documents,
+                    batch_size=batch_size,
+                    embed_concurrency=embed_concurrency,
+                )
+            )
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+    default_case: str = f"pipeline {DEFAULT_EMBED_BATCH_SIZE} x{DEFAULT_EMBED_CONCURRENCY}"
+    default_results: List[Dict[str, Any]] = [result for result in results if result["case"] == default_case]
+    if default_results:
+        ratio: float = default_results[0]["chunks_per_second"] / results[0]["chunks_per_second"]
+        print(f"Default pipeline throughput is {ratio:.2f}x the baseline")
+        if ratio < 1.0 - args.max_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of recall@k, query latency and memory of the two-stage "matryoshka" vector store against an exact search.
+
+The synthetic corpus concentrates its variance in the leading dimensions, as Matryoshka embeddings do.
+Pass --vectors to measure a real ".npy" vector store instead, such as one built with text-embedding-3-small:
+its last --queries rows are used as queries against the other rows.
+
+Usage:
+    python -m benchmarks.matryoshka_benchmark --size 100000 --dimensions 1536 --prefilter-dimensions 128 256 512
+    python -m benchmarks.matryoshka_benchmark --vectors vector_store.npy --rerank-factors 5 10 20
+"""
+
+import argparse
+import json
+import statistics
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Tuple
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from benchmarks.ann_benchmark import search_ids
+from benchmarks.vector_search_benchmark import time_ms
+from coded_tools.rag.matryoshka_vector_store import MatryoshkaVectorStore
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from tests.coded_tools.rag.corpora import make_matryoshka_corpus
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def benchmark_setting(
+    store: MatryoshkaVectorStore,
+    queries: List[List[float]],
+    exact_ids: List[Set[str]],
+    exact_p50: float,
+    exact_mb: float,
+    k: int,
+) -> Dict[str, Any]:
+    """
+    :param store: Store configured with the prefilter dimensions and rerank factor to measure
+    :param queries: Query vectors, one timed query each
+    :param exact_ids: Ids found by an exact search for each query
+    :param exact_p50: Median latency of the exact search in milliseconds
+    :param exact_mb: Size of the full embedding matrix in MB
+    :param k: Number of results per query
+    :return: Result dictionary of the setting
+    """
+    # Also builds the prefilter matrix before the timed queries
+    found_ids: List[Set[str]] = search_ids(store, queries, k)
+    recall: float = statistics.mean(len(found & expected) / k for found, expected in zip(found_ids, exact_ids))
+    p50: float = statistics.median(
+        time_ms(lambda query=query: store.similarity_search_by_vector(query, k)) for query in queries
+    )
+    prefix_mb: float = store.prefix_matrix.nbytes / 2**20
+    print(
+        f"dims {store.prefilter_dimensions:>5} | rerank x{store.rerank_factor:<3} | recall@{k} {recall:6.3f} | "
+        f"{p50:8.3f} ms | speedup {exact_p50 / p50:5.1f}x | prefilter {prefix_mb:8.1f} MB of {exact_mb:8.1f} MB"
+    )
+    return {
+        "corpus_size": len(store),
+        "dimensions": store.matrix.shape[1],
+        "prefilter_dimensions": store.prefilter_dimensions,
+        "rerank_factor": store.rerank_factor,
+        "k": k,
+        f"recall_at_{k}": recall,
+        "matryoshka_p50_ms": p50,
+        "exact_p50_ms": exact_p50,
+        "speedup": exact_p50 / p50,
+        "prefilter_mb": prefix_mb,
+        "full_matrix_mb": exact_mb,
+    }
+
+
+def benchmark_exact(vectors: np.ndarray, queries: List[List[float]], k: int) -> Tuple[List[Set[str]], float]:
+    """
+    :param vectors: The corpus
+    :param queries: Query vectors, one timed query each
+    :param k: Number of results per query
+    :return: Ids found by an exact search for each query, and its median latency in milliseconds
+    """
+    exact_store = NumpyVectorStore(embedding=FakeEmbeddings(size=vectors.shape[1]))
+    exact_store.add_vectors(
+        vectors, [f"chunk {i}" for i in range(len(vectors))], ids=[str(i) for i in range(len(vectors))]
+    )
+    exact_ids: List[Set[str]] = search_ids(exact_store, queries, k)
+    exact_p50: float = statistics.median(
+        time_ms(lambda query=query: exact_store.similarity_search_by_vector(query, k)) for query in queries
+    )
+    return exact_ids, exact_p50
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200, help="Number of topics of the synthetic corpus")
+    parser.add_argument("--vectors", help="Path to the .npy matrix of a vector store, instead of a synthetic corpus")
+    parser.add_argument("--prefilter-dimensions", type=int, nargs="+", default=[128, 256, 512])
+    parser.add_argument("--rerank-factors", type=int, nargs="+", default=[10])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    if args.vectors:
+        corpus: np.ndarray = np.load(args.vectors, mmap_mode="r")
+    else:
+        corpus = make_matryoshka_corpus(args.size + args.queries, args.dimensions, args.clusters)
+    vectors: np.ndarray = np.asarray(corpus[: -args.queries], dtype=np.float32)
+    queries: List[List[float]] = np.asarray(corpus[-args.queries :], dtype=np.float32).tolist()
+
+    exact_ids, exact_p50 = benchmark_exact(vectors, queries, args.k)
+    exact_mb: float = vectors.nbytes / 2**20
+    print(f"exact search over {len(vectors)} x {vectors.shape[1]} vectors: {exact_p50:8.3f} ms")
+
+    store = MatryoshkaVectorStore(embedding=FakeEmbeddings(size=vectors.shape[1]))
+    store.add_vectors(vectors, [f"chunk {i}" for i in range(len(vectors))], ids=[str(i) for i in range(len(vectors))])
+    results: List[Dict[str, Any]] = []
+    for prefilter_dimensions in args.prefilter_dimensions:
+        store.prefilter_dimensions = prefilter_dimensions
+        for rerank_factor in args.rerank_factors:
+            store.rerank_factor = rerank_factor
+            results.append(benchmark_setting(store, queries, exact_ids, exact_p50, exact_mb, args.k))
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
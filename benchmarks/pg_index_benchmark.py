@@ -0,0 +1,204 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of recall@k and query latency of a pgvector ANN index against an exact scan of the same table,
+for each query-time setting: ef_search of an HNSW index, or probes of an IVFFlat index.
+Also prints the query plan of each setting, to check that the index is used.
+
+Needs a local postgres with the pgvector extension, configured by the POSTGRES_* environment variables
+(see benchmarks/pg_ingest_benchmark.py).
+
+Usage:
+    python -m benchmarks.pg_index_benchmark --size 100000 --index hnsw --values 10 40 100 200
+    python -m benchmarks.pg_index_benchmark --size 100000 --index ivfflat --values 1 5 10 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGEngine
+from langchain_postgres import PGVectorStore
+from langchain_postgres.v2.indexes import DEFAULT_DISTANCE_STRATEGY
+from langchain_postgres.v2.indexes import QueryOptions
+
+from coded_tools.base_rag import PostgresConfig
+from coded_tools.rag.pg_bulk_load import PgBulkLoader
+from coded_tools.rag.pg_index import SearchPlan
+from coded_tools.rag.pg_index import VectorIndexConfig
+from coded_tools.rag.pg_index import aensure_vector_index
+from coded_tools.rag.pg_index import aexplain_search
+from coded_tools.rag.pg_index import arun_statement
+from tests.coded_tools.rag.corpora import make_clustered_corpus
+
+# Disables index scans, so that the planner falls back to an exact sequential scan
+EXACT_SETTINGS = ["enable_indexscan = off"]
+
+
+async def search_ids(
+    pg_engine: PGEngine, table_name: str, query: List[float], k: int, settings: Sequence[str]
+) -> List[str]:
+    """
+    :return: Ids of the k nearest rows of the table, searched with the given settings
+    """
+    rows: List[Dict[str, Any]] = await arun_statement(
+        pg_engine,
+        f'SELECT "langchain_id" FROM "{table_name}" '
+        f'ORDER BY "embedding" {DEFAULT_DISTANCE_STRATEGY.operator} :query_embedding LIMIT :k',
+        {"query_embedding": str(query), "k": k},
+        settings,
+    )
+    return [str(row["langchain_id"]) for row in rows]
+
+
+async def time_searches(
+    pg_engine: PGEngine, table_name: str, queries: List[List[float]], k: int, settings: Sequence[str]
+) -> Dict[str, Any]:
+    """
+    :return: Ids found for each query, and the median latency in milliseconds
+    """
+    found: List[List[str]] = []
+    latencies: List[float] = []
+    for query in queries:
+        start: float = time.perf_counter()
+        found.append(await search_ids(pg_engine, table_name, query, k, settings))
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return {"ids": found, "p50_ms": statistics.median(latencies)}
+
+
+async def load_table(pg_engine: PGEngine, config: PostgresConfig, vectors: np.ndarray, args: argparse.Namespace):
+    """
+    Create the benchmark table and copy the corpus into it.
+    """
+    await pg_engine.ainit_vectorstore_table(
+        table_name=args.table_name, vector_size=args.dimensions, overwrite_existing=True
+    )
+    async with PgBulkLoader(config.connection_string, args.table_name) as loader:
+        await loader.add([Document(page_content=f"chunk {i}") for i in range(len(vectors))], vectors.tolist())
+        await loader.flush()
+        await loader.analyze()
+
+
+async def benchmark_setting(
+    pg_engine: PGEngine,
+    value: int,
+    queries: List[List[float]],
+    exact: Dict[str, Any],
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """
+    :param pg_engine: Engine connected to the benchmark database
+    :param value: ef_search of an HNSW index, or probes of an IVFFlat index
+    :param queries: Query vectors, one timed query each
+    :param exact: Ids and median latency of the exact scan
+    :param args: Parsed command line arguments
+    :return: Result dictionary of the setting
+    """
+    setting: Dict[str, int] = {"ef_search": value} if args.index == "hnsw" else {"probes": value}
+    query_options: QueryOptions = VectorIndexConfig(type=args.index, **setting).query_options()
+    settings: List[str] = query_options.to_parameter()
+    ann: Dict[str, Any] = await time_searches(pg_engine, args.table_name, queries, args.k, settings)
+    recall: float = statistics.mean(
+        len(set(found) & set(expected)) / args.k for found, expected in zip(ann["ids"], exact["ids"])
+    )
+    plan: SearchPlan = await aexplain_search(pg_engine, args.table_name, queries[0], args.k, query_options)
+    print(f"{settings[0]:>22} | recall@{args.k} {recall:6.3f} | {ann['p50_ms']:8.3f} ms | {plan.summary()}")
+    return {
+        "index": args.index,
+        "setting": settings[0],
+        "k": args.k,
+        f"recall_at_{args.k}": recall,
+        "p50_ms": ann["p50_ms"],
+        "exact_p50_ms": exact["p50_ms"],
+        "uses_index": plan.uses_index,
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    :param args: Parsed command line arguments
+    :return: Result dictionary of each query-time setting
+    """
+    config = PostgresConfig(
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        database=os.getenv("POSTGRES_DB"),
+        table_name=args.table_name,
+    )
+    corpus: np.ndarray = make_clustered_corpus(args.size + args.queries, args.dimensions, args.clusters)
+    queries: List[List[float]] = corpus[args.size :].tolist()
+    # A table kept from an earlier run may hold an index of another type
+    index_config = VectorIndexConfig(
+        type=args.index, m=args.m, ef_construction=args.ef_construction, lists=args.lists, rebuild=True
+    )
+
+    pg_engine: PGEngine = PGEngine.from_connection_string(url=config.connection_string)
+    results: List[Dict[str, Any]] = []
+    try:
+        await load_table(pg_engine, config, corpus[: args.size], args)
+        vector_store: PGVectorStore = await PGVectorStore.create(
+            engine=pg_engine,
+            table_name=args.table_name,
+            embedding_service=DeterministicFakeEmbedding(size=args.dimensions),
+        )
+        start: float = time.perf_counter()
+        await aensure_vector_index(vector_store, pg_engine, config.connection_string, args.table_name, index_config)
+        print(f"{args.index} index built in {time.perf_counter() - start:.2f} s")
+
+        exact: Dict[str, Any] = await time_searches(pg_engine, args.table_name, queries, args.k, EXACT_SETTINGS)
+        print(f"exact scan: {exact['p50_ms']:8.3f} ms")
+        for value in args.values:
+            results.append(await benchmark_setting(pg_engine, value, queries, exact, args))
+    finally:
+        if not args.keep_table:
+            await pg_engine.adrop_table(args.table_name)
+        await pg_engine.close()
+    return results
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=200, help="Number of topics of the synthetic corpus")
+    parser.add_argument("--index", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, help="IVFFlat lists. Default to the number of rows / 1000.")
+    parser.add_argument("--values", type=int, nargs="+", default=[10, 40, 100, 200], help="ef_search or probes")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--table-name", default="index_benchmark")
+    parser.add_argument("--keep-table", action="store_true", help="Do not drop the benchmark table")
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = asyncio.run(run(args))
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
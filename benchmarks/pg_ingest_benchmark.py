@@ -0,0 +1,165 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of rows per second loaded into a postgres vector store table, comparing
+PGVectorStore.aadd_embeddings ("insert", the default ingestion) with binary COPY ("copy").
+
+Embeddings are random, so no embedding API is called. Needs a local postgres with the
+pgvector extension, configured by the POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST,
+POSTGRES_PORT and POSTGRES_DB environment variables, for example:
+
+    docker run --name pgvector-container -e POSTGRES_USER=<user> -e POSTGRES_PASSWORD=<password> \\
+        -e POSTGRES_DB=<db_name> -p 6024:5432 -d pgvector/pgvector:pg16
+
+Usage:
+    python -m benchmarks.pg_ingest_benchmark --rows 20000 --modes insert copy --json-output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGEngine
+from langchain_postgres import PGVectorStore
+from langchain_postgres.v2.indexes import HNSWIndex
+
+from coded_tools.base_rag import PostgresConfig
+from coded_tools.rag.ingestion_pipeline import DEFAULT_EMBED_BATCH_SIZE
+from coded_tools.rag.pg_bulk_load import DEFAULT_COPY_BATCH_SIZE
+from coded_tools.rag.pg_bulk_load import PgBulkLoader
+
+
+def make_batches(rows: int, dimensions: int, batch_size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    :param rows: Number of chunks
+    :param dimensions: Dimensions of the embeddings
+    :param batch_size: Number of chunks per batch, as the ingestion pipeline hands them to its sink
+    :param seed: Random seed
+    :return: Batches of {"chunks": ..., "vectors": ...}
+    """
+    rng = np.random.default_rng(seed)
+    batches: List[Dict[str, Any]] = []
+    for start in range(0, rows, batch_size):
+        size: int = min(batch_size, rows - start)
+        chunks: List[Document] = [
+            Document(page_content=f"Chunk {start + offset} " + "lorem ipsum " * 40, metadata={"page": start + offset})
+            for offset in range(size)
+        ]
+        vectors: List[List[float]] = rng.standard_normal((size, dimensions), dtype=np.float32).tolist()
+        batches.append({"chunks": chunks, "vectors": vectors})
+    return batches
+
+
+async def load(mode: str, pg_engine: PGEngine, config: PostgresConfig, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    :param mode: "insert" or "copy"
+    :param pg_engine: Engine connected to the benchmark database
+    :param config: Connection settings of the benchmark database
+    :param args: Parsed command line arguments
+    :return: Result dictionary of the mode
+    """
+    table_name: str = f"{args.table_prefix}_{mode}"
+    await pg_engine.ainit_vectorstore_table(
+        table_name=table_name, vector_size=args.dimensions, overwrite_existing=True
+    )
+    vector_store: PGVectorStore = await PGVectorStore.create(
+        engine=pg_engine, table_name=table_name, embedding_service=DeterministicFakeEmbedding(size=args.dimensions)
+    )
+    batches: List[Dict[str, Any]] = make_batches(args.rows, args.dimensions, DEFAULT_EMBED_BATCH_SIZE)
+
+    start: float = time.perf_counter()
+    if mode == "copy":
+        async with PgBulkLoader(config.connection_string, table_name, batch_size=args.copy_batch_size) as loader:
+            for batch in batches:
+                await loader.add(batch["chunks"], batch["vectors"])
+            await loader.flush()
+            await loader.analyze()
+    else:
+        for batch in batches:
+            await vector_store.aadd_embeddings(
+                [chunk.page_content for chunk in batch["chunks"]],
+                batch["vectors"],
+                [chunk.metadata for chunk in batch["chunks"]],
+            )
+    load_seconds: float = time.perf_counter() - start
+
+    result: Dict[str, Any] = {
+        "mode": mode,
+        "rows": args.rows,
+        "load_seconds": load_seconds,
+        "rows_per_second": args.rows / load_seconds,
+    }
+    if args.index:
+        start = time.perf_counter()
+        await vector_store.aapply_vector_index(HNSWIndex())
+        result["index_seconds"] = time.perf_counter() - start
+
+    if not args.keep_tables:
+        await pg_engine.adrop_table(table_name)
+    return result
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    :param args: Parsed command line arguments
+    :return: Result dictionary of each mode
+    """
+    config = PostgresConfig(
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        database=os.getenv("POSTGRES_DB"),
+        table_name=args.table_prefix,
+    )
+    pg_engine: PGEngine = PGEngine.from_connection_string(url=config.connection_string)
+    try:
+        return [await load(mode, pg_engine, config, args) for mode in args.modes]
+    finally:
+        await pg_engine.close()
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--modes", nargs="+", choices=["insert", "copy"], default=["insert", "copy"])
+    parser.add_argument("--copy-batch-size", type=int, default=DEFAULT_COPY_BATCH_SIZE)
+    parser.add_argument("--index", action="store_true", help="Also time building an HNSW index after the load")
+    parser.add_argument("--table-prefix", default="ingest_benchmark")
+    parser.add_argument("--keep-tables", action="store_true", help="Do not drop the benchmark tables")
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = asyncio.run(run(args))
+    for result in results:
+        line: str = f"{result['mode']:>6}: {result['rows']} rows in {result['load_seconds']:.2f} s"
+        line += f" ({result['rows_per_second']:.0f} rows/s)"
+        if "index_seconds" in result:
+            line += f", HNSW index in {result['index_seconds']:.2f} s"
+        print(line)
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+End to end benchmark of the RAG stack, through the PdfRag coded tool.
+
+For each corpus size, a synthetic corpus of --docs PDFs of --pages pages is generated. Each page
+holds filler text and one fact, "The code of document D page P is X". The corpus is ingested with a
+first tool call, then --queries tool calls ask for the codes of random pages. Each case runs in a
+fresh process, so that its peak memory is its own, and reports:
+    build_seconds: duration of the first tool call, which loads, chunks, embeds and saves the corpus
+    peak_rss_mb: peak resident memory of the process
+    disk_mb: size of the saved vector store files
+    query_p50_ms, query_p95_ms, query_p99_ms: latency of the following tool calls
+    hit_rate: share of queries whose fact is in the retrieved chunks, to catch quality regressions
+
+The default "hashing" embeddings run offline with no API key. The tokenizer of the "token" chunking
+strategy is downloaded by tiktoken on first use, so fully offline runs need it in TIKTOKEN_CACHE_DIR.
+
+--baseline compares the results with an earlier --json-output and exits with status 1 if a metric
+regressed by more than --max-regression, so that the benchmark can gate CI.
+
+Usage:
+    python -m benchmarks.rag_benchmark --docs 10 100 --pages 20 --json-output results.json
+    python -m benchmarks.rag_benchmark --docs 10 100 --pages 20 --baseline results.json --max-regression 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+import pymupdf
+
+from coded_tools.pdf_rag import PdfRag
+
+# Metrics compared with the baseline, all lower is better
+REGRESSION_METRICS = ("build_seconds", "peak_rss_mb", "disk_mb", "query_p50_ms", "query_p95_ms", "query_p99_ms")
+# Keys identifying the same case in two result files
+CASE_KEYS = ("docs", "pages", "vector_store_type", "retrieval_mode", "embeddings")
+SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "ta", "vo", "zen", "pa", "shi", "dor", "el", "qua", "fin", "bu", "gar")
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    """
+    :param size: Number of words
+    :param rng: Random generator
+    :return: Distinct made-up words
+    """
+    words: set = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def page_code(doc: int, page: int) -> str:
+    """
+    :return: The code stated by the fact of a page, which appears on no other page
+    """
+    return f"c{doc:05d}x{page:04d}"
+
+
+def write_corpus(directory: str, args: argparse.Namespace, docs: int) -> Tuple[List[str], int]:
+    """
+    Generate the synthetic PDFs. Filler words follow a Zipf distribution, as in natural text.
+
+    :param directory: Directory of the PDFs
+    :param args: Parsed command line arguments
+    :param docs: Number of PDFs
+    :return: Paths of the PDFs and their total size in bytes
+    """
+    rng = random.Random(args.seed)
+    vocabulary: List[str] = make_vocabulary(args.vocabulary, rng)
+    weights: np.ndarray = 1.0 / np.arange(1, len(vocabulary) + 1)
+    np_rng = np.random.default_rng(args.seed)
+    paths: List[str] = []
+    for doc in range(docs):
+        pdf = pymupdf.open()
+        for page in range(args.pages):
+            filler: np.ndarray = np_rng.choice(len(vocabulary), size=args.words_per_page, p=weights / weights.sum())
+            words: List[str] = [vocabulary[index] for index in filler]
+            words.insert(
+                rng.randint(0, len(words)), f"The code of document {doc} page {page} is {page_code(doc, page)}."
+            )
+            pdf.new_page().insert_textbox(pymupdf.Rect(36, 36, 576, 806), " ".join(words), fontsize=8)
+        path: str = os.path.join(directory, f"doc_{doc:05d}.pdf")
+        pdf.save(path)
+        pdf.close()
+        paths.append(path)
+    return paths, sum(os.path.getsize(path) for path in paths)
+
+
+def percentile(latencies: List[float], percent: int) -> float:
+    """
+    :param latencies: Measured latencies
+    :param percent: Percentile, between 1 and 99
+    :return: The percentile of the latencies
+    """
+    if len(latencies) < 2:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1]
+
+
+def peak_rss_mb() -> float:
+    """
+    :return: Peak resident memory of this process in megabytes
+    """
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def files_size(path: str) -> int:
+    """
+    :param path: Path of a saved vector store
+    :return: Size in bytes of the vector store file and its sidecar files
+    """
+    directory, name = os.path.split(path)
+    stem: str = os.path.splitext(name)[0]
+    return sum(
+        os.path.getsize(os.path.join(directory, file_name))
+        for file_name in os.listdir(directory)
+        if file_name.startswith(stem)
+    )
+
+
+async def run_tool_calls(paths: List[str], vector_store_path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Ingest the corpus with a first tool call, then time the query tool calls.
+
+    :param paths: Paths of the PDFs
+    :param vector_store_path: Path the vector store is saved to
+    :param args: Parsed command line arguments
+    :return: Measurements of the tool calls
+    """
+    tool_args: Dict[str, Any] = {
+        "urls": paths,
+        "vector_store_type": args.vector_store_type,
+        "retrieval_mode": args.retrieval_mode,
+        "embeddings": {"provider": args.embeddings, **json.loads(args.embeddings_args)},
+        "chunking": json.loads(args.chunking),
+        "save_vector_store": True,
+        "vector_store_path": vector_store_path,
+        "use_query_cache": args.query_cache,
+    }
+    rng = random.Random(args.seed + 1)
+    pages: List[Tuple[int, int]] = [
+        (rng.randrange(len(paths)), rng.randrange(args.pages)) for _ in range(args.queries + 1)
+    ]
+
+    start: float = time.perf_counter()
+    await PdfRag().async_invoke({**tool_args, "query": f"What is the code of document {pages[0][0]}?"}, {})
+    build_seconds: float = time.perf_counter() - start
+    build_rss_mb: float = peak_rss_mb()
+
+    latencies: List[float] = []
+    hits: int = 0
+    for doc, page in pages[1:]:
+        start = time.perf_counter()
+        answer: str = await PdfRag().async_invoke(
+            {**tool_args, "query": f"What is the code of document {doc} page {page}?"}, {}
+        )
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        hits += page_code(doc, page) in answer
+
+    return {
+        "build_seconds": build_seconds,
+        "build_peak_rss_mb": build_rss_mb,
+        "query_p50_ms": percentile(latencies, 50),
+        "query_p95_ms": percentile(latencies, 95),
+        "query_p99_ms": percentile(latencies, 99),
+        "hit_rate": hits / len(latencies),
+    }
+
+
+def run_case(docs: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run one corpus size. Runs in a fresh process.
+
+    :param docs: Number of PDFs
+    :param args: Parsed command line arguments
+    :return: Result dictionary of the case
+    """
+    # Parse PDFs in this process, so that its peak memory includes the parsing
+    os.environ["RAG_PDF_LOADER_PROCESSES"] = str(args.pdf_processes)
+    with tempfile.TemporaryDirectory(prefix="rag_benchmark_") as directory:
+        start: float = time.perf_counter()
+        paths, corpus_bytes = write_corpus(directory, args, docs)
+        corpus_seconds: float = time.perf_counter() - start
+        vector_store_path: str = os.path.join(directory, "vector_store" + args.vector_store_format)
+        measurements: Dict[str, Any] = asyncio.run(run_tool_calls(paths, vector_store_path, args))
+        disk_bytes: int = files_size(vector_store_path)
+
+    return {
+        "docs": docs,
+        "pages": args.pages,
+        "vector_store_type": args.vector_store_type,
+        "retrieval_mode": args.retrieval_mode,
+        "embeddings": args.embeddings,
+        "queries": args.queries,
+        "corpus_mb": corpus_bytes / (1024 * 1024),
+        "corpus_seconds": corpus_seconds,
+        **measurements,
+        "peak_rss_mb": peak_rss_mb(),
+        "disk_mb": disk_bytes / (1024 * 1024),
+    }
+
+
+def find_regressions(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], max_regression: float
+) -> List[str]:
+    """
+    :param results: Results of this run
+    :param baseline: Results of an earlier run
+    :param max_regression: Largest accepted relative increase of a metric, such as 0.2 for 20%
+    :return: Description of each metric that increased by more than max_regression
+    """
+    baseline_cases: Dict[Tuple, Dict[str, Any]] = {
+        tuple(case.get(key) for key in CASE_KEYS): case for case in baseline
+    }
+    regressions: List[str] = []
+    for result in results:
+        case_key: Tuple = tuple(result.get(key) for key in CASE_KEYS)
+        expected: Dict[str, Any] = baseline_cases.get(case_key)
+        if expected is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            if expected.get(metric) and result[metric] > expected[metric] * (1.0 + max_regression):
+                regressions.append(
+                    f"{dict(zip(CASE_KEYS, case_key))}: {metric} {result[metric]:.3f} > {expected[metric]:.3f}"
+                )
+        if result["hit_rate"] < expected.get("hit_rate", 0.0) - max_regression:
+            regressions.append(
+                f"{dict(zip(CASE_KEYS, case_key))}: hit_rate {result['hit_rate']:.3f} < {expected['hit_rate']:.3f}"
+            )
+    return regressions
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 50], help="Number of PDFs of each corpus")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per PDF")
+    parser.add_argument("--words-per-page", type=int, default=300)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Number of distinct filler words")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed query tool calls per corpus")
+    parser.add_argument("--vector-store-type", choices=["in_memory", "ivf"], default="in_memory")
+    parser.add_argument("--vector-store-format", choices=[".npy", ".json"], default=".npy")
+    parser.add_argument("--retrieval-mode", choices=["vector", "hybrid", "lexical"], default="vector")
+    parser.add_argument("--embeddings", default="hashing", help="Embeddings provider")
+    parser.add_argument("--embeddings-args", default="{}", help="JSON arguments of the embeddings provider")
+    parser.add_argument("--chunking", default="{}", help="JSON chunking arguments")
+    parser.add_argument("--query-cache", action="store_true", help="Keep the query cache enabled")
+    parser.add_argument("--pdf-processes", type=int, default=0, help="PDF parsing processes, 0 to parse in threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Accepted relative increase of a metric")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for docs in args.docs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            result: Dict[str, Any] = executor.submit(run_case, docs, args).result()
+        results.append(result)
+        print(
+            f"{docs:>6} docs x {args.pages} pages | build {result['build_seconds']:8.2f} s"
+            f" | peak RSS {result['peak_rss_mb']:8.1f} MB | disk {result['disk_mb']:8.2f} MB"
+            f" | query p50 {result['query_p50_ms']:7.2f} p95 {result['query_p95_ms']:7.2f}"
+            f" p99 {result['query_p99_ms']:7.2f} ms | hit rate {result['hit_rate']:.3f}"
+        )
+
+    if args.json_output:
+        report: Dict[str, Any] = {
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "results": results,
+        }
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline: List[Dict[str, Any]] = json.load(baseline_file)["results"]
+        regressions: List[str] = find_regressions(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Benchmark of query latency against corpus size for the in-memory vector stores.
+
+Usage:
+    python -m benchmarks.vector_search_benchmark --sizes 1000 10000 100000 --json-output results.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+
+
+def make_corpus(size: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """
+    :param size: Number of vectors
+    :param dimensions: Dimensions of each vector
+    :param seed: Random seed
+    :return: (size, dimensions) float32 array of random vectors
+    """
+    return np.random.default_rng(seed).standard_normal((size, dimensions), dtype=np.float32)
+
+
+def build_numpy_store(vectors: np.ndarray) -> NumpyVectorStore:
+    """Build a NumpyVectorStore holding the vectors."""
+    store = NumpyVectorStore(embedding=FakeEmbeddings(size=vectors.shape[1]))
+    store.add_vectors(vectors, [f"chunk {i}" for i in range(len(vectors))])
+    return store
+
+
+def build_in_memory_store(vectors: np.ndarray) -> InMemoryVectorStore:
+    """Build an InMemoryVectorStore holding the vectors, without embedding anything."""
+    store = InMemoryVectorStore(embedding=FakeEmbeddings(size=vectors.shape[1]))
+    for i, vector in enumerate(vectors):
+        doc_id = str(uuid.uuid4())
+        store.store[doc_id] = {"id": doc_id, "vector": vector.tolist(), "text": f"chunk {i}", "metadata": {}}
+    return store
+
+
+def time_ms(function: Callable[[], Any]) -> float:
+    """
+    :param function: Function to time
+    :return: Latency of the call in milliseconds
+    """
+    start: float = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000.0
+
+
+def benchmark_size(size: int, query_vectors: np.ndarray, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    :param size: Number of vectors in the corpus
+    :param query_vectors: Query vectors, one timed query each
+    :param args: Parsed command line arguments
+    :return: Result dictionary of the corpus size
+    """
+    vectors: np.ndarray = make_corpus(size, args.dimensions)
+    queries: List[List[float]] = query_vectors.tolist()
+    result: Dict[str, Any] = {"corpus_size": size, "dimensions": args.dimensions, "k": args.k}
+
+    numpy_store: NumpyVectorStore = build_numpy_store(vectors)
+    latencies: List[float] = [
+        time_ms(lambda query=query: numpy_store.similarity_search_by_vector(query, args.k)) for query in queries
+    ]
+    result["numpy_p50_ms"] = statistics.median(latencies)
+
+    batch: List[List[float]] = queries[: args.batch_size]
+    batch_latencies: List[float] = [
+        time_ms(lambda: numpy_store.batch_similarity_search_with_score_by_vector(batch, args.k)) for _ in range(5)
+    ]
+    result["numpy_batched_per_query_ms"] = statistics.median(batch_latencies) / len(batch)
+
+    if size <= args.baseline_max_size:
+        in_memory_store: InMemoryVectorStore = build_in_memory_store(vectors)
+        latencies = [
+            time_ms(lambda query=query: in_memory_store.similarity_search_by_vector(query, args.k))
+            for query in queries
+        ]
+        result["in_memory_p50_ms"] = statistics.median(latencies)
+        result["speedup"] = result["in_memory_p50_ms"] / result["numpy_p50_ms"]
+
+    return result
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=20, help="Number of timed queries per corpus size")
+    parser.add_argument("--batch-size", type=int, default=16, help="Number of queries per batched search")
+    parser.add_argument(
+        "--baseline-max-size",
+        type=int,
+        default=10000,
+        help="Largest corpus to also run through InMemoryVectorStore, which holds vectors as python lists",
+    )
+    parser.add_argument("--json-output", help="Path to write the results as JSON")
+    args = parser.parse_args()
+
+    query_vectors: np.ndarray = make_corpus(args.queries, args.dimensions, seed=1)
+    results: List[Dict[str, Any]] = []
+    for size in args.sizes:
+        result: Dict[str, Any] = benchmark_size(size, query_vectors, args)
+        results.append(result)
+        line: str = (
+            f"{size:>9} docs | numpy {result['numpy_p50_ms']:8.3f} ms"
+            f" | numpy batched {result['numpy_batched_per_query_ms']:8.3f} ms/query"
+        )
+        if "speedup" in result:
+            line += f" | InMemoryVectorStore {result['in_memory_p50_ms']:9.3f} ms | speedup {result['speedup']:6.1f}x"
+        print(line)
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
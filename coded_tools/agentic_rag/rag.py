@@ -11,9 +11,11 @@
 #
 # END COPYRIGHT
 
+import logging
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.vectorstores import InMemoryVectorStore
@@ -22,8 +24,22 @@ from langchain_core.vectorstores.base import VectorStoreRetriever
 from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from neuro_san.interfaces.coded_tool import CodedTool
+from requests.exceptions import RequestException
+
+from coded_tools.rag.download_cache import CachedDownload
+from coded_tools.rag.download_cache import DownloadCache
+from coded_tools.rag.download_cache import get_download_cache
+from coded_tools.rag.vector_store_cache import VECTOR_STORE_CACHE
+from coded_tools.rag.vector_store_cache import VectorStoreCache
 
 PDF_FILE_URL = "https://www.replicon.com/wp-content/uploads/2016/06/RFP-Template_Replicon.pdf"
+CHUNK_SIZE = 100
+CHUNK_OVERLAP = 50
+
+logger = logging.getLogger(__name__)
+
+# Vector store cache key of the latest content of each URL, to drop the store of a previous content
+_LATEST_STORE_KEYS: Dict[str, str] = {}
 
 
 class Rag(CodedTool):
@@ -80,33 +96,71 @@ class Rag(CodedTool):
             return "Error: No query provided."
 
         # Build the vector store and run the query
-        vectorstore: InMemoryVectorStore = await self.generate_vector_store(PDF_FILE_URL)
+        try:
+            vectorstore: InMemoryVectorStore = await self.generate_vector_store(PDF_FILE_URL)
+        except RequestException as error:
+            logger.error("Failed to download %s: %s\n", PDF_FILE_URL, error)
+            return f"Error: Failed to download {PDF_FILE_URL}."
         return await self.query_vectorstore(vectorstore, query)
 
     async def generate_vector_store(self, url: str) -> InMemoryVectorStore:
         """
-        Asynchronously loads web documents from given URLs, split them into
-        chunks, and build an in-memory vector store using OpenAI embeddings.
+        Asynchronously download a PDF, split it into chunks, and build
+        an in-memory vector store using OpenAI embeddings.
+
+        The PDF is kept in a local download cache and revalidated with a conditional request,
+        its parsed pages are cached by content hash, and the vector store is only rebuilt
+        when the content changes.
 
-        :param urls: List of URLs to fetch and embed
+        :param url: URL of the PDF to fetch and embed
         :return: In-memory vector store containing the embedded document chunks
+        :raises RequestException: If the PDF could not be downloaded and is not cached
         """
-
-        loader = PyPDFLoader(file_path=url)
-        docs: List[Document] = await loader.aload()
+        download_cache: DownloadCache = get_download_cache()
+        download: CachedDownload = await download_cache.afetch(url)
+        logger.info("Download cache stats: %s\n", download_cache.stats())
+
+        embeddings = OpenAIEmbeddings()
+        cache_key: str = VectorStoreCache.make_key(
+            {"url": url, "content_hash": download.content_hash},
+            CHUNK_SIZE,
+            CHUNK_OVERLAP,
+            embeddings.model,
+            embeddings.dimensions,
+        )
+        cached_store: Optional[InMemoryVectorStore] = VECTOR_STORE_CACHE.get(cache_key)
+        if cached_store is not None:
+            logger.info("Using cached vector store of %s\n", url)
+            return cached_store
+
+        docs: Optional[List[Document]] = download_cache.get_documents(download.content_hash)
+        if docs is None:
+            loader = PyPDFLoader(file_path=download.path)
+            docs = await loader.aload()
+            for doc in docs:
+                # Point back to the URL rather than to the cached file
+                doc.metadata["source"] = url
+            download_cache.put_documents(download.content_hash, docs)
 
         # Split documents into smaller chunks for better embedding and
         # retrieval
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=100, chunk_overlap=50)
+        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+        )
         doc_chunks: List[Document] = text_splitter.split_documents(docs)
 
         # Create an in-memory vector store with embeddings
         vectorstore: InMemoryVectorStore = await InMemoryVectorStore.afrom_documents(
             documents=doc_chunks,
             collection_name="rag-in-memory",
-            embedding=OpenAIEmbeddings(),
+            embedding=embeddings,
         )
 
+        previous_key: Optional[str] = _LATEST_STORE_KEYS.get(url)
+        if previous_key is not None and previous_key != cache_key:
+            VECTOR_STORE_CACHE.invalidate(previous_key)
+        _LATEST_STORE_KEYS[url] = cache_key
+        VECTOR_STORE_CACHE.put(cache_key, vectorstore)
         return vectorstore
 
     async def query_vectorstore(self, vectorstore: InMemoryVectorStore, query: str) -> str:
@@ -9,16 +9,23 @@
 #
 # END COPYRIGHT
 
+import asyncio
 import logging
 import os
 import re
+import time
 from abc import ABC
 from abc import abstractmethod
 from dataclasses import dataclass
 from typing import Any
+from typing import AsyncIterator
+from typing import Dict
 from typing import List
 from typing import Literal
 from typing import Optional
+from typing import Tuple
+
+import numpy as np
 
 # pylint: disable=import-error
 from asyncpg import InvalidCatalogNameError
@@ -27,18 +34,71 @@ from langchain_community.vectorstores import InMemoryVectorStore
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
-from langchain_core.vectorstores.base import VectorStoreRetriever
-from langchain_openai import OpenAIEmbeddings
 from langchain_postgres import PGEngine
 from langchain_postgres import PGVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_postgres.v2.indexes import QueryOptions
+from langchain_text_splitters import TextSplitter
 from sqlalchemy.exc import ProgrammingError
 
+from coded_tools.rag.bm25_index import reciprocal_rank_fusion
+from coded_tools.rag.chunking import ChunkingConfig
+from coded_tools.rag.chunking import get_text_splitter
+from coded_tools.rag.chunking import get_token_counter
+from coded_tools.rag.context_assembler import AssembledContext
+from coded_tools.rag.context_assembler import ContextConfig
+from coded_tools.rag.context_assembler import assemble_context
+from coded_tools.rag.dedup import ChunkDeduplicator
+from coded_tools.rag.dedup import DedupConfig
+from coded_tools.rag.embedding_batcher import BatchedEmbeddings
+from coded_tools.rag.embedding_cache import CachedEmbeddings
+from coded_tools.rag.embedding_cache import get_embedding_cache
+from coded_tools.rag.embeddings_provider import VECTOR_SIZE
+from coded_tools.rag.embeddings_provider import create_embeddings
+from coded_tools.rag.ingestion_pipeline import DEFAULT_EMBED_BATCH_SIZE
+from coded_tools.rag.ingestion_pipeline import DEFAULT_QUEUE_BATCHES
+from coded_tools.rag.ingestion_pipeline import EmbeddedBatchSink
+from coded_tools.rag.ingestion_pipeline import IngestionPipeline
+from coded_tools.rag.ingestion_pipeline import PipelineStats
+from coded_tools.rag.ivf_vector_store import DEFAULT_N_PROBE
+from coded_tools.rag.ivf_vector_store import IvfVectorStore
+from coded_tools.rag.matryoshka_vector_store import DEFAULT_PREFILTER_DIMENSIONS
+from coded_tools.rag.matryoshka_vector_store import DEFAULT_RERANK_FACTOR
+from coded_tools.rag.matryoshka_vector_store import MatryoshkaVectorStore
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.pg_bulk_load import DEFAULT_COPY_BATCH_SIZE
+from coded_tools.rag.pg_bulk_load import PgBulkLoader
+from coded_tools.rag.pg_engine_registry import PG_ENGINE_REGISTRY
+from coded_tools.rag.pg_index import VectorIndexConfig
+from coded_tools.rag.pg_index import aensure_vector_index
+from coded_tools.rag.pg_index import alog_search_plan
+from coded_tools.rag.pg_sync import DEFAULT_SYNC_BATCH_SIZE
+from coded_tools.rag.pg_sync import SyncStats
+from coded_tools.rag.pg_sync import fetch_embeddings
+from coded_tools.rag.pg_sync import sync_vector_store
+from coded_tools.rag.pg_sync import update_chunk_metadata
+from coded_tools.rag.query_cache import QUERY_CACHE
+from coded_tools.rag.query_cache import file_version
+from coded_tools.rag.shared_vector_store import SharedVectorStores
+from coded_tools.rag.shared_vector_store import get_shared_vector_stores
+from coded_tools.rag.vector_store_cache import VECTOR_STORE_CACHE
+from coded_tools.rag.vector_store_cache import VectorStoreCache
+
 # Invalid file path character pattern
 INVALID_PATH_PATTERN = r"[<>:\"|?*\x00-\x1F]"
 DEFAULT_TABLE_NAME = "vectorstore"
-EMBEDDINGS_MODEL = "text-embedding-3-small"
-VECTOR_SIZE = 1536
+# Number of documents retrieved per query
+RETRIEVAL_K = 4
+# "vector" ranks chunks by embedding similarity, "lexical" by BM25 keyword score without embedding the query,
+# and "hybrid" fuses both rankings
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+# Candidates taken from each ranking before fusing them in "hybrid" mode
+HYBRID_FETCH_K = 20
+# Vector store types kept in process memory. "ivf" adds an approximate nearest-neighbour index,
+# "matryoshka" a prefilter on the leading dimensions of the embeddings.
+IN_MEMORY_VECTOR_STORE_TYPES = {"in_memory", "ivf", "matryoshka"}
+VECTOR_STORE_TYPES = IN_MEMORY_VECTOR_STORE_TYPES | {"postgres"}
+# Loader arguments that must never end up in a cache key
+SECRET_LOADER_ARGS = {"api_key", "password", "token", "oauth2", "session", "cookies"}
 
 logger = logging.getLogger(__name__)
 
@@ -65,11 +125,74 @@ class BaseRag(ABC):
     Abstract Base Class for different types of RAG implementations.
     """
 
+    # pylint: disable=too-many-instance-attributes
     def __init__(self):
         # Save the generated vector store as a JSON file if True
         self.save_vector_store: bool = False
         self.abs_vector_store_path: Optional[str] = None
-        self.embeddings: Embeddings = OpenAIEmbeddings(model=EMBEDDINGS_MODEL, dimensions=VECTOR_SIZE)
+        # Precision of the embedding matrix when saving to a ".npy" vector store file
+        self.vector_store_dtype: Literal["float32", "float16"] = "float32"
+        # Reuse vector stores built by earlier calls in this process if True
+        self.use_vector_store_cache: bool = True
+        # Directory through which the worker processes of this host share in-memory vector stores,
+        # None to keep a private copy in each process
+        self.shared_vector_store_dir: Optional[str] = None
+        # Reuse the results of earlier identical or near-identical queries against the same vector store if True
+        self.use_query_cache: bool = True
+        # Identity of the vector store in the query cache, set by generate_vector_store()
+        self.query_cache_namespace: Optional[str] = None
+        # One of RETRIEVAL_MODES. "hybrid" and "lexical" need an in-memory vector store.
+        self.retrieval_mode: Literal["vector", "hybrid", "lexical"] = "vector"
+        # "attach" reuses an existing postgres table as is,
+        # "incremental" upserts new or changed chunks and deletes stale ones
+        self.postgres_sync_mode: Literal["attach", "incremental"] = "attach"
+        self.postgres_sync_batch_size: int = DEFAULT_SYNC_BATCH_SIZE
+        # How a new postgres table is filled: "insert" adds each batch of chunks with INSERT statements,
+        # "copy" streams them with binary COPY and builds the vector index once the table is full
+        self.postgres_ingest_mode: Literal["insert", "copy"] = "insert"
+        self.postgres_copy_batch_size: int = DEFAULT_COPY_BATCH_SIZE
+        # ANN index kept on postgres tables, and its query-time search settings
+        self.postgres_index: VectorIndexConfig = VectorIndexConfig()
+        # Log the EXPLAIN ANALYZE plan of each postgres similarity search if True
+        self.postgres_explain: bool = False
+        # Engine, table and index search settings of the postgres vector store, set by generate_vector_store()
+        self.postgres_table: Optional[Tuple[PGEngine, str]] = None
+        self.postgres_query_options: Optional[QueryOptions] = None
+        # Number of clusters of the "ivf" index (None for the square root of the number of chunks)
+        # and number of clusters searched per query
+        self.ivf_lists: Optional[int] = None
+        self.ivf_probes: int = DEFAULT_N_PROBE
+        # Leading embedding dimensions scored by the first stage of the "matryoshka" vector store,
+        # and candidates reranked with the full embeddings per result
+        self.matryoshka_dimensions: int = DEFAULT_PREFILTER_DIMENSIONS
+        self.matryoshka_rerank_factor: int = DEFAULT_RERANK_FACTOR
+        # Number of chunks embedded per request, and of batches buffered ahead of embedding, during ingestion
+        self.embedding_batch_size: int = DEFAULT_EMBED_BATCH_SIZE
+        self.ingestion_queue_size: int = DEFAULT_QUEUE_BATCHES
+        # How documents are split into chunks
+        self.chunking: ChunkingConfig = ChunkingConfig()
+        # How near-duplicate chunks are dropped between splitting and embedding
+        self.dedup: DedupConfig = DedupConfig()
+        # How retrieved chunks are reranked, merged and fitted in a token budget before they are returned
+        self.context: ContextConfig = ContextConfig()
+        # Created on first use, so that configure_embeddings() can select a provider
+        # without the default one being created, and failing without its API key
+        self._embeddings: Optional[Embeddings] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """
+        Embeddings of the chunks and queries. Concurrent tool calls of this process share embedding requests
+        through the batcher. The provider comes from the RAG_EMBEDDINGS_PROVIDER environment variable,
+        "openai" by default, unless configure_embeddings() selected one.
+        """
+        if self._embeddings is None:
+            self._embeddings = BatchedEmbeddings(create_embeddings())
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, embeddings: Embeddings):
+        self._embeddings = embeddings
 
     @abstractmethod
     async def load_documents(self, loader_args: Any) -> List[Document]:
@@ -78,11 +201,85 @@ class BaseRag(ABC):
         """
         raise NotImplementedError
 
+    async def iter_documents(self, loader_args: Any) -> AsyncIterator[Document]:
+        """
+        Yield documents from the data source one by one, so that ingestion can start
+        before the whole source is loaded. Subclasses able to load lazily should
+        override this. The default implementation yields from load_documents().
+
+        :param loader_args: Arguments specific to the document loader
+        :return: Async iterator over the documents
+        """
+        for document in await self.load_documents(loader_args):
+            yield document
+
+    def get_source_identity(self, loader_args: Any) -> Any:
+        """
+        Describe the data source so that vector stores built from it can be cached.
+        Subclasses can override this to return a cheaper or more precise identity.
+
+        :param loader_args: Arguments specific to the document loader
+        :return: JSON-serializable identity of the data source
+        """
+        if isinstance(loader_args, dict):
+            return {key: value for key, value in loader_args.items() if key not in SECRET_LOADER_ARGS}
+        return loader_args
+
+    def get_vector_store_cache_key(self, loader_args: Any, vector_store_type: str = "in_memory") -> str:
+        """
+        Build the process-wide cache key for the vector store of the given data source.
+
+        :param loader_args: Arguments specific to the document loader
+        :param vector_store_type: Type of the vector store
+        :return: Cache key of the vector store
+        """
+        return VectorStoreCache.make_key(
+            source_identity={
+                "source": self.get_source_identity(loader_args),
+                "vector_store_type": vector_store_type,
+                "chunking": self.chunking.to_dict(),
+                # Only part of the key when enabled, so that keys of vector stores built without it do not change
+                **({"dedup": self.dedup.to_dict()} if self.dedup.enabled else {}),
+            },
+            chunk_size=self.chunking.chunk_size,
+            chunk_overlap=self.chunking.chunk_overlap,
+            embeddings_model=getattr(self.embeddings, "model", type(self.embeddings).__name__),
+            dimensions=getattr(self.embeddings, "dimensions", None),
+        )
+
+    def get_query_cache_namespace(
+        self,
+        loader_args: Any,
+        postgres_config: Optional[PostgresConfig] = None,
+        vector_store_type: str = "in_memory",
+    ) -> str:
+        """
+        Identify the vector store of the given data source in the query cache.
+
+        :param loader_args: Arguments specific to the document loader
+        :param postgres_config: PostgreSQL configuration of a postgres vector store
+        :param vector_store_type: Type of the vector store
+        :return: Namespace of the cached query results
+        """
+        namespace: str = self.get_vector_store_cache_key(loader_args, vector_store_type)
+        if postgres_config is not None:
+            # Tables of different databases hold different rows for the same source
+            table_name: str = postgres_config.table_name or DEFAULT_TABLE_NAME
+            namespace += f":{postgres_config.host}:{postgres_config.port}/{postgres_config.database}/{table_name}"
+        return namespace
+
+    def invalidate_query_cache(self):
+        """Drop the cached query results of the current vector store, after it was rebuilt or changed."""
+        if self.query_cache_namespace:
+            QUERY_CACHE.invalidate(self.query_cache_namespace)
+
     def configure_vector_store_path(self, vector_store_path: Optional[str]):
         """
         Validate the vector store file path and set it as an absolute path.
 
-        :param vector_store_path: Relative or absolute path to the vector store JSON file.
+        :param vector_store_path: Relative or absolute path to the vector store file.
+            A ".json" file uses the InMemoryVectorStore JSON format, a ".npy" file
+            the memory-mappable binary format of NumpyVectorStore.
         :raises ValueError: If the path contains invalid characters or has an incorrect file extension.
         """
         if not vector_store_path:
@@ -94,9 +291,9 @@ class BaseRag(ABC):
             raise ValueError(f"Invalid vector_store_path: '{vector_store_path}'")
 
         # Check file extension
-        if not vector_store_path.endswith(".json"):
-            logger.error("vector_store_path must be a .json file, got: '%s'\n", vector_store_path)
-            raise ValueError(f"vector_store_path must be a .json file, got: '{vector_store_path}'")
+        if not vector_store_path.endswith((".json", ".npy")):
+            logger.error("vector_store_path must be a .json or .npy file, got: '%s'\n", vector_store_path)
+            raise ValueError(f"vector_store_path must be a .json or .npy file, got: '{vector_store_path}'")
 
         if os.path.isabs(vector_store_path):
             # It's already an absolute path — use it directly
@@ -106,11 +303,124 @@ class BaseRag(ABC):
             base_path: str = os.path.dirname(__file__)
             self.abs_vector_store_path = os.path.abspath(os.path.join(base_path, vector_store_path))
 
+    def configure_shared_vector_store(self, shared_vector_store_dir: Optional[str]):
+        """
+        Validate the shared vector store directory and set it as an absolute path.
+
+        :param shared_vector_store_dir: Relative or absolute path to the directory through which
+            worker processes share in-memory vector stores, such as a directory of /dev/shm.
+            None falls back to the RAG_SHARED_VECTOR_STORE_DIR environment variable.
+        :raises ValueError: If the path contains invalid characters.
+        """
+        shared_vector_store_dir = shared_vector_store_dir or os.getenv("RAG_SHARED_VECTOR_STORE_DIR")
+        if not shared_vector_store_dir:
+            self.shared_vector_store_dir = None
+            return
+
+        # Check for obviously invalid characters in filenames (basic check)
+        if re.search(INVALID_PATH_PATTERN, shared_vector_store_dir):
+            logger.error("Invalid characters in shared_vector_store_dir: '%s'\n", shared_vector_store_dir)
+            raise ValueError(f"Invalid shared_vector_store_dir: '{shared_vector_store_dir}'")
+
+        if not os.path.isabs(shared_vector_store_dir):
+            # Combine to relative path to base path to make absolute path
+            base_path: str = os.path.dirname(__file__)
+            shared_vector_store_dir = os.path.abspath(os.path.join(base_path, shared_vector_store_dir))
+        self.shared_vector_store_dir = shared_vector_store_dir
+
+    def configure_embeddings(self, embeddings_args: Optional[Dict[str, Any]]):
+        """
+        Select the embeddings provider. Call before configure_embedding_cache(), which wraps the embeddings.
+
+        :param embeddings_args: Dictionary with the "provider" ("openai", "hashing", "sentence_transformers"
+            or any registered provider) and its arguments, such as "model" and "dimensions".
+            None keeps the provider of the RAG_EMBEDDINGS_PROVIDER environment variable.
+        :raises ValueError: If the provider is unknown or its arguments are not valid
+        """
+        if embeddings_args is not None:
+            self.embeddings = BatchedEmbeddings(create_embeddings(embeddings_args))
+
+    def configure_embedding_cache(self, embedding_cache_path: Optional[str]):
+        """
+        Validate the embedding cache file path and wrap the embeddings with the
+        persistent cache stored there, so that only new or changed chunks are embedded.
+
+        :param embedding_cache_path: Relative or absolute path to the SQLite embedding cache file.
+        :raises ValueError: If the path contains invalid characters or has an incorrect file extension.
+        """
+        if not embedding_cache_path or isinstance(self.embeddings, CachedEmbeddings):
+            return
+
+        # Check for obviously invalid characters in filenames (basic check)
+        if re.search(INVALID_PATH_PATTERN, embedding_cache_path):
+            logger.error("Invalid characters in embedding_cache_path: '%s'\n", embedding_cache_path)
+            raise ValueError(f"Invalid embedding_cache_path: '{embedding_cache_path}'")
+
+        # Check file extension
+        if not embedding_cache_path.endswith((".sqlite", ".db")):
+            logger.error("embedding_cache_path must be a .sqlite or .db file, got: '%s'\n", embedding_cache_path)
+            raise ValueError(f"embedding_cache_path must be a .sqlite or .db file, got: '{embedding_cache_path}'")
+
+        if not os.path.isabs(embedding_cache_path):
+            # Combine to relative path to base path to make absolute path
+            base_path: str = os.path.dirname(__file__)
+            embedding_cache_path = os.path.abspath(os.path.join(base_path, embedding_cache_path))
+
+        self.embeddings = CachedEmbeddings(self.embeddings, get_embedding_cache(embedding_cache_path))
+
+    def configure_chunking(self, chunking_args: Optional[Dict[str, Any]]):
+        """
+        Configure how documents are split into chunks.
+
+        :param chunking_args: Dictionary with any of "strategy" ("token", "page", "paragraph" or "heading"),
+            "chunk_size" and "chunk_overlap" in tokens, and "encoding_name" of the tiktoken tokenizer.
+            None keeps the default token chunking.
+        :raises ValueError: If a chunking argument is not valid
+        """
+        self.chunking = ChunkingConfig.from_dict(chunking_args)
+
+    def configure_dedup(self, dedup_args: Optional[Dict[str, Any]]):
+        """
+        Configure how near-duplicate chunks are dropped before embedding.
+
+        :param dedup_args: Dictionary with any of "threshold", "num_perm", "shingle_size" and "seed".
+            None, or a threshold of 0, keeps all chunks.
+        :raises ValueError: If a dedup argument is not valid
+        """
+        self.dedup = DedupConfig.from_dict(dedup_args)
+
+    def _create_deduplicator(self) -> Optional[ChunkDeduplicator]:
+        """
+        :return: A deduplicator for one ingestion, None if near-duplicate chunks are kept
+        """
+        return ChunkDeduplicator(self.dedup) if self.dedup.enabled else None
+
+    def configure_context(self, context_args: Optional[Dict[str, Any]]):
+        """
+        Configure how retrieved chunks are assembled into the returned context.
+
+        :param context_args: Dictionary with any of "token_budget", "fetch_k", "lambda_mult", "merge_overlaps"
+            and "include_sources". None, or a token_budget of 0, returns the retrieved chunks as they are.
+        :raises ValueError: If a context argument is not valid
+        """
+        self.context = ContextConfig.from_dict(context_args)
+
+    def configure_postgres_index(self, index_args: Optional[Dict[str, Any]]):
+        """
+        Configure the ANN index of postgres vector store tables.
+
+        :param index_args: Dictionary with any of "type" ("hnsw", "ivfflat" or "none"), "m" and "ef_construction"
+            of an HNSW index, "lists" of an IVFFlat index, the query-time "ef_search" and "probes", and "rebuild"
+            to rebuild an existing index built differently. None keeps the default HNSW index.
+        :raises ValueError: If an index argument is not valid
+        """
+        self.postgres_index = VectorIndexConfig.from_dict(index_args)
+
     async def generate_vector_store(
         self,
         loader_args: Any,
         postgres_config: Optional[PostgresConfig] = None,
-        vector_store_type: Literal["in_memory", "postgres"] = "in_memory",
+        vector_store_type: Literal["in_memory", "ivf", "matryoshka", "postgres"] = "in_memory",
     ) -> Optional[VectorStore]:
         """
         Asynchronously loads documents from a given data source, splits them into
@@ -121,85 +431,232 @@ class BaseRag(ABC):
         :param vector_store_type: Type of vector store to create
         :return: Vector store containing the embedded document chunks
         """
-
         # If vector store type is unsupported, fallback to in-memory vector store
-        if vector_store_type not in {"in_memory", "postgres"}:
+        if vector_store_type not in VECTOR_STORE_TYPES:
             logger.warning(
-                "Received %s as 'vector_store_typ'. Available types are 'in_memory' and 'postgres'\n", vector_store_type)
+                "Received %s as 'vector_store_typ'. "
+                "Available types are 'in_memory', 'ivf', 'matryoshka' and 'postgres'\n",
+                vector_store_type,
+            )
             vector_store_type = "in_memory"
 
         # Validate postgres config if needed
         if vector_store_type == "postgres" and postgres_config is None:
             raise ValueError("postgres_config is required when vector_store_type is 'postgres'\n")
 
+        self.query_cache_namespace = self.get_query_cache_namespace(loader_args, postgres_config, vector_store_type)
+
+        if vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES and self.shared_vector_store_dir:
+            return self._configure_search(await self._generate_shared_vector_store(loader_args, vector_store_type))
+
+        # Reuse a vector store already built in this process for the same source
+        cache_key: Optional[str] = None
+        if vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES and self.use_vector_store_cache:
+            cache_key = self.get_vector_store_cache_key(loader_args, vector_store_type)
+            cached_store: Optional[VectorStore] = VECTOR_STORE_CACHE.get(cache_key)
+            if cached_store is not None:
+                logger.info("Using cached vector store. Cache stats: %s\n", VECTOR_STORE_CACHE.stats())
+                return self._configure_search(cached_store)
+
         # Try to load existing vector store for in-memory vector store
-        if vector_store_type == "in_memory":
-            existing_store = await self._load_existing_vector_store()
+        if vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES:
+            existing_store = await self._load_existing_vector_store(vector_store_type)
             if existing_store:
-                return existing_store
+                # The file may have changed since earlier results were retrieved from it
+                if self.query_cache_namespace:
+                    version: str = file_version(self.abs_vector_store_path)
+                    QUERY_CACHE.invalidate_on_change(self.query_cache_namespace, version)
+                if cache_key:
+                    VECTOR_STORE_CACHE.put(cache_key, existing_store)
+                return self._configure_search(existing_store)
 
         # Load and process documents
-        vectorstore = await self._create_new_vector_store(
-            loader_args, postgres_config, vector_store_type
-        )
+        vectorstore = await self._create_new_vector_store(loader_args, postgres_config, vector_store_type)
+
+        if vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES:
+            # Postgres vector stores invalidate the query cache themselves, only when rows change
+            self.invalidate_query_cache()
 
         # Save vector store if configured
         await self._save_vector_store(vectorstore, vector_store_type)
 
-        return vectorstore
+        if cache_key and vectorstore is not None:
+            VECTOR_STORE_CACHE.put(cache_key, vectorstore)
+
+        return self._configure_search(vectorstore)
+
+    async def _generate_shared_vector_store(self, loader_args: Any, vector_store_type: str) -> Optional[VectorStore]:
+        """
+        Attach to the vector store another worker process of this host published in the shared directory,
+        or build and publish it, holding the build lock so that only one process builds it.
+        When use_vector_store_cache is False, a new version is built, and the other processes swap to it.
+
+        :param loader_args: Arguments specific to the document loader
+        :param vector_store_type: One of IN_MEMORY_VECTOR_STORE_TYPES
+        :return: The vector store, memory-mapped from the shared directory
+        """
+        shared: SharedVectorStores = get_shared_vector_stores(self.shared_vector_store_dir)
+        key: str = self.get_vector_store_cache_key(loader_args, vector_store_type)
+        store_class: type = self._in_memory_store_class(vector_store_type)
+        rebuild: bool = not self.use_vector_store_cache
+
+        attached: Optional[NumpyVectorStore] = None
+        if not rebuild:
+            attached = shared.attach(key, store_class, self.embeddings, on_swap=self.invalidate_query_cache)
+        if attached is not None:
+            return attached
+
+        async with shared.build_lock(key):
+            if not rebuild:
+                # Another process may have published it while this one waited for the lock
+                attached = shared.attach(key, store_class, self.embeddings, on_swap=self.invalidate_query_cache)
+                if attached is not None:
+                    return attached
+
+            vectorstore: Optional[NumpyVectorStore] = await self._load_existing_vector_store(vector_store_type)
+            if vectorstore is None:
+                vectorstore = await self._create_in_memory_vector_store(loader_args, vector_store_type)
+            self.invalidate_query_cache()
+            await self._save_vector_store(vectorstore, vector_store_type)
+            if vectorstore is None or len(vectorstore) == 0:
+                # Not shared, so that a failed load is retried by the next call rather than served to every process
+                return vectorstore
+            await asyncio.to_thread(shared.publish, key, vectorstore, self.vector_store_dtype)
+
+        # Search the shared files rather than the private copy built by this process, which is then freed
+        return shared.attach(key, store_class, self.embeddings) or vectorstore
+
+    def _configure_search(self, vector_store: Optional[VectorStore]) -> Optional[VectorStore]:
+        """Prepare the vector store for the retrieval mode of this call."""
+        if isinstance(vector_store, NumpyVectorStore) and self.retrieval_mode != "vector":
+            # Index stores loaded from file, or built for vector retrieval only, before the first query
+            vector_store.get_lexical_index()
+        return vector_store
+
+    @staticmethod
+    def _in_memory_store_class(vector_store_type: str) -> type:
+        """
+        :param vector_store_type: One of IN_MEMORY_VECTOR_STORE_TYPES
+        :return: The NumpyVectorStore class implementing the vector store type
+        """
+        return {"ivf": IvfVectorStore, "matryoshka": MatryoshkaVectorStore}.get(vector_store_type, NumpyVectorStore)
 
-    async def _load_existing_vector_store(self) -> Optional[VectorStore]:
+    async def _load_existing_vector_store(self, vector_store_type: str = "in_memory") -> Optional[VectorStore]:
         """Try to load existing vector store from file."""
 
         if not self.abs_vector_store_path:
             return None
 
+        store_class: type = self._in_memory_store_class(vector_store_type)
         try:
-            vector_store: VectorStore = InMemoryVectorStore.load(
-                path=self.abs_vector_store_path,
-                embedding=self.embeddings
-            )
+            vector_store: NumpyVectorStore
+            if self.abs_vector_store_path.endswith(".npy"):
+                # Memory-map the binary format, so that loading does not copy the embeddings
+                vector_store = store_class.load(path=self.abs_vector_store_path, embedding=self.embeddings)
+            else:
+                # Move the JSON vectors into one NumPy matrix for vectorized search
+                vector_store = store_class.from_in_memory(
+                    InMemoryVectorStore.load(path=self.abs_vector_store_path, embedding=self.embeddings)
+                )
+            if isinstance(vector_store, IvfVectorStore):
+                vector_store.n_lists = vector_store.n_lists or self.ivf_lists
             logger.info("Loaded vector store from: %s\n", self.abs_vector_store_path)
             return vector_store
         except FileNotFoundError:
             logger.info("Vector store not found at: %s. Creating from source.\n", self.abs_vector_store_path)
             return None
+        except ValueError as value_error:
+            # Such as a sidecar that does not match the embedding matrix, after an interrupted copy
+            logger.warning("Invalid vector store at %s: %s. Rebuilding it.\n", self.abs_vector_store_path, value_error)
+            return None
 
     async def _create_new_vector_store(
         self,
         loader_args: Any,
         postgres_config: Optional[PostgresConfig],
-        vector_store_type: Literal["in_memory", "postgres"],
+        vector_store_type: Literal["in_memory", "ivf", "matryoshka", "postgres"],
     ) -> Optional[VectorStore]:
         """Create a new vector store."""
 
-        if vector_store_type == "in_memory":
-            return await self._create_in_memory_vector_store(loader_args)
+        if vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES:
+            return await self._create_in_memory_vector_store(loader_args, vector_store_type)
 
         return await self._create_postgres_vector_store(loader_args, postgres_config)
 
+    def get_text_splitter(self) -> TextSplitter:
+        """
+        :return: Splitter turning documents into smaller chunks for better embedding and retrieval
+        """
+        return get_text_splitter(self.chunking)
+
     async def _process_documents(self, loader_args: Any) -> List[Document]:
         """Load and split documents"""
-        # Load documents and build the vector store
-        docs: List[Document] = await self.load_documents(loader_args)
-
-        # Split documents into smaller chunks for better embedding and retrieval
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=100, chunk_overlap=50)
-
-        doc_chunks: List[Document] = text_splitter.split_documents(docs)
+        deduplicator: Optional[ChunkDeduplicator] = self._create_deduplicator()
+        pipeline = IngestionPipeline(self.embeddings, self.get_text_splitter(), deduplicator=deduplicator)
+        doc_chunks: List[Document] = [chunk async for chunk in pipeline.iter_chunks(self.iter_documents(loader_args))]
         logger.info("Processed %d document chunks\n", len(doc_chunks))
+        if deduplicator is not None:
+            deduplicator.apply_provenance(doc_chunks)
+            dimensions: int = getattr(self.embeddings, "dimensions", None) or VECTOR_SIZE
+            logger.info("%s\n", deduplicator.stats.summary(dimensions))
 
         return doc_chunks
 
-    async def _create_in_memory_vector_store(self, loader_args) -> VectorStore:
-        """Create an in-memory vector store."""
-        doc_chunks: List[Document] = await self._process_documents(loader_args)
-        logger.info("Creating in-memory vector store.")
-        return await InMemoryVectorStore.afrom_documents(
-            documents=doc_chunks,
-            embedding=self.embeddings,
+    async def _ingest(
+        self,
+        loader_args: Any,
+        sink: EmbeddedBatchSink,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ) -> PipelineStats:
+        """
+        Stream documents through splitting, deduplication and embedding into the sink, without holding
+        the whole source in memory.
+
+        Chunks are stored before their later duplicates are known, so callers record the provenance
+        of the deduplicator in the stored chunks afterwards.
+
+        :param loader_args: Arguments specific to the document loader
+        :param sink: Coroutine function storing each batch of chunks with their embeddings
+        :param deduplicator: Drops near-duplicate chunks before embedding, None to keep all chunks
+        :return: Throughput counters of the ingestion
+        """
+        pipeline = IngestionPipeline(
+            self.embeddings,
+            self.get_text_splitter(),
+            batch_size=self.embedding_batch_size,
+            queue_size=self.ingestion_queue_size,
+            deduplicator=deduplicator,
         )
+        stats: PipelineStats = await pipeline.run(self.iter_documents(loader_args), sink)
+        logger.info("%s\n", stats.summary())
+        return stats
 
+    async def _create_in_memory_vector_store(self, loader_args, vector_store_type: str = "in_memory") -> VectorStore:
+        """Create an in-memory vector store."""
+        logger.info("Creating in-memory vector store.")
+        store_class: type = self._in_memory_store_class(vector_store_type)
+        vector_store: NumpyVectorStore = store_class(embedding=self.embeddings)
+
+        async def add_batch(chunks: List[Document], vectors: List[List[float]]):
+            vector_store.add_vectors(
+                vectors,
+                [chunk.page_content for chunk in chunks],
+                [chunk.metadata for chunk in chunks],
+                [chunk.id for chunk in chunks],
+            )
+            if self.retrieval_mode != "vector":
+                # Index each batch while the next one is being embedded
+                vector_store.get_lexical_index()
+
+        deduplicator: Optional[ChunkDeduplicator] = self._create_deduplicator()
+        await self._ingest(loader_args, add_batch, deduplicator)
+        if deduplicator is not None and deduplicator.provenance:
+            vector_store.update_metadata(deduplicator.provenance_metadata())
+        if isinstance(vector_store, IvfVectorStore):
+            vector_store.n_lists = self.ivf_lists
+        return vector_store
+
+    # pylint: disable=too-many-return-statements
     async def _create_postgres_vector_store(
         self,
         loader_args: Any,
@@ -207,9 +664,11 @@ class BaseRag(ABC):
     ) -> Optional[VectorStore]:
         """Create a PostgreSQL vector store."""
 
-        # Create engine and table
-        pg_engine = PGEngine.from_connection_string(url=postgres_config.connection_string)
+        # Reuse the engine, and its connection pool, of earlier calls to the same database
+        connection_string: str = postgres_config.connection_string
+        pg_engine: PGEngine = PG_ENGINE_REGISTRY.get_engine(connection_string)
         table_name: str = postgres_config.table_name or DEFAULT_TABLE_NAME
+        self.postgres_table = (pg_engine, table_name)
 
         logger.info(
             "PostgreSQL connection details:\n"
@@ -221,32 +680,70 @@ class BaseRag(ABC):
         )
 
         try:
+            if PG_ENGINE_REGISTRY.is_table_initialized(connection_string, table_name):
+                # Skip the table creation attempt for tables created or found by earlier calls
+                try:
+                    return await self._attach_postgres_vector_store(
+                        pg_engine, connection_string, table_name, loader_args
+                    )
+                except ValueError as value_error:
+                    logger.info("Table %s is gone, creating it again. %s\n", table_name, value_error)
+                    PG_ENGINE_REGISTRY.forget_table(connection_string, table_name)
+
             # Initiaize vector store table
             await pg_engine.ainit_vectorstore_table(
                 table_name=table_name,
-                vector_size=VECTOR_SIZE,
+                vector_size=getattr(self.embeddings, "dimensions", None) or VECTOR_SIZE,
             )
+            PG_ENGINE_REGISTRY.mark_table_initialized(connection_string, table_name)
 
-            doc_chunks: List[Document] = await self._process_documents(loader_args)
+            if self.postgres_sync_mode == "incremental":
+                # Fill the new table through the sync so that rows get fingerprint ids
+                return await self._attach_postgres_vector_store(pg_engine, connection_string, table_name, loader_args)
 
             logger.info("Creating postgres vector store from documents.")
-            # Create vector store and load documents
-            return await PGVectorStore.afrom_documents(
-                documents=doc_chunks,
-                embedding=self.embeddings,
+            # Create vector store and stream the documents into it
+            vector_store: PGVectorStore = await PGVectorStore.create(
                 engine=pg_engine,
                 table_name=table_name,
+                embedding_service=self.embeddings,
             )
 
+            deduplicator: Optional[ChunkDeduplicator] = self._create_deduplicator()
+            if self.postgres_ingest_mode == "copy":
+                await self._copy_into_postgres_vector_store(connection_string, table_name, loader_args, deduplicator)
+            else:
+
+                async def add_batch(chunks: List[Document], vectors: List[List[float]]):
+                    await vector_store.aadd_embeddings(
+                        [chunk.page_content for chunk in chunks],
+                        vectors,
+                        [chunk.metadata for chunk in chunks],
+                        # Rows keep the chunk ids the dedup provenance refers to
+                        ids=[chunk.id for chunk in chunks] if all(chunk.id for chunk in chunks) else None,
+                    )
+
+                await self._ingest(loader_args, add_batch, deduplicator)
+            if deduplicator is not None and deduplicator.provenance:
+                await update_chunk_metadata(
+                    pg_engine,
+                    table_name,
+                    deduplicator.provenance_metadata(),
+                    batch_size=self.postgres_sync_batch_size,
+                )
+            # Indexing the full table is faster than maintaining the index row by row,
+            # and trains IVFFlat lists on the actual rows
+            vector_store = await self._index_postgres_vector_store(
+                vector_store, pg_engine, connection_string, table_name
+            )
+            self.invalidate_query_cache()
+            return vector_store
+
         except ProgrammingError:
             # Table already exists. Create vector store from it.
             logger.info("Table %s already exists.\n", table_name)
-            logger.info("Creating postgres vector store from existing table.\n")
-            return await PGVectorStore.create(
-                engine=pg_engine,
-                table_name=table_name,
-                embedding_service=self.embeddings,
-            )
+            PG_ENGINE_REGISTRY.mark_table_initialized(connection_string, table_name)
+            return await self._attach_postgres_vector_store(pg_engine, connection_string, table_name, loader_args)
 
         except OSError as os_error:
             # Fail to create vector store due to connection error
@@ -263,16 +760,79 @@ class BaseRag(ABC):
             logger.error("Fail to create vector store due to invalid DB name. %s\n", invalid_catalog_error)
             return None
 
+    async def _copy_into_postgres_vector_store(
+        self,
+        connection_string: str,
+        table_name: str,
+        loader_args: Any,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ):
+        """
+        Stream the chunks into a new table with binary COPY, then refresh the planner statistics.
+        """
+        logger.info("Bulk loading postgres table %s with COPY.\n", table_name)
+        async with PgBulkLoader(connection_string, table_name, batch_size=self.postgres_copy_batch_size) as loader:
+            await self._ingest(loader_args, loader.add, deduplicator)
+            await loader.flush()
+            await loader.analyze()
+        logger.info(
+            "Copied %d rows in %.2f s (%.0f rows/s)\n", loader.rows, loader.seconds, loader.rows_per_second
+        )
+
+    async def _attach_postgres_vector_store(
+        self, pg_engine: PGEngine, connection_string: str, table_name: str, loader_args: Any
+    ) -> VectorStore:
+        """
+        Create a vector store from an existing table and, in incremental sync mode,
+        upsert new or changed chunks and delete the stale ones. The ANN index of the table
+        is then created if it is missing.
+        """
+        logger.info("Creating postgres vector store from existing table.\n")
+        vector_store: PGVectorStore = await PGVectorStore.create(
+            engine=pg_engine,
+            table_name=table_name,
+            embedding_service=self.embeddings,
+        )
+
+        if self.postgres_sync_mode == "incremental":
+            doc_chunks: List[Document] = await self._process_documents(loader_args)
+            sync_stats: SyncStats = await sync_vector_store(
+                vector_store, pg_engine, table_name, doc_chunks, batch_size=self.postgres_sync_batch_size
+            )
+            if sync_stats.added or sync_stats.deleted:
+                self.invalidate_query_cache()
+
+        return await self._index_postgres_vector_store(vector_store, pg_engine, connection_string, table_name)
+
+    async def _index_postgres_vector_store(
+        self, vector_store: PGVectorStore, pg_engine: PGEngine, connection_string: str, table_name: str
+    ) -> PGVectorStore:
+        """
+        Create the ANN index of the table if it is missing, then return a vector store of the table
+        that searches the index with the configured ef_search or probes.
+        """
+        self.postgres_query_options = await aensure_vector_index(
+            vector_store, pg_engine, connection_string, table_name, self.postgres_index
+        )
+        if self.postgres_query_options is None:
+            return vector_store
+        return await PGVectorStore.create(
+            engine=pg_engine,
+            table_name=table_name,
+            embedding_service=self.embeddings,
+            index_query_options=self.postgres_query_options,
+        )
+
     async def _save_vector_store(
         self,
         vectorstore: VectorStore,
-        vector_store_type: Literal["in_memory", "postgres"]
+        vector_store_type: Literal["in_memory", "ivf", "matryoshka", "postgres"]
     ):
         """Save vector store to file if configured."""
         should_save: bool = (
             self.save_vector_store
             and self.abs_vector_store_path
-            and vector_store_type == "in_memory"
+            and vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES
         )
 
         if not should_save:
@@ -280,11 +840,137 @@ class BaseRag(ABC):
 
         try:
             os.makedirs(os.path.dirname(self.abs_vector_store_path), exist_ok=True)
-            vectorstore.dump(path=self.abs_vector_store_path)
+            if self.abs_vector_store_path.endswith(".npy"):
+                vectorstore.save(path=self.abs_vector_store_path, dtype=self.vector_store_dtype)
+            else:
+                vectorstore.dump(path=self.abs_vector_store_path)
             logger.info("Vector store saved to: %s\n", self.abs_vector_store_path)
         except OSError as os_error:
             logger.error("Failed to save vector store to %s: %s\n", self.abs_vector_store_path, os_error)
 
+    async def retrieve(self, vectorstore: VectorStore, query: str, k: int = RETRIEVAL_K) -> List[Document]:
+        """
+        Retrieve the documents relevant to the query, ranked according to the retrieval mode.
+
+        :param vectorstore: The vector store to query
+        :param query: The user query to search for relevant documents
+        :param k: Number of documents to retrieve
+        :return: The retrieved documents, none if there is no vector store
+        """
+        results, _ = await self._retrieve_with_embedding(vectorstore, query, k)
+        return results
+
+    async def _retrieve_with_embedding(
+        self, vectorstore: VectorStore, query: str, k: int
+    ) -> Tuple[List[Document], Optional[np.ndarray]]:
+        """Same as retrieve(), also returning the query embedding when one was computed or cached."""
+        if vectorstore is None:
+            logger.error("No vector store to retrieve from.\n")
+            return [], None
+
+        retrieval_mode: str = self.retrieval_mode
+        if retrieval_mode not in RETRIEVAL_MODES:
+            logger.warning(
+                "Received %s as 'retrieval_mode'. Available modes are %s\n", retrieval_mode, ", ".join(RETRIEVAL_MODES)
+            )
+            retrieval_mode = "vector"
+        if retrieval_mode != "vector" and not isinstance(vectorstore, NumpyVectorStore):
+            logger.warning("'%s' retrieval needs an in-memory vector store. Using 'vector'.\n", retrieval_mode)
+            retrieval_mode = "vector"
+
+        if retrieval_mode == "lexical":
+            # Keyword ranking only: no embedding call at all
+            return vectorstore.lexical_search(query, k=k), None
+
+        fetch_k: int = max(HYBRID_FETCH_K, k) if retrieval_mode == "hybrid" else k
+        results, embedding = await self._vector_search(vectorstore, query, fetch_k)
+        if retrieval_mode == "hybrid":
+            lexical_results: List[Document] = vectorstore.lexical_search(query, k=fetch_k)
+            results = reciprocal_rank_fusion([results, lexical_results], limit=k)
+        return results, embedding
+
+    async def _vector_search(
+        self, vectorstore: VectorStore, query: str, k: int
+    ) -> Tuple[List[Document], Optional[np.ndarray]]:
+        """Rank the chunks by embedding similarity to the query, through the query cache when enabled."""
+
+        # Passed to each search rather than set on the vector store, which is shared with concurrent calls
+        search_kwargs: Dict[str, Any] = self._search_kwargs(vectorstore)
+
+        async def search(embedding: List[float]) -> List[Document]:
+            start: float = time.perf_counter()
+            results: List[Document] = await vectorstore.asimilarity_search_by_vector(embedding, k=k, **search_kwargs)
+            logger.info("Vector search of %d chunks took %.2f ms\n", k, (time.perf_counter() - start) * 1000)
+            if self.postgres_explain and isinstance(vectorstore, PGVectorStore):
+                await alog_search_plan(
+                    *self.postgres_table, embedding, k, self.postgres_index, self.postgres_query_options
+                )
+            return results
+
+        if not self.use_query_cache or not self.query_cache_namespace:
+            embedding: List[float] = await self.embeddings.aembed_query(query)
+            return await search(embedding), np.asarray(embedding, dtype=np.float32)
+
+        results, query_vector = await QUERY_CACHE.aretrieve_with_embedding(
+            self.query_cache_namespace,
+            query,
+            self.embeddings.aembed_query,
+            search,
+            variant=self._search_variant(vectorstore, k, search_kwargs),
+        )
+        logger.info("Query cache stats: %s\n", QUERY_CACHE.stats())
+        return results, query_vector
+
+    def _search_kwargs(self, vectorstore: VectorStore) -> Dict[str, Any]:
+        """Search parameters of this call for the IVF and matryoshka vector stores, none for the others."""
+        if isinstance(vectorstore, IvfVectorStore):
+            return {"n_probe": self.ivf_probes}
+        if isinstance(vectorstore, MatryoshkaVectorStore):
+            return {"prefilter_dimensions": self.matryoshka_dimensions, "rerank_factor": self.matryoshka_rerank_factor}
+        return {}
+
+    def _search_variant(self, vectorstore: VectorStore, k: int, search_kwargs: Dict[str, Any]) -> str:
+        """
+        :param vectorstore: The vector store searched
+        :param k: Number of documents searched
+        :param search_kwargs: The search parameters passed to the vector store
+        :return: The search parameters that change the results of a query, so that results found
+            with other parameters are not reused from the query cache
+        """
+        parameters: List[str] = [f"k={k}"] + [f"{name}={value}" for name, value in sorted(search_kwargs.items())]
+        if isinstance(vectorstore, PGVectorStore) and self.postgres_query_options is not None:
+            parameters.extend(self.postgres_query_options.to_parameter())
+        return ",".join(parameters)
+
+    async def assemble_context(self, vectorstore: VectorStore, query: str) -> AssembledContext:
+        """
+        Retrieve fetch_k candidate chunks, rerank them by maximal marginal relevance,
+        merge the overlapping chunks of each source and keep the best passages within the token budget.
+
+        :param vectorstore: The vector store to query
+        :param query: The user query to search for relevant documents
+        :return: The assembled context
+        """
+        candidates, query_vector = await self._retrieve_with_embedding(vectorstore, query, self.context.fetch_k)
+        if not candidates:
+            return AssembledContext(include_sources=self.context.include_sources)
+
+        if query_vector is None:
+            query_vector = np.asarray(await self.embeddings.aembed_query(query), dtype=np.float32)
+        # Stored embeddings of the candidates, which are only embedded again when a store cannot hand them back
+        vectors: Optional[np.ndarray] = None
+        ids: List[str] = [doc.id for doc in candidates if doc.id]
+        if isinstance(vectorstore, NumpyVectorStore) and len(ids) == len(candidates):
+            vectors = vectorstore.get_vectors_by_ids(ids)
+        elif isinstance(vectorstore, PGVectorStore) and len(ids) == len(candidates) and self.postgres_table:
+            vectors = await fetch_embeddings(*self.postgres_table, ids)
+        if vectors is None:
+            vectors = np.asarray(await self.embeddings.aembed_documents([doc.page_content for doc in candidates]))
+
+        return assemble_context(
+            candidates, vectors, query_vector, self.context, get_token_counter(self.chunking.encoding_name)
+        )
+
     async def query_vectorstore(self, vectorstore: VectorStore, query: str) -> str:
         """
         Query the given vector store using the provided query string
@@ -294,18 +980,19 @@ class BaseRag(ABC):
         :param query: The user query to search for relevant documents
         :return: Concatenated text content of the retrieved documents
         """
-        try:
-            # Create a retriever interface from the vector store
-            retriever: VectorStoreRetriever = vectorstore.as_retriever()
+        if vectorstore is None:
+            return "Failed to create vector store. Please check the log for more information.\n"
 
-            # Perform an asynchronous similarity search
-            results: List[Document] = await retriever.ainvoke(query)
+        if self.context.enabled:
+            context: AssembledContext = await self.assemble_context(vectorstore, query)
+            logger.info("Assembled context: %s\n", context.summary())
+            return context.to_text()
 
-            if results:
-                logger.info("Retrieval completed!\n")
+        # Perform an asynchronous similarity search
+        results: List[Document] = await self.retrieve(vectorstore, query)
 
-            # Concatenate the content of all retrieved documents
-            return "\n\n".join(doc.page_content for doc in results)
+        if results:
+            logger.info("Retrieval completed!\n")
 
-        except AttributeError:
-            return "Failed to create vector store. Please check the log for more information.\n"
+        # Concatenate the content of all retrieved documents
+        return "\n\n".join(doc.page_content for doc in results)
@@ -14,20 +14,46 @@
 import inspect
 import logging
 import os
+import re
+import time
+from datetime import datetime
+from datetime import timezone
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Set
 
 # pylint: disable=import-error
 from atlassian.errors import ApiPermissionError
 from langchain_community.document_loaders.confluence import ConfluenceLoader
 from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
 from neuro_san.interfaces.coded_tool import CodedTool
+from requests.exceptions import ConnectionError as RequestsConnectionError
 from requests.exceptions import HTTPError
 
+from .base_rag import IN_MEMORY_VECTOR_STORE_TYPES
 from .base_rag import BaseRag
+from .base_rag import PostgresConfig
+from .rag.confluence_fetcher import DEFAULT_FETCH_CONCURRENCY
+from .rag.confluence_fetcher import DEFAULT_FETCH_MAX_RETRIES
+from .rag.confluence_fetcher import ConfluenceFetcher
+from .rag.confluence_sync import DEFAULT_MIN_SYNC_INTERVAL
+from .rag.confluence_sync import ConfluenceSyncState
+from .rag.confluence_sync import changed_since_cql
+from .rag.confluence_sync import get_confluence_sync_state
+from .rag.confluence_sync import scope_cql
+from .rag.numpy_vector_store import validate_dtype
+from .rag.vector_store_cache import VECTOR_STORE_CACHE
 
 INVALID_PATH_PATTERN = r"[<>:\"|?*\x00-\x1F]"
+# ConfluenceLoader arguments selecting the pages, replaced by a CQL query during an incremental sync
+SCOPE_LOADER_ARGS = {"space_key", "page_ids", "label", "cql"}
+
+# Vector store cache key to the fingerprint of the synced pages the vector store of this process was built from
+BUILT_SYNC_FINGERPRINTS: Dict[str, str] = {}
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,12 +64,53 @@ class ConfluenceRag(CodedTool, BaseRag):
     CodedTool implementation which provides a way to do RAG on confluence pages
     """
 
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self):
+        super().__init__()
+        # Persistent page versions and cursor of the incremental sync, None to load all pages on every build
+        self.sync_state: Optional[ConfluenceSyncState] = None
+        # Load all pages and replace the synced ones if True, to also catch pages that left the scope unnoticed
+        self.full_sync: bool = False
+        # Seconds after a sync during which queries reuse the stored pages and the cached vector store
+        self.min_sync_interval: float = DEFAULT_MIN_SYNC_INTERVAL
+        # Maximum number of concurrent Confluence requests, lowered automatically when throttled,
+        # and retries of a throttled or failed request
+        self.fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY
+        self.fetch_max_retries: int = DEFAULT_FETCH_MAX_RETRIES
+        # Pages synced by generate_vector_store() before the cache lookup, for load_documents() to return
+        self._synced_documents: Optional[List[Document]] = None
+
     async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> str:
         """
         Load confluence pages from URLs, build a vector store, and run a query against it.
 
         :param args: Dictionary containing:
           "query": search string
+          "url": base URL of the Confluence site, such as https://your-domain.atlassian.net/wiki/
+          "space_key": key of the space to load
+          "page_ids": list of ids of the pages to load
+          "username" and "api_key": Confluence credentials, default to JIRA_USERNAME and JIRA_API_TOKEN
+              and any other argument of ConfluenceLoader, such as "label", "cql" or "max_pages"
+          "save_vector_store": save to JSON file if True
+          "vector_store_path": relative path to this file
+          "vector_store_dtype": "float32" or "float16" precision of a ".npy" vector store file
+          "use_vector_store_cache": reuse the vector store built by an earlier call if True
+          "shared_vector_store_dir": directory through which worker processes share in-memory vector stores
+          "use_query_cache": reuse the results of earlier identical or near-identical queries if True
+          "retrieval_mode": "vector", "hybrid" or "lexical" ranking of the chunks
+          "embeddings": dictionary of the "provider" ("openai", "hashing" or "sentence_transformers")
+              and its arguments, such as "model" and "dimensions"
+          "sync_state_path": path to the SQLite file of the incremental sync of the pages
+          "full_sync": load all pages and replace the synced ones if True
+          "min_sync_interval": seconds after a sync during which queries do not sync again
+          "fetch_concurrency": maximum number of concurrent Confluence requests
+          "fetch_max_retries": retries of a throttled or failed Confluence request
+          "embedding_cache_path": path to the persistent embedding cache, default to the sync state file
+          "chunking": dictionary of "strategy", "chunk_size", "chunk_overlap" and "encoding_name"
+          "dedup": dictionary of the "threshold", "num_perm", "shingle_size" and "seed"
+              of the near-duplicate chunk elimination
+          "context": dictionary of the "token_budget", "fetch_k", "lambda_mult", "merge_overlaps"
+              and "include_sources" of the assembly of the retrieved chunks
 
         :param sly_data: A dictionary whose keys are defined by the agent
             hierarchy, but whose values are meant to be kept out of the
@@ -100,8 +167,46 @@ class ConfluenceRag(CodedTool, BaseRag):
         # Save the generated vector store as a JSON file if True
         self.save_vector_store = args.get("save_vector_store", False)
 
+        # Reuse the vector store built by an earlier call in this process if True
+        self.use_vector_store_cache = args.get("use_vector_store_cache", True)
+
+        # Reuse the results of earlier identical or near-identical queries if True
+        self.use_query_cache = args.get("use_query_cache", True)
+
+        # Rank chunks by embedding similarity, BM25 keyword score, or both
+        self.retrieval_mode = args.get("retrieval_mode", "vector")
+
         # Configure the vector store path
         self.configure_vector_store_path(args.get("vector_store_path"))
+        self.vector_store_dtype = validate_dtype(args.get("vector_store_dtype", "float32"))
+
+        # Share in-memory vector stores with the other worker processes of this host through memory-mapped files
+        self.configure_shared_vector_store(args.get("shared_vector_store_dir"))
+
+        # Embeddings provider, such as "hashing" to run offline
+        self.configure_embeddings(args.get("embeddings"))
+
+        # Only download pages modified since the last sync
+        self.configure_sync_state(args.get("sync_state_path"))
+        self.full_sync = args.get("full_sync", False)
+        self.min_sync_interval = args.get("min_sync_interval", DEFAULT_MIN_SYNC_INTERVAL)
+
+        # Concurrent Confluence requests, halved whenever Confluence answers 429 Too Many Requests
+        self.fetch_concurrency = args.get("fetch_concurrency", DEFAULT_FETCH_CONCURRENCY)
+        self.fetch_max_retries = args.get("fetch_max_retries", DEFAULT_FETCH_MAX_RETRIES)
+
+        # Only embed chunks that are not in the persistent embedding cache yet.
+        # A synced source keeps its embeddings next to its pages by default, so that only modified pages are embedded.
+        self.configure_embedding_cache(args.get("embedding_cache_path") or (self.sync_state and self.sync_state.path))
+
+        # Chunking strategy and sizes
+        self.configure_chunking(args.get("chunking"))
+
+        # Drop near-duplicate chunks before embedding
+        self.configure_dedup(args.get("dedup"))
+
+        # Rerank, merge and fit the retrieved chunks in a token budget
+        self.configure_context(args.get("context"))
 
         # Prepare the vector store
         vectorstore = await self.generate_vector_store(loader_args=loader_args)
@@ -109,6 +214,33 @@ class ConfluenceRag(CodedTool, BaseRag):
         # Run the query against the vector store
         return await self.query_vectorstore(vectorstore, query)
 
+    def configure_sync_state(self, sync_state_path: Optional[str]):
+        """
+        Validate the sync state file path and open the incremental sync state stored there.
+
+        :param sync_state_path: Relative or absolute path to the SQLite sync state file.
+        :raises ValueError: If the path contains invalid characters or has an incorrect file extension.
+        """
+        if not sync_state_path:
+            return
+
+        # Check for obviously invalid characters in filenames (basic check)
+        if re.search(INVALID_PATH_PATTERN, sync_state_path):
+            logger.error("Invalid characters in sync_state_path: '%s'\n", sync_state_path)
+            raise ValueError(f"Invalid sync_state_path: '{sync_state_path}'")
+
+        # Check file extension
+        if not sync_state_path.endswith((".sqlite", ".db")):
+            logger.error("sync_state_path must be a .sqlite or .db file, got: '%s'\n", sync_state_path)
+            raise ValueError(f"sync_state_path must be a .sqlite or .db file, got: '{sync_state_path}'")
+
+        if not os.path.isabs(sync_state_path):
+            # Combine to relative path to base path to make absolute path
+            base_path: str = os.path.dirname(__file__)
+            sync_state_path = os.path.abspath(os.path.join(base_path, sync_state_path))
+
+        self.sync_state = get_confluence_sync_state(sync_state_path)
+
     async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
         """
         Load Confluence pages from the provided loader arguments.
@@ -116,16 +248,178 @@ class ConfluenceRag(CodedTool, BaseRag):
         :param loader_args: Dictionary containing 'url', 'space_key', and/or 'page_ids' of the Confluence pages to load
         :return: List of loaded Confluence pages
         """
+        if self._synced_documents is not None:
+            return self._synced_documents
+        if self.sync_state is not None:
+            return await self.sync_documents(loader_args)
+        return await self._load_pages(loader_args) or []
+
+    async def generate_vector_store(
+        self,
+        loader_args: Any,
+        postgres_config: Optional[PostgresConfig] = None,
+        vector_store_type: Literal["in_memory", "ivf", "matryoshka", "postgres"] = "in_memory",
+    ) -> Optional[VectorStore]:
+        """
+        Build the vector store as BaseRag.generate_vector_store() does. A synced source is synced first,
+        unless it was synced less than min_sync_interval seconds ago, so that a cached or shared vector store
+        is only reused while none of its stored pages changed.
+
+        :param loader_args: Dictionary containing 'url', 'space_key', and/or 'page_ids' of the Confluence pages to load
+        :param postgres_config: PostgreSQL configuration (required for postgres vector store)
+        :param vector_store_type: Type of vector store to create
+        :return: Vector store containing the embedded page chunks
+        """
+        if self.sync_state is None:
+            return await super().generate_vector_store(loader_args, postgres_config, vector_store_type)
+
+        source: str = ConfluenceSyncState.make_source(self.get_source_identity(loader_args))
+        synced_at: Optional[float] = self.sync_state.get_synced_at(source)
+        if synced_at is None or time.time() - synced_at >= self.min_sync_interval:
+            self._synced_documents = await self.sync_documents(loader_args)
+        fingerprint: str = self.sync_state.get_fingerprint(source)
+        cache_key: str = self.get_vector_store_cache_key(loader_args, vector_store_type)
+        use_vector_store_cache: bool = self.use_vector_store_cache
+        rebuild: bool = BUILT_SYNC_FINGERPRINTS.get(cache_key) != fingerprint
+        if rebuild:
+            # Rebuild from the synced pages, and publish a new version of a shared vector store
+            VECTOR_STORE_CACHE.invalidate(cache_key)
+            self.use_vector_store_cache = False
+            if self._synced_documents is None:
+                # Synced recently, possibly by another process sharing the sync state
+                self._synced_documents = self.sync_state.get_documents(source)
+        try:
+            vectorstore: Optional[VectorStore] = await super().generate_vector_store(
+                loader_args, postgres_config, vector_store_type
+            )
+        finally:
+            self.use_vector_store_cache = use_vector_store_cache
+            self._synced_documents = None
+        if vectorstore is not None:
+            BUILT_SYNC_FINGERPRINTS[cache_key] = fingerprint
+            if (
+                rebuild
+                and use_vector_store_cache
+                and vector_store_type in IN_MEMORY_VECTOR_STORE_TYPES
+                and not self.shared_vector_store_dir
+            ):
+                # The rebuild skipped the cache, which later calls reuse until the pages change again
+                VECTOR_STORE_CACHE.put(cache_key, vectorstore)
+        return vectorstore
+
+    async def sync_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
+        """
+        Bring the pages stored in the sync state up to date, then return all of them.
+
+        The first sync, or a full sync, loads every page. Later syncs only download the pages
+        modified since the cursor of the last sync, and remove the pages no longer found by the
+        page selection arguments. Pages are only removed when all pages in scope could be listed.
+        If Confluence cannot be reached, the stored pages are returned as they are.
+
+        :param loader_args: Dictionary containing 'url', 'space_key', and/or 'page_ids' of the Confluence pages to load
+        :return: List of all synced Confluence pages
+        """
+        source: str = ConfluenceSyncState.make_source(self.get_source_identity(loader_args))
+        started_at: datetime = datetime.now(timezone.utc)
+        cursor: Optional[str] = None if self.full_sync else self.sync_state.get_cursor(source)
+
+        if cursor is None:
+            docs: Optional[List[Document]] = await self._load_pages(loader_args)
+            if docs is None:
+                return self.sync_state.get_documents(source)
+            self.sync_state.replace_documents(source, docs)
+            logger.info("Fully synced %d Confluence pages\n", len(docs))
+        else:
+            scope: str = scope_cql(loader_args)
+            other_args: Dict[str, Any] = {
+                arg: arg_value for arg, arg_value in loader_args.items() if arg not in SCOPE_LOADER_ARGS
+            }
+            changed: Optional[List[Document]] = await self._load_pages(
+                {**other_args, "cql": changed_since_cql(scope, cursor)}
+            )
+            if changed is None:
+                return self.sync_state.get_documents(source)
+            page_ids: Optional[Set[str]] = await self._list_page_ids({**other_args, "cql": scope})
+
+            # The search overlaps the last sync, skip the pages already stored at the same version
+            versions: Dict[str, Optional[str]] = self.sync_state.get_versions(source)
+            modified: List[Document] = [
+                doc for doc in changed if versions.get(str(doc.metadata["id"]), "") != doc.metadata.get("when")
+            ]
+            deleted: Set[str] = set()
+            if page_ids is None:
+                # Pages missing from an incomplete listing may still be in scope
+                logger.warning("Could not list all Confluence pages in scope, skipping the removal of deleted pages\n")
+            else:
+                deleted = set(versions) - page_ids - {str(doc.metadata["id"]) for doc in changed}
+            self.sync_state.put_documents(source, modified)
+            self.sync_state.delete_documents(source, deleted)
+            logger.info(
+                "Synced Confluence pages modified since %s: %d new or modified, %d deleted\n",
+                cursor, len(modified), len(deleted)
+            )
+
+        cursor = self.sync_state.commit_sync(source, started_at)
+        logger.info("Confluence sync cursor is now %s\n", cursor)
+        return self.sync_state.get_documents(source)
+
+    def _create_fetcher(self, loader_args: Dict[str, Any]) -> ConfluenceFetcher:
+        """
+        :param loader_args: ConfluenceLoader arguments
+        :return: Fetcher of the pages selected by the arguments
+        """
+        # Let throttled responses through to the fetcher, which slows down all its requests at once
+        confluence_kwargs: Dict[str, Any] = {
+            "retry_with_header": False,
+            **(loader_args.get("confluence_kwargs") or {}),
+        }
+        loader = ConfluenceLoader(**{**loader_args, "confluence_kwargs": confluence_kwargs})
+        return ConfluenceFetcher(loader, max_concurrency=self.fetch_concurrency, max_retries=self.fetch_max_retries)
+
+    async def _load_pages(self, loader_args: Dict[str, Any]) -> Optional[List[Document]]:
+        """
+        :param loader_args: ConfluenceLoader arguments
+        :return: The loaded Confluence pages, or None if they could not be loaded
+        """
         url = loader_args.get("url")
-        docs: List[Document] = []
         try:
-            loader = ConfluenceLoader(**loader_args)
-            docs = await loader.aload()
-            logger.info("Successfully loaded Confluence pages from %s", url)
+            docs: List[Document] = await self._create_fetcher(loader_args).aload()
+            logger.info("Successfully loaded %d Confluence pages from %s", len(docs), url)
+            return docs
         except HTTPError as http_error:
             logger.error("HTTP error while loading from %s: %s", url, http_error)
-            return []
         except ApiPermissionError as api_error:
             logger.error("API Permission error while loading from %s: %s", url, api_error)
+        except RequestsConnectionError as connection_error:
+            logger.error("Connection error while loading from %s: %s", url, connection_error)
+        return None
+
+    async def _list_page_ids(self, loader_args: Dict[str, Any]) -> Optional[Set[str]]:
+        """
+        List all pages matching a CQL query without downloading their content, however many there are,
+        since the pages missing from the list are removed from the sync state.
+
+        :param loader_args: ConfluenceLoader arguments with the "cql" query
+        :return: Ids of the matching pages, or None if they could not all be listed
+        """
+        url = loader_args.get("url")
+        try:
+            pages: List[Dict[str, Any]] = await self._create_fetcher(loader_args).search(
+                loader_args["cql"], all_pages=True
+            )
+        except HTTPError as http_error:
+            logger.error("HTTP error while listing pages from %s: %s", url, http_error)
+            return None
+        except ApiPermissionError as api_error:
+            logger.error("API Permission error while listing pages from %s: %s", url, api_error)
+            return None
+        except RequestsConnectionError as connection_error:
+            logger.error("Connection error while listing pages from %s: %s", url, connection_error)
+            return None
+        return {str(page["id"]) for page in pages}
 
-        return docs
+    async def _load_existing_vector_store(self, vector_store_type: str = "in_memory") -> Optional[VectorStore]:
+        """Synced sources are rebuilt from the synced pages, so that the vector store file does not go stale."""
+        if self.sync_state is not None:
+            return None
+        return await super()._load_existing_vector_store(vector_store_type)
@@ -14,10 +14,10 @@
 import logging
 import os
 from typing import Any
+from typing import AsyncIterator
 from typing import Dict
 from typing import List
 
-from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_core.documents import Document
 from langchain_core.vectorstores import VectorStore
 
@@ -25,6 +25,11 @@ from neuro_san.interfaces.coded_tool import CodedTool
 
 from coded_tools.base_rag import BaseRag
 from coded_tools.base_rag import PostgresConfig
+from coded_tools.rag.numpy_vector_store import validate_dtype
+from coded_tools.rag.pdf_loader import DEFAULT_LOAD_TIMEOUT
+from coded_tools.rag.pdf_loader import DEFAULT_MAX_CONCURRENCY
+from coded_tools.rag.pdf_loader import iter_pdfs
+from coded_tools.rag.pdf_loader import load_pdfs
 
 INVALID_PATH_PATTERN = r"[<>:\"|?*\x00-\x1F]"
 
@@ -32,6 +37,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# pylint: disable=too-many-instance-attributes
 class PdfRag(CodedTool, BaseRag):
     """
     CodedTool implementation which provides a way to do RAG on pdf files
@@ -46,6 +52,33 @@ class PdfRag(CodedTool, BaseRag):
           "urls": list of pdf files
           "save_vector_store": save to JSON file if True
           "vector_store_path": relative path to this file
+          "vector_store_dtype": "float32" or "float16" precision of a ".npy" vector store file
+          "use_vector_store_cache": reuse the vector store built by an earlier call if True
+          "shared_vector_store_dir": directory through which worker processes share in-memory vector stores
+          "use_query_cache": reuse the results of earlier identical or near-identical queries if True
+          "retrieval_mode": "vector", "hybrid" or "lexical" ranking of the chunks
+          "embeddings": dictionary of the "provider" ("openai", "hashing" or "sentence_transformers")
+              and its arguments, such as "model" and "dimensions"
+          "embedding_cache_path": path to the persistent embedding cache
+          "chunking": dictionary of "strategy", "chunk_size", "chunk_overlap" and "encoding_name"
+          "dedup": dictionary of the "threshold", "num_perm", "shingle_size" and "seed"
+              of the near-duplicate chunk elimination
+          "context": dictionary of the "token_budget", "fetch_k", "lambda_mult", "merge_overlaps"
+              and "include_sources" of the assembly of the retrieved chunks
+          "postgres_sync_mode": "attach" or "incremental"
+          "postgres_sync_batch_size": rows per batch in "incremental" mode
+          "postgres_ingest_mode": "insert" or "copy" to fill a new postgres table
+          "postgres_copy_batch_size": rows per COPY in "copy" mode
+          "postgres_index": dictionary of the "type" ("hnsw", "ivfflat" or "none"), "m", "ef_construction",
+              "lists", "ef_search", "probes" and "rebuild" of the ANN index of the postgres table
+          "postgres_explain": log the query plan and timings of each postgres search if True
+          "ivf_lists": number of clusters of the "ivf" vector store
+          "ivf_probes": number of clusters searched per query by the "ivf" vector store
+          "matryoshka_dimensions": leading embedding dimensions scored first by the "matryoshka" vector store
+          "matryoshka_rerank_factor": candidates reranked with the full embeddings per result
+              by the "matryoshka" vector store
+          "max_concurrency": maximum number of pdf files loaded at once
+          "load_timeout": seconds allowed to load each pdf file
 
         :param sly_data: A dictionary whose keys are defined by the agent
             hierarchy, but whose values are meant to be kept out of the
@@ -79,8 +112,36 @@ class PdfRag(CodedTool, BaseRag):
         # Save the generated vector store as a JSON file if True
         self.save_vector_store = args.get("save_vector_store", False)
 
+        # Reuse the vector store built by an earlier call in this process if True
+        self.use_vector_store_cache = args.get("use_vector_store_cache", True)
+
+        # Reuse the results of earlier identical or near-identical queries if True
+        self.use_query_cache = args.get("use_query_cache", True)
+
+        # Rank chunks by embedding similarity, BM25 keyword score, or both
+        self.retrieval_mode = args.get("retrieval_mode", "vector")
+
         # Configure the vector store path
         self.configure_vector_store_path(args.get("vector_store_path"))
+        self.vector_store_dtype = validate_dtype(args.get("vector_store_dtype", "float32"))
+
+        # Share in-memory vector stores with the other worker processes of this host through memory-mapped files
+        self.configure_shared_vector_store(args.get("shared_vector_store_dir"))
+
+        # Embeddings provider, such as "hashing" to run offline
+        self.configure_embeddings(args.get("embeddings"))
+
+        # Only embed chunks that are not in the persistent embedding cache yet
+        self.configure_embedding_cache(args.get("embedding_cache_path"))
+
+        # Chunking strategy and sizes
+        self.configure_chunking(args.get("chunking"))
+
+        # Drop near-duplicate chunks before embedding
+        self.configure_dedup(args.get("dedup"))
+
+        # Rerank, merge and fit the retrieved chunks in a token budget
+        self.configure_context(args.get("context"))
 
         # For PostgreSQL vector store
         if vector_store_type == "postgres":
@@ -92,12 +153,32 @@ class PdfRag(CodedTool, BaseRag):
                 database=os.getenv("POSTGRES_DB"),
                 table_name=args.get("table_name")
             )
+            self.postgres_sync_mode = args.get("postgres_sync_mode", "attach")
+            self.postgres_sync_batch_size = args.get("postgres_sync_batch_size", self.postgres_sync_batch_size)
+            self.postgres_ingest_mode = args.get("postgres_ingest_mode", "insert")
+            self.postgres_copy_batch_size = args.get("postgres_copy_batch_size", self.postgres_copy_batch_size)
+            self.configure_postgres_index(args.get("postgres_index"))
+            self.postgres_explain = args.get("postgres_explain", False)
         else:
             postgres_config = None
 
+        # For approximate nearest-neighbour search over an in-memory vector store
+        if vector_store_type == "ivf":
+            self.ivf_lists = args.get("ivf_lists")
+            self.ivf_probes = args.get("ivf_probes", self.ivf_probes)
+
+        # For a two-stage search prefiltering on the leading dimensions of Matryoshka embeddings
+        if vector_store_type == "matryoshka":
+            self.matryoshka_dimensions = args.get("matryoshka_dimensions", self.matryoshka_dimensions)
+            self.matryoshka_rerank_factor = args.get("matryoshka_rerank_factor", self.matryoshka_rerank_factor)
+
         # Prepare the vector store
         vector_store: VectorStore = await self.generate_vector_store(
-            loader_args={"urls": urls},
+            loader_args={
+                "urls": urls,
+                "max_concurrency": args.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+                "load_timeout": args.get("load_timeout", DEFAULT_LOAD_TIMEOUT),
+            },
             postgres_config=postgres_config,
             vector_store_type=vector_store_type
         )
@@ -105,25 +186,40 @@ class PdfRag(CodedTool, BaseRag):
         # Run the query against the vector store
         return await self.query_vectorstore(vector_store, query)
 
+    def get_source_identity(self, loader_args: Dict[str, Any]) -> Any:
+        """
+        :param loader_args: Dictionary containing 'urls' and loading options
+        :return: The URLs, as the loading options do not change the loaded documents
+        """
+        return {"urls": loader_args.get("urls", [])}
+
     async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
         """
-        Load PDF documents from URLs.
+        Load PDF documents from URLs concurrently, parsing them in a process pool.
+        A file that fails or times out is logged and skipped.
+
+        :param loader_args: Dictionary containing 'urls' (list of PDF file URLs),
+            and optionally 'max_concurrency' and 'load_timeout' (seconds per file)
+        :return: List of loaded PDF documents, in the order of the URLs
+        """
+        return await load_pdfs(
+            urls=loader_args.get("urls", []),
+            max_concurrency=loader_args.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            timeout=loader_args.get("load_timeout", DEFAULT_LOAD_TIMEOUT),
+        )
+
+    async def iter_documents(self, loader_args: Dict[str, Any]) -> AsyncIterator[Document]:
+        """
+        Yield the pages of the PDF documents as the files are loaded, so that chunks
+        are embedded while the remaining files are still being loaded.
 
-        :param loader_args: Dictionary containing 'urls' (list of PDF file URLs)
-        :return: List of loaded PDF documents
+        :param loader_args: Dictionary containing 'urls' (list of PDF file URLs),
+            and optionally 'max_concurrency' and 'load_timeout' (seconds per file)
+        :return: Async iterator over the pages, in the order of the URLs
         """
-        docs: List[Document] = []
-        urls: List[str] = loader_args.get("urls", [])
-
-        for url in urls:
-            try:
-                loader = PyMuPDFLoader(file_path=url)
-                doc: List[Document] = await loader.aload()
-                docs.extend(doc)
-                logger.info("Successfully loaded PDF file from %s", url)
-            except FileNotFoundError:
-                logger.error("File not found: %s", url)
-            except ValueError as e:
-                logger.error("Invalid file path or unsupported input: %s – %s", url, e)
-
-        return docs
+        async for document in iter_pdfs(
+            urls=loader_args.get("urls", []),
+            max_concurrency=loader_args.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            timeout=loader_args.get("load_timeout", DEFAULT_LOAD_TIMEOUT),
+        ):
+            yield document
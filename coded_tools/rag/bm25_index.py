@@ -0,0 +1,167 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import math
+import re
+from collections import Counter
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Standard BM25 parameters: term frequency saturation and document length normalization
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+# Rank constant of reciprocal rank fusion, from the original paper. Damps the weight of the very first ranks.
+DEFAULT_RRF_K = 60
+# Rough memory of one posting: a row and a term frequency in two python lists
+POSTING_BYTES = 64
+
+# Words, keeping identifiers such as part numbers ("AB-1234", "v2.1", "policy_id") together
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_./][^\W_]+)*")
+TOKEN_SEPARATORS = re.compile(r"[-_./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    :param text: The text
+    :return: Case-folded words of the text. Identifiers are kept whole and also split into
+        their parts, so that "AB-1234" matches queries for either "AB-1234" or "1234".
+    """
+    tokens: List[str] = []
+    for token in TOKEN_PATTERN.findall(text.casefold()):
+        tokens.append(token)
+        parts: List[str] = TOKEN_SEPARATORS.split(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class Bm25Index:
+    """
+    In-memory inverted index ranking texts by Okapi BM25.
+
+    Texts are identified by their row, in the order they were added. Each term maps to
+    the rows containing it and its frequency in each, so a query only touches the
+    postings of its own terms. Rows can be appended at any time; there is no deletion.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        tokenizer: Callable[[str], List[str]] = tokenize,
+    ):
+        """
+        :param k1: Term frequency saturation
+        :param b: Document length normalization, from 0 (none) to 1 (full)
+        :param tokenizer: Function splitting texts and queries into terms
+        """
+        self.k1: float = k1
+        self.b: float = b
+        self.tokenizer: Callable[[str], List[str]] = tokenizer
+        # Term -> (rows, term frequencies)
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._lengths: List[int] = []
+        self._length_array: Optional[np.ndarray] = None
+        self._total_length: int = 0
+        self._num_postings: int = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index."""
+        return self._num_postings * POSTING_BYTES + len(self._postings) * 100 + len(self._lengths) * 8
+
+    def add_texts(self, texts: Iterable[str]):
+        """
+        Index texts as the next rows.
+
+        :param texts: The texts
+        """
+        for text in texts:
+            row: int = len(self._lengths)
+            term_counts: Counter = Counter(self.tokenizer(text))
+            for term, count in term_counts.items():
+                rows, frequencies = self._postings.setdefault(term, ([], []))
+                rows.append(row)
+                frequencies.append(count)
+            self._num_postings += len(term_counts)
+            length: int = sum(term_counts.values())
+            self._lengths.append(length)
+            self._total_length += length
+        self._length_array = None
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """
+        :param query: The query
+        :param k: Number of rows to return
+        :return: (row, BM25 score) tuples of the k best rows matching at least one query term, best first
+        """
+        terms: List[str] = [term for term in dict.fromkeys(self.tokenizer(query)) if term in self._postings]
+        if not terms or k <= 0:
+            return []
+
+        if self._length_array is None:
+            self._length_array = np.asarray(self._lengths, dtype=np.float32)
+        num_rows: int = len(self._lengths)
+        average_length: float = max(self._total_length / num_rows, 1e-9)
+        scores: np.ndarray = np.zeros(num_rows, dtype=np.float32)
+        for term in terms:
+            rows: np.ndarray = np.asarray(self._postings[term][0], dtype=np.int64)
+            frequencies: np.ndarray = np.asarray(self._postings[term][1], dtype=np.float32)
+            idf: float = math.log(1.0 + (num_rows - len(rows) + 0.5) / (len(rows) + 0.5))
+            norms: np.ndarray = self.k1 * (1.0 - self.b + self.b * self._length_array[rows] / average_length)
+            # Rows are unique within a posting list, so fancy-index accumulation is safe
+            scores[rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norms)
+
+        matched: np.ndarray = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        best: np.ndarray = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(row), float(scores[row])) for row in best]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]],
+    k: int = DEFAULT_RRF_K,
+    limit: Optional[int] = None,
+) -> List[Document]:
+    """
+    Merge rankings by reciprocal rank fusion: each document scores the sum of 1 / (k + rank)
+    over the rankings it appears in. Only ranks are used, so rankings with incomparable
+    scores, such as cosine similarities and BM25 scores, can be fused.
+
+    :param rankings: Lists of documents, best first
+    :param k: Rank constant
+    :param limit: Maximum number of documents to return, or None for all
+    :return: The fused ranking, best first
+    """
+    scores: Dict[Hashable, float] = {}
+    documents: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key: Hashable = document.id or document.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, document)
+    # Stable sort: ties keep the order of the first ranking
+    fused: List[Hashable] = sorted(scores, key=lambda key: -scores[key])
+    return [documents[key] for key in fused[:limit]]
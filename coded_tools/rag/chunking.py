@@ -0,0 +1,221 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import copy
+import re
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import tiktoken
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_text_splitters import TextSplitter
+
+CHUNK_SIZE = 100
+CHUNK_OVERLAP = 50
+DEFAULT_ENCODING = "gpt2"
+CHUNKING_STRATEGIES = ("token", "page", "paragraph", "heading")
+
+# Blank lines separate paragraphs
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Markdown headings, numbered section titles ("2.1 Scope") and short all-caps lines
+HEADING_LINE = re.compile(
+    r"^(?:#{1,6}[ \t]+\S.*|(?:\d+\.)*\d+\.?[ \t]+[A-Z][^.!?:;\n]{0,80}|[A-Z][A-Z0-9 ,&/()'-]{2,80})$", re.MULTILINE
+)
+
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    """
+    How documents are split into chunks before embedding.
+
+    strategy is one of:
+        "token": recursive split on paragraphs, lines and words into chunks of chunk_size tokens
+        "page": one chunk per loaded document (a PDF page), split by paragraph only when larger than chunk_size
+        "paragraph": whole paragraphs merged up to chunk_size tokens, overlapping by whole paragraphs
+        "heading": sections starting at each heading, split by paragraph when larger than chunk_size,
+            with the heading also kept in the "heading" metadata of each chunk
+    """
+
+    strategy: str = "token"
+    chunk_size: int = CHUNK_SIZE
+    chunk_overlap: int = CHUNK_OVERLAP
+    encoding_name: str = DEFAULT_ENCODING
+
+    def __post_init__(self):
+        if self.strategy not in CHUNKING_STRATEGIES:
+            raise ValueError(
+                f"Unknown chunking strategy '{self.strategy}'. Available: {', '.join(CHUNKING_STRATEGIES)}"
+            )
+        if self.chunk_size <= 0 or not 0 <= self.chunk_overlap < self.chunk_size:
+            raise ValueError(
+                f"Invalid chunking sizes: chunk_size={self.chunk_size}, chunk_overlap={self.chunk_overlap}. "
+                "chunk_overlap must be at least 0 and smaller than chunk_size."
+            )
+
+    @classmethod
+    def from_dict(cls, chunking_args: Optional[Dict[str, Any]]) -> "ChunkingConfig":
+        """
+        :param chunking_args: Dictionary with any of "strategy", "chunk_size", "chunk_overlap"
+            and "encoding_name", as given in the tool arguments or the HOCON file
+        :return: The chunking configuration, with defaults for missing keys
+        :raises ValueError: If a key or value is not valid
+        """
+        chunking_args = dict(chunking_args or {})
+        unknown: List[str] = sorted(set(chunking_args) - {config_field.name for config_field in fields(cls)})
+        if unknown:
+            raise ValueError(f"Unknown chunking arguments: {', '.join(unknown)}")
+        return cls(**chunking_args)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: JSON-serializable configuration, part of the cache keys of the vector stores built with it
+        """
+        return asdict(self)
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(encoding_name: str) -> tiktoken.Encoding:
+    """
+    :param encoding_name: Name of the tiktoken encoding
+    :return: The encoding, loaded once per process
+    """
+    return tiktoken.get_encoding(encoding_name)
+
+
+def get_token_counter(encoding_name: str) -> Callable[[str], int]:
+    """
+    :param encoding_name: Name of the tiktoken encoding
+    :return: Function counting the tokens of a text
+    """
+    tokenizer: tiktoken.Encoding = get_tokenizer(encoding_name)
+
+    def count_tokens(text: str) -> int:
+        # Special token strings in documents are counted as plain text
+        return len(tokenizer.encode(text, disallowed_special=()))
+
+    return count_tokens
+
+
+class ParagraphTextSplitter(TextSplitter):
+    """
+    Merges whole paragraphs into chunks of up to chunk_size tokens, overlapping by whole
+    paragraphs. Only paragraphs larger than a chunk are split inside.
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._fallback = RecursiveCharacterTextSplitter(**kwargs)
+
+    def split_paragraphs(self, text: str) -> List[str]:
+        """
+        :param text: The text
+        :return: The paragraphs of the text, with paragraphs larger than a chunk already split
+        """
+        pieces: List[str] = []
+        for paragraph in PARAGRAPH_BREAK.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if self._length_function(paragraph) > self._chunk_size:
+                pieces.extend(self._fallback.split_text(paragraph))
+            else:
+                pieces.append(paragraph)
+        return pieces
+
+    def split_text(self, text: str) -> List[str]:
+        return self._merge_splits(self.split_paragraphs(text), "\n\n")
+
+
+class PageTextSplitter(ParagraphTextSplitter):
+    """
+    Keeps each document, such as a PDF page, whole as one chunk. Documents larger than
+    chunk_size tokens are split by paragraph.
+    """
+
+    def split_text(self, text: str) -> List[str]:
+        text = text.strip()
+        if not text:
+            return []
+        if self._length_function(text) <= self._chunk_size:
+            return [text]
+        return super().split_text(text)
+
+
+class HeadingTextSplitter(ParagraphTextSplitter):
+    """
+    Splits documents into sections starting at each heading line, so that no chunk spans
+    two sections. Sections larger than chunk_size tokens are split by paragraph. The
+    heading of each chunk is also stored in its "heading" metadata, as only the first
+    chunk of a section contains it.
+    """
+
+    @staticmethod
+    def split_sections(text: str) -> List[Tuple[str, str]]:
+        """
+        :param text: The text
+        :return: (heading, section text) pairs. The section text starts with its heading line.
+            Text before the first heading has an empty heading.
+        """
+        sections: List[Tuple[str, str]] = []
+        heading: str = ""
+        start: int = 0
+        for match in HEADING_LINE.finditer(text):
+            sections.append((heading, text[start : match.start()]))
+            heading = match.group(0).lstrip("#").strip()
+            start = match.start()
+        sections.append((heading, text[start:]))
+        return [(heading, body) for heading, body in sections if body.strip()]
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for _, body in self.split_sections(text) for chunk in super().split_text(body)]
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[Dict[Any, Any]]] = None) -> List[Document]:
+        documents: List[Document] = []
+        for text, metadata in zip(texts, metadatas or [{}] * len(texts)):
+            for heading, body in self.split_sections(text):
+                for chunk in super().split_text(body):
+                    chunk_metadata: Dict[Any, Any] = copy.deepcopy(metadata)
+                    if heading:
+                        chunk_metadata["heading"] = heading
+                    documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
+
+
+SPLITTER_CLASSES: Dict[str, type] = {
+    "token": RecursiveCharacterTextSplitter,
+    "page": PageTextSplitter,
+    "paragraph": ParagraphTextSplitter,
+    "heading": HeadingTextSplitter,
+}
+
+
+@lru_cache(maxsize=32)
+def get_text_splitter(config: ChunkingConfig) -> TextSplitter:
+    """
+    Splitters hold no state between calls, so one instance per configuration is shared by the process.
+
+    :param config: The chunking configuration
+    :return: The text splitter implementing the configuration
+    """
+    return SPLITTER_CLASSES[config.strategy](
+        chunk_size=config.chunk_size,
+        chunk_overlap=config.chunk_overlap,
+        length_function=get_token_counter(config.encoding_name),
+    )
@@ -0,0 +1,417 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from langchain_community.document_loaders.confluence import ConfluenceLoader
+from langchain_core.documents import Document
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import HTTPError
+from requests.exceptions import Timeout
+
+from coded_tools.rag.confluence_sync import quote_cql
+
+DEFAULT_FETCH_CONCURRENCY = 8
+DEFAULT_FETCH_MAX_RETRIES = 5
+# Responses asking the client to slow down, which halve the concurrency
+THROTTLE_STATUS_CODES = {429, 503}
+# Transient server errors, retried at the same concurrency
+RETRY_STATUS_CODES = THROTTLE_STATUS_CODES | {500, 502, 504}
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+CONTENT_PATH = "rest/api/content"
+SEARCH_PATH = "rest/api/content/search"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str], clock: Callable[[], float] = time.time) -> Optional[float]:
+    """
+    :param value: Retry-After header, in seconds or as an HTTP date
+    :param clock: Wall clock in seconds, to compute the delay until an HTTP date
+    :return: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at: datetime = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - clock())
+
+
+# pylint: disable=too-many-instance-attributes
+class AdaptiveConcurrency:
+    """
+    Concurrency limit adapting to the rate limits of an API, by additive increase and multiplicative decrease.
+
+    Each successful request raises the limit by 1 / limit, so by about one per round of requests,
+    up to max_concurrency. A throttled request halves the limit and pauses all new requests
+    for the Retry-After delay of the response. The other requests of the burst throttled during
+    that pause only extend it, so that the limit is halved at most once per pause.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """
+        :param max_concurrency: Maximum number of requests in flight
+        :param clock: Monotonic clock in seconds
+        :param sleep: Coroutine function sleeping for a number of seconds
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"Invalid max_concurrency: {max_concurrency}")
+        self.max_concurrency: int = max_concurrency
+        self.limit: float = float(max_concurrency)
+        self.in_flight: int = 0
+        self.throttled: int = 0
+        self._paused_until: float = 0.0
+        self._clock: Callable[[], float] = clock
+        self._sleep: Callable[[float], Awaitable[Any]] = sleep
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for the end of any pause and for a free slot under the current limit, and take the slot."""
+        while (pause := self._paused_until - self._clock()) > 0:
+            await self._sleep(pause)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, throttled: bool = False, pause: float = 0.0):
+        """
+        Free the slot of a finished request and adapt the limit.
+
+        :param throttled: True if the API asked to slow down
+        :param pause: Seconds to hold back all new requests, when throttled
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                now: float = self._clock()
+                if now >= self._paused_until:
+                    self.limit = max(1.0, self.limit / 2.0)
+                self._paused_until = max(self._paused_until, now + pause)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class ConfluenceFetcher:
+    """
+    Loads the pages selected by a ConfluenceLoader with concurrent requests.
+
+    Pages of a space are fetched as concurrent ranges, pages selected by id one request each,
+    and pages selected by label or CQL through the sequential, cursor paginated search.
+    Restrictions and attachments of the pages are then fetched concurrently, and the pages
+    converted to documents by the loader, so that they match the documents of ConfluenceLoader.load().
+    Every request shares one AdaptiveConcurrency, and is retried on throttling and transient errors.
+    """
+
+    def __init__(
+        self,
+        loader: ConfluenceLoader,
+        max_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+        max_retries: int = DEFAULT_FETCH_MAX_RETRIES,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """
+        :param loader: Loader holding the Confluence client and the page selection arguments
+        :param max_concurrency: Maximum number of requests in flight
+        :param max_retries: Retries of a throttled or failed request before giving up
+        :param sleep: Coroutine function sleeping for a number of seconds
+        """
+        self.loader: ConfluenceLoader = loader
+        self.max_retries: int = max_retries
+        self.concurrency = AdaptiveConcurrency(max_concurrency, sleep=sleep)
+        self.requests: int = 0
+        self.retries: int = 0
+        self._sleep: Callable[[float], Awaitable[Any]] = sleep
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with the request counters and the current concurrency limit
+        """
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.concurrency.throttled,
+            "concurrency": int(self.concurrency.limit),
+        }
+
+    async def request(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking Confluence call in a worker thread, within the concurrency limit.
+
+        :param function: Function sending one or more requests through the Confluence client
+        :return: Result of the function
+        :raises HTTPError: If the request failed with a non transient error, or after max_retries
+        """
+        attempt: int = 0
+        while True:
+            await self.concurrency.acquire()
+            self.requests += 1
+            try:
+                result: Any = await asyncio.to_thread(function, *args, **kwargs)
+            except HTTPError as http_error:
+                status: Optional[int] = http_error.response.status_code if http_error.response is not None else None
+                if status not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    await self.concurrency.release()
+                    raise
+                delay: float = self._backoff(attempt)
+                if status in THROTTLE_STATUS_CODES:
+                    retry_after: Optional[float] = parse_retry_after(http_error.response.headers.get("Retry-After"))
+                    delay = delay if retry_after is None else retry_after
+                    await self.concurrency.release(throttled=True, pause=delay)
+                else:
+                    await self.concurrency.release()
+                    await self._sleep(delay)
+                logger.info("Confluence answered %s, retrying in %.1f s. %s\n", status, delay, self.stats())
+            except (RequestsConnectionError, Timeout) as connection_error:
+                await self.concurrency.release()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.info("Confluence request failed: %s, retrying in %.1f s\n", connection_error, delay)
+                await self._sleep(delay)
+            else:
+                await self.concurrency.release()
+                return result
+            attempt += 1
+            self.retries += 1
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**attempt)
+
+    def _expand(self) -> str:
+        """
+        :return: Fields expanded in the page responses, as requested by ConfluenceLoader
+        """
+        return ",".join(
+            [self.loader.content_format.value, "version", *(["metadata.labels"] if self.loader.include_labels else [])]
+        )
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.request(self.loader.confluence.get, path, params=params)
+
+    async def fetch_space(self, space_key: str) -> List[Dict[str, Any]]:
+        """
+        Fetch the pages of a space as concurrent ranges.
+
+        The first range tells how many pages the server returns per request, which can be fewer than
+        the requested limit. Later ranges are then fetched concurrently until one reaches the end of the space.
+
+        :param space_key: Key of the space
+        :return: Pages of the space in the order of the API, at most the max_pages of the loader
+        """
+        params: Dict[str, Any] = {
+            "spaceKey": space_key,
+            "type": "page",
+            "status": "any" if self.loader.include_archived_content else "current",
+            "expand": self._expand(),
+            "limit": self.loader.limit,
+        }
+        first: Dict[str, Any] = await self._get(CONTENT_PATH, {**params, "start": 0})
+        ranges: Dict[int, List[Dict[str, Any]]] = {0: first.get("results", [])}
+        step: int = len(ranges[0])
+        if step == 0 or not first.get("_links", {}).get("next"):
+            return ranges[0][: self.loader.max_pages]
+
+        next_start: int = step
+        end: Optional[int] = None
+
+        async def fetch_ranges():
+            nonlocal next_start, end
+            while next_start < self.loader.max_pages and (end is None or next_start < end):
+                start: int = next_start
+                next_start += step
+                response: Dict[str, Any] = await self._get(CONTENT_PATH, {**params, "start": start, "limit": step})
+                ranges[start] = response.get("results", [])
+                if not ranges[start] or not response.get("_links", {}).get("next"):
+                    end = start if end is None else min(end, start)
+
+        await asyncio.gather(*(fetch_ranges() for _ in range(self.concurrency.max_concurrency)))
+        pages: List[Dict[str, Any]] = [
+            page for start in sorted(ranges) if end is None or start <= end for page in ranges[start]
+        ]
+        return pages[: self.loader.max_pages]
+
+    async def search(self, cql: str, expand: Optional[str] = None, all_pages: bool = False) -> List[Dict[str, Any]]:
+        """
+        Follow the cursor pagination of a CQL search, one request at a time.
+
+        :param cql: CQL query
+        :param expand: Fields expanded in the results, None for the ids and titles only
+        :param all_pages: True to return every matching page, such as to list the pages still in scope,
+            False to stop at the max_pages of the loader
+        :return: Matching pages
+        """
+        max_pages: Optional[int] = None if all_pages else self.loader.max_pages
+        params: Dict[str, Any] = {"cql": cql, "limit": self.loader.limit}
+        if expand:
+            params["expand"] = expand
+        if self.loader.include_archived_content:
+            params["includeArchivedSpaces"] = True
+        pages: List[Dict[str, Any]] = []
+        response: Dict[str, Any] = await self._get(SEARCH_PATH, params)
+        while True:
+            pages.extend(response.get("results", []))
+            next_url: str = response.get("_links", {}).get("next", "")
+            if not next_url or (max_pages is not None and len(pages) >= max_pages):
+                return pages[:max_pages]
+            # The next link carries the query and the cursor
+            response = await self._get(next_url)
+
+    async def fetch_page(self, page_id: str) -> Dict[str, Any]:
+        """
+        :param page_id: Id of the page
+        :return: The page with its content
+        """
+        return await self._get(f"{CONTENT_PATH}/{page_id}", {"expand": self._expand()})
+
+    async def _is_public(self, page: Dict[str, Any]) -> bool:
+        """Same check as ConfluenceLoader.is_public_page(), through the concurrency limit."""
+        if page.get("status") != "current":
+            return False
+        restrictions: Dict[str, Any] = await self._get(f"{CONTENT_PATH}/{page['id']}/restriction/byOperation")
+        read: Dict[str, Any] = restrictions["read"]["restrictions"]
+        return not read["user"]["results"] and not read["group"]["results"]
+
+    def _attachment_text(self, attachment: Dict[str, Any]) -> Optional[str]:
+        """
+        Download an attachment and extract its text, as ConfluenceLoader.process_attachment() does.
+
+        :param attachment: Attachment of a page
+        :return: Title and text of the attachment, or None if its type is not supported or it is gone
+        """
+        media_type: str = attachment["metadata"]["mediaType"]
+        absolute_url: str = self.loader.base_url + attachment["_links"]["download"]
+        ocr_languages: Optional[str] = self.loader.ocr_languages
+        processors: Dict[str, Callable[[], str]] = {
+            "application/pdf": lambda: self.loader.process_pdf(absolute_url, ocr_languages),
+            "image/png": lambda: self.loader.process_image(absolute_url, ocr_languages),
+            "image/jpg": lambda: self.loader.process_image(absolute_url, ocr_languages),
+            "image/jpeg": lambda: self.loader.process_image(absolute_url, ocr_languages),
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document": lambda: self.loader.process_doc(
+                absolute_url
+            ),
+            "application/vnd.ms-excel": lambda: self.loader.process_xls(absolute_url),
+            "image/svg+xml": lambda: self.loader.process_svg(absolute_url, ocr_languages),
+        }
+        processor: Optional[Callable[[], str]] = processors.get(media_type)
+        if processor is None:
+            return None
+        try:
+            return attachment["title"] + processor()
+        except HTTPError as http_error:
+            if http_error.response is not None and http_error.response.status_code == 404:
+                logger.info("Attachment not found at %s\n", absolute_url)
+                return None
+            raise
+
+    async def fetch_attachment_texts(self, page_id: str) -> List[str]:
+        """
+        :param page_id: Id of the page
+        :return: Texts of the supported attachments of the page, downloaded concurrently
+        """
+        response: Dict[str, Any] = await self._get(f"{CONTENT_PATH}/{page_id}/child/attachment", {"limit": 100})
+        attachments: List[Dict[str, Any]] = [
+            attachment
+            for attachment in response.get("results", [])
+            if not self.loader.attachment_filter_func or self.loader.attachment_filter_func(attachment)
+        ]
+        texts: List[Optional[str]] = await asyncio.gather(
+            *(self.request(self._attachment_text, attachment) for attachment in attachments)
+        )
+        return [text for text in texts if text is not None]
+
+    async def process_page(self, page: Dict[str, Any]) -> Optional[Document]:
+        """
+        :param page: Page with its content
+        :return: The page as a document, or None if it is restricted and restricted content is not included
+        """
+        if not self.loader.include_restricted_content and not await self._is_public(page):
+            return None
+        attachment_texts: List[str] = []
+        if self.loader.include_attachments:
+            attachment_texts = await self.fetch_attachment_texts(page["id"])
+        # Converting the page only sends requests when comments are included
+        convert: Callable[..., Awaitable[Document]] = (
+            self.request if self.loader.include_comments else asyncio.to_thread
+        )
+        document: Document = await convert(
+            self.loader.process_page,
+            page,
+            False,
+            self.loader.include_comments,
+            self.loader.include_labels,
+            self.loader.content_format,
+            self.loader.ocr_languages,
+            self.loader.keep_markdown_format,
+            keep_newlines=self.loader.keep_newlines,
+        )
+        if attachment_texts:
+            document.page_content += "".join(attachment_texts)
+        return document
+
+    async def aload(self) -> List[Document]:
+        """
+        :return: Documents of the pages selected by the loader, as ConfluenceLoader.load() returns them
+        :raises ValueError: If the loader selects no pages
+        """
+        if not (self.loader.space_key or self.loader.page_ids or self.loader.label or self.loader.cql):
+            raise ValueError("Must specify at least one among `space_key`, `page_ids`, `label`, `cql` parameters.")
+        start: float = time.perf_counter()
+        pages: List[Dict[str, Any]] = []
+        if self.loader.space_key:
+            pages.extend(await self.fetch_space(self.loader.space_key))
+        page_ids: List[str] = [str(page_id) for page_id in self.loader.page_ids or []]
+        if self.loader.label:
+            labelled: List[Dict[str, Any]] = await self.search(
+                f"label = {quote_cql(self.loader.label)} and type = page"
+            )
+            page_ids.extend(str(page["id"]) for page in labelled)
+        if self.loader.cql:
+            pages.extend(await self.search(self.loader.cql, self._expand()))
+        fetched_ids = {str(page["id"]) for page in pages}
+        pages.extend(
+            await asyncio.gather(
+                *(self.fetch_page(page_id) for page_id in dict.fromkeys(page_ids) if page_id not in fetched_ids)
+            )
+        )
+        documents: List[Optional[Document]] = await asyncio.gather(*(self.process_page(page) for page in pages))
+        loaded: List[Document] = [document for document in documents if document is not None]
+        logger.info(
+            "Fetched %d Confluence pages in %.2f s. %s\n", len(loaded), time.perf_counter() - start, self.stats()
+        )
+        return loaded
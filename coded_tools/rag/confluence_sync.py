@@ -0,0 +1,279 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+
+from langchain_core.documents import Document
+
+# CQL dates have a minute precision and are read in the timezone of the Confluence user,
+# so changes are searched from a day before the cursor. Pages seen again are skipped by their version.
+CURSOR_MARGIN = timedelta(days=1)
+CQL_DATE_FORMAT = "%Y-%m-%d %H:%M"
+# SQLite limits the number of host parameters in a single statement
+SQLITE_BATCH_SIZE = 500
+# Seconds after a sync during which queries use the stored pages without syncing again
+DEFAULT_MIN_SYNC_INTERVAL = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+def quote_cql(value: Any) -> str:
+    """
+    :param value: Value of a CQL field
+    :return: The value as a double-quoted CQL string
+    """
+    escaped: str = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def scope_cql(loader_args: Dict[str, Any]) -> str:
+    """
+    Express the pages selected by ConfluenceLoader arguments as one CQL query.
+
+    :param loader_args: ConfluenceLoader arguments with any of "space_key", "page_ids", "label" and "cql"
+    :return: CQL query matching the same pages
+    :raises ValueError: If the arguments select no pages
+    """
+    clauses: List[str] = []
+    if loader_args.get("space_key"):
+        clauses.append(f"(space = {quote_cql(loader_args['space_key'])} and type = page)")
+    if loader_args.get("page_ids"):
+        page_ids: List[str] = [str(page_id) for page_id in loader_args["page_ids"]]
+        # Page ids are numbers, only quote anything else
+        clauses.append(
+            f"id in ({', '.join(page_id if page_id.isdigit() else quote_cql(page_id) for page_id in page_ids)})"
+        )
+    if loader_args.get("label"):
+        clauses.append(f"(label = {quote_cql(loader_args['label'])} and type = page)")
+    if loader_args.get("cql"):
+        clauses.append(f"({loader_args['cql']})")
+    if not clauses:
+        raise ValueError("Cannot sync Confluence pages without 'space_key', 'page_ids', 'label' or 'cql'")
+    return clauses[0] if len(clauses) == 1 else f"({' or '.join(clauses)})"
+
+
+def changed_since_cql(scope: str, cursor: str) -> str:
+    """
+    :param scope: CQL query of the synced pages, from scope_cql()
+    :param cursor: ISO timestamp of the latest page version seen by the last sync
+    :return: CQL query of the pages of the scope modified since the cursor, less CURSOR_MARGIN
+    """
+    since: datetime = parse_timestamp(cursor) - CURSOR_MARGIN
+    return f'{scope} and lastmodified >= "{since.strftime(CQL_DATE_FORMAT)}"'
+
+
+def parse_timestamp(timestamp: str) -> datetime:
+    """
+    :param timestamp: ISO timestamp, such as the "when" of a Confluence page version
+    :return: The timestamp as an UTC datetime. Timestamps without timezone are taken as UTC.
+    """
+    parsed: datetime = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class ConfluenceSyncState:
+    """
+    Persistent state of the incremental sync of Confluence pages, backed by SQLite.
+
+    For each synced source, keeps the text, metadata and last modification time of every page,
+    and a cursor: the latest modification time seen. A sync then only downloads the pages
+    modified since the cursor, and rebuilds the source from the stored pages.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the SQLite database file
+        """
+        self.path: str = path
+        self._lock = threading.Lock()
+
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS confluence_pages ("
+                "source TEXT NOT NULL, page_id TEXT NOT NULL, last_modified TEXT, "
+                "page_content TEXT NOT NULL, metadata TEXT NOT NULL, PRIMARY KEY (source, page_id))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS confluence_sync_cursors ("
+                "source TEXT PRIMARY KEY, cursor TEXT, synced_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def make_source(source_identity: Any) -> str:
+        """
+        :param source_identity: JSON-serializable identity of the synced pages, without secrets
+        :return: Key of the source in the sync state
+        """
+        return json.dumps(source_identity, sort_keys=True, default=str)
+
+    def get_cursor(self, source: str) -> Optional[str]:
+        """
+        :param source: Key of the source, from make_source()
+        :return: The cursor of the last sync, or None if the source was never synced
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT cursor FROM confluence_sync_cursors WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_synced_at(self, source: str) -> Optional[float]:
+        """
+        :param source: Key of the source
+        :return: Time of the last committed sync as seconds since the epoch, or None if the source was never synced
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT synced_at FROM confluence_sync_cursors WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_versions(self, source: str) -> Dict[str, Optional[str]]:
+        """
+        :param source: Key of the source
+        :return: Dictionary of the ids of the stored pages to their last modification time
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT page_id, last_modified FROM confluence_pages WHERE source = ?", (source,)
+            ).fetchall()
+        return dict(rows)
+
+    def get_fingerprint(self, source: str) -> str:
+        """
+        :param source: Key of the source
+        :return: Hash of the ids and versions of the stored pages, which changes whenever a sync stores
+            or removes a page, including a sync of another process sharing the file
+        """
+        versions: List[List[Optional[str]]] = sorted(
+            [page_id, when] for page_id, when in self.get_versions(source).items()
+        )
+        return hashlib.sha256(json.dumps(versions).encode("utf-8")).hexdigest()
+
+    def get_documents(self, source: str) -> List[Document]:
+        """
+        :param source: Key of the source
+        :return: The stored pages of the source, ordered by page id
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT page_content, metadata FROM confluence_pages WHERE source = ? ORDER BY page_id", (source,)
+            ).fetchall()
+        return [Document(page_content=page_content, metadata=json.loads(metadata)) for page_content, metadata in rows]
+
+    def put_documents(self, source: str, documents: Iterable[Document]):
+        """
+        Store new or modified pages.
+
+        :param source: Key of the source
+        :param documents: Pages loaded by ConfluenceLoader, with their "id" and "when" metadata
+        """
+        rows = [
+            (
+                source,
+                str(document.metadata["id"]),
+                document.metadata.get("when"),
+                document.page_content,
+                json.dumps(document.metadata, default=str),
+            )
+            for document in documents
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO confluence_pages VALUES (?, ?, ?, ?, ?)", rows)
+
+    def delete_documents(self, source: str, page_ids: Iterable[str]):
+        """
+        :param source: Key of the source
+        :param page_ids: Ids of the pages to remove
+        """
+        page_ids = list(page_ids)
+        with self._lock, self._connection:
+            for start in range(0, len(page_ids), SQLITE_BATCH_SIZE):
+                batch: List[str] = page_ids[start : start + SQLITE_BATCH_SIZE]
+                placeholders: str = ",".join("?" * len(batch))
+                self._connection.execute(
+                    f"DELETE FROM confluence_pages WHERE source = ? AND page_id IN ({placeholders})", [source, *batch]
+                )
+
+    def replace_documents(self, source: str, documents: Iterable[Document]):
+        """
+        Store the pages of a full sync, removing all previously stored pages of the source.
+
+        :param source: Key of the source
+        :param documents: All pages of the source
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM confluence_pages WHERE source = ?", (source,))
+        self.put_documents(source, documents)
+
+    def commit_sync(self, source: str, started_at: datetime) -> str:
+        """
+        Move the cursor of the source to the latest modification time of its stored pages.
+
+        :param source: Key of the source
+        :param started_at: Time the sync started, the cursor when no stored page has a modification time
+        :return: The new cursor
+        """
+        latest: Set[datetime] = {
+            parse_timestamp(last_modified) for last_modified in self.get_versions(source).values() if last_modified
+        }
+        cursor: str = (max(latest) if latest else started_at).isoformat()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO confluence_sync_cursors VALUES (?, ?, ?)", (source, cursor, time.time())
+            )
+        return cursor
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+_STATES: Dict[str, ConfluenceSyncState] = {}
+_STATES_LOCK = threading.Lock()
+
+
+def get_confluence_sync_state(path: str) -> ConfluenceSyncState:
+    """
+    Return the process-wide ConfluenceSyncState for a database file, opening it on first use.
+
+    :param path: Absolute path to the SQLite database file
+    :return: The shared ConfluenceSyncState
+    """
+    with _STATES_LOCK:
+        state: Optional[ConfluenceSyncState] = _STATES.get(path)
+        if state is None:
+            state = ConfluenceSyncState(path)
+            _STATES[path] = state
+        return state
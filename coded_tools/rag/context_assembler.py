@@ -0,0 +1,268 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import fields
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+DEFAULT_CONTEXT_FETCH_K = 20
+DEFAULT_LAMBDA_MULT = 0.7
+# Shortest common text of two chunks treated as their overlap, so that chunks sharing a few words are not merged
+MIN_OVERLAP_CHARS = 20
+PASSAGE_SEPARATOR = "\n\n"
+
+
+@dataclass(frozen=True)
+class ContextConfig:
+    """
+    How retrieved chunks are assembled into the context returned to the agent.
+
+    token_budget: maximum number of tokens of the context, 0 to return the retrieved chunks as they are
+    fetch_k: number of candidate chunks retrieved before reranking
+    lambda_mult: weight of the relevance to the query against the novelty to the chunks already
+        selected in the maximal marginal relevance reranking, from 0 (most diverse) to 1 (most relevant)
+    merge_overlaps: merge chunks of the same source whose texts overlap into one passage
+    include_sources: prefix each passage with its source and score
+    """
+
+    token_budget: int = 0
+    fetch_k: int = DEFAULT_CONTEXT_FETCH_K
+    lambda_mult: float = DEFAULT_LAMBDA_MULT
+    merge_overlaps: bool = True
+    include_sources: bool = True
+
+    def __post_init__(self):
+        if self.token_budget < 0:
+            raise ValueError(f"Invalid context token_budget: {self.token_budget}. It must be at least 0.")
+        if self.fetch_k < 1:
+            raise ValueError(f"Invalid context fetch_k: {self.fetch_k}. It must be at least 1.")
+        if not 0.0 <= self.lambda_mult <= 1.0:
+            raise ValueError(f"Invalid context lambda_mult: {self.lambda_mult}. It must be between 0 and 1.")
+
+    @classmethod
+    def from_dict(cls, context_args: Optional[Dict[str, Any]]) -> "ContextConfig":
+        """
+        :param context_args: Dictionary with any of "token_budget", "fetch_k", "lambda_mult", "merge_overlaps"
+            and "include_sources", as given in the tool arguments or the HOCON file
+        :return: The context configuration, with defaults for missing keys
+        :raises ValueError: If a key or value is not valid
+        """
+        context_args = dict(context_args or {})
+        unknown: List[str] = sorted(set(context_args) - {config_field.name for config_field in fields(cls)})
+        if unknown:
+            raise ValueError(f"Unknown context arguments: {', '.join(unknown)}")
+        return cls(**context_args)
+
+    @property
+    def enabled(self) -> bool:
+        """True if retrieved chunks are assembled within a token budget."""
+        return self.token_budget > 0
+
+
+@dataclass
+class ContextPassage:
+    """One or more overlapping chunks of the same source, merged into one passage of the context."""
+
+    text: str
+    source: Optional[str]
+    page: Optional[Any]
+    score: float
+    tokens: int = 0
+    chunks: int = 1
+
+    def format(self, include_sources: bool = True) -> str:
+        """
+        :param include_sources: Prefix the text with the source and score of the passage
+        :return: The passage as it appears in the context
+        """
+        if not include_sources:
+            return self.text
+        location: str = self.source or "unknown"
+        if self.page is not None:
+            location += f", page {self.page}"
+        return f"[source: {location} | score: {self.score:.3f}]\n{self.text}"
+
+
+@dataclass
+class AssembledContext:
+    """Passages selected for the context, best first, with the token counts before and after assembly."""
+
+    passages: List[ContextPassage] = field(default_factory=list)
+    include_sources: bool = True
+    tokens: int = 0
+    candidate_tokens: int = 0
+    candidates: int = 0
+
+    def to_text(self) -> str:
+        """
+        :return: The context as text, passages separated by blank lines
+        """
+        return PASSAGE_SEPARATOR.join(passage.format(self.include_sources) for passage in self.passages)
+
+    def summary(self) -> str:
+        """
+        :return: One line description of the assembly
+        """
+        return (
+            f"{len(self.passages)} passages, {self.tokens} tokens, "
+            f"from {self.candidates} candidate chunks of {self.candidate_tokens} tokens"
+        )
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    :param vectors: Array of vectors, one per row, or a single vector
+    :return: The vectors scaled to unit length. Zero vectors are left as they are.
+    """
+    norms: np.ndarray = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0.0, 1.0, norms)
+
+
+def mmr_rerank(
+    query_vector: np.ndarray, vectors: np.ndarray, lambda_mult: float = DEFAULT_LAMBDA_MULT
+) -> List[Tuple[int, float]]:
+    """
+    Order candidates by maximal marginal relevance: each step picks the candidate maximizing
+    lambda_mult * relevance - (1 - lambda_mult) * highest similarity to the candidates already picked.
+
+    The similarities between candidates are computed once as a matrix product, and the highest
+    similarity of each candidate to the picked ones is updated with one vectorized maximum per step.
+
+    :param query_vector: Embedding of the query
+    :param vectors: (candidates, dimensions) embeddings of the candidates
+    :param lambda_mult: Weight of the relevance against the novelty, from 0 to 1
+    :return: (candidate index, cosine relevance to the query) tuples of all candidates, in MMR order
+    """
+    if len(vectors) == 0:
+        return []
+    unit: np.ndarray = normalize(np.asarray(vectors, dtype=np.float32))
+    relevance: np.ndarray = unit @ normalize(np.asarray(query_vector, dtype=np.float32))
+    similarity: np.ndarray = unit @ unit.T
+    max_similarity: np.ndarray = np.full(len(unit), -np.inf, dtype=np.float32)
+    remaining: np.ndarray = np.ones(len(unit), dtype=bool)
+    order: List[Tuple[int, float]] = []
+    for _ in range(len(unit)):
+        # Nothing is picked yet in the first step, so the most relevant candidate comes first
+        redundancy: np.ndarray = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        mmr: np.ndarray = np.where(remaining, lambda_mult * relevance - (1.0 - lambda_mult) * redundancy, -np.inf)
+        picked: int = int(np.argmax(mmr))
+        order.append((picked, float(relevance[picked])))
+        remaining[picked] = False
+        max_similarity = np.maximum(max_similarity, similarity[:, picked])
+    return order
+
+
+def merge_overlapping(first: str, second: str, min_overlap: int = MIN_OVERLAP_CHARS) -> Optional[str]:
+    """
+    Merge two texts when one contains the other, or the end of one is the start of the other,
+    as with consecutive chunks split with an overlap.
+
+    :param first: A text
+    :param second: Another text
+    :param min_overlap: Shortest common text considered an overlap
+    :return: The merged text, or None if the texts do not overlap
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+    for head, tail in ((first, second), (second, first)):
+        if len(tail) < min_overlap:
+            continue
+        # The overlap starts at the earliest position of the start of the tail whose suffix matches the tail
+        position: int = head.find(tail[:min_overlap])
+        while position != -1:
+            if tail.startswith(head[position:]):
+                return head[:position] + tail
+            position = head.find(tail[:min_overlap], position + 1)
+    return None
+
+
+def _find_overlap(
+    passages: List[ContextPassage], document: Document
+) -> Tuple[Optional[ContextPassage], Optional[str]]:
+    """
+    :param passages: Passages already selected
+    :param document: A candidate chunk
+    :return: The passage of the same source and page overlapping the chunk and their merged text, or (None, None)
+    """
+    location: Tuple[str, str] = (str(document.metadata.get("source")), str(document.metadata.get("page")))
+    for passage in passages:
+        if (str(passage.source), str(passage.page)) == location:
+            merged_text: Optional[str] = merge_overlapping(passage.text, document.page_content)
+            if merged_text is not None:
+                return passage, merged_text
+    return None, None
+
+
+def assemble_context(
+    documents: Sequence[Document],
+    vectors: np.ndarray,
+    query_vector: Sequence[float],
+    config: ContextConfig,
+    count_tokens: Callable[[str], int],
+) -> AssembledContext:
+    """
+    Rerank candidate chunks by maximal marginal relevance, merge the overlapping chunks of each source,
+    and keep the best passages that fit in the token budget.
+
+    Candidates are taken in MMR order. A candidate overlapping a passage already selected from the same source
+    extends that passage, so the overlap is only counted once. Otherwise it starts a new passage. Candidates
+    that would exceed the budget are skipped, so that shorter ones further down can still fill it.
+
+    :param documents: Candidate chunks
+    :param vectors: (candidates, dimensions) embeddings of the candidates
+    :param query_vector: Embedding of the query
+    :param config: The context configuration
+    :param count_tokens: Function counting the tokens of a text
+    :return: The assembled context, passages ordered by their best chunk relevance
+    """
+    context = AssembledContext(include_sources=config.include_sources, candidates=len(documents))
+    context.candidate_tokens = sum(count_tokens(document.page_content) for document in documents)
+    separator_tokens: int = count_tokens(PASSAGE_SEPARATOR)
+
+    for index, relevance in mmr_rerank(np.asarray(query_vector), vectors, config.lambda_mult):
+        document: Document = documents[index]
+        merged_into, merged_text = _find_overlap(context.passages, document) if config.merge_overlaps else (None, None)
+        if merged_into is not None:
+            candidate = ContextPassage(
+                merged_text, merged_into.source, merged_into.page, merged_into.score, chunks=merged_into.chunks + 1
+            )
+            candidate.score = max(candidate.score, relevance)
+            previous_tokens: int = merged_into.tokens
+        else:
+            candidate = ContextPassage(
+                document.page_content, document.metadata.get("source"), document.metadata.get("page"), relevance
+            )
+            previous_tokens = -separator_tokens if context.passages else 0
+
+        candidate.tokens = count_tokens(candidate.format(config.include_sources))
+        added_tokens: int = candidate.tokens - previous_tokens
+        if context.tokens + added_tokens > config.token_budget:
+            continue
+        context.tokens += added_tokens
+        if merged_into is not None:
+            context.passages[context.passages.index(merged_into)] = candidate
+        else:
+            context.passages.append(candidate)
+
+    context.passages.sort(key=lambda passage: -passage.score)
+    return context
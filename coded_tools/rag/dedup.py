@@ -0,0 +1,252 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import re
+import uuid
+import zlib
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import fields
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Metadata key of a kept chunk listing the metadata of the near-duplicate chunks dropped in its favor
+DUPLICATE_SOURCES_KEY = "duplicate_sources"
+WORD_PATTERN = re.compile(r"\w+")
+# Bytes per value of a float32 embedding
+EMBEDDING_VALUE_BYTES = 4
+
+
+@dataclass(frozen=True)
+class DedupConfig:
+    """
+    How near-duplicate chunks are dropped before embedding.
+
+    Chunks are compared by the Jaccard similarity of their sets of shingle_size consecutive words,
+    estimated from MinHash signatures of num_perm hash functions. A chunk at least threshold similar
+    to an earlier chunk of the same ingestion is not embedded. A threshold of 0 disables deduplication.
+    """
+
+    threshold: float = 0.0
+    num_perm: int = 128
+    shingle_size: int = 5
+    seed: int = 1
+
+    def __post_init__(self):
+        if not 0.0 <= self.threshold <= 1.0:
+            raise ValueError(f"Invalid dedup threshold {self.threshold}. It must be between 0 and 1.")
+        if self.num_perm <= 0 or self.shingle_size <= 0:
+            raise ValueError(
+                f"Invalid dedup sizes: num_perm={self.num_perm}, shingle_size={self.shingle_size}. "
+                "Both must be positive."
+            )
+
+    @classmethod
+    def from_dict(cls, dedup_args: Optional[Dict[str, Any]]) -> "DedupConfig":
+        """
+        :param dedup_args: Dictionary with any of "threshold", "num_perm", "shingle_size" and "seed",
+            as given in the tool arguments or the HOCON file
+        :return: The dedup configuration, with defaults for missing keys
+        :raises ValueError: If a key or value is not valid
+        """
+        dedup_args = dict(dedup_args or {})
+        unknown: List[str] = sorted(set(dedup_args) - {config_field.name for config_field in fields(cls)})
+        if unknown:
+            raise ValueError(f"Unknown dedup arguments: {', '.join(unknown)}")
+        return cls(**dedup_args)
+
+    @property
+    def enabled(self) -> bool:
+        """True if near-duplicate chunks are dropped."""
+        return self.threshold > 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: JSON-serializable configuration, part of the cache keys of the vector stores built with it
+        """
+        return asdict(self)
+
+
+@dataclass
+class DedupStats:
+    """Counters of the chunks seen and dropped by a deduplicator."""
+
+    chunks: int = 0
+    duplicates: int = 0
+    # Characters of the dropped chunks, which are neither stored nor sent to the embeddings model
+    duplicate_chars: int = 0
+
+    def saved_bytes(self, dimensions: int) -> int:
+        """
+        :param dimensions: Dimensions of the embeddings
+        :return: Approximate storage not used by the dropped chunks, embeddings and texts
+        """
+        return self.duplicates * dimensions * EMBEDDING_VALUE_BYTES + self.duplicate_chars
+
+    def summary(self, dimensions: int) -> str:
+        """
+        :param dimensions: Dimensions of the embeddings
+        :return: One line for logging
+        """
+        ratio: float = self.duplicates / self.chunks if self.chunks else 0.0
+        return (
+            f"dedup: dropped {self.duplicates} of {self.chunks} chunks ({ratio:.1%}) as near-duplicates, "
+            f"saving {self.duplicates} embeddings and {self.saved_bytes(dimensions) / 2**20:.2f} MB"
+        )
+
+
+def shingles(text: str, shingle_size: int) -> List[str]:
+    """
+    :param text: Text of a chunk
+    :param shingle_size: Number of consecutive words per shingle
+    :return: Shingles of the lowercased words of the text, a single one for texts shorter than shingle_size
+    """
+    words: List[str] = WORD_PATTERN.findall(text.lower())
+    if len(words) <= shingle_size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[start : start + shingle_size]) for start in range(len(words) - shingle_size + 1)]
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Split signatures into bands for locality-sensitive hashing. Two chunks are compared only if all rows
+    of one of their bands match, which happens with probability 1 - (1 - s^rows)^bands for a similarity s.
+
+    :param num_perm: Length of the signatures
+    :param threshold: Similarity threshold
+    :return: Number of bands and rows per band, whose similarity at the steepest probability increase
+        is the highest not above threshold, so that few similar pairs are missed
+    """
+    best: Tuple[int, int] = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0 and (rows / num_perm) ** (1.0 / rows) <= threshold:
+            best = (num_perm // rows, rows)
+    return best
+
+
+class ChunkDeduplicator:
+    """
+    Drops chunks that are near-duplicates of an earlier chunk, such as page headers, footers and
+    disclaimers repeated across a corpus.
+
+    Each chunk gets a MinHash signature. Locality-sensitive hashing of the signature bands finds
+    earlier chunks likely to be similar, whose estimated similarity is then checked against the
+    threshold. Only the signatures of kept chunks are held, at num_perm * 4 bytes each.
+
+    The metadata of each dropped chunk is recorded as provenance of the chunk it duplicates,
+    by chunk id. Chunks without an id are given one, so that provenance can be recorded in stored
+    chunks once their later duplicates are known.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, config: DedupConfig):
+        """
+        :param config: The dedup configuration
+        """
+        self.config: DedupConfig = config
+        self.bands, self.rows = choose_bands(config.num_perm, config.threshold)
+        rng = np.random.default_rng(config.seed)
+        # Multiply-shift hash functions, (a * x + b) >> 32 in 64-bit arithmetic with odd multipliers
+        self._multipliers: np.ndarray = rng.integers(0, 2**63, size=config.num_perm, dtype=np.uint64) * 2 + 1
+        self._increments: np.ndarray = rng.integers(0, 2**63, size=config.num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self._kept_ids: List[str] = []
+        # Chunk id of each kept chunk with duplicates, to the metadata of its duplicates
+        self.provenance: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats = DedupStats()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        :param text: Text of a chunk
+        :return: MinHash signature of the shingles of the text, None for a text without words
+        """
+        text_shingles: List[str] = shingles(text, self.config.shingle_size)
+        if not text_shingles:
+            return None
+        hashes: np.ndarray = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in text_shingles), dtype=np.uint64
+        )
+        # Overflowing uint64 products wrap around, as the hash functions intend
+        values: np.ndarray = (np.outer(hashes, self._multipliers) + self._increments) >> np.uint64(32)
+        return values.min(axis=0).astype(np.uint32)
+
+    def _find_duplicate(self, signature: np.ndarray, band_keys: List[bytes]) -> Optional[int]:
+        """
+        :return: Index of the most similar earlier kept chunk at least threshold similar, if any
+        """
+        candidates = {index for band, key in enumerate(band_keys) for index in self._buckets[band].get(key, ())}
+        best_index: Optional[int] = None
+        best_similarity: float = self.config.threshold
+        for index in sorted(candidates):
+            similarity: float = float(np.mean(self._signatures[index] == signature))
+            if similarity >= best_similarity and (best_index is None or similarity > best_similarity):
+                best_index, best_similarity = index, similarity
+        return best_index
+
+    def is_duplicate(self, chunk: Document) -> bool:
+        """
+        Check a chunk against the chunks kept so far, and keep it if it is not a near-duplicate.
+
+        :param chunk: The chunk, given an id if it has none
+        :return: True if the chunk should be dropped
+        """
+        self.stats.chunks += 1
+        if not chunk.id:
+            chunk.id = str(uuid.uuid4())
+        signature: Optional[np.ndarray] = self.signature(chunk.page_content)
+        if signature is None:
+            return False
+        band_keys: List[bytes] = [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes() for band in range(self.bands)
+        ]
+
+        duplicate_of: Optional[int] = self._find_duplicate(signature, band_keys)
+        if duplicate_of is not None:
+            self.stats.duplicates += 1
+            self.stats.duplicate_chars += len(chunk.page_content)
+            source: Dict[str, Any] = {
+                key: value for key, value in chunk.metadata.items() if key != DUPLICATE_SOURCES_KEY
+            }
+            sources: List[Dict[str, Any]] = self.provenance.setdefault(self._kept_ids[duplicate_of], [])
+            if source not in sources:
+                sources.append(source)
+            return True
+
+        index: int = len(self._signatures)
+        self._signatures.append(signature)
+        self._kept_ids.append(chunk.id)
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(index)
+        return False
+
+    def provenance_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: Chunk id of each kept chunk with duplicates, to the metadata recording them
+        """
+        return {chunk_id: {DUPLICATE_SOURCES_KEY: sources} for chunk_id, sources in self.provenance.items()}
+
+    def apply_provenance(self, chunks: List[Document]):
+        """
+        Record the duplicates of each chunk in its metadata, once all chunks were deduplicated.
+
+        :param chunks: The kept chunks
+        """
+        for chunk in chunks:
+            sources: Optional[List[Dict[str, Any]]] = self.provenance.get(chunk.id)
+            if sources:
+                chunk.metadata[DUPLICATE_SOURCES_KEY] = sources
@@ -0,0 +1,232 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import requests
+from langchain_core.documents import Document
+from requests.exceptions import RequestException
+
+# Seconds allowed to connect to the server and between two received bytes
+DEFAULT_DOWNLOAD_TIMEOUT = 60.0
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(path: str) -> str:
+    """
+    :param path: Path to a file
+    :return: sha256 hex digest of its content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedDownload:
+    """A downloaded file kept in the cache, and the validators to revalidate it with."""
+
+    url: str
+    path: str
+    content_hash: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True if the server answered 304 Not Modified, or could not be reached, and the cached copy was kept
+    from_cache: bool = False
+
+
+class DownloadCache:
+    """
+    Local cache of downloaded files, revalidated with conditional requests.
+
+    A cached file is requested again with If-None-Match and If-Modified-Since headers built from the
+    ETag and Last-Modified headers of its last download, so that an unchanged file costs a single
+    304 Not Modified response instead of a download. When the server cannot be reached, the cached
+    copy is used as is.
+
+    Files are identified by the sha256 of their content, which also keys the cache of their parsed
+    documents, so that a file downloaded again with the same content is not parsed again.
+    """
+
+    def __init__(self, directory: str, timeout: float = DEFAULT_DOWNLOAD_TIMEOUT):
+        """
+        :param directory: Directory holding the cached files, created if needed
+        :param timeout: Seconds allowed to connect to the server and between two received bytes
+        """
+        self.directory: str = directory
+        self.timeout: float = timeout
+        os.makedirs(directory, exist_ok=True)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self.downloads: int = 0
+        self.not_modified: int = 0
+        self.stale: int = 0
+
+    def _path(self, url: str, suffix: str) -> str:
+        key: str = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def _parsed_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"{content_hash}.documents.json")
+
+    def get_cached(self, url: str) -> Optional[CachedDownload]:
+        """
+        :param url: URL of the file
+        :return: The cached download of the URL, without revalidating it, or None if it is not cached
+        """
+        try:
+            with open(self._path(url, ".json"), "r", encoding="utf-8") as metadata_file:
+                cached = CachedDownload(**json.load(metadata_file))
+        except (OSError, ValueError, TypeError):
+            return None
+        return cached if os.path.exists(cached.path) else None
+
+    def _write_atomically(self, path: str, write: Any):
+        """Write a file through a temporary file, so that concurrent readers never see a partial file."""
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                write(temp_file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def fetch(self, url: str) -> CachedDownload:
+        """
+        Download a file, or revalidate its cached copy.
+
+        :param url: URL of the file
+        :return: The cached download, up to date with the server unless it could not be reached
+        :raises RequestException: If the file could not be downloaded and is not cached
+        """
+        cached: Optional[CachedDownload] = self.get_cached(url)
+        headers: Dict[str, str] = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        digest = hashlib.sha256()
+
+        def write(file: Any):
+            for block in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                digest.update(block)
+                file.write(block)
+
+        try:
+            with self._session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304 and cached is not None:
+                    with self._lock:
+                        self.not_modified += 1
+                    logger.info("%s not modified since its cached download\n", url)
+                    cached.from_cache = True
+                    return cached
+                response.raise_for_status()
+                self._write_atomically(self._path(url, ".bin"), write)
+        except RequestException as error:
+            if cached is None:
+                raise
+            with self._lock:
+                self.stale += 1
+            logger.warning("Could not revalidate %s, using its cached copy: %s\n", url, error)
+            cached.from_cache = True
+            return cached
+
+        download = CachedDownload(
+            url=url,
+            path=self._path(url, ".bin"),
+            content_hash=digest.hexdigest(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        metadata: bytes = json.dumps(asdict(download)).encode("utf-8")
+        self._write_atomically(self._path(url, ".json"), lambda file: file.write(metadata))
+        with self._lock:
+            self.downloads += 1
+        logger.info("Downloaded %s, content hash %s\n", url, download.content_hash)
+        return download
+
+    async def afetch(self, url: str) -> CachedDownload:
+        """
+        Download a file, or revalidate its cached copy, in a worker thread.
+
+        :param url: URL of the file
+        :return: The cached download
+        """
+        return await asyncio.to_thread(self.fetch, url)
+
+    def get_documents(self, content_hash: str) -> Optional[List[Document]]:
+        """
+        :param content_hash: sha256 hex digest of a file
+        :return: The documents parsed from a file of this content, or None if it was not parsed yet
+        """
+        try:
+            with open(self._parsed_path(content_hash), "r", encoding="utf-8") as parsed_file:
+                records: List[Dict[str, Any]] = json.load(parsed_file)
+        except (OSError, ValueError):
+            return None
+        return [Document(page_content=record["text"], metadata=record["metadata"]) for record in records]
+
+    def put_documents(self, content_hash: str, documents: List[Document]):
+        """
+        :param content_hash: sha256 hex digest of a file
+        :param documents: The documents parsed from the file
+        """
+        records: List[Dict[str, Any]] = [{"text": doc.page_content, "metadata": doc.metadata} for doc in documents]
+        payload: bytes = json.dumps(records, default=str).encode("utf-8")
+        self._write_atomically(self._parsed_path(content_hash), lambda file: file.write(payload))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Number of downloads, of 304 Not Modified responses, and of cached copies used when offline
+        """
+        with self._lock:
+            return {"downloads": self.downloads, "not_modified": self.not_modified, "stale": self.stale}
+
+
+_CACHES: Dict[str, DownloadCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_download_cache(directory: Optional[str] = None) -> DownloadCache:
+    """
+    Return the process-wide DownloadCache of a directory, creating it on first use.
+
+    :param directory: Absolute path to the cache directory. Defaults to RAG_DOWNLOAD_CACHE_DIR,
+        then to a directory of the system temporary directory.
+    :return: The shared DownloadCache
+    """
+    directory = directory or os.getenv(
+        "RAG_DOWNLOAD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "neuro_san_rag_downloads")
+    )
+    with _CACHES_LOCK:
+        cache: Optional[DownloadCache] = _CACHES.get(directory)
+        if cache is None:
+            cache = DownloadCache(directory)
+            _CACHES[directory] = cache
+        return cache
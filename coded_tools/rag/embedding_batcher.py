@@ -0,0 +1,389 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Tokens per embedding request, well below the 300k tokens OpenAI accepts, to leave room for estimation error
+DEFAULT_MAX_BATCH_TOKENS = 100_000
+# Inputs per embedding request accepted by OpenAI
+DEFAULT_MAX_BATCH_SIZE = 2048
+# Seconds a request waits for concurrent requests to join its batch
+DEFAULT_MAX_WAIT = 0.01
+DEFAULT_MAX_CONCURRENT_BATCHES = 4
+# Rough number of characters per token of English text
+CHARS_PER_TOKEN = 4
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token count estimate that needs no tokenizer download.
+
+    :param text: The text
+    :return: Estimated number of tokens of the text, at least 1
+    """
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+# pylint: disable=too-few-public-methods
+class RateLimiter:
+    """
+    Token buckets enforcing a requests-per-minute and a tokens-per-minute budget.
+    Buckets start full and refill continuously. The state is guarded by a thread lock,
+    so that one limiter can be shared by the event loops of several threads.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """
+        :param requests_per_minute: Request budget, 0 for no limit
+        :param tokens_per_minute: Token budget, 0 for no limit
+        :param clock: Monotonic clock in seconds
+        :param sleep: Coroutine function sleeping for a number of seconds
+        """
+        self.limits: Tuple[float, float] = (float(requests_per_minute), float(tokens_per_minute))
+        self._available: List[float] = list(self.limits)
+        self._clock: Callable[[], float] = clock
+        self._sleep: Callable[[float], Awaitable[Any]] = sleep
+        self._last: float = clock()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """
+        Take one request and the tokens from the budgets if both allow it.
+
+        :param tokens: Tokens of the request
+        :return: 0 when acquired, otherwise the seconds to wait before trying again
+        """
+        with self._lock:
+            now: float = self._clock()
+            elapsed: float = now - self._last
+            self._last = now
+            # A request larger than a whole budget only needs a full bucket
+            needed: Tuple[float, float] = (1.0, min(float(tokens), self.limits[1]))
+            wait: float = 0.0
+            for index, limit in enumerate(self.limits):
+                if limit <= 0:
+                    continue
+                self._available[index] = min(limit, self._available[index] + elapsed * limit / 60.0)
+                if self._available[index] < needed[index]:
+                    wait = max(wait, (needed[index] - self._available[index]) * 60.0 / limit)
+            if wait > 0:
+                return wait
+            for index, limit in enumerate(self.limits):
+                if limit > 0:
+                    self._available[index] -= needed[index]
+            return 0.0
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        Wait until one request of the given size fits in the budgets, and take it.
+
+        :param tokens: Tokens of the request
+        :return: Seconds spent waiting
+        """
+        waited: float = 0.0
+        while True:
+            delay: float = self._try_acquire(tokens)
+            if delay <= 0:
+                return waited
+            await self._sleep(delay)
+            waited += delay
+
+
+@dataclass
+class _EmbedRequest:
+    """Texts of one caller waiting to be embedded."""
+
+    texts: List[str]
+    tokens: int
+    future: asyncio.Future
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests of one event loop into batches.
+
+    A batch is sent once it reaches max_batch_tokens or max_batch_size, or once its
+    oldest request has waited max_wait seconds. Each batch first takes its request and
+    tokens from the rate limiter, so that bursts are smoothed out instead of being
+    answered with HTTP 429 responses.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+        rate_limiter: Optional[RateLimiter] = None,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ):
+        """
+        :param embeddings: Embeddings the batches are sent to
+        :param max_batch_tokens: Maximum estimated tokens per batch
+        :param max_batch_size: Maximum number of texts per batch
+        :param max_wait: Seconds a request waits for other requests to join its batch
+        :param max_concurrent_batches: Maximum number of batches being embedded at once
+        :param rate_limiter: Budget the batches are taken from, None for no limit
+        :param token_counter: Function estimating the tokens of a text
+        """
+        self.embeddings: Embeddings = embeddings
+        self.max_batch_tokens: int = max_batch_tokens
+        self.max_batch_size: int = max_batch_size
+        self.max_wait: float = max_wait
+        self.rate_limiter: Optional[RateLimiter] = rate_limiter
+        self.token_counter: Callable[[str], int] = token_counter
+        self._pending: Deque[_EmbedRequest] = deque()
+        self._pending_tokens: int = 0
+        self._pending_texts: int = 0
+        self._wakeup = asyncio.Event()
+        self._in_flight = asyncio.Semaphore(max_concurrent_batches)
+        self._flusher: Optional[asyncio.Task] = None
+        # The event loop only keeps weak references to tasks, so the running batches are kept here
+        self._send_tasks: Set[asyncio.Task] = set()
+        self._counters: Dict[str, float] = {"requests": 0, "batches": 0, "texts": 0, "rate_limited_seconds": 0.0}
+
+    def stats(self) -> Dict[str, float]:
+        """
+        :return: Number of requests, batches and texts embedded and seconds spent waiting on the rate limiter
+        """
+        return dict(self._counters)
+
+    def _split(self, texts: List[str]) -> List[Tuple[List[str], int]]:
+        """Split the texts of one caller into parts that each fit in a batch."""
+        parts: List[Tuple[List[str], int]] = []
+        part: List[str] = []
+        part_tokens: int = 0
+        for text in texts:
+            tokens: int = self.token_counter(text)
+            if part and (part_tokens + tokens > self.max_batch_tokens or len(part) >= self.max_batch_size):
+                parts.append((part, part_tokens))
+                part, part_tokens = [], 0
+            part.append(text)
+            part_tokens += tokens
+        if part:
+            parts.append((part, part_tokens))
+        return parts
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed the texts as part of batches shared with concurrent callers.
+
+        :param texts: The texts
+        :return: One embedding per text
+        """
+        if not texts:
+            return []
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        futures: List[asyncio.Future] = []
+        for part, tokens in self._split(texts):
+            future: asyncio.Future = loop.create_future()
+            self._pending.append(_EmbedRequest(part, tokens, future))
+            self._pending_tokens += tokens
+            self._pending_texts += len(part)
+            futures.append(future)
+        self._counters["requests"] += 1
+        self._wakeup.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_pending())
+
+        results: List[List[List[float]]] = await asyncio.gather(*futures)
+        return [vector for part_vectors in results for vector in part_vectors]
+
+    def _batch_is_full(self) -> bool:
+        return self._pending_tokens >= self.max_batch_tokens or self._pending_texts >= self.max_batch_size
+
+    def _take_batch(self) -> List[_EmbedRequest]:
+        """Remove, oldest first, the requests fitting in one batch from the pending requests."""
+        batch: List[_EmbedRequest] = [self._pending.popleft()]
+        tokens: int = batch[0].tokens
+        size: int = len(batch[0].texts)
+        while self._pending:
+            request: _EmbedRequest = self._pending[0]
+            if tokens + request.tokens > self.max_batch_tokens or size + len(request.texts) > self.max_batch_size:
+                break
+            batch.append(self._pending.popleft())
+            tokens += request.tokens
+            size += len(request.texts)
+        self._pending_tokens -= tokens
+        self._pending_texts -= size
+        return batch
+
+    async def _flush_pending(self):
+        """Send batches until no request is pending."""
+        batch: List[_EmbedRequest] = []
+        try:
+            while self._pending:
+                deadline: float = time.monotonic() + self.max_wait
+                while not self._batch_is_full() and time.monotonic() < deadline:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), deadline - time.monotonic())
+                    except asyncio.TimeoutError:
+                        break
+
+                batch = self._take_batch()
+                if self.rate_limiter is not None:
+                    self._counters["rate_limited_seconds"] += await self.rate_limiter.acquire(
+                        sum(request.tokens for request in batch)
+                    )
+                await self._in_flight.acquire()
+                task: asyncio.Task = asyncio.get_running_loop().create_task(self._send(batch))
+                self._send_tasks.add(task)
+                task.add_done_callback(self._send_tasks.discard)
+                batch = []
+        except (Exception, asyncio.CancelledError) as exception:
+            # Such as a cancellation while waiting on the rate limiter. The callers would otherwise wait forever.
+            logger.warning("Flushing %d embedding requests failed: %r\n", len(batch) + len(self._pending), exception)
+            self._fail(batch + list(self._pending), exception)
+            self._pending.clear()
+            self._pending_tokens = 0
+            self._pending_texts = 0
+            raise
+
+    @staticmethod
+    def _fail(requests: List[_EmbedRequest], exception: BaseException):
+        """Hand the exception to every caller still waiting on one of the requests."""
+        for request in requests:
+            if request.future.done():
+                continue
+            if isinstance(exception, asyncio.CancelledError):
+                request.future.cancel()
+            else:
+                request.future.set_exception(exception)
+
+    async def _send(self, batch: List[_EmbedRequest]):
+        """Embed one batch and hand each caller its embeddings."""
+        try:
+            texts: List[str] = [text for request in batch for text in request.texts]
+            vectors: List[List[float]] = await self.embeddings.aembed_documents(texts)
+            self._counters["batches"] += 1
+            self._counters["texts"] += len(texts)
+            start: int = 0
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(vectors[start : start + len(request.texts)])
+                start += len(request.texts)
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            # Every caller of the batch gets the error, as if it had sent the request itself
+            logger.warning("Embedding batch of %d requests failed: %s\n", len(batch), exception)
+            self._fail(batch, exception)
+        finally:
+            self._in_flight.release()
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper sending asynchronous document embeddings through the EmbeddingBatcher
+    of the running event loop, so that concurrent RAG tool calls share requests.
+    Synchronous calls and queries go straight to the wrapped embeddings.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        """
+        :param embeddings: The embeddings the batches are sent to
+        """
+        self.embeddings: Embeddings = embeddings
+        # Exposed so that callers identifying the embeddings model see through the wrapper
+        self.model: str = getattr(embeddings, "model", type(embeddings).__name__)
+        self.dimensions: Optional[int] = getattr(embeddings, "dimensions", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await get_embedding_batcher(self.embeddings).embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+_RATE_LIMITERS: Dict[str, RateLimiter] = {}
+_BATCHERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, EmbeddingBatcher]]" = (
+    weakref.WeakKeyDictionary()
+)
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """
+    Return the process-wide rate limiter of an embeddings model, whose budgets come from
+    RAG_EMBEDDING_REQUESTS_PER_MINUTE and RAG_EMBEDDING_TOKENS_PER_MINUTE (0 for no limit).
+
+    :param model: Name of the embeddings model
+    :return: The shared RateLimiter
+    """
+    with _REGISTRY_LOCK:
+        limiter: Optional[RateLimiter] = _RATE_LIMITERS.get(model)
+        if limiter is None:
+            limiter = RateLimiter(
+                requests_per_minute=int(os.getenv("RAG_EMBEDDING_REQUESTS_PER_MINUTE", "0")),
+                tokens_per_minute=int(os.getenv("RAG_EMBEDDING_TOKENS_PER_MINUTE", "0")),
+            )
+            _RATE_LIMITERS[model] = limiter
+        return limiter
+
+
+def get_embedding_batcher(embeddings: Embeddings) -> EmbeddingBatcher:
+    """
+    Return the batcher of the running event loop for embeddings of the same class, model and
+    dimensions, creating it on first use. Batches are sent to the embeddings that created the batcher.
+
+    :param embeddings: The embeddings to batch requests for
+    :return: The shared EmbeddingBatcher
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    model: str = getattr(embeddings, "model", type(embeddings).__name__)
+    key: Tuple = (type(embeddings).__name__, model, getattr(embeddings, "dimensions", None))
+    with _REGISTRY_LOCK:
+        batchers: Dict[Tuple, EmbeddingBatcher] = _BATCHERS.setdefault(loop, {})
+        batcher: Optional[EmbeddingBatcher] = batchers.get(key)
+    if batcher is None:
+        batcher = EmbeddingBatcher(
+            embeddings,
+            max_batch_tokens=int(os.getenv("RAG_EMBEDDING_BATCH_MAX_TOKENS", str(DEFAULT_MAX_BATCH_TOKENS))),
+            max_wait=float(os.getenv("RAG_EMBEDDING_BATCH_MAX_WAIT_MS", str(DEFAULT_MAX_WAIT * 1000))) / 1000,
+            rate_limiter=get_rate_limiter(model),
+        )
+        with _REGISTRY_LOCK:
+            batcher = _BATCHERS.setdefault(loop, {}).setdefault(key, batcher)
+    return batcher
@@ -0,0 +1,262 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+# SQLite limits the number of host parameters in a single statement
+SQLITE_BATCH_SIZE = 500
+# The cache may grow this fraction of max_entries over it before being evicted back to max_entries,
+# so that evictions run once per that many new embeddings instead of on every write
+EVICTION_SLACK = 0.01
+# Access times of cache hits are written with the next write, or once this many are pending
+MAX_PENDING_ACCESSES = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+def make_embedding_key(text: str, model: str, dimensions: Optional[int]) -> str:
+    """
+    Content address of an embedding.
+
+    :param text: Text that is embedded
+    :param model: Name of the embeddings model
+    :param dimensions: Dimensions of the embedding vector
+    :return: sha256 hex digest of the text, model and dimensions
+    """
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(str(dimensions).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+# pylint: disable=too-many-instance-attributes
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of embedding vectors backed by SQLite.
+
+    Vectors are stored as float32 blobs. Once the number of entries exceeds
+    max_entries by EVICTION_SLACK, the least recently used entries are evicted.
+    Lookups are read-only: the access times of the hits are buffered and written in batches.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        :param path: Path to the SQLite database file
+        :param max_entries: Maximum number of embeddings to keep
+        """
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock = threading.Lock()
+        # Access times of cache hits not written yet
+        self._pending_accesses: Dict[str, float] = {}
+
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)")
+        # Running count of the entries, recounted before evicting since other processes may share the file
+        self._entries: int = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings. Their access time is refreshed with a later write.
+
+        :param keys: Keys from make_embedding_key()
+        :return: Dictionary of the keys found and their vectors
+        """
+        found: Dict[str, List[float]] = {}
+        unique_keys: List[str] = list(dict.fromkeys(keys))
+        now: float = time.time()
+        with self._lock:
+            for start in range(0, len(unique_keys), SQLITE_BATCH_SIZE):
+                batch: List[str] = unique_keys[start : start + SQLITE_BATCH_SIZE]
+                placeholders: str = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            self._pending_accesses.update(dict.fromkeys(found, now))
+            if len(self._pending_accesses) >= MAX_PENDING_ACCESSES:
+                with self._connection:
+                    self._write_accesses()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: Sequence[Tuple[str, List[float]]]):
+        """
+        Store embeddings, then evict the least recently used ones when over the size cap and its slack.
+
+        :param items: Sequence of (key, vector) tuples
+        """
+        if not items:
+            return
+        now: float = time.time()
+        # Keys are content addresses, so a key already stored, such as by another process, keeps its vector
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items]
+        with self._lock, self._connection:
+            inserted: int = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?)", rows
+            ).rowcount
+            self._entries += max(inserted, 0)
+            self._write_accesses()
+            if self._entries > self.max_entries + int(self.max_entries * EVICTION_SLACK):
+                self._evict()
+
+    def _write_accesses(self):
+        """
+        Write the pending access times of cache hits. Called with the lock held, in a transaction.
+        """
+        if self._pending_accesses:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_accesses.items()],
+            )
+            self._pending_accesses.clear()
+
+    def _evict(self):
+        """
+        Evict the least recently used entries down to max_entries. Called with the lock held, in a transaction.
+        """
+        self._entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow: int = self._entries - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._entries = self.max_entries
+            logger.info("Evicted %d embeddings from %s\n", overflow, self.path)
+
+    def __len__(self) -> int:
+        """
+        :return: Running count of the entries, without the ones added by other processes until the next eviction
+        """
+        return self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with the hit/miss counters and current usage, without querying the database
+        """
+        lookups: int = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends texts missing from an EmbeddingCache to the wrapped embeddings.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        """
+        :param embeddings: The embeddings used for cache misses
+        :param cache: The cache of previously computed embeddings
+        """
+        self.embeddings: Embeddings = embeddings
+        self.cache: EmbeddingCache = cache
+        # Exposed so that callers identifying the embeddings model see through the wrapper
+        self.model: str = getattr(embeddings, "model", type(embeddings).__name__)
+        self.dimensions: Optional[int] = getattr(embeddings, "dimensions", None)
+
+    def _keys(self, texts: List[str]) -> List[str]:
+        return [make_embedding_key(text, self.model, self.dimensions) for text in texts]
+
+    @staticmethod
+    def _missing(texts: List[str], keys: List[str], found: Dict[str, List[float]]) -> Dict[str, str]:
+        """Map each key that was not found to its text, de-duplicated."""
+        return {key: text for key, text in zip(keys, texts) if key not in found}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys: List[str] = self._keys(texts)
+        found: Dict[str, List[float]] = self.cache.get_many(keys)
+        missing: Dict[str, str] = self._missing(texts, keys, found)
+        if missing:
+            vectors: List[List[float]] = self.embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self.cache.put_many(new_items)
+            found.update(new_items)
+        logger.info("Embedded %d of %d chunks. Embedding cache: %s\n", len(missing), len(texts), self.cache.stats())
+        return [found[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys: List[str] = self._keys(texts)
+        found: Dict[str, List[float]] = await asyncio.to_thread(self.cache.get_many, keys)
+        missing: Dict[str, str] = self._missing(texts, keys, found)
+        if missing:
+            vectors: List[List[float]] = await self.embeddings.aembed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self.cache.put_many, new_items)
+            found.update(new_items)
+        logger.info("Embedded %d of %d chunks. Embedding cache: %s\n", len(missing), len(texts), self.cache.stats())
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+_CACHES: Dict[str, EmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_embedding_cache(path: str) -> EmbeddingCache:
+    """
+    Return the process-wide EmbeddingCache for a database file, opening it on first use.
+
+    :param path: Absolute path to the SQLite database file
+    :return: The shared EmbeddingCache
+    """
+    with _CACHES_LOCK:
+        cache: Optional[EmbeddingCache] = _CACHES.get(path)
+        if cache is None:
+            max_entries = int(os.getenv("RAG_EMBEDDING_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+            cache = EmbeddingCache(path, max_entries=max_entries)
+            _CACHES[path] = cache
+        return cache
@@ -0,0 +1,222 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+EMBEDDINGS_MODEL = "text-embedding-3-small"
+VECTOR_SIZE = 1536
+DEFAULT_PROVIDER = "openai"
+DEFAULT_HASHING_DIMENSIONS = 384
+DEFAULT_SENTENCE_TRANSFORMERS_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Words, as features of the hashing embeddings
+WORD = re.compile(r"\w+")
+
+EmbeddingsFactory = Callable[..., Embeddings]
+
+# Concurrent encodes of local models only compete for the same CPU cores, so they run one at a time
+_ENCODE_LOCK = threading.Lock()
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, offline embeddings for tests and benchmarks.
+
+    Each text is embedded by hashing its lowercase words and word bigrams into a vector of the
+    given dimensions, with a sign also taken from the hash, and normalizing it to unit length.
+    Texts sharing words get similar embeddings, so retrieval behaves like a keyword search
+    instead of returning random chunks, and the same text always gets the same embedding
+    in every process.
+
+    latency_ms and latency_ms_per_text simulate the round trip of an embeddings API,
+    so that batching and concurrency can be measured without a network.
+    """
+
+    def __init__(
+        self, dimensions: int = DEFAULT_HASHING_DIMENSIONS, latency_ms: float = 0.0, latency_ms_per_text: float = 0.0
+    ):
+        """
+        :param dimensions: Dimensions of the embeddings
+        :param latency_ms: Simulated latency of each request, in milliseconds
+        :param latency_ms_per_text: Simulated latency added per embedded text, in milliseconds
+        """
+        if dimensions < 1:
+            raise ValueError(f"Invalid hashing embeddings dimensions: {dimensions}")
+        self.model: str = "hashing"
+        self.dimensions: int = dimensions
+        self.latency_ms: float = latency_ms
+        self.latency_ms_per_text: float = latency_ms_per_text
+
+    def _latency(self, texts: int) -> float:
+        return (self.latency_ms + self.latency_ms_per_text * texts) / 1000.0
+
+    def _embed(self, text: str) -> List[float]:
+        words: List[str] = WORD.findall(text.lower())
+        # Fall back to the whole text, so that texts without words still get distinct unit vectors
+        features: List[str] = words + [f"{first} {second}" for first, second in zip(words, words[1:])] or [text]
+        vector: np.ndarray = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in features:
+            value: int = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm: float = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            # Every feature cancelled out
+            vector[0], norm = 1.0, 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if texts:
+            time.sleep(self._latency(len(texts)))
+        return [self._embed(text) for text in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if texts:
+            await asyncio.sleep(self._latency(len(texts)))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+@lru_cache(maxsize=4)
+def _load_sentence_transformer(model: str, device: str) -> Any:
+    """
+    Load a sentence-transformers model once per process.
+
+    :param model: Name or path of the model
+    :param device: Device the model runs on, such as "cpu"
+    :return: The SentenceTransformer
+    """
+    # Optional dependency, only needed by this provider
+    try:
+        # pylint: disable=import-outside-toplevel
+        from sentence_transformers import SentenceTransformer
+    except ImportError as import_error:
+        raise ImportError(
+            "The sentence-transformers package is not installed. "
+            "Please install it using 'pip install sentence-transformers'."
+        ) from import_error
+    return SentenceTransformer(model, device=device)
+
+
+class SentenceTransformersEmbeddings(Embeddings):
+    """
+    Embeddings computed locally by a sentence-transformers model, on CPU by default.
+    Asynchronous calls run the model in a worker thread.
+    """
+
+    def __init__(self, model: str = DEFAULT_SENTENCE_TRANSFORMERS_MODEL, device: str = "cpu", batch_size: int = 32):
+        """
+        :param model: Name or path of the sentence-transformers model
+        :param device: Device the model runs on
+        :param batch_size: Number of texts encoded at once
+        """
+        self._model: Any = _load_sentence_transformer(model, device)
+        self.model: str = model
+        self.dimensions: int = self._model.get_sentence_embedding_dimension()
+        self.batch_size: int = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with _ENCODE_LOCK:
+            vectors: np.ndarray = self._model.encode(
+                texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+            )
+        return vectors.tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+def _create_openai_embeddings(model: str = EMBEDDINGS_MODEL, dimensions: Optional[int] = None) -> Embeddings:
+    """
+    :param model: Name of the OpenAI embeddings model
+    :param dimensions: Dimensions of the embeddings. text-embedding-3 models return shortened embeddings
+        of any size up to their full size. Default to the RAG_EMBEDDINGS_DIMENSIONS environment variable,
+        then to VECTOR_SIZE.
+    :return: OpenAI embeddings
+    """
+    dimensions = dimensions or int(os.getenv("RAG_EMBEDDINGS_DIMENSIONS", str(VECTOR_SIZE)))
+    if dimensions < 1:
+        raise ValueError(f"Invalid OpenAI embeddings dimensions: {dimensions}")
+    return OpenAIEmbeddings(model=model, dimensions=dimensions)
+
+
+_PROVIDERS: Dict[str, EmbeddingsFactory] = {
+    "openai": _create_openai_embeddings,
+    "hashing": HashingEmbeddings,
+    "sentence_transformers": SentenceTransformersEmbeddings,
+}
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def register_embeddings_provider(name: str, factory: EmbeddingsFactory):
+    """
+    Make an embeddings provider selectable by name.
+
+    :param name: Name of the provider in the "provider" key of the embeddings arguments
+    :param factory: Function creating the embeddings from the other keys of the embeddings arguments
+    """
+    with _PROVIDERS_LOCK:
+        _PROVIDERS[name] = factory
+
+
+def get_embeddings_providers() -> List[str]:
+    """
+    :return: Names of the registered embeddings providers
+    """
+    with _PROVIDERS_LOCK:
+        return sorted(_PROVIDERS)
+
+
+def create_embeddings(embeddings_args: Optional[Dict[str, Any]] = None) -> Embeddings:
+    """
+    :param embeddings_args: Dictionary with the "provider" name and the arguments of the provider,
+        such as {"provider": "hashing", "dimensions": 256}. A missing provider defaults to the
+        RAG_EMBEDDINGS_PROVIDER environment variable, then to "openai".
+    :return: The embeddings
+    :raises ValueError: If the provider is unknown or its arguments are not valid
+    """
+    embeddings_args = dict(embeddings_args or {})
+    provider: str = embeddings_args.pop("provider", None) or os.getenv("RAG_EMBEDDINGS_PROVIDER", DEFAULT_PROVIDER)
+    with _PROVIDERS_LOCK:
+        factory: Optional[EmbeddingsFactory] = _PROVIDERS.get(provider)
+    if factory is None:
+        raise ValueError(
+            f"Unknown embeddings provider '{provider}'. Available: {', '.join(get_embeddings_providers())}"
+        )
+    try:
+        return factory(**embeddings_args)
+    except TypeError as type_error:
+        raise ValueError(f"Invalid arguments of the '{provider}' embeddings provider: {type_error}") from type_error
@@ -0,0 +1,227 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import AsyncIterable
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+
+from coded_tools.rag.dedup import ChunkDeduplicator
+from coded_tools.rag.dedup import DedupStats
+
+# Number of chunks embedded per request. Requests of concurrent batches may be merged by BatchedEmbeddings.
+DEFAULT_EMBED_BATCH_SIZE = 512
+# Number of split batches allowed to wait for the embedding stage before loading pauses
+DEFAULT_QUEUE_BATCHES = 4
+# Number of embedding requests in flight at once
+DEFAULT_EMBED_CONCURRENCY = 4
+
+# Receives each batch of chunks together with their embeddings
+EmbeddedBatchSink = Callable[[List[Document], List[List[float]]], Awaitable[Any]]
+
+
+@dataclass
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    name: str
+    items: int = 0
+    # Time spent doing the work of the stage, excluding time spent waiting on other stages.
+    # Summed over the concurrent requests of the embedding stage.
+    seconds: float = 0.0
+
+    def add(self, items: int, seconds: float):
+        """
+        :param items: Number of items processed
+        :param seconds: Time it took to process them
+        """
+        self.items += items
+        self.seconds += seconds
+
+    @property
+    def items_per_second(self) -> float:
+        """Throughput of the stage while it was busy."""
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class PipelineStats:
+    """Throughput counters of an ingestion run."""
+
+    load: StageStats = field(default_factory=lambda: StageStats("load"))
+    split: StageStats = field(default_factory=lambda: StageStats("split"))
+    embed: StageStats = field(default_factory=lambda: StageStats("embed"))
+    store: StageStats = field(default_factory=lambda: StageStats("store"))
+    wall_seconds: float = 0.0
+    # Counters of the dedup stage, None if near-duplicate chunks are not dropped
+    dedup: Optional[DedupStats] = None
+    # Dimensions of the embeddings, known once a batch is embedded
+    dimensions: int = 0
+
+    def summary(self) -> str:
+        """One line per stage, for logging."""
+        lines: List[str] = [
+            f"  {stage.name}: {stage.items} items in {stage.seconds:.2f} s ({stage.items_per_second:.1f}/s)"
+            for stage in (self.load, self.split, self.embed, self.store)
+        ]
+        if self.dedup is not None:
+            lines.append(f"  {self.dedup.summary(self.dimensions)}")
+        return "\n".join([f"Ingestion took {self.wall_seconds:.2f} s", *lines])
+
+
+class IngestionPipeline:
+    """
+    Streams documents through load -> split -> dedup -> embed -> store.
+
+    Loading and splitting run in one task, which feeds fixed-size batches of chunks
+    into a bounded queue. A second task sends up to embed_concurrency batches at once
+    to the embeddings, and a third task hands the embedded batches to a sink in the order
+    they were split, while the next batches are embedded. When embedding falls behind,
+    the full queue pauses loading, so that only queue_size batches of chunks, plus those
+    being embedded or stored and the chunks of the current document, are held in memory
+    however large the source is.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        text_splitter: TextSplitter,
+        batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+        queue_size: int = DEFAULT_QUEUE_BATCHES,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+        embed_concurrency: int = DEFAULT_EMBED_CONCURRENCY,
+    ):
+        """
+        :param embeddings: Embeddings used to embed the chunks
+        :param text_splitter: Splitter turning each document into chunks
+        :param batch_size: Number of chunks embedded per request
+        :param queue_size: Number of batches allowed to wait for the embedding stage
+        :param deduplicator: Drops near-duplicate chunks before they are embedded, None to keep all chunks
+        :param embed_concurrency: Number of embedding requests in flight at once
+        """
+        self.embeddings: Embeddings = embeddings
+        self.text_splitter: TextSplitter = text_splitter
+        self.batch_size: int = max(1, batch_size)
+        self.queue_size: int = max(1, queue_size)
+        self.embed_concurrency: int = max(1, embed_concurrency)
+        self.deduplicator: Optional[ChunkDeduplicator] = deduplicator
+        self.stats = PipelineStats(dedup=deduplicator.stats if deduplicator is not None else None)
+
+    async def iter_chunks(self, documents: AsyncIterable[Document]) -> AsyncIterator[Document]:
+        """
+        :param documents: The documents, produced lazily
+        :return: Async iterator over the chunks of the documents
+        """
+        iterator: AsyncIterator[Document] = aiter(documents)
+        while True:
+            start: float = time.perf_counter()
+            try:
+                document: Document = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            self.stats.load.add(1, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            chunks: List[Document] = self.text_splitter.split_documents([document])
+            if self.deduplicator is not None:
+                chunks = [chunk for chunk in chunks if not self.deduplicator.is_duplicate(chunk)]
+            self.stats.split.add(len(chunks), time.perf_counter() - start)
+            for chunk in chunks:
+                yield chunk
+
+    async def _produce(self, documents: AsyncIterable[Document], queue: asyncio.Queue):
+        """Split the documents and put batches of chunks on the queue, waiting while it is full."""
+        batch: List[Document] = []
+        async for chunk in self.iter_chunks(documents):
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                await queue.put(batch)
+                batch = []
+        if batch:
+            await queue.put(batch)
+        await queue.put(None)
+
+    async def _embed(self, batch: List[Document]) -> List[List[float]]:
+        """Embed the chunks of one batch."""
+        start: float = time.perf_counter()
+        vectors: List[List[float]] = await self.embeddings.aembed_documents([chunk.page_content for chunk in batch])
+        self.stats.embed.add(len(batch), time.perf_counter() - start)
+        if vectors:
+            self.stats.dimensions = len(vectors[0])
+        return vectors
+
+    async def _embed_batches(self, queue: asyncio.Queue, embedded: asyncio.Queue, tasks: Set[asyncio.Task]):
+        """Start embedding the batches taken from the queue, with up to embed_concurrency requests in flight."""
+        slots = asyncio.Semaphore(self.embed_concurrency)
+        while True:
+            batch: Optional[List[Document]] = await queue.get()
+            if batch is None:
+                await embedded.put(None)
+                return
+            await slots.acquire()
+            task: asyncio.Task = asyncio.create_task(self._embed(batch))
+            task.add_done_callback(lambda _: slots.release())
+            tasks.add(task)
+            await embedded.put((batch, task))
+
+    async def _store(self, embedded: asyncio.Queue, sink: EmbeddedBatchSink, tasks: Set[asyncio.Task]):
+        """Pass the embedded batches to the sink, one at a time and in the order they were split."""
+        while True:
+            item: Optional[Tuple[List[Document], asyncio.Task]] = await embedded.get()
+            if item is None:
+                return
+            batch, task = item
+            vectors: List[List[float]] = await task
+            tasks.discard(task)
+
+            start: float = time.perf_counter()
+            await sink(batch, vectors)
+            self.stats.store.add(len(batch), time.perf_counter() - start)
+
+    async def run(self, documents: AsyncIterable[Document], sink: EmbeddedBatchSink) -> PipelineStats:
+        """
+        Ingest the documents. A failure in any stage cancels the other ones and is raised.
+
+        :param documents: The documents, produced lazily
+        :param sink: Coroutine function storing each batch of chunks with their embeddings
+        :return: Throughput counters of the run
+        """
+        start: float = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Batches being embedded, in the order they were split, waiting to be stored
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=self.embed_concurrency)
+        embed_tasks: Set[asyncio.Task] = set()
+        stages: List[asyncio.Task] = [
+            asyncio.create_task(self._produce(documents, queue)),
+            asyncio.create_task(self._embed_batches(queue, embedded, embed_tasks)),
+            asyncio.create_task(self._store(embedded, sink, embed_tasks)),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            for task in stages + list(embed_tasks):
+                task.cancel()
+            self.stats.wall_seconds += time.perf_counter() - start
+        return self.stats
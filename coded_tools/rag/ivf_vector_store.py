@@ -0,0 +1,255 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import math
+import os
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.rag.numpy_vector_store import SCORE_BLOCK_ROWS
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.numpy_vector_store import normalize_rows
+from coded_tools.rag.numpy_vector_store import top_k_indices
+
+DEFAULT_N_PROBE = 8
+DEFAULT_TRAINING_ITERATIONS = 10
+# k-means is trained on a sample of at most this many rows per list
+TRAINING_ROWS_PER_LIST = 256
+# Below this many rows an exact search is as fast as probing lists
+MIN_INDEXED_ROWS = 1024
+# Retrain the centroids once the store has grown by this factor since training
+RETRAIN_GROWTH_FACTOR = 4
+IVF_SUFFIX = ".ivf.npz"
+
+logger = logging.getLogger(__name__)
+
+
+def ivf_path(path: str) -> str:
+    """
+    :param path: Path to the ".npy" embedding matrix
+    :return: Path to the file holding the IVF index
+    """
+    base: str = path[: -len(".npy")] if path.endswith(".npy") else path
+    return base + IVF_SUFFIX
+
+
+def assign_rows(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    :param matrix: (rows, dimensions) array of unit-length vectors
+    :param centroids: (lists, dimensions) array of unit-length centroids
+    :return: Index of the most similar centroid of each row
+    """
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+        block: np.ndarray = np.asarray(matrix[start : start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        assignments[start : start + SCORE_BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(
+    matrix: np.ndarray, n_lists: int, iterations: int = DEFAULT_TRAINING_ITERATIONS, seed: int = 0
+) -> np.ndarray:
+    """
+    Spherical k-means on a sample of the rows.
+
+    :param matrix: (rows, dimensions) array of unit-length vectors
+    :param n_lists: Number of centroids
+    :param iterations: Number of k-means iterations
+    :param seed: Random seed of the sampling
+    :return: (n_lists, dimensions) array of unit-length centroids
+    """
+    rng = np.random.default_rng(seed)
+    sample_size: int = min(matrix.shape[0], n_lists * TRAINING_ROWS_PER_LIST)
+    sample: np.ndarray = np.asarray(matrix[np.sort(rng.choice(matrix.shape[0], sample_size, replace=False))])
+    sample = sample.astype(np.float32)
+    centroids: np.ndarray = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments: np.ndarray = assign_rows(sample, centroids)
+        order: np.ndarray = np.argsort(assignments, kind="stable")
+        counts: np.ndarray = np.bincount(assignments, minlength=n_lists)
+        non_empty: np.ndarray = np.flatnonzero(counts)
+        starts: np.ndarray = np.concatenate([[0], np.cumsum(counts)[:-1]])[non_empty]
+        sums: np.ndarray = np.add.reduceat(sample[order], starts, axis=0)
+        centroids[non_empty] = normalize_rows(sums)
+        # Re-seed empty lists with random rows
+        empty: np.ndarray = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+    return centroids
+
+
+class IvfVectorStore(NumpyVectorStore):
+    """
+    NumpyVectorStore with an inverted file (IVF) index for sub-linear search.
+
+    Rows are partitioned into n_lists clusters with spherical k-means. A query is
+    only scored against the rows of its n_probe most similar clusters, so raising
+    n_probe trades latency for recall, up to an exact search when n_probe equals n_lists.
+    """
+
+    def __init__(self, embedding: Embeddings, n_lists: Optional[int] = None, n_probe: int = DEFAULT_N_PROBE):
+        """
+        :param embedding: Embeddings used to embed added texts and queries
+        :param n_lists: Number of clusters. Defaults to the square root of the number of rows.
+        :param n_probe: Number of clusters scored per query
+        """
+        super().__init__(embedding)
+        self.n_lists: Optional[int] = n_lists
+        self.n_probe: int = n_probe
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_rows: int = 0
+        self._assignments: Optional[np.ndarray] = None
+        self._list_rows: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        """(lists, dimensions) array of the trained centroids, None before the index is built"""
+        return self._centroids
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None) -> List[str]:
+        self._assignments = None
+        return super().add_vectors(vectors, texts, metadatas, ids)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self._assignments = None
+        return super().delete(ids, **kwargs)
+
+    def build_index(self):
+        """Train the centroids and assign every row to its cluster."""
+        n_lists: int = self.n_lists or max(1, int(math.sqrt(len(self))))
+        n_lists = min(n_lists, len(self))
+        self._centroids = train_centroids(self.matrix, n_lists)
+        self._trained_rows = len(self)
+        self._assignments = None
+        self._ensure_lists()
+        logger.info("Built IVF index with %d lists over %d rows\n", n_lists, len(self))
+
+    def _ensure_lists(self):
+        """(Re)compute the row assignments and the rows of each list after the store changed."""
+        self._ensure_normalized()
+        if self._centroids is None or len(self) > self._trained_rows * RETRAIN_GROWTH_FACTOR:
+            self.build_index()
+            return
+        if self._assignments is None or len(self._assignments) != len(self):
+            self._assignments = assign_rows(self.matrix, self._centroids)
+            self._list_rows = None
+        if self._list_rows is None:
+            self._list_rows = np.argsort(self._assignments, kind="stable")
+            self._list_offsets = np.searchsorted(
+                self._assignments[self._list_rows], np.arange(len(self._centroids) + 1)
+            )
+
+    def _candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        """Rows of the n_probe clusters most similar to the unit-length query."""
+        probes: np.ndarray = top_k_indices(self._centroids @ query, n_probe)
+        return np.concatenate(
+            [self._list_rows[self._list_offsets[probe] : self._list_offsets[probe + 1]] for probe in probes]
+        )
+
+    def batch_similarity_search_with_score_by_vector(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int = 4,
+        filter: Optional[Callable[[Document], bool]] = None,  # pylint: disable=redefined-builtin
+        *,
+        n_probe: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Same as NumpyVectorStore.batch_similarity_search_with_score_by_vector(), only scoring the rows
+        of the clusters most similar to each query.
+
+        :param n_probe: Number of clusters scored per query, defaults to the n_probe of the store
+        """
+        if len(self) < MIN_INDEXED_ROWS:
+            return super().batch_similarity_search_with_score_by_vector(embeddings, k, filter)
+
+        n_probe = n_probe or self.n_probe
+        self._ensure_lists()
+        queries: np.ndarray = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        results: List[List[Tuple[Document, float]]] = []
+        for query in queries:
+            candidates: np.ndarray = self._candidates(query, n_probe)
+            scores: np.ndarray = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+            ranked: np.ndarray = top_k_indices(scores, k if filter is None else len(candidates))
+            query_results: List[Tuple[Document, float]] = []
+            for index in ranked:
+                document: Document = self._document(int(candidates[index]))
+                if filter is None or filter(document):
+                    query_results.append((document, float(scores[index])))
+                    if len(query_results) >= k:
+                        break
+            results.append(query_results)
+        return results
+
+    def save_files(self, path: str, dtype: str = "float32"):
+        """
+        Write the files of NumpyVectorStore.save_files() plus the IVF index.
+
+        :param path: Path to the ".npy" file
+        :param dtype: "float32" or "float16"
+        """
+        super().save_files(path, dtype)
+        if len(self) < MIN_INDEXED_ROWS:
+            return
+        self._ensure_lists()
+        with open(ivf_path(path) + ".tmp", "wb") as ivf_file:
+            np.savez(
+                ivf_file,
+                centroids=self._centroids,
+                assignments=self._assignments,
+                trained_rows=np.asarray(self._trained_rows),
+            )
+        os.replace(ivf_path(path) + ".tmp", ivf_path(path))
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings, mmap_mode: Optional[str] = "r") -> "IvfVectorStore":
+        """
+        Load a store saved with save(). The IVF index is rebuilt on first search when it was not saved.
+
+        :param path: Path to the ".npy" file
+        :param embedding: Embeddings used to embed queries and added texts
+        :param mmap_mode: "r" to memory-map the files read-only, None to read them into memory
+        :return: The loaded store
+        """
+        # Resolved once, so that the IVF index comes from the same saved version as the store
+        path = os.path.realpath(path)
+        store: IvfVectorStore = super().load(path, embedding, mmap_mode)
+        if os.path.exists(ivf_path(path)):
+            store.load_index(ivf_path(path))
+        return store
+
+    def load_index(self, path: str):
+        """
+        Restore an IVF index saved with save(). An index of a different number of rows is ignored.
+
+        :param path: Path to the ".ivf.npz" file
+        """
+        with np.load(path) as index:
+            if len(index["assignments"]) != len(self):
+                logger.warning("Ignoring IVF index %s that does not match the vector store\n", path)
+                return
+            self._centroids = index["centroids"]
+            self._assignments = index["assignments"]
+            self._trained_rows = int(index["trained_rows"])
+            self._list_rows = None
+            self.n_lists = len(self._centroids)
@@ -0,0 +1,224 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import os
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.rag.numpy_vector_store import SCORE_BLOCK_ROWS
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.numpy_vector_store import normalize_rows
+from coded_tools.rag.numpy_vector_store import top_k_indices
+
+DEFAULT_PREFILTER_DIMENSIONS = 256
+# Candidates reranked with the full vectors per result requested
+DEFAULT_RERANK_FACTOR = 10
+# Fewest candidates reranked, so that small k still leave room for the prefilter to be wrong
+MIN_RERANK_CANDIDATES = 100
+PREFIX_SUFFIX = ".prefix.npy"
+
+logger = logging.getLogger(__name__)
+
+
+def prefix_path(path: str) -> str:
+    """
+    :param path: Path to the ".npy" embedding matrix
+    :return: Path to the file holding the truncated prefilter matrix
+    """
+    base: str = path[: -len(".npy")] if path.endswith(".npy") else path
+    return base + PREFIX_SUFFIX
+
+
+def truncate_rows(matrix: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    :param matrix: (rows, full dimensions) array of vectors
+    :param dimensions: Number of leading dimensions kept
+    :return: (rows, dimensions) array of the leading dimensions of each row, renormalized to unit length
+    """
+    truncated = np.empty((matrix.shape[0], dimensions), dtype=np.float32)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+        block: np.ndarray = np.asarray(matrix[start : start + SCORE_BLOCK_ROWS, :dimensions], dtype=np.float32)
+        truncated[start : start + SCORE_BLOCK_ROWS] = normalize_rows(block)
+    return truncated
+
+
+class MatryoshkaVectorStore(NumpyVectorStore):
+    """
+    NumpyVectorStore with a two-stage search over Matryoshka embeddings.
+
+    Models trained with Matryoshka representation learning, such as OpenAI text-embedding-3,
+    concentrate the information of an embedding in its leading dimensions. A query is first
+    scored against a matrix of the leading prefilter_dimensions of each row, then only the best
+    candidates are reranked with their full vectors, which can stay memory-mapped on disk.
+    With 256 of 1536 dimensions, the prefilter matrix is 6 times smaller than the full matrix
+    and scoring it is about 6 times faster. Raising rerank_factor trades latency for recall.
+
+    Embeddings of other models lose more when truncated. Measure recall with benchmarks.matryoshka_benchmark.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        prefilter_dimensions: int = DEFAULT_PREFILTER_DIMENSIONS,
+        rerank_factor: int = DEFAULT_RERANK_FACTOR,
+    ):
+        """
+        :param embedding: Embeddings used to embed added texts and queries
+        :param prefilter_dimensions: Leading dimensions scored by the first stage
+        :param rerank_factor: Candidates reranked with the full vectors per result requested
+        """
+        super().__init__(embedding)
+        self.prefilter_dimensions: int = prefilter_dimensions
+        self.rerank_factor: int = rerank_factor
+        # Prefilter matrices by number of dimensions, as concurrent searches may use different prefilter dimensions
+        self._prefixes: Dict[int, np.ndarray] = {}
+        self._prefix_lock = threading.Lock()
+
+    @property
+    def prefix_matrix(self) -> Optional[np.ndarray]:
+        """(rows, prefilter dimensions) array scored by the first stage, None before it is built"""
+        if len(self) == 0:
+            return None
+        return self._prefixes.get(min(self.prefilter_dimensions, self.matrix.shape[1]))
+
+    @property
+    def nbytes(self) -> int:
+        return super().nbytes + sum(prefix.nbytes for prefix in list(self._prefixes.values()))
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None) -> List[str]:
+        self._prefixes = {}
+        return super().add_vectors(vectors, texts, metadatas, ids)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self._prefixes = {}
+        return super().delete(ids, **kwargs)
+
+    def _ensure_prefix(self, dimensions: int) -> np.ndarray:
+        """
+        :param dimensions: Number of prefilter dimensions
+        :return: The prefilter matrix of that many dimensions, (re)built after the store changed
+        """
+        dimensions = min(dimensions, self.matrix.shape[1])
+        with self._prefix_lock:
+            self._ensure_normalized()
+            prefix: Optional[np.ndarray] = self._prefixes.get(dimensions)
+            if prefix is None or len(prefix) != len(self):
+                prefix = truncate_rows(self.matrix, dimensions)
+                self._prefixes[dimensions] = prefix
+                logger.info("Built %d-dimension prefilter matrix over %d rows\n", dimensions, len(self))
+            return prefix
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def batch_similarity_search_with_score_by_vector(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int = 4,
+        filter: Optional[Callable[[Document], bool]] = None,  # pylint: disable=redefined-builtin
+        *,
+        prefilter_dimensions: Optional[int] = None,
+        rerank_factor: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Same as NumpyVectorStore.batch_similarity_search_with_score_by_vector(), scoring the leading
+        dimensions first and reranking the best candidates with their full vectors.
+
+        :param prefilter_dimensions: Leading dimensions scored by the first stage, defaults to those of the store
+        :param rerank_factor: Candidates reranked per result requested, defaults to that of the store
+        """
+        prefilter_dimensions = prefilter_dimensions or self.prefilter_dimensions
+        n_candidates: int = max(k * (rerank_factor or self.rerank_factor), MIN_RERANK_CANDIDATES)
+        if filter is not None or len(self) <= n_candidates or prefilter_dimensions >= self.matrix.shape[1]:
+            # Filtered searches may need any number of candidates, so they score the full matrix
+            return super().batch_similarity_search_with_score_by_vector(embeddings, k, filter)
+
+        prefix: np.ndarray = self._ensure_prefix(prefilter_dimensions)
+        queries: np.ndarray = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        prefix_queries: np.ndarray = normalize_rows(queries[:, : prefix.shape[1]])
+        results: List[List[Tuple[Document, float]]] = []
+        for query, prefix_query in zip(queries, prefix_queries):
+            # Sorted rows read the full vectors in file order
+            candidates: np.ndarray = np.sort(top_k_indices(prefix @ prefix_query, n_candidates))
+            scores: np.ndarray = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+            results.append(
+                [(self._document(int(candidates[index])), float(scores[index])) for index in top_k_indices(scores, k)]
+            )
+        return results
+
+    def save_files(self, path: str, dtype: str = "float32"):
+        """
+        Write the files of NumpyVectorStore.save_files() plus the prefilter matrix.
+
+        :param path: Path to the ".npy" file
+        :param dtype: "float32" or "float16"
+        """
+        super().save_files(path, dtype)
+        if len(self) == 0:
+            return
+        prefix: np.ndarray = self._ensure_prefix(self.prefilter_dimensions)
+        with open(prefix_path(path) + ".tmp", "wb") as prefix_file:
+            np.save(prefix_file, prefix)
+        os.replace(prefix_path(path) + ".tmp", prefix_path(path))
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        embedding: Embeddings,
+        mmap_mode: Optional[str] = "r",
+        prefilter_dimensions: int = DEFAULT_PREFILTER_DIMENSIONS,
+    ) -> "MatryoshkaVectorStore":
+        """
+        Load a store saved with save(). The prefilter matrix is rebuilt on first search when it was not saved,
+        or was saved with other prefilter dimensions.
+
+        :param path: Path to the ".npy" file
+        :param embedding: Embeddings used to embed queries and added texts
+        :param mmap_mode: "r" to memory-map the files read-only, None to read them into memory
+        :param prefilter_dimensions: Leading dimensions scored by the first stage
+        :return: The loaded store
+        """
+        # Resolved once, so that the prefilter matrix comes from the same saved version as the store
+        path = os.path.realpath(path)
+        store: MatryoshkaVectorStore = super().load(path, embedding, mmap_mode)
+        store.prefilter_dimensions = prefilter_dimensions
+        if os.path.exists(prefix_path(path)):
+            store.load_prefix(prefix_path(path), mmap_mode)
+        return store
+
+    def load_prefix(self, path: str, mmap_mode: Optional[str] = "r"):
+        """
+        Restore a prefilter matrix saved with save(). A matrix of a different number of rows,
+        or not as wide as the configured prefilter dimensions, is ignored.
+
+        :param path: Path to the ".prefix.npy" file
+        :param mmap_mode: "r" to memory-map the file read-only, None to read it into memory
+        """
+        prefix: np.ndarray = np.load(path, mmap_mode=mmap_mode)
+        if len(prefix) != len(self):
+            logger.warning("Ignoring prefilter matrix %s that does not match the vector store\n", path)
+            return
+        if prefix.shape[1] != min(self.prefilter_dimensions, self.matrix.shape[1]):
+            logger.info("Ignoring %d-dimension prefilter matrix %s, rebuilt on first search\n", prefix.shape[1], path)
+            return
+        with self._prefix_lock:
+            self._prefixes[prefix.shape[1]] = prefix
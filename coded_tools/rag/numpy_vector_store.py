@@ -0,0 +1,736 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import argparse
+import asyncio
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from coded_tools.rag.bm25_index import Bm25Index
+
+# Suffixes of the sidecar files written next to the ".npy" embedding matrix
+DOCS_SUFFIX = ".docs.jsonl"
+OFFSETS_SUFFIX = ".offsets.npy"
+# Directory next to a saved ".npy" file holding one subdirectory per saved version of the files
+VERSIONS_SUFFIX = ".versions"
+# Saved versions kept on disk, so that a process reading the previous link can still load it
+KEPT_VERSIONS = 2
+SUPPORTED_DTYPES = {"float32", "float16"}
+# Rows scored at a time for non-float32 matrices, bounding the temporary float32 copy
+SCORE_BLOCK_ROWS = 65536
+# Candidates fetched per requested result when a filter may reject documents
+FILTER_OVERFETCH = 4
+# Rows checked on load to detect matrices saved without normalization
+NORMALIZATION_SAMPLE_ROWS = 64
+
+logger = logging.getLogger(__name__)
+
+
+def validate_dtype(dtype: str) -> str:
+    """
+    :param dtype: Precision of a saved embedding matrix
+    :return: The dtype
+    :raises ValueError: If the dtype is not one of SUPPORTED_DTYPES
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"dtype must be one of {sorted(SUPPORTED_DTYPES)}, got: '{dtype}'")
+    return dtype
+
+
+def sidecar_paths(path: str) -> Tuple[str, str]:
+    """
+    :param path: Path to the ".npy" embedding matrix
+    :return: Paths to the document sidecar and its line offsets
+    """
+    base: str = path[: -len(".npy")] if path.endswith(".npy") else path
+    return base + DOCS_SUFFIX, base + OFFSETS_SUFFIX
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    :param vectors: Array of vectors along the last axis
+    :return: float32 copy of the vectors scaled to unit length. Zero vectors are left as they are.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms: np.ndarray = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Select the k highest scores in O(n) with argpartition, then sort only those k.
+
+    :param scores: Array of scores along the last axis
+    :param k: Number of indices to return per row
+    :return: Indices of the k highest scores along the last axis, highest first
+    """
+    if k >= scores.shape[-1]:
+        return np.argsort(-scores, axis=-1)
+    candidates: np.ndarray = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order: np.ndarray = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class _JsonlSidecar:
+    """
+    Read-only, memory-mapped view of the document sidecar.
+    Each line is only parsed when its row is requested.
+    """
+
+    def __init__(self, docs_path: str, offsets_path: str):
+        self.offsets: np.ndarray = np.load(offsets_path, mmap_mode="r")
+        self._file = open(docs_path, "rb")  # pylint: disable=consider-using-with
+        size: int = os.fstat(self._file.fileno()).st_size
+        self._mmap: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self) -> int:
+        return max(len(self.offsets) - 1, 0)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        start: int = int(self.offsets[row])
+        end: int = int(self.offsets[row + 1])
+        return json.loads(self._mmap[start:end])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def close(self):
+        """Release the memory map and the file handle. Safe to call more than once."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __del__(self):
+        # The attributes are missing if __init__ failed
+        if hasattr(self, "_file"):
+            self.close()
+
+
+# pylint: disable=too-many-public-methods,too-many-instance-attributes
+class NumpyVectorStore(VectorStore):
+    """
+    Vector store keeping all embeddings in one contiguous NumPy matrix of unit-length rows.
+
+    Cosine similarity of a query to every document is then a single matrix-vector
+    product, and the top k results are selected with argpartition. Several queries
+    can be scored at once with a single matrix-matrix product.
+
+    The store can be saved as a float32 or float16 ".npy" matrix plus a compact
+    JSON lines sidecar holding ids, texts and metadata. Loading memory-maps both
+    files, so it is near-instant and the pages are shared between processes that
+    load the same files.
+    """
+
+    def __init__(self, embedding: Embeddings):
+        """
+        :param embedding: Embeddings used to embed added texts and queries
+        """
+        self.embedding: Embeddings = embedding
+        self._matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        # Over-allocated array the matrix is a view of, so that appending batches does not copy every row each time
+        self._buffer: Optional[np.ndarray] = None
+        self._records: Union[List[Dict[str, Any]], _JsonlSidecar] = []
+        # False for matrices loaded from files written without normalization
+        self._normalized: bool = True
+        self._id_to_row: Optional[Dict[str, int]] = None
+        # BM25 index of the texts for lexical search, built on first use
+        self._lexical_index: Optional[Bm25Index] = None
+        self._lexical_index_lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The (number of documents, dimensions) embedding matrix."""
+        return self._matrix
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate private memory held by this store. Memory-mapped pages are shared and not counted."""
+        total: int = 0 if isinstance(self._matrix, np.memmap) else self._matrix.nbytes
+        if self._buffer is not None and self._matrix.base is self._buffer:
+            total = self._buffer.nbytes
+        if isinstance(self._records, list):
+            total += sum(len(record["text"]) + 200 for record in self._records)
+        if self._lexical_index is not None:
+            total += self._lexical_index.nbytes
+        return total
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    def _document(self, row: int) -> Document:
+        record: Dict[str, Any] = self._records[row]
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"])
+
+    def _get_id_to_row(self) -> Dict[str, int]:
+        if self._id_to_row is None:
+            self._id_to_row = {record["id"]: row for row, record in enumerate(self._records)}
+        return self._id_to_row
+
+    def _make_writable(self):
+        """Copy memory-mapped data into memory before it is modified."""
+        if isinstance(self._matrix, np.memmap) or not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix, dtype=np.float32)
+        if not isinstance(self._records, list):
+            sidecar: _JsonlSidecar = self._records
+            self._records = list(sidecar)
+            sidecar.close()
+
+    def close(self):
+        """Release the file handles of a memory-mapped store. The store must not be searched afterwards."""
+        if isinstance(self._records, _JsonlSidecar):
+            self._records.close()
+
+    def _invalidate(self):
+        self._id_to_row = None
+        self._lexical_index = None
+
+    def _append_rows(self, rows: np.ndarray):
+        """
+        Append rows to the matrix, growing the backing buffer geometrically.
+
+        :param rows: (rows, dimensions) array of unit-length vectors
+        """
+        start: int = len(self)
+        end: int = start + len(rows)
+        if self._buffer is None or self._matrix.base is not self._buffer or end > len(self._buffer):
+            buffer: np.ndarray = np.empty((max(end, 2 * start), rows.shape[1]), dtype=np.float32)
+            buffer[:start] = self._matrix
+            self._buffer = buffer
+        self._buffer[start:end] = rows
+        self._matrix = self._buffer[:end]
+
+    def add_vectors(
+        self,
+        vectors: Union[np.ndarray, List[List[float]]],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[str]:
+        """
+        Add already embedded texts, replacing the rows of ids that are already stored.
+
+        :param vectors: One embedding per text
+        :param texts: The texts
+        :param metadatas: Optional metadata per text
+        :param ids: Optional id per text. Random ids are generated when missing.
+        :return: The ids of the added texts
+        """
+        new_vectors: np.ndarray = normalize_rows(vectors)
+        if len(texts) == 0:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        doc_ids: List[str] = [doc_id or str(uuid.uuid4()) for doc_id in (ids or [None] * len(texts))]
+
+        self._make_writable()
+        if len(self) == 0:
+            self._matrix = np.zeros((0, new_vectors.shape[1]), dtype=np.float32)
+
+        id_to_row: Dict[str, int] = self._get_id_to_row()
+        appended_vectors: List[np.ndarray] = []
+        for doc_id, text, metadata, vector in zip(doc_ids, texts, metadatas, new_vectors):
+            record: Dict[str, Any] = {"id": doc_id, "text": text, "metadata": dict(metadata or {})}
+            row: Optional[int] = id_to_row.get(doc_id)
+            if row is None:
+                id_to_row[doc_id] = len(self._records)
+                self._records.append(record)
+                appended_vectors.append(vector)
+            else:
+                self._records[row] = record
+                self._matrix[row] = vector
+                # The index cannot replace the terms of a row, so it is rebuilt on next use
+                self._lexical_index = None
+
+        if appended_vectors:
+            self._append_rows(np.stack(appended_vectors))
+        return doc_ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_vectors(self.embedding.embed_documents(texts), texts, metadatas, ids)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_vectors(await self.embedding.aembed_documents(texts), texts, metadatas, ids)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        id_to_row: Dict[str, int] = self._get_id_to_row()
+        rows = {id_to_row[doc_id] for doc_id in ids if doc_id in id_to_row}
+        if not rows:
+            return False
+        self._make_writable()
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(rows)] = False
+        self._matrix = self._matrix[keep]
+        self._records = [record for row, record in enumerate(self._records) if keep[row]]
+        self._invalidate()
+        return True
+
+    async def adelete(self, ids: Optional[Sequence[str]] = None, **kwargs: Any) -> Optional[bool]:
+        return self.delete(ids, **kwargs)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        id_to_row: Dict[str, int] = self._get_id_to_row()
+        return [self._document(id_to_row[doc_id]) for doc_id in ids if doc_id in id_to_row]
+
+    def update_metadata(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Merge metadata into stored documents, without re-embedding them.
+
+        :param updates: Document id to the metadata keys to set
+        :return: Number of documents updated, ids not stored are ignored
+        """
+        id_to_row: Dict[str, int] = self._get_id_to_row()
+        rows: List[Tuple[int, Dict[str, Any]]] = [
+            (id_to_row[doc_id], metadata) for doc_id, metadata in updates.items() if doc_id in id_to_row
+        ]
+        if rows:
+            self._make_writable()
+        for row, metadata in rows:
+            record: Dict[str, Any] = self._records[row]
+            self._records[row] = {**record, "metadata": {**record["metadata"], **metadata}}
+        return len(rows)
+
+    async def aget_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return self.get_by_ids(ids)
+
+    def get_vectors_by_ids(self, ids: Sequence[str]) -> Optional[np.ndarray]:
+        """
+        :param ids: Ids of stored documents
+        :return: (len(ids), dimensions) float32 array of their unit-length embeddings,
+            or None if any of the ids is not in the store
+        """
+        id_to_row: Dict[str, int] = self._get_id_to_row()
+        if any(doc_id not in id_to_row for doc_id in ids):
+            return None
+        self._ensure_normalized()
+        return np.asarray(self._matrix[[id_to_row[doc_id] for doc_id in ids]], dtype=np.float32)
+
+    def get_lexical_index(self) -> Bm25Index:
+        """
+        :return: BM25 index of the texts, built on first use and extended with the rows added since
+        """
+        with self._lexical_index_lock:
+            if self._lexical_index is None:
+                self._lexical_index = Bm25Index()
+            index: Bm25Index = self._lexical_index
+            if len(index) < len(self._records):
+                index.add_texts(self._records[row]["text"] for row in range(len(index), len(self._records)))
+            return index
+
+    def lexical_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Keyword search ranking the texts by BM25, without embedding the query.
+
+        :param query: The query
+        :param k: Number of documents to return
+        :return: List of (document, BM25 score) tuples of documents sharing a term with the query, best first
+        """
+        return [(self._document(row), score) for row, score in self.get_lexical_index().search(query, k)]
+
+    def lexical_search(self, query: str, k: int = 4) -> List[Document]:
+        """
+        :param query: The query
+        :param k: Number of documents to return
+        :return: Documents sharing a term with the query, best BM25 score first
+        """
+        return [doc for doc, _ in self.lexical_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._cosine_relevance_score_fn
+
+    def _ensure_normalized(self):
+        """Normalize, in memory, a matrix loaded from a file that was written without normalization."""
+        if not self._normalized:
+            self._matrix = normalize_rows(self._matrix)
+            self._normalized = True
+
+    def _score(self, queries: np.ndarray) -> np.ndarray:
+        """
+        :param queries: (number of queries, dimensions) array of unit-length query vectors
+        :return: (number of queries, number of documents) array of cosine similarities
+        """
+        self._ensure_normalized()
+        if self._matrix.dtype == np.float32:
+            return queries @ self._matrix.T
+
+        # BLAS does not handle float16, so upcast one block of rows at a time
+        scores = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            block: np.ndarray = self._matrix[start : start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start : start + SCORE_BLOCK_ROWS] = queries @ block.T
+        return scores
+
+    def _select(
+        self,
+        scores: np.ndarray,
+        k: int,
+        filter: Optional[Callable[[Document], bool]],  # pylint: disable=redefined-builtin
+    ) -> List[Tuple[Document, float]]:
+        """Turn the scores of one query into the k best (document, score) tuples passing the filter."""
+        if filter is None:
+            return [(self._document(int(row)), float(scores[row])) for row in top_k_indices(scores, k)]
+
+        fetch_k: int = k * FILTER_OVERFETCH
+        while True:
+            results: List[Tuple[Document, float]] = []
+            for row in top_k_indices(scores, fetch_k):
+                document: Document = self._document(int(row))
+                if filter(document):
+                    results.append((document, float(scores[row])))
+                    if len(results) >= k:
+                        return results
+            if fetch_k >= len(self):
+                return results
+            fetch_k *= FILTER_OVERFETCH
+
+    # pylint: disable=unused-argument
+    def batch_similarity_search_with_score_by_vector(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int = 4,
+        filter: Optional[Callable[[Document], bool]] = None,  # pylint: disable=redefined-builtin
+        **kwargs: Any,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Score several queries with one matrix-matrix product.
+
+        :param embeddings: Query embeddings
+        :param k: Number of documents to return per query
+        :param filter: Optional predicate documents must satisfy
+        :param kwargs: Search parameters of the subclasses, such as n_probe. They default to the
+            attributes of the store, and are passed per search so that concurrent callers do not
+            have to change the attributes of a shared store.
+        :return: For each query, a list of (document, cosine similarity) tuples, most similar first
+        """
+        if len(self) == 0 or len(embeddings) == 0:
+            return [[] for _ in embeddings]
+        scores: np.ndarray = self._score(normalize_rows(np.asarray(embeddings, dtype=np.float32)))
+        return [self._select(query_scores, k, filter) for query_scores in scores]
+
+    def batch_similarity_search_with_score(
+        self, queries: Sequence[str], k: int = 4, **kwargs: Any
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        :param queries: Query strings
+        :param k: Number of documents to return per query
+        :return: For each query, a list of (document, cosine similarity) tuples, most similar first
+        """
+        embeddings: List[List[float]] = [self.embedding.embed_query(query) for query in queries]
+        return self.batch_similarity_search_with_score_by_vector(embeddings, k, **kwargs)
+
+    async def abatch_similarity_search_with_score(
+        self, queries: Sequence[str], k: int = 4, **kwargs: Any
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        :param queries: Query strings
+        :param k: Number of documents to return per query
+        :return: For each query, a list of (document, cosine similarity) tuples, most similar first
+        """
+        embeddings: List[List[float]] = list(
+            await asyncio.gather(*(self.embedding.aembed_query(query) for query in queries))
+        )
+        return self.batch_similarity_search_with_score_by_vector(embeddings, k, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Callable[[Document], bool]] = None,  # pylint: disable=redefined-builtin
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """
+        :param embedding: Query embedding
+        :param k: Number of documents to return
+        :param filter: Optional predicate documents must satisfy
+        :param kwargs: Search parameters, as in batch_similarity_search_with_score_by_vector()
+        :return: List of (document, cosine similarity) tuples, most similar first
+        """
+        return self.batch_similarity_search_with_score_by_vector([embedding], k, filter, **kwargs)[0]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    # pylint: disable=arguments-differ
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    # pylint: disable=arguments-differ
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding: List[float] = await self.embedding.aembed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, **kwargs)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        if len(self) == 0:
+            return []
+        query: np.ndarray = normalize_rows(np.asarray([embedding], dtype=np.float32))
+        candidates: np.ndarray = top_k_indices(self._score(query)[0], fetch_k)
+        selected: List[int] = maximal_marginal_relevance(
+            query[0], self._matrix[candidates].astype(np.float32), lambda_mult=lambda_mult, k=k
+        )
+        return [self._document(int(candidates[index])) for index in selected]
+
+    def max_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, **kwargs: Any
+    ) -> List[Document]:
+        embedding: List[float] = self.embedding.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k, fetch_k, lambda_mult, **kwargs)
+
+    async def amax_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, **kwargs: Any
+    ) -> List[Document]:
+        embedding: List[float] = await self.embedding.aembed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k, fetch_k, lambda_mult, **kwargs)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding=embedding)
+        store.add_texts(texts, metadatas, ids=kwargs.get("ids"))
+        return store
+
+    @classmethod
+    async def afrom_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding=embedding)
+        await store.aadd_texts(texts, metadatas, ids=kwargs.get("ids"))
+        return store
+
+    @classmethod
+    def from_in_memory(cls, in_memory_store: InMemoryVectorStore) -> "NumpyVectorStore":
+        """
+        Convert an InMemoryVectorStore without re-embedding.
+
+        :param in_memory_store: The store to convert
+        :return: NumpyVectorStore holding the same documents and vectors
+        """
+        store = cls(embedding=in_memory_store.embeddings)
+        entries: List[Dict[str, Any]] = list(in_memory_store.store.values())
+        store.add_vectors(
+            [entry["vector"] for entry in entries],
+            [entry["text"] for entry in entries],
+            [entry["metadata"] for entry in entries],
+            [entry["id"] for entry in entries],
+        )
+        return store
+
+    def to_in_memory(self) -> InMemoryVectorStore:
+        """
+        :return: InMemoryVectorStore holding the same documents and vectors
+        """
+        in_memory_store = InMemoryVectorStore(embedding=self.embedding)
+        for row, record in enumerate(self._records):
+            in_memory_store.store[record["id"]] = {
+                "id": record["id"],
+                "vector": self._matrix[row].astype(np.float32).tolist(),
+                "text": record["text"],
+                "metadata": record["metadata"],
+            }
+        return in_memory_store
+
+    def dump(self, path: str):
+        """
+        Save the store in the JSON format of InMemoryVectorStore.dump().
+
+        :param path: Path to the ".json" file
+        """
+        self.to_in_memory().dump(path)
+
+    def save(self, path: str, dtype: str = "float32"):
+        """
+        Save the store as a ".npy" embedding matrix plus the document sidecar files.
+
+        Each save writes its files to a new version directory under path + VERSIONS_SUFFIX, then atomically
+        replaces path with a symbolic link to the new matrix. A concurrent load() resolves the link once,
+        so that it never pairs the matrix of one save with the sidecars of another.
+        Where symbolic links are not supported, the files are replaced one by one at path.
+
+        :param path: Path to the ".npy" file
+        :param dtype: "float32" or "float16". float16 halves the size at a small cost in precision.
+        """
+        versions_directory: str = path + VERSIONS_SUFFIX
+        version: str = f"{time.time_ns():x}-{os.getpid()}"
+        version_path: str = os.path.join(versions_directory, version, os.path.basename(path))
+        self.save_files(version_path, dtype)
+        link_path: str = f"{path}.{version}.tmp"
+        try:
+            os.symlink(os.path.relpath(version_path, os.path.dirname(os.path.abspath(path))), link_path)
+        except OSError as os_error:
+            logger.warning("Cannot link %s to its saved version, replacing the files in place: %s\n", path, os_error)
+            shutil.rmtree(os.path.dirname(version_path), ignore_errors=True)
+            self.save_files(path, dtype)
+            return
+        os.replace(link_path, path)
+
+        versions: List[str] = sorted(
+            (entry.name for entry in os.scandir(versions_directory) if entry.is_dir()),
+            key=lambda name: int(name.split("-")[0], 16),
+        )
+        for old_version in versions[:-KEPT_VERSIONS]:
+            # Processes still mapping a removed version keep their mapping. Windows cannot remove mapped files.
+            shutil.rmtree(os.path.join(versions_directory, old_version), ignore_errors=True)
+
+    def save_files(self, path: str, dtype: str = "float32"):
+        """
+        Write the ".npy" embedding matrix and the document sidecar files. Each file is written under a temporary
+        name and then renamed, so readers never see partial files, but the files are not replaced at once:
+        use save() to replace a store that may be loaded concurrently.
+
+        :param path: Path to the ".npy" file
+        :param dtype: "float32" or "float16"
+        """
+        validate_dtype(dtype)
+        docs_path, offsets_path = sidecar_paths(path)
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        offsets: List[int] = [0]
+        with open(docs_path + ".tmp", "wb") as docs_file:
+            for record in self._records:
+                line: bytes = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                docs_file.write(line)
+                offsets.append(offsets[-1] + len(line))
+        with open(offsets_path + ".tmp", "wb") as offsets_file:
+            np.save(offsets_file, np.asarray(offsets, dtype=np.int64))
+        with open(path + ".tmp", "wb") as matrix_file:
+            np.save(matrix_file, np.ascontiguousarray(self._matrix, dtype=dtype))
+
+        # Sidecars first, so that a reader seeing the new matrix also sees matching documents
+        os.replace(docs_path + ".tmp", docs_path)
+        os.replace(offsets_path + ".tmp", offsets_path)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings, mmap_mode: Optional[str] = "r") -> "NumpyVectorStore":
+        """
+        Load a store saved with save(), from the version its path links to when the load starts.
+
+        :param path: Path to the ".npy" file
+        :param embedding: Embeddings used to embed queries and added texts
+        :param mmap_mode: "r" to memory-map the files read-only, None to read them into memory
+        :return: The loaded store
+        :raises FileNotFoundError: If any of the files is missing
+        """
+        path = os.path.realpath(path)
+        docs_path, offsets_path = sidecar_paths(path)
+        store = cls(embedding=embedding)
+        store._matrix = np.load(path, mmap_mode=mmap_mode)
+        sidecar = _JsonlSidecar(docs_path, offsets_path)
+        if not mmap_mode:
+            store._records = list(sidecar)
+            sidecar.close()
+        else:
+            store._records = sidecar
+        if len(store._records) != store._matrix.shape[0]:
+            store.close()
+            raise ValueError(f"Sidecar of {path} has {len(store._records)} rows, expected {store._matrix.shape[0]}")
+        sample: np.ndarray = np.asarray(store._matrix[:NORMALIZATION_SAMPLE_ROWS], dtype=np.float32)
+        store._normalized = bool(np.allclose(np.linalg.norm(sample, axis=1), 1.0, atol=1e-2))
+        return store
+
+
+def convert_json_to_npy(json_path: str, npy_path: str, embedding: Embeddings = None, dtype: str = "float32"):
+    """
+    Convert a vector store saved with InMemoryVectorStore.dump() to the binary format.
+
+    :param json_path: Path to the existing ".json" dump
+    :param npy_path: Path to the ".npy" file to write
+    :param embedding: Embeddings to attach to the loaded store. Not used for the conversion itself.
+    :param dtype: "float32" or "float16"
+    """
+    in_memory_store: InMemoryVectorStore = InMemoryVectorStore.load(json_path, embedding=embedding)
+    NumpyVectorStore.from_in_memory(in_memory_store).save(npy_path, dtype=dtype)
+    logger.info("Converted %d vectors from %s to %s\n", len(in_memory_store.store), json_path, npy_path)
+
+
+def main():
+    """Command line entry point of the JSON to ".npy" converter."""
+    parser = argparse.ArgumentParser(description="Convert a JSON vector store dump to the memory-mappable format.")
+    parser.add_argument("json_path", help="Path to the existing .json vector store dump")
+    parser.add_argument("npy_path", help="Path to the .npy file to write")
+    parser.add_argument("--dtype", choices=sorted(SUPPORTED_DTYPES), default="float32")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    convert_json_to_npy(args.json_path, args.npy_path, dtype=args.dtype)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Deque
+from typing import List
+from typing import Optional
+from typing import Sequence
+from urllib.parse import urlparse
+
+import requests
+from langchain_community.document_loaders import PyMuPDFLoader
+from langchain_core.documents import Document
+
+DEFAULT_MAX_CONCURRENCY = 8
+# Seconds allowed to download and parse a single PDF
+DEFAULT_LOAD_TIMEOUT = 120.0
+DOWNLOAD_CHUNK_BYTES = 1 << 16
+# A worker whose job cannot be interrupted exits once the job runs this many times its timeout
+WORKER_EXIT_TIMEOUT_FACTOR = 2.0
+
+logger = logging.getLogger(__name__)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def download_pdf(url: str, path: str, timeout: float):
+    """
+    Download a PDF within a deadline. Unlike PyMuPDFLoader, which downloads without a timeout,
+    a stalled or trickling server cannot hold the worker longer than timeout.
+
+    :param url: HTTP(S) URL of the PDF
+    :param path: Path of the file to write
+    :param timeout: Seconds allowed for the whole download
+    :raises requests.RequestException: If the download fails or does not finish in time
+    """
+    deadline: float = time.monotonic() + timeout
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with open(path, "wb") as pdf_file:
+            while chunk := response.raw.read1(DOWNLOAD_CHUNK_BYTES, decode_content=True):
+                # read1() returns the bytes received so far, so that a trickling server cannot outlast the deadline
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"Download of {url} did not finish within {timeout} seconds")
+                pdf_file.write(chunk)
+
+
+def parse_pdf(url: str, timeout: float = DEFAULT_LOAD_TIMEOUT) -> List[Document]:
+    """
+    Download, if needed, and parse a PDF. Runs in a worker process.
+
+    :param url: Local path or URL of the PDF
+    :param timeout: Seconds allowed to download the PDF
+    :return: One document per page
+    """
+    if urlparse(url).scheme not in ("http", "https"):
+        return PyMuPDFLoader(file_path=url).load()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path: str = os.path.join(temp_dir, "download.pdf")
+        download_pdf(url, path, timeout)
+        docs: List[Document] = PyMuPDFLoader(file_path=path).load()
+    for doc in docs:
+        doc.metadata["source"] = url
+        doc.metadata["file_path"] = url
+    return docs
+
+
+class PdfLoadTimeout(TimeoutError):
+    """Raised in a worker when loading a PDF outlasts its timeout."""
+
+
+def _raise_timeout(_signum: int, _frame: Any):
+    """
+    SIGALRM handler interrupting the job of a worker process.
+    """
+    raise PdfLoadTimeout("Loading the PDF did not finish within its timeout")
+
+
+def call_with_deadline(function: Callable[..., List[Document]], timeout: float, *args: Any) -> List[Document]:
+    """
+    Run a job in a worker process within a deadline that only starts once the job is running,
+    so that the time spent waiting for a worker does not count.
+
+    Once the deadline passes, SIGALRM interrupts the job, which fails with PdfLoadTimeout while the worker
+    and the other jobs of the pool carry on. A job stuck in native code never returns to the interpreter
+    to be interrupted: as the last resort, the worker then exits WORKER_EXIT_TIMEOUT_FACTOR times the timeout
+    after the job started.
+
+    :param function: The job
+    :param timeout: Seconds allowed to run the job
+    :param args: Arguments of the job
+    :return: The result of the job
+    :raises PdfLoadTimeout: If the job did not finish in time
+    """
+    watchdog = threading.Timer(timeout * WORKER_EXIT_TIMEOUT_FACTOR, os._exit, (1,))
+    watchdog.daemon = True
+    watchdog.start()
+    # Signal handlers can only be installed in the main thread, which runs the jobs of a worker process
+    use_alarm: bool = hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    previous_handler: Any = signal.signal(signal.SIGALRM, _raise_timeout) if use_alarm else None
+    try:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        return function(*args)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+        watchdog.cancel()
+
+
+async def run_in_thread(function: Callable[..., List[Document]], timeout: float, *args: Any) -> List[Document]:
+    """
+    Run a job in a thread within a deadline that only starts once the thread runs the job.
+    Threads cannot be interrupted: a job that times out is abandoned, and only the download of a stuck PDF is bounded.
+
+    :param function: The job
+    :param timeout: Seconds allowed to run the job
+    :param args: Arguments of the job
+    :return: The result of the job
+    :raises asyncio.TimeoutError: If the job did not finish in time
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    started = asyncio.Event()
+
+    def run() -> List[Document]:
+        loop.call_soon_threadsafe(started.set)
+        return function(*args)
+
+    task: asyncio.Task = asyncio.ensure_future(asyncio.to_thread(run))
+    waiter: asyncio.Task = asyncio.ensure_future(started.wait())
+    try:
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        return await asyncio.wait_for(task, timeout)
+    finally:
+        waiter.cancel()
+        task.cancel()
+
+
+def get_worker_count() -> int:
+    """
+    :return: Number of PDFs parsed at once by this server process, from RAG_PDF_LOADER_PROCESSES,
+        defaulting to the number of CPUs. 0 parses PDFs in threads of this process instead.
+    """
+    return int(os.getenv("RAG_PDF_LOADER_PROCESSES", str(os.cpu_count() or 1)))
+
+
+def get_process_pool() -> Optional[Executor]:
+    """
+    Process pool shared by all PDF loads of this server process, created on first use.
+    The number of workers comes from RAG_PDF_LOADER_PROCESSES and defaults to the number of CPUs.
+    Setting it to 0 parses PDFs in threads of this process instead.
+
+    :return: The process pool, or None to parse in threads
+    """
+    global _process_pool  # pylint: disable=global-statement
+    processes: int = get_worker_count()
+    if processes <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned workers do not inherit the event loop and threads of the server process
+            _process_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def _reset_process_pool(pool: Executor):
+    """
+    Drop a broken process pool, so that the next load starts a new one.
+
+    :param pool: The pool to drop, left alone if it was already replaced
+    """
+    global _process_pool  # pylint: disable=global-statement
+    with _process_pool_lock:
+        if _process_pool is not pool:
+            return
+        _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def loader_concurrency(max_concurrency: int) -> int:
+    """
+    :param max_concurrency: Maximum number of PDFs to load at once
+    :return: That maximum, capped to the workers of the process pool, so that the timeout of a PDF
+        does not run while it waits for a worker
+    """
+    workers: int = get_worker_count()
+    return max(1, min(max_concurrency, workers) if workers > 0 else max_concurrency)
+
+
+async def load_pdf(url: str, semaphore: asyncio.Semaphore, timeout: float) -> List[Document]:
+    """
+    Load a single PDF, logging and skipping it on failure.
+
+    :param url: Local path or URL of the PDF
+    :param semaphore: Semaphore bounding the number of PDFs loaded at once, to at most the pool workers
+    :param timeout: Seconds allowed to load the PDF, from the time a worker starts loading it
+    :return: One document per page, or an empty list when the PDF could not be loaded
+    """
+    async with semaphore:
+        # A second attempt is made when a worker exiting, such as one stuck on another PDF, broke the pool
+        for attempt in range(2):
+            pool: Optional[Executor] = get_process_pool()
+            try:
+                if pool is None:
+                    docs: List[Document] = await run_in_thread(parse_pdf, timeout, url, timeout)
+                else:
+                    docs = await asyncio.get_running_loop().run_in_executor(
+                        pool, call_with_deadline, parse_pdf, timeout, url, timeout
+                    )
+                logger.info("Successfully loaded PDF file from %s", url)
+                return docs
+            except requests.RequestException as e:
+                logger.error("Failed to download PDF file from %s – %s", url, e)
+            except (asyncio.TimeoutError, PdfLoadTimeout):
+                logger.error("Timed out after %s seconds loading PDF file from %s", timeout, url)
+            except FileNotFoundError:
+                logger.error("File not found: %s", url)
+            except ValueError as e:
+                logger.error("Invalid file path or unsupported input: %s – %s", url, e)
+            except BrokenProcessPool as e:
+                _reset_process_pool(pool)
+                if attempt == 0:
+                    logger.warning("PDF loader process pool broke while loading %s, retrying – %s\n", url, e)
+                    continue
+                logger.error("PDF loader process pool broke again while loading %s – %s", url, e)
+            return []
+        return []
+
+
+async def load_pdfs(
+    urls: Sequence[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    timeout: float = DEFAULT_LOAD_TIMEOUT,
+) -> List[Document]:
+    """
+    Load PDFs concurrently, parsing them in a process pool.
+
+    :param urls: Local paths or URLs of the PDFs
+    :param max_concurrency: Maximum number of PDFs downloaded and parsed at once
+    :param timeout: Seconds allowed to load each PDF
+    :return: The pages of all PDFs that could be loaded, in the order of the urls
+    """
+    semaphore = asyncio.Semaphore(loader_concurrency(max_concurrency))
+    per_url_docs: List[List[Document]] = await asyncio.gather(*(load_pdf(url, semaphore, timeout) for url in urls))
+    return [doc for docs in per_url_docs for doc in docs]
+
+
+async def iter_pdfs(
+    urls: Sequence[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    timeout: float = DEFAULT_LOAD_TIMEOUT,
+) -> AsyncIterator[Document]:
+    """
+    Load PDFs concurrently and yield their pages in the order of the urls. At most
+    max_concurrency PDFs are loaded ahead of the one being yielded, so that memory
+    stays bounded however many urls there are.
+
+    :param urls: Local paths or URLs of the PDFs
+    :param max_concurrency: Maximum number of PDFs downloaded and parsed at once
+    :param timeout: Seconds allowed to load each PDF
+    :return: Async iterator over the pages of all PDFs that could be loaded
+    """
+    window: int = max(1, max_concurrency)
+    semaphore = asyncio.Semaphore(loader_concurrency(max_concurrency))
+    remaining = iter(urls)
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        while True:
+            while len(pending) < window:
+                url: Optional[str] = next(remaining, None)
+                if url is None:
+                    break
+                pending.append(asyncio.create_task(load_pdf(url, semaphore, timeout)))
+            if not pending:
+                return
+            for document in await pending.popleft():
+                yield document
+    finally:
+        for task in pending:
+            task.cancel()
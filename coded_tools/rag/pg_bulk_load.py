@@ -0,0 +1,150 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import json
+import logging
+import time
+import uuid
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import asyncpg
+import numpy as np
+from langchain_core.documents import Document
+from pgvector.asyncpg import register_vector
+
+# Rows sent per COPY. A batch of 1536-dimension float32 vectors takes about 6 MB per 1000 rows.
+DEFAULT_COPY_BATCH_SIZE = 2000
+# Default column names of the tables created by PGEngine.ainit_vectorstore_table
+COPY_COLUMNS = ("langchain_id", "content", "embedding", "langchain_metadata")
+
+logger = logging.getLogger(__name__)
+
+
+def asyncpg_dsn(connection_string: str) -> str:
+    """
+    :param connection_string: SQLAlchemy connection string, such as "postgresql+asyncpg://..."
+    :return: The same connection string without the SQLAlchemy driver name, as asyncpg expects it
+    """
+    scheme, separator, rest = connection_string.partition("://")
+    return scheme.split("+", 1)[0] + separator + rest
+
+
+def row_id(chunk: Document) -> uuid.UUID:
+    """
+    :param chunk: A chunk
+    :return: The id of the chunk when it is a UUID, as the id column expects, or a random UUID
+    """
+    if chunk.id:
+        try:
+            return uuid.UUID(str(chunk.id))
+        except ValueError:
+            pass
+    return uuid.uuid4()
+
+
+class PgBulkLoader:
+    """
+    Streams chunks and their embeddings into a vector store table with binary COPY,
+    which skips the per-row statement overhead of INSERT.
+
+    Rows are buffered and sent batch_size at a time. The loader uses its own asyncpg
+    connection with the pgvector binary codec registered on it, so that the pooled
+    connections of the PGEngine, which send vectors as text, are left untouched.
+
+    Use as an async context manager. Rows still buffered are sent on a clean exit.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        connection_string: str,
+        table_name: str,
+        schema_name: str = "public",
+        batch_size: int = DEFAULT_COPY_BATCH_SIZE,
+        connect: Callable[[str], Awaitable[Any]] = asyncpg.connect,
+    ):
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of a table created by PGEngine.ainit_vectorstore_table
+        :param schema_name: Schema of the table
+        :param batch_size: Number of rows sent per COPY
+        :param connect: Coroutine function opening an asyncpg connection from a DSN
+        """
+        self.connection_string: str = connection_string
+        self.table_name: str = table_name
+        self.schema_name: str = schema_name
+        self.batch_size: int = max(1, batch_size)
+        self._connect: Callable[[str], Awaitable[Any]] = connect
+        self._connection: Optional[Any] = None
+        self._records: List[Tuple[uuid.UUID, str, np.ndarray, str]] = []
+        self.rows: int = 0
+        # Time spent in COPY, excluding the time spent waiting for rows
+        self.seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of the COPY statements."""
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    async def __aenter__(self) -> "PgBulkLoader":
+        self._connection = await self._connect(asyncpg_dsn(self.connection_string))
+        await register_vector(self._connection)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                await self.flush()
+        finally:
+            await self._connection.close()
+            self._connection = None
+
+    async def add(self, chunks: Sequence[Document], vectors: Sequence[Sequence[float]]):
+        """
+        Buffer chunks with their embeddings, sending a COPY whenever a batch is full.
+        Usable as the sink of an IngestionPipeline.
+
+        :param chunks: The chunks
+        :param vectors: One embedding per chunk
+        """
+        for chunk, vector in zip(chunks, vectors):
+            self._records.append(
+                (
+                    row_id(chunk),
+                    chunk.page_content,
+                    np.asarray(vector, dtype=np.float32),
+                    json.dumps(chunk.metadata or {}, default=str),
+                )
+            )
+        if len(self._records) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Send the buffered rows."""
+        if not self._records:
+            return
+        records, self._records = self._records, []
+        start: float = time.perf_counter()
+        await self._connection.copy_records_to_table(
+            self.table_name, records=records, columns=list(COPY_COLUMNS), schema_name=self.schema_name
+        )
+        self.seconds += time.perf_counter() - start
+        self.rows += len(records)
+
+    async def analyze(self):
+        """Refresh the planner statistics of the table after a bulk load."""
+        await self._connection.execute(f'ANALYZE "{self.schema_name}"."{self.table_name}"')
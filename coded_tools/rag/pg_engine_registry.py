@@ -0,0 +1,221 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from asyncpg import PostgresError
+from langchain_postgres import PGEngine
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+# Seconds after which a pooled connection is replaced, before servers or proxies drop idle connections
+DEFAULT_POOL_RECYCLE = 1800
+# Seconds to wait for a free connection when the pool is exhausted
+DEFAULT_POOL_TIMEOUT = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings of the engines in the registry."""
+
+    pool_size: int = DEFAULT_POOL_SIZE
+    max_overflow: int = DEFAULT_MAX_OVERFLOW
+    pool_recycle: int = DEFAULT_POOL_RECYCLE
+    pool_timeout: float = DEFAULT_POOL_TIMEOUT
+    # Test each connection with a round trip when it is checked out, replacing dead ones
+    pool_pre_ping: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        """
+        :return: Pool settings from the RAG_POSTGRES_POOL_* environment variables, with defaults for missing ones
+        """
+        return cls(
+            pool_size=int(os.getenv("RAG_POSTGRES_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+            max_overflow=int(os.getenv("RAG_POSTGRES_POOL_MAX_OVERFLOW", str(DEFAULT_MAX_OVERFLOW))),
+            pool_recycle=int(os.getenv("RAG_POSTGRES_POOL_RECYCLE_SECONDS", str(DEFAULT_POOL_RECYCLE))),
+            pool_timeout=float(os.getenv("RAG_POSTGRES_POOL_TIMEOUT_SECONDS", str(DEFAULT_POOL_TIMEOUT))),
+            pool_pre_ping=os.getenv("RAG_POSTGRES_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        )
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """
+        :return: Keyword arguments of sqlalchemy's create_async_engine
+        """
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_recycle": self.pool_recycle,
+            "pool_timeout": self.pool_timeout,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+
+# pylint: disable=too-many-instance-attributes
+class PGEngineRegistry:
+    """
+    Thread-safe, process-wide registry of PGEngines, one per connection string.
+
+    Each engine owns a pool of asyncpg connections running on the background event loop
+    of PGEngine, so that one engine serves the tool calls of every thread and event loop
+    of the process. The registry also remembers the vector store tables already
+    initialized through each engine, so that later calls skip the table creation attempt,
+    and the vector index of each table, so that later calls skip the index checks.
+    """
+
+    def __init__(
+        self,
+        pool_config: Optional[PoolConfig] = None,
+        engine_factory: Callable[..., PGEngine] = PGEngine.from_connection_string,
+    ):
+        """
+        :param pool_config: Connection pool settings. Read from the environment when not given.
+        :param engine_factory: Function creating an engine from a connection string and engine keyword arguments
+        """
+        self.pool_config: PoolConfig = pool_config or PoolConfig.from_env()
+        self._engine_factory: Callable[..., PGEngine] = engine_factory
+        self._engines: Dict[str, PGEngine] = {}
+        self._tables: Set[Tuple[str, str]] = set()
+        # Access method and storage options of the vector index of each table
+        self._vector_indexes: Dict[Tuple[str, str], Tuple[str, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+        self.engines_created: int = 0
+        self.engines_reused: int = 0
+
+    def get_engine(self, connection_string: str) -> PGEngine:
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :return: The engine of the connection string, created on first use
+        """
+        with self._lock:
+            engine: Optional[PGEngine] = self._engines.get(connection_string)
+            if engine is not None:
+                self.engines_reused += 1
+                return engine
+            engine = self._engine_factory(url=connection_string, **self.pool_config.engine_kwargs())
+            self._engines[connection_string] = engine
+            self.engines_created += 1
+            return engine
+
+    def is_table_initialized(self, connection_string: str, table_name: str) -> bool:
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of the vector store table
+        :return: True if the table was created or found through this registry
+        """
+        with self._lock:
+            return (connection_string, table_name) in self._tables
+
+    def mark_table_initialized(self, connection_string: str, table_name: str):
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of the vector store table, now known to exist
+        """
+        with self._lock:
+            self._tables.add((connection_string, table_name))
+
+    def forget_table(self, connection_string: str, table_name: str):
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of a vector store table that no longer exists
+        """
+        with self._lock:
+            self._tables.discard((connection_string, table_name))
+            self._vector_indexes.pop((connection_string, table_name), None)
+
+    def get_vector_index(self, connection_string: str, table_name: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of the vector store table
+        :return: Access method and storage options of the vector index of the table, None if not known
+        """
+        with self._lock:
+            return self._vector_indexes.get((connection_string, table_name))
+
+    def set_vector_index(self, connection_string: str, table_name: str, vector_index: Tuple[str, Dict[str, str]]):
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of the vector store table
+        :param vector_index: Access method and storage options of the vector index of the table
+        """
+        with self._lock:
+            self._vector_indexes[(connection_string, table_name)] = vector_index
+
+    def forget_vector_index(self, connection_string: str, table_name: str):
+        """
+        :param connection_string: SQLAlchemy connection string of the database
+        :param table_name: Name of a vector store table whose vector index was dropped
+        """
+        with self._lock:
+            self._vector_indexes.pop((connection_string, table_name), None)
+
+    async def ahealth_check(self, connection_string: str) -> bool:
+        """
+        Check that the database answers through the pooled engine.
+
+        :param connection_string: SQLAlchemy connection string of the database
+        :return: True if a round trip succeeded
+        """
+        engine: PGEngine = self.get_engine(connection_string)
+
+        async def _ping():
+            # pylint: disable=protected-access
+            async with engine._pool.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            # pylint: disable=protected-access
+            await engine._run_as_async(_ping())
+            return True
+        except (OSError, PostgresError, SQLAlchemyError) as error:
+            logger.warning("Postgres health check failed: %s\n", error)
+            return False
+
+    async def aclose(self):
+        """Dispose of the connection pools of all engines and forget them."""
+        with self._lock:
+            engines: List[PGEngine] = list(self._engines.values())
+            self._engines.clear()
+            self._tables.clear()
+            self._vector_indexes.clear()
+        for engine in engines:
+            await engine.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with the number of engines and how often they were reused
+        """
+        with self._lock:
+            return {
+                "engines": len(self._engines),
+                "engines_created": self.engines_created,
+                "engines_reused": self.engines_reused,
+                "tables": len(self._tables),
+                "vector_indexes": len(self._vector_indexes),
+            }
+
+
+# Shared by every RAG tool instance in this process
+PG_ENGINE_REGISTRY = PGEngineRegistry()
@@ -0,0 +1,445 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import fields
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from langchain_postgres import PGEngine
+from langchain_postgres import PGVectorStore
+from langchain_postgres.v2.indexes import DEFAULT_DISTANCE_STRATEGY
+from langchain_postgres.v2.indexes import DEFAULT_INDEX_NAME_SUFFIX
+from langchain_postgres.v2.indexes import BaseIndex
+from langchain_postgres.v2.indexes import HNSWIndex
+from langchain_postgres.v2.indexes import HNSWQueryOptions
+from langchain_postgres.v2.indexes import IVFFlatIndex
+from langchain_postgres.v2.indexes import IVFFlatQueryOptions
+from langchain_postgres.v2.indexes import QueryOptions
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from coded_tools.rag.pg_engine_registry import PG_ENGINE_REGISTRY
+
+# "none" leaves the table without an ANN index, so every search is an exact sequential scan
+INDEX_TYPES = ("hnsw", "ivfflat", "none")
+# pgvector defaults
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCTION = 64
+DEFAULT_HNSW_EF_SEARCH = 40
+# An IVFFlat index is rebuilt once the table holds this many times the rows its lists were sized for
+IVFFLAT_REBUILD_GROWTH = 4.0
+
+logger = logging.getLogger(__name__)
+
+
+def default_ivfflat_lists(rows: int) -> int:
+    """
+    :param rows: Number of rows of the table
+    :return: Number of IVFFlat lists recommended by pgvector: rows / 1000 up to 1M rows, sqrt(rows) above
+    """
+    if rows <= 1_000_000:
+        return max(1, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def default_ivfflat_probes(lists: int) -> int:
+    """
+    :param lists: Number of IVFFlat lists
+    :return: Number of lists searched per query recommended by pgvector as a start: sqrt(lists)
+    """
+    return max(1, round(math.sqrt(lists)))
+
+
+@dataclass(frozen=True)
+class VectorIndexConfig:
+    """
+    ANN index of a postgres vector store table, and how it is searched.
+
+    type is one of:
+        "hnsw": graph index with m links per node, built with a candidate list of ef_construction,
+            searched with a candidate list of ef_search. Best recall for the latency, slower to build.
+        "ivfflat": lists clusters, of which probes are searched per query. Quick to build,
+            but its clusters are trained on the rows present when it is built.
+        "none": no index, exact search
+    Higher ef_search or probes raise recall and latency.
+    None for lists or probes sizes them from the number of rows.
+    A missing index is created without blocking writes. An existing index built differently is kept,
+    unless rebuild is True. Rebuilding drops the index, so it is meant for a maintenance run.
+    """
+
+    type: str = "hnsw"
+    m: int = DEFAULT_HNSW_M
+    ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION
+    ef_search: int = DEFAULT_HNSW_EF_SEARCH
+    lists: Optional[int] = None
+    probes: Optional[int] = None
+    rebuild: bool = False
+
+    def __post_init__(self):
+        if self.type not in INDEX_TYPES:
+            raise ValueError(f"Unknown postgres index type '{self.type}'. Available: {', '.join(INDEX_TYPES)}")
+        sizes: Dict[str, Optional[int]] = {
+            "m": self.m,
+            "ef_construction": self.ef_construction,
+            "ef_search": self.ef_search,
+            "lists": self.lists,
+            "probes": self.probes,
+        }
+        invalid: List[str] = [f"{name}={value}" for name, value in sizes.items() if value is not None and value < 1]
+        if invalid:
+            raise ValueError(f"Invalid postgres index sizes: {', '.join(invalid)}. Sizes must be at least 1.")
+
+    @classmethod
+    def from_dict(cls, index_args: Optional[Dict[str, Any]]) -> "VectorIndexConfig":
+        """
+        :param index_args: Dictionary with any of "type", "m", "ef_construction", "ef_search", "lists",
+            "probes" and "rebuild", as given in the tool arguments or the HOCON file
+        :return: The index configuration, with defaults for missing keys
+        :raises ValueError: If a key or value is not valid
+        """
+        index_args = dict(index_args or {})
+        unknown: List[str] = sorted(set(index_args) - {config_field.name for config_field in fields(cls)})
+        if unknown:
+            raise ValueError(f"Unknown postgres index arguments: {', '.join(unknown)}")
+        return cls(**index_args)
+
+    def build_index(self, rows: int) -> Optional[BaseIndex]:
+        """
+        :param rows: Number of rows of the table, to size the IVFFlat lists
+        :return: The index to create, or None for "none"
+        """
+        if self.type == "hnsw":
+            return HNSWIndex(m=self.m, ef_construction=self.ef_construction)
+        if self.type == "ivfflat":
+            return IVFFlatIndex(lists=self.lists or default_ivfflat_lists(rows))
+        return None
+
+    def query_options(self, lists: Optional[int] = None) -> Optional[QueryOptions]:
+        """
+        :param lists: Number of lists of the IVFFlat index of the table, when known
+        :return: Settings applied to each search of the table, or None for "none"
+        """
+        if self.type == "hnsw":
+            return HNSWQueryOptions(ef_search=self.ef_search)
+        if self.type == "ivfflat":
+            return IVFFlatQueryOptions(probes=self.probes or default_ivfflat_probes(lists or self.lists or 1))
+        return None
+
+    def existing_query_options(self, access_method: str, options: Dict[str, str]) -> Optional[QueryOptions]:
+        """
+        :param access_method: Access method of the existing index of the table, which may differ from type
+        :param options: Storage options of the existing index
+        :return: Settings applied to each search of the existing index, or None if it is neither HNSW nor IVFFlat
+        """
+        if access_method not in ("hnsw", "ivfflat"):
+            return None
+        return VectorIndexConfig(type=access_method, ef_search=self.ef_search, probes=self.probes).query_options(
+            int(options.get("lists", 100))
+        )
+
+
+@dataclass
+class SearchPlan:
+    """Query plan and timings of one similarity search, as reported by EXPLAIN ANALYZE."""
+
+    node_types: List[str] = field(default_factory=list)
+    index_names: List[str] = field(default_factory=list)
+    planning_ms: float = 0.0
+    execution_ms: float = 0.0
+    settings: List[str] = field(default_factory=list)
+
+    @property
+    def uses_index(self) -> bool:
+        """True if the search was answered by an index instead of a sequential scan."""
+        return bool(self.index_names)
+
+    def summary(self) -> str:
+        """
+        :return: One line description of the plan
+        """
+        access: str = f"index {', '.join(self.index_names)}" if self.uses_index else "sequential scan"
+        return (
+            f"{access} ({' > '.join(self.node_types)}), planning {self.planning_ms:.2f} ms, "
+            f"execution {self.execution_ms:.2f} ms, settings: {', '.join(self.settings) or 'defaults'}"
+        )
+
+
+def index_name(table_name: str) -> str:
+    """
+    :param table_name: Name of a vector store table
+    :return: Name of the vector index PGVectorStore gives the table
+    """
+    return table_name + DEFAULT_INDEX_NAME_SUFFIX
+
+
+async def arun_statement(
+    pg_engine: PGEngine, statement: str, params: Optional[Dict[str, Any]] = None, settings: Sequence[str] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Run a statement on a pooled connection of the engine, in a transaction of its own.
+
+    :param pg_engine: Engine of the database
+    :param statement: SQL statement
+    :param params: Bound parameters of the statement
+    :param settings: Settings such as "hnsw.ef_search = 100", applied with SET LOCAL before the statement
+    :return: Rows of the result as dictionaries
+    """
+
+    async def _run() -> List[Dict[str, Any]]:
+        # pylint: disable=protected-access
+        async with pg_engine._pool.connect() as conn:
+            for setting in settings:
+                await conn.execute(text(f"SET LOCAL {setting}"))
+            result = await conn.execute(text(statement), params or {})
+            rows: List[Dict[str, Any]] = (
+                [dict(row) for row in result.mappings().fetchall()] if result.returns_rows else []
+            )
+            await conn.commit()
+            return rows
+
+    # pylint: disable=protected-access
+    return await pg_engine._run_as_async(_run())
+
+
+async def adescribe_vector_index(
+    pg_engine: PGEngine, table_name: str, schema_name: str = "public"
+) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    :param pg_engine: Engine of the database
+    :param table_name: Name of the vector store table
+    :param schema_name: Schema of the table
+    :return: Access method ("hnsw", "ivfflat", ...) and storage options of the vector index of the table,
+        or None if the table has no vector index
+    """
+    rows: List[Dict[str, Any]] = await arun_statement(
+        pg_engine,
+        "SELECT am.amname, c.reloptions FROM pg_class c "
+        "JOIN pg_am am ON am.oid = c.relam "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = :index_name AND n.nspname = :schema_name",
+        {"index_name": index_name(table_name), "schema_name": schema_name},
+    )
+    if not rows:
+        return None
+    options: Dict[str, str] = dict(option.split("=", 1) for option in rows[0]["reloptions"] or [])
+    return rows[0]["amname"], options
+
+
+async def aestimate_rows(pg_engine: PGEngine, table_name: str, schema_name: str = "public") -> int:
+    """
+    :param pg_engine: Engine of the database
+    :param table_name: Name of the vector store table
+    :param schema_name: Schema of the table
+    :return: Number of rows of the table, from the planner statistics when the table was analyzed
+    """
+    qualified_name: str = f'"{schema_name}"."{table_name}"'
+    rows: List[Dict[str, Any]] = await arun_statement(
+        pg_engine,
+        "SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = to_regclass(:qualified_name)",
+        {"qualified_name": qualified_name},
+    )
+    if rows and rows[0]["estimate"] is not None and rows[0]["estimate"] >= 0:
+        return int(rows[0]["estimate"])
+    rows = await arun_statement(pg_engine, f"SELECT count(*) AS count FROM {qualified_name}")
+    return int(rows[0]["count"])
+
+
+def index_matches(config: VectorIndexConfig, access_method: str, options: Dict[str, str], rows: int) -> bool:
+    """
+    :param config: Wanted index configuration
+    :param access_method: Access method of the existing index
+    :param options: Storage options of the existing index, missing when left to the pgvector defaults
+    :param rows: Number of rows of the table
+    :return: True if the existing index is built as configured
+    """
+    if access_method != config.type:
+        return False
+    if config.type == "hnsw":
+        return (
+            int(options.get("m", DEFAULT_HNSW_M)) == config.m
+            and int(options.get("ef_construction", DEFAULT_HNSW_EF_CONSTRUCTION)) == config.ef_construction
+        )
+    lists: int = int(options.get("lists", 100))
+    if config.lists is not None:
+        return lists == config.lists
+    # Lists sized from the row count go stale as the table grows
+    return default_ivfflat_lists(rows) < lists * IVFFLAT_REBUILD_GROWTH
+
+
+async def aensure_vector_index(
+    vector_store: PGVectorStore,
+    pg_engine: PGEngine,
+    connection_string: str,
+    table_name: str,
+    config: VectorIndexConfig,
+) -> Optional[QueryOptions]:
+    """
+    Create the configured ANN index of a table when it has none, with CREATE INDEX CONCURRENTLY so that
+    writes to the table go on meanwhile. An index built differently is only rebuilt with config.rebuild.
+    The index found or created is remembered in PG_ENGINE_REGISTRY, so that later calls skip the checks.
+
+    :param vector_store: Vector store of the table
+    :param pg_engine: Engine of the database
+    :param connection_string: SQLAlchemy connection string of the database
+    :param table_name: Name of the vector store table
+    :param config: Wanted index configuration
+    :return: Search settings of the index of the table, or None if the table has no index
+    """
+    if config.type == "none":
+        return None
+
+    current: Optional[Tuple[str, Dict[str, str]]] = None
+    if not config.rebuild:
+        current = PG_ENGINE_REGISTRY.get_vector_index(connection_string, table_name)
+        if current is None:
+            current = await adescribe_vector_index(pg_engine, table_name)
+            if current is not None and current[0] != config.type:
+                logger.warning(
+                    'Table %s has a %s index, not the configured %s one. Set "rebuild" to rebuild it.\n',
+                    table_name,
+                    current[0],
+                    config.type,
+                )
+    else:
+        current = await adescribe_vector_index(pg_engine, table_name)
+
+    rows: int = 0
+    if config.type == "ivfflat" and (current is None or config.rebuild):
+        rows = await aestimate_rows(pg_engine, table_name)
+    if current is not None and config.rebuild and not index_matches(config, current[0], current[1], rows):
+        logger.info("Rebuilding the %s index of table %s as %s.\n", current[0], table_name, config)
+        await vector_store.adrop_vector_index()
+        PG_ENGINE_REGISTRY.forget_vector_index(connection_string, table_name)
+        current = None
+    if current is None:
+        if config.type == "ivfflat" and rows == 0:
+            # IVFFlat clusters are trained on the rows present when the index is built
+            logger.info("Table %s is empty, deferring its ivfflat index.\n", table_name)
+            return None
+        current = await _acreate_vector_index(vector_store, pg_engine, table_name, config.build_index(rows))
+        if current is None:
+            return None
+
+    PG_ENGINE_REGISTRY.set_vector_index(connection_string, table_name, current)
+    return config.existing_query_options(current[0], current[1])
+
+
+async def _acreate_vector_index(
+    vector_store: PGVectorStore, pg_engine: PGEngine, table_name: str, index: BaseIndex
+) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    :return: Access method and storage options of the index of the table, the created one or the one
+        another process created first, or None if the table still has no index
+    """
+    start: float = time.perf_counter()
+    try:
+        await vector_store.aapply_vector_index(index, concurrently=True)
+    except ProgrammingError as programming_error:
+        # Another process created the index first, search the index it built
+        logger.info("Index of table %s not created. %s\n", table_name, programming_error)
+        return await adescribe_vector_index(pg_engine, table_name)
+    logger.info(
+        "Built %s index %s of table %s in %.2f s\n",
+        index.index_type,
+        index.index_options(),
+        table_name,
+        time.perf_counter() - start,
+    )
+    if isinstance(index, IVFFlatIndex):
+        return index.index_type, {"lists": str(index.lists)}
+    return index.index_type, {"m": str(index.m), "ef_construction": str(index.ef_construction)}
+
+
+def parse_plan(explain_output: Any) -> SearchPlan:
+    """
+    :param explain_output: Result of EXPLAIN (ANALYZE, FORMAT JSON), as a JSON string or decoded
+    :return: Nodes, indexes and timings of the plan
+    """
+    if isinstance(explain_output, str):
+        explain_output = json.loads(explain_output)
+    root: Dict[str, Any] = explain_output[0]
+    plan = SearchPlan(planning_ms=root.get("Planning Time", 0.0), execution_ms=root.get("Execution Time", 0.0))
+    nodes: List[Dict[str, Any]] = [root["Plan"]]
+    while nodes:
+        node: Dict[str, Any] = nodes.pop(0)
+        plan.node_types.append(node["Node Type"])
+        if "Index Name" in node:
+            plan.index_names.append(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return plan
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+async def aexplain_search(
+    pg_engine: PGEngine,
+    table_name: str,
+    embedding: Sequence[float],
+    k: int,
+    query_options: Optional[QueryOptions] = None,
+    schema_name: str = "public",
+) -> SearchPlan:
+    """
+    Run a similarity search the way PGVectorStore does, under EXPLAIN ANALYZE.
+
+    :param pg_engine: Engine of the database
+    :param table_name: Name of the vector store table
+    :param embedding: Query embedding
+    :param k: Number of results
+    :param query_options: Search settings of the index, as given to the vector store
+    :param schema_name: Schema of the table
+    :return: The plan and timings of the search
+    """
+    settings: List[str] = query_options.to_parameter() if query_options is not None else []
+    operator: str = DEFAULT_DISTANCE_STRATEGY.operator
+    rows: List[Dict[str, Any]] = await arun_statement(
+        pg_engine,
+        f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT "langchain_id" FROM "{schema_name}"."{table_name}" '
+        f'ORDER BY "embedding" {operator} :query_embedding LIMIT :k',
+        {"query_embedding": str([float(value) for value in embedding]), "k": k},
+        settings,
+    )
+    plan: SearchPlan = parse_plan(next(iter(rows[0].values())))
+    plan.settings = settings
+    return plan
+
+
+async def alog_search_plan(
+    pg_engine: PGEngine,
+    table_name: str,
+    embedding: Sequence[float],
+    k: int,
+    config: VectorIndexConfig,
+    query_options: Optional[QueryOptions] = None,
+):
+    """
+    Log the plan and timings of a similarity search, to tune the index settings.
+
+    :param pg_engine: Engine of the database
+    :param table_name: Name of the vector store table
+    :param embedding: Query embedding
+    :param k: Number of results
+    :param config: Configuration of the index of the table
+    :param query_options: Search settings of the index, as given to the vector store
+    """
+    plan: SearchPlan = await aexplain_search(pg_engine, table_name, embedding, k, query_options=query_options)
+    logger.info("Query plan of table %s: %s\n", table_name, plan.summary())
+    if not plan.uses_index and config.type != "none":
+        logger.warning("Search of table %s did not use its %s index.\n", table_name, config.type)
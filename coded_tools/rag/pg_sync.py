@@ -0,0 +1,206 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_postgres import PGEngine
+from langchain_postgres import PGVectorStore
+from sqlalchemy import text
+
+DEFAULT_SYNC_BATCH_SIZE = 500
+ID_COLUMN = "langchain_id"
+EMBEDDING_COLUMN = "embedding"
+METADATA_COLUMN = "langchain_metadata"
+# Namespace of the chunk fingerprint UUIDs, so that ids never clash with random uuid4 ids
+CHUNK_ID_NAMESPACE = uuid.UUID("9a3e4a2c-6f0e-4b6e-9a43-3c1f0f3d2b51")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncStats:
+    """Outcome of an incremental sync."""
+
+    added: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+
+def fingerprint_chunk(chunk: Document) -> str:
+    """
+    Deterministic id of a chunk derived from its content and metadata.
+
+    :param chunk: The document chunk
+    :return: UUID string usable as the id column of a PGVectorStore table
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(chunk.metadata, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(chunk.page_content.encode("utf-8"))
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, digest.hexdigest()))
+
+
+def fingerprint_chunks(chunks: Iterable[Document]) -> Dict[str, Document]:
+    """
+    :param chunks: The document chunks
+    :return: Dictionary of chunk fingerprints to chunks. Identical chunks collapse into one entry.
+    """
+    return {fingerprint_chunk(chunk): chunk for chunk in chunks}
+
+
+async def fetch_existing_ids(pg_engine: PGEngine, table_name: str, schema_name: str = "public") -> Set[str]:
+    """
+    Read the ids of all rows currently stored in a vector store table.
+
+    :param pg_engine: Engine connected to the database
+    :param table_name: Name of the vector store table
+    :param schema_name: Schema of the vector store table
+    :return: Set of ids as strings
+    """
+
+    async def _fetch() -> Set[str]:
+        # pylint: disable=protected-access
+        async with pg_engine._pool.connect() as conn:
+            result = await conn.execute(text(f'SELECT "{ID_COLUMN}" FROM "{schema_name}"."{table_name}"'))
+            return {str(row[0]) for row in result.fetchall()}
+
+    # pylint: disable=protected-access
+    return await pg_engine._run_as_async(_fetch())
+
+
+async def fetch_embeddings(
+    pg_engine: PGEngine, table_name: str, ids: List[str], schema_name: str = "public"
+) -> Optional[np.ndarray]:
+    """
+    Read the stored embeddings of rows, such as search results, rather than embedding their chunks again.
+
+    :param pg_engine: Engine connected to the database
+    :param table_name: Name of the vector store table
+    :param ids: Ids of the rows
+    :param schema_name: Schema of the vector store table
+    :return: (rows, dimensions) float32 array of the embeddings in the order of the ids,
+        or None if a row was not found
+    """
+    # Vectors read as text are JSON arrays, like in PGVectorStore
+    statement = text(
+        f'SELECT "{ID_COLUMN}", CAST("{EMBEDDING_COLUMN}" AS text) FROM "{schema_name}"."{table_name}" '
+        f'WHERE "{ID_COLUMN}" = ANY(CAST(:ids AS uuid[]))'
+    )
+
+    async def _fetch() -> Dict[str, List[float]]:
+        # pylint: disable=protected-access
+        async with pg_engine._pool.connect() as conn:
+            result = await conn.execute(statement, {"ids": ids})
+            return {str(row[0]): json.loads(row[1]) for row in result.fetchall()}
+
+    # pylint: disable=protected-access
+    embeddings: Dict[str, List[float]] = await pg_engine._run_as_async(_fetch())
+    if any(row_id not in embeddings for row_id in ids):
+        return None
+    return np.asarray([embeddings[row_id] for row_id in ids], dtype=np.float32)
+
+
+async def update_chunk_metadata(
+    pg_engine: PGEngine,
+    table_name: str,
+    updates: Dict[str, Dict[str, Any]],
+    batch_size: int = DEFAULT_SYNC_BATCH_SIZE,
+    schema_name: str = "public",
+) -> int:
+    """
+    Merge metadata into stored rows, without re-embedding their chunks.
+
+    :param pg_engine: Engine connected to the database
+    :param table_name: Name of the vector store table
+    :param updates: Row id to the metadata keys to set
+    :param batch_size: Number of rows updated per statement
+    :param schema_name: Schema of the vector store table
+    :return: Number of rows updated
+    """
+    # One statement per batch, joining the rows on their uuid primary key so that its index is used.
+    # Merged as jsonb, whether the column is json or jsonb.
+    statement = text(
+        f'UPDATE "{schema_name}"."{table_name}" AS t SET "{METADATA_COLUMN}" = '
+        f'CAST(CAST(t."{METADATA_COLUMN}" AS jsonb) || u.patch AS json) '
+        "FROM unnest(CAST(:row_ids AS uuid[]), CAST(:patches AS jsonb[])) AS u(row_id, patch) "
+        f'WHERE t."{ID_COLUMN}" = u.row_id'
+    )
+    row_ids: List[str] = list(updates)
+    patches: List[str] = [json.dumps(updates[row_id], default=str) for row_id in row_ids]
+
+    async def _update() -> int:
+        updated: int = 0
+        for start in range(0, len(row_ids), batch_size):
+            # pylint: disable=protected-access
+            async with pg_engine._pool.begin() as conn:
+                result = await conn.execute(
+                    statement,
+                    {"row_ids": row_ids[start : start + batch_size], "patches": patches[start : start + batch_size]},
+                )
+                updated += result.rowcount
+        return updated
+
+    # pylint: disable=protected-access
+    return await pg_engine._run_as_async(_update())
+
+
+async def sync_vector_store(
+    vector_store: PGVectorStore,
+    pg_engine: PGEngine,
+    table_name: str,
+    chunks: List[Document],
+    batch_size: int = DEFAULT_SYNC_BATCH_SIZE,
+) -> SyncStats:
+    """
+    Bring a vector store table in line with the given chunks, embedding only chunks
+    that are not stored yet and deleting rows whose chunk no longer exists.
+
+    :param vector_store: Vector store attached to the table
+    :param pg_engine: Engine connected to the database
+    :param table_name: Name of the vector store table
+    :param chunks: The complete, current set of document chunks
+    :param batch_size: Number of rows upserted or deleted per statement
+    :return: Counts of added, deleted and unchanged chunks
+    """
+    desired: Dict[str, Document] = fingerprint_chunks(chunks)
+    existing: Set[str] = await fetch_existing_ids(pg_engine, table_name)
+
+    to_add: List[str] = [chunk_id for chunk_id in desired if chunk_id not in existing]
+    to_delete: List[str] = [chunk_id for chunk_id in existing if chunk_id not in desired]
+
+    for start in range(0, len(to_add), batch_size):
+        batch_ids: List[str] = to_add[start : start + batch_size]
+        await vector_store.aadd_documents([desired[chunk_id] for chunk_id in batch_ids], ids=batch_ids)
+
+    for start in range(0, len(to_delete), batch_size):
+        await vector_store.adelete(ids=to_delete[start : start + batch_size])
+
+    stats = SyncStats(added=len(to_add), deleted=len(to_delete), unchanged=len(desired) - len(to_add))
+    logger.info(
+        "Synced table %s: %d added, %d deleted, %d unchanged\n",
+        table_name,
+        stats.added,
+        stats.deleted,
+        stats.unchanged,
+    )
+    return stats
@@ -0,0 +1,360 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 600.0
+# Cosine similarity above which two query embeddings are treated as the same question.
+# Kept high, since queries differing in a single name can still be very similar.
+DEFAULT_SIMILARITY_THRESHOLD = 0.97
+
+# (namespace, generation, variant, normalized query)
+_EntryKey = Tuple[str, int, str, str]
+
+
+def normalize_query(query: str) -> str:
+    """
+    :param query: The query as asked
+    :return: The query case-folded with whitespace collapsed, used as the exact-match key
+    """
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+def file_version(path: str) -> str:
+    """
+    :param path: Path to a vector store file
+    :return: Version of the file for QueryCache.invalidate_on_change(), its modification time and size,
+        or a new value on every call when it cannot be read
+    """
+    try:
+        file_stat: os.stat_result = os.stat(path)
+    except OSError:
+        return f"unknown:{time.time_ns()}"
+    return f"{file_stat.st_mtime_ns}:{file_stat.st_size}"
+
+
+@dataclass
+class _QueryEntry:
+    """Retrieved documents of a query and the normalized embedding of the query."""
+
+    embedding: Optional[np.ndarray]
+    results: List[Document]
+    expires_at: float
+
+
+class QueryCache:
+    """
+    Thread-safe, process-wide cache of retrieval results in front of the vector stores.
+
+    Two tiers are looked up in order:
+        exact: the normalized query text, which skips both the query embedding and the search
+        semantic: a cached query whose embedding has a cosine similarity of at least
+            similarity_threshold with the new one, which skips the search
+
+    Entries live in a namespace identifying the vector store they were retrieved from,
+    and are only reused for lookups of the same variant, describing the search parameters
+    the results depend on, such as the number of documents retrieved.
+    Invalidating a namespace, when its vector store is rebuilt or synced, drops its entries
+    and bumps its generation, so that searches still running against the old vector store
+    cannot add stale results. Entries expire after ttl_seconds and are evicted in
+    least-recently-used order beyond max_entries.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_entries: Maximum number of cached queries over all namespaces
+        :param ttl_seconds: Seconds a cached result stays valid
+        :param similarity_threshold: Minimum cosine similarity for a semantic hit. Above 1 disables the semantic tier.
+        :param clock: Monotonic clock in seconds
+        """
+        self.max_entries: int = max_entries
+        self.ttl_seconds: float = ttl_seconds
+        self.similarity_threshold: float = similarity_threshold
+        self._clock: Callable[[], float] = clock
+        self._entries: "OrderedDict[_EntryKey, _QueryEntry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # Namespace to the version of the vector store file its cached queries were retrieved from
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self.exact_hits: int = 0
+        self.semantic_hits: int = 0
+        self.misses: int = 0
+        self.expirations: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+
+    def generation(self, namespace: str) -> int:
+        """
+        :param namespace: Identity of a vector store
+        :return: Number of times the namespace was invalidated
+        """
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def get(self, namespace: str, query: str, variant: str = "") -> Optional[List[Document]]:
+        """
+        Exact tier lookup. Does not count a miss, as the semantic tier may still hit.
+
+        :param namespace: Identity of the vector store
+        :param query: The query as asked
+        :param variant: Search parameters the results depend on
+        :return: The cached documents or None
+        """
+        entry: Optional[_QueryEntry] = self._get_exact(namespace, query, variant)
+        return None if entry is None else list(entry.results)
+
+    def _get_exact(self, namespace: str, query: str, variant: str) -> Optional[_QueryEntry]:
+        """Exact tier lookup, counting a hit."""
+        with self._lock:
+            key: _EntryKey = (namespace, self.generation(namespace), variant, normalize_query(query))
+            entry: Optional[_QueryEntry] = self._live_entry(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry
+
+    def get_similar(
+        self, namespace: str, query: str, embedding: List[float], variant: str = ""
+    ) -> Optional[List[Document]]:
+        """
+        Semantic tier lookup. A hit is also cached under the exact query, so that
+        asking it again skips the embedding.
+
+        :param namespace: Identity of the vector store
+        :param query: The query as asked
+        :param embedding: Embedding of the query
+        :param variant: Search parameters the results depend on
+        :return: The documents of the most similar cached query, or None on a miss
+        """
+        vector: np.ndarray = _normalize(embedding)
+        with self._lock:
+            generation: int = self.generation(namespace)
+            best_key: Optional[_EntryKey] = None
+            best_similarity: float = self.similarity_threshold
+            for key in list(self._entries):
+                if key[:3] != (namespace, generation, variant):
+                    continue
+                entry: Optional[_QueryEntry] = self._live_entry(key)
+                if entry is None or entry.embedding is None or entry.embedding.shape != vector.shape:
+                    continue
+                similarity: float = float(entry.embedding @ vector)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+
+            if best_key is None:
+                self.misses += 1
+                return None
+            self.semantic_hits += 1
+            results: List[Document] = self._entries[best_key].results
+            self._entries.move_to_end(best_key)
+            self._store((namespace, generation, variant, normalize_query(query)), vector, results)
+            return list(results)
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def put(
+        self,
+        namespace: str,
+        query: str,
+        embedding: Optional[List[float]],
+        results: List[Document],
+        generation: Optional[int] = None,
+        variant: str = "",
+    ):
+        """
+        :param namespace: Identity of the vector store
+        :param query: The query as asked
+        :param embedding: Embedding of the query, or None to only cache it for the exact tier
+        :param results: Documents retrieved for the query
+        :param generation: Generation of the namespace when the search started. Results of an
+            older generation were retrieved from a vector store since rebuilt and are dropped.
+        :param variant: Search parameters the results depend on
+        """
+        vector: Optional[np.ndarray] = None if embedding is None else _normalize(embedding)
+        with self._lock:
+            current: int = self.generation(namespace)
+            if generation is not None and generation != current:
+                return
+            self._store((namespace, current, variant, normalize_query(query)), vector, list(results))
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    async def aretrieve(
+        self,
+        namespace: str,
+        query: str,
+        embed_query: Callable[[str], Awaitable[List[float]]],
+        search: Callable[[List[float]], Awaitable[List[Document]]],
+        variant: str = "",
+    ) -> List[Document]:
+        """
+        Look the query up in both tiers, and search the vector store on a miss.
+
+        :param namespace: Identity of the vector store
+        :param query: The query as asked
+        :param embed_query: Coroutine function embedding the query
+        :param search: Coroutine function searching the vector store by query embedding
+        :param variant: Search parameters the results depend on
+        :return: The retrieved documents
+        """
+        results, _ = await self.aretrieve_with_embedding(namespace, query, embed_query, search, variant)
+        return results
+
+    async def aretrieve_with_embedding(
+        self,
+        namespace: str,
+        query: str,
+        embed_query: Callable[[str], Awaitable[List[float]]],
+        search: Callable[[List[float]], Awaitable[List[Document]]],
+        variant: str = "",
+    ) -> Tuple[List[Document], Optional[np.ndarray]]:
+        """
+        Same as aretrieve(), also returning the embedding of the query, so that reranking the results
+        does not embed the query again.
+
+        :return: The retrieved documents, and the embedding of the query, normalized on an exact hit,
+            or None on an exact hit of a query cached without its embedding
+        """
+        entry: Optional[_QueryEntry] = self._get_exact(namespace, query, variant)
+        if entry is not None:
+            return list(entry.results), entry.embedding
+
+        generation: int = self.generation(namespace)
+        embedding: List[float] = await embed_query(query)
+        results: Optional[List[Document]] = self.get_similar(namespace, query, embedding, variant)
+        if results is not None:
+            return results, np.asarray(embedding, dtype=np.float32)
+
+        results = await search(embedding)
+        self.put(namespace, query, embedding, results, generation=generation, variant=variant)
+        return results, np.asarray(embedding, dtype=np.float32)
+
+    def invalidate(self, namespace: str):
+        """
+        Drop the cached queries of a vector store that was rebuilt or changed.
+
+        :param namespace: Identity of the vector store
+        """
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._versions.pop(namespace, None)
+            for key in [key for key in self._entries if key[0] == namespace]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def invalidate_on_change(self, namespace: str, version: str) -> bool:
+        """
+        Drop the cached queries of a vector store loaded again from its file, unless the file
+        is still the version they were retrieved from.
+
+        :param namespace: Identity of the vector store
+        :param version: Version of the file, such as its modification time and size
+        :return: True if the cached queries were dropped
+        """
+        with self._lock:
+            if self._versions.get(namespace) == version:
+                return False
+            self.invalidate(namespace)
+            self._versions[namespace] = version
+            return True
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._versions.clear()
+            self.exact_hits = 0
+            self.semantic_hits = 0
+            self.misses = 0
+            self.expirations = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with the hit/miss counters of each tier and current usage
+        """
+        with self._lock:
+            hits: int = self.exact_hits + self.semantic_hits
+            lookups: int = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "exact_hit_rate": self.exact_hits / lookups if lookups else 0.0,
+                "semantic_hit_rate": self.semantic_hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def _live_entry(self, key: _EntryKey) -> Optional[_QueryEntry]:
+        """Return the entry unless it is missing or expired, dropping it when expired. Caller must hold the lock."""
+        entry: Optional[_QueryEntry] = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        return entry
+
+    def _store(self, key: _EntryKey, embedding: Optional[np.ndarray], results: List[Document]):
+        """Add an entry, evicting the least recently used ones when over budget. Caller must hold the lock."""
+        self._entries[key] = _QueryEntry(
+            embedding=embedding, results=results, expires_at=self._clock() + self.ttl_seconds
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    """
+    :param embedding: A vector
+    :return: The vector scaled to unit length, so that a dot product is a cosine similarity
+    """
+    vector: np.ndarray = np.asarray(embedding, dtype=np.float32)
+    norm: float = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+# Shared by every RAG tool instance in this process
+QUERY_CACHE = QueryCache(
+    max_entries=int(os.getenv("RAG_QUERY_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+    ttl_seconds=float(os.getenv("RAG_QUERY_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+    similarity_threshold=float(os.getenv("RAG_QUERY_CACHE_SIMILARITY", str(DEFAULT_SIMILARITY_THRESHOLD))),
+)
@@ -0,0 +1,197 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+
+# Only on POSIX systems. Elsewhere, processes may build the same vector store concurrently,
+# and the last one published wins.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# File naming the current version of a vector store, replaced atomically to swap versions
+CURRENT_FILE = "CURRENT"
+MATRIX_FILE = "vectors.npy"
+LOCK_FILE = "build.lock"
+# Versions kept on disk, so that a process reading the previous pointer can still attach to it
+KEPT_VERSIONS = 2
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVectorStores:
+    """
+    Vector stores shared by the processes of a host through memory-mapped files.
+
+    One process builds a vector store and publishes it as a new version directory holding its
+    ".npy" matrix and document sidecar, then atomically points the CURRENT file of the store to it.
+    Every process, the builder included, attaches read-only to the current version with a memory map,
+    so that the pages of the matrix are shared: N worker processes hold about one copy of the index.
+    On a RAM-backed file system such as /dev/shm, the files are shared memory segments.
+
+    Attached processes check the CURRENT file on each lookup and swap to a newly published version,
+    while queries in flight keep using the mapping of the version they started with.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Directory holding one subdirectory per vector store, created if needed
+        """
+        self.directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+        # Store key to the version attached by this process and its vector store
+        self._attached: Dict[str, Tuple[str, NumpyVectorStore]] = {}
+        self._lock = threading.Lock()
+
+    def _store_directory(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def current_version(self, key: str) -> Optional[str]:
+        """
+        :param key: Key of the vector store
+        :return: Current version of the vector store, or None if it was never published
+        """
+        try:
+            with open(os.path.join(self._store_directory(key), CURRENT_FILE), "r", encoding="utf-8") as current:
+                return current.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def attach(
+        self,
+        key: str,
+        store_class: type,
+        embedding: Embeddings,
+        on_swap: Optional[Callable[[], None]] = None,
+    ) -> Optional[NumpyVectorStore]:
+        """
+        Return the current version of a vector store, memory-mapped read-only.
+
+        :param key: Key of the vector store
+        :param store_class: NumpyVectorStore or a subclass, to load the files with
+        :param embedding: Embeddings used to embed queries
+        :param on_swap: Called when a newer version replaces the one attached by this process
+        :return: The vector store, or None if it was never published
+        """
+        version: Optional[str] = self.current_version(key)
+        if version is None:
+            return None
+        with self._lock:
+            attached: Optional[Tuple[str, NumpyVectorStore]] = self._attached.get(key)
+        if attached is not None and attached[0] == version:
+            return attached[1]
+
+        path: str = os.path.join(self._store_directory(key), version, MATRIX_FILE)
+        try:
+            store: NumpyVectorStore = store_class.load(path=path, embedding=embedding, mmap_mode="r")
+        except FileNotFoundError:
+            # Replaced and removed since the pointer was read, the next lookup reads the new pointer
+            logger.warning("Version %s of shared vector store %s was removed while attaching\n", version, key)
+            return attached[1] if attached is not None else None
+        with self._lock:
+            self._attached[key] = (version, store)
+        logger.info("Attached to version %s of shared vector store %s\n", version, key)
+        # The replaced store is not closed, searches in flight may still use it.
+        # Its mapping is released once the last reference to it is dropped.
+        if attached is not None and on_swap is not None:
+            on_swap()
+        return store
+
+    def publish(self, key: str, store: NumpyVectorStore, dtype: str = "float32") -> str:
+        """
+        Write a vector store as a new version and make it the current one.
+
+        :param key: Key of the vector store
+        :param store: The vector store to publish
+        :param dtype: "float32" or "float16" precision of the matrix
+        :return: The published version
+        """
+        store_directory: str = self._store_directory(key)
+        version: str = f"{time.time_ns():x}-{os.getpid()}"
+        # The version directory is already published at once through the CURRENT file
+        store.save_files(os.path.join(store_directory, version, MATRIX_FILE), dtype=dtype)
+
+        current_path: str = os.path.join(store_directory, CURRENT_FILE)
+        with open(current_path + ".tmp", "w", encoding="utf-8") as current:
+            current.write(version)
+        os.replace(current_path + ".tmp", current_path)
+        logger.info("Published version %s of shared vector store %s\n", version, key)
+        self._remove_old_versions(key)
+        return version
+
+    def _remove_old_versions(self, key: str):
+        """
+        Remove all but the latest versions. Processes still mapping a removed version keep their mapping,
+        as the files are only freed once unmapped.
+        """
+        store_directory: str = self._store_directory(key)
+        versions: List[str] = sorted(
+            (entry.name for entry in os.scandir(store_directory) if entry.is_dir()),
+            key=lambda name: int(name.split("-")[0], 16),
+        )
+        for version in versions[:-KEPT_VERSIONS]:
+            # Windows cannot remove mapped files, they are removed by a later publish
+            shutil.rmtree(os.path.join(store_directory, version), ignore_errors=True)
+
+    @asynccontextmanager
+    async def build_lock(self, key: str) -> AsyncIterator[None]:
+        """
+        Hold the exclusive lock of building a vector store, across the processes of the host.
+
+        :param key: Key of the vector store
+        """
+        store_directory: str = self._store_directory(key)
+        os.makedirs(store_directory, exist_ok=True)
+        with open(os.path.join(store_directory, LOCK_FILE), "a+b") as lock_file:
+            if fcntl is not None:
+                # Waiting may take as long as another process takes to build the vector store
+                await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+_SHARED_STORES: Dict[str, SharedVectorStores] = {}
+_SHARED_STORES_LOCK = threading.Lock()
+
+
+def get_shared_vector_stores(directory: str) -> SharedVectorStores:
+    """
+    Return the process-wide SharedVectorStores of a directory, creating it on first use.
+
+    :param directory: Absolute path to the shared directory
+    :return: The shared SharedVectorStores
+    """
+    with _SHARED_STORES_LOCK:
+        shared: Optional[SharedVectorStores] = _SHARED_STORES.get(directory)
+        if shared is None:
+            shared = SharedVectorStores(directory)
+            _SHARED_STORES[directory] = shared
+        return shared
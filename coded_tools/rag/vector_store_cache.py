@@ -0,0 +1,210 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from langchain_core.vectorstores import VectorStore
+
+# Rough per-entry overhead of a python dict entry holding id, text and metadata
+ENTRY_OVERHEAD_BYTES = 200
+# A python float inside a list costs a 24 byte object plus an 8 byte pointer
+PYTHON_FLOAT_BYTES = 32
+
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_MAX_MEGABYTES = 1024
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_vector_store_bytes(vector_store: VectorStore) -> int:
+    """
+    Estimate the memory held by a vector store.
+
+    :param vector_store: The vector store to measure
+    :return: Approximate number of bytes held by the vector store
+    """
+    nbytes: Optional[int] = getattr(vector_store, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+
+    store: Optional[Dict[str, Dict[str, Any]]] = getattr(vector_store, "store", None)
+    if not isinstance(store, dict):
+        return 0
+
+    total: int = 0
+    for entry in store.values():
+        total += ENTRY_OVERHEAD_BYTES
+        total += len(entry.get("vector") or []) * PYTHON_FLOAT_BYTES
+        total += len(entry.get("text") or "")
+    return total
+
+
+@dataclass
+class _CacheEntry:
+    """A cached vector store and its estimated size."""
+
+    vector_store: VectorStore
+    size_bytes: int
+
+
+class VectorStoreCache:
+    """
+    Thread-safe, process-wide cache of built vector stores.
+
+    Entries are evicted in least-recently-used order whenever either the
+    number of entries or the estimated memory footprint exceeds its budget.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_MEGABYTES * 1024 * 1024):
+        """
+        :param max_entries: Maximum number of vector stores to keep
+        :param max_bytes: Maximum estimated memory of all cached vector stores
+        """
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._total_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @staticmethod
+    def make_key(
+        source_identity: Any,
+        chunk_size: int,
+        chunk_overlap: int,
+        embeddings_model: str,
+        dimensions: Optional[int],
+    ) -> str:
+        """
+        Build a cache key from everything that determines the content of a vector store.
+
+        :param source_identity: JSON-serializable description of the document source
+        :param chunk_size: Chunk size used by the text splitter
+        :param chunk_overlap: Chunk overlap used by the text splitter
+        :param embeddings_model: Name of the embeddings model
+        :param dimensions: Dimensions of the embedding vectors
+        :return: Hex digest identifying the vector store
+        """
+        payload: Dict[str, Any] = {
+            "source": source_identity,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "embeddings_model": embeddings_model,
+            "dimensions": dimensions,
+        }
+        serialized: str = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[VectorStore]:
+        """
+        Return the cached vector store for the key, marking it as most recently used.
+
+        :param key: Cache key from make_key()
+        :return: The cached vector store or None on a miss
+        """
+        with self._lock:
+            entry: Optional[_CacheEntry] = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.vector_store
+
+    def put(self, key: str, vector_store: VectorStore, size_bytes: Optional[int] = None):
+        """
+        Add a vector store to the cache, evicting older entries when over budget.
+
+        :param key: Cache key from make_key()
+        :param vector_store: The vector store to cache
+        :param size_bytes: Size of the vector store. Estimated when not given.
+        """
+        if size_bytes is None:
+            size_bytes = estimate_vector_store_bytes(vector_store)
+
+        if size_bytes > self.max_bytes:
+            logger.warning(
+                "Vector store of %d bytes exceeds the cache budget of %d bytes. Not caching.\n",
+                size_bytes,
+                self.max_bytes,
+            )
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _CacheEntry(vector_store=vector_store, size_bytes=size_bytes)
+            self._total_bytes += size_bytes
+
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                evicted_key, evicted_entry = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_entry.size_bytes
+                self.evictions += 1
+                logger.info("Evicted vector store %s from cache\n", evicted_key)
+
+    def invalidate(self, key: str):
+        """
+        Remove a vector store from the cache.
+
+        :param key: Cache key from make_key()
+        """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove all vector stores and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with the hit/miss/eviction counters and current usage
+        """
+        with self._lock:
+            lookups: int = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: str):
+        """Remove an entry and account for its size. Caller must hold the lock."""
+        entry: Optional[_CacheEntry] = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+
+
+# Shared by every RAG tool instance in this process
+VECTOR_STORE_CACHE = VectorStoreCache(
+    max_entries=int(os.getenv("RAG_VECTOR_STORE_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+    max_bytes=int(os.getenv("RAG_VECTOR_STORE_CACHE_MAX_MB", str(DEFAULT_MAX_MEGABYTES))) * 1024 * 1024,
+)
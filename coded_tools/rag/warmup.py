@@ -0,0 +1,230 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from neuro_san.internals.graph.persistence.registry_manifest_restorer import RegistryManifestRestorer
+from neuro_san.internals.graph.registry.agent_network import AgentNetwork
+from neuro_san.internals.run_context.langchain.toolbox.toolbox_info_restorer import ToolboxInfoRestorer
+
+from coded_tools.base_rag import BaseRag
+
+# Query run against each vector store once it is built, which also loads the query path
+WARMUP_QUERY = "warmup"
+DEFAULT_WARMUP_CONCURRENCY = 2
+# Seconds allowed to warm up one tool before it is reported as failed, so that readiness is not blocked forever
+DEFAULT_WARMUP_TIMEOUT = 1800.0
+# Coded tools report errors as text rather than exceptions
+FAILURE_PREFIXES = ("❌", "Failed to create vector store")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupTarget:
+    """A RAG tool of an agent network, with the arguments of its agent network file."""
+
+    network: str
+    tool: str
+    class_ref: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    # "pending", "running", "ready" or "failed"
+    state: str = "pending"
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """Name of the tool prefixed with its agent network."""
+        return f"{self.network}/{self.tool}"
+
+
+def resolve_tool_class(network: str, class_ref: str) -> Optional[type]:
+    """
+    Resolve a coded tool class reference as neuro-san does: in the package of the agent network first,
+    then in the coded_tools package.
+
+    :param network: Name of the agent network
+    :param class_ref: "module.ClassName" reference of the tool
+    :return: The class, or None if it cannot be imported
+    """
+    module_name, _, class_name = class_ref.rpartition(".")
+    for package in (f"coded_tools.{network}", "coded_tools"):
+        try:
+            module = importlib.import_module(f"{package}.{module_name}")
+        except ImportError:
+            continue
+        tool_class: Optional[type] = getattr(module, class_name, None)
+        if tool_class is not None:
+            return tool_class
+    return None
+
+
+def find_warmup_targets(
+    manifest_file: Optional[str] = None, toolbox_info_file: Optional[str] = None
+) -> List[WarmupTarget]:
+    """
+    Find the RAG tools of the agent networks enabled in the manifest.
+
+    :param manifest_file: Path to the manifest. Defaults to AGENT_MANIFEST_FILE, as for the server.
+    :param toolbox_info_file: Path to the toolbox info file. Defaults to AGENT_TOOLBOX_INFO_FILE.
+    :return: One target per tool whose class is a BaseRag, in manifest order
+    """
+    networks: Dict[str, AgentNetwork] = RegistryManifestRestorer(manifest_file).restore()
+    restorer = ToolboxInfoRestorer()
+    default_toolbox: Dict[str, Any] = restorer.restore()
+    toolbox_infos: Dict[str, Dict[str, Any]] = {}
+
+    targets: List[WarmupTarget] = []
+    for network_name, network in networks.items():
+        config: Dict[str, Any] = network.get_config()
+        toolbox_file: Optional[str] = (
+            config.get("agent_toolbox_info_file")
+            or config.get("toolbox_info_file")
+            or toolbox_info_file
+            or os.getenv("AGENT_TOOLBOX_INFO_FILE")
+        )
+        if toolbox_file and toolbox_file not in toolbox_infos:
+            toolbox_infos[toolbox_file] = {**default_toolbox, **restorer.restore(file_reference=toolbox_file)}
+        toolbox: Dict[str, Any] = toolbox_infos.get(toolbox_file, default_toolbox)
+
+        for tool_spec in config.get("tools", []):
+            class_ref: Optional[str] = tool_spec.get("class")
+            if tool_spec.get("toolbox") is not None:
+                class_ref = toolbox.get(tool_spec["toolbox"], {}).get("class")
+            if not class_ref:
+                continue
+            tool_class: Optional[type] = resolve_tool_class(network_name, class_ref)
+            if tool_class is None or not issubclass(tool_class, BaseRag):
+                continue
+            targets.append(
+                WarmupTarget(network_name, tool_spec.get("name"), class_ref, dict(tool_spec.get("args", {})))
+            )
+    return targets
+
+
+class RagWarmup:
+    """
+    Builds or loads the vector stores of RAG tools in a background thread, so that the first
+    user query of each tool finds them in the process-wide caches.
+
+    Each tool is warmed up by invoking it as the agent network would, with its configured
+    arguments and a placeholder query. The warmup is complete, and the server ready, once
+    every tool is ready or has failed.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_WARMUP_CONCURRENCY, timeout: float = DEFAULT_WARMUP_TIMEOUT):
+        """
+        :param concurrency: Maximum number of tools warmed up at once
+        :param timeout: Seconds allowed to warm up one tool
+        """
+        self.concurrency: int = concurrency
+        self.timeout: float = timeout
+        self.targets: List[WarmupTarget] = []
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, targets: List[WarmupTarget]) -> threading.Thread:
+        """
+        Warm up the targets in a daemon thread running its own event loop.
+
+        :param targets: Tools to warm up
+        :return: The warmup thread
+        """
+        self.targets = targets
+        self._done.clear()
+        logger.info("Warming up %d RAG tools: %s\n", len(targets), ", ".join(target.name for target in targets))
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="rag-warmup", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    async def run(self):
+        """Warm up all targets, at most concurrency at once."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(target: WarmupTarget):
+            async with semaphore:
+                await self.warm_up(target)
+
+        try:
+            await asyncio.gather(*(bounded(target) for target in self.targets))
+        finally:
+            self._done.set()
+            logger.info("RAG warmup complete: %s\n", self.status())
+
+    async def warm_up(self, target: WarmupTarget):
+        """
+        Invoke one tool with its configured arguments, recording its state.
+
+        :param target: Tool to warm up
+        """
+        target.state = "running"
+        start: float = time.perf_counter()
+        try:
+            tool_class: Optional[type] = resolve_tool_class(target.network, target.class_ref)
+            result: Any = await asyncio.wait_for(
+                tool_class().async_invoke({**target.args, "query": WARMUP_QUERY}, {}), self.timeout
+            )
+            if isinstance(result, str) and result.startswith(FAILURE_PREFIXES):
+                target.error = result.strip().splitlines()[0]
+        except asyncio.TimeoutError:
+            target.error = f"Timed out after {self.timeout} seconds"
+        # Any failure of a tool must be recorded rather than stop the other warmups
+        # pylint: disable=broad-exception-caught
+        except Exception as exception:
+            target.error = f"{type(exception).__name__}: {exception}"
+        target.seconds = time.perf_counter() - start
+        target.state = "failed" if target.error else "ready"
+        if target.error:
+            logger.error("Warmup of %s failed after %.1f s: %s\n", target.name, target.seconds, target.error)
+        else:
+            logger.info("Warmed up %s in %.1f s\n", target.name, target.seconds)
+
+    def is_ready(self) -> bool:
+        """True once every target is ready or has failed, or if the warmup was not started."""
+        return self._thread is None or self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        :param timeout: Seconds to wait for, None to wait until the warmup is complete
+        :return: True if the warmup is complete
+        """
+        return self._thread is None or self._done.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        :return: Readiness and the state, duration and error of each target
+        """
+        return {
+            "ready": self.is_ready(),
+            "targets": {
+                target.name: {"state": target.state, "seconds": target.seconds, "error": target.error}
+                for target in self.targets
+            },
+        }
+
+
+# Shared by the server main loop and its readiness check
+RAG_WARMUP = RagWarmup(
+    concurrency=int(os.getenv("RAG_WARMUP_CONCURRENCY", str(DEFAULT_WARMUP_CONCURRENCY))),
+    timeout=float(os.getenv("RAG_WARMUP_TIMEOUT_SECONDS", str(DEFAULT_WARMUP_TIMEOUT))),
+)
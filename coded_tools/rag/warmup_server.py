@@ -0,0 +1,62 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Neuro SAN server which warms up the RAG tools of the enabled agent networks in the background at startup,
+and reports itself ready on /readyz only once they are warm.
+
+Usage, with the arguments of neuro_san.service.main_loop.server_main_loop:
+    python -m coded_tools.rag.warmup_server --port 30011 --http_port 8080
+
+Set RAG_WARMUP=false to skip the warmup.
+"""
+
+import os
+
+from neuro_san.service.main_loop.server_main_loop import ServerMainLoop
+from neuro_san.service.utils.server_status import ServerStatus
+
+from coded_tools.rag.warmup import RAG_WARMUP
+from coded_tools.rag.warmup import RagWarmup
+from coded_tools.rag.warmup import find_warmup_targets
+
+
+class WarmupServerStatus(ServerStatus):
+    """Server status which is only ready once the RAG warmup is complete."""
+
+    def __init__(self, server_status: ServerStatus, warmup: RagWarmup):
+        """
+        :param server_status: Status of the server, whose services are shared
+        :param warmup: The RAG warmup to wait for
+        """
+        super().__init__(server_status.server_name)
+        self.grpc_service = server_status.grpc_service
+        self.http_service = server_status.http_service
+        self.updater = server_status.updater
+        self.warmup: RagWarmup = warmup
+
+    def is_server_ready(self) -> bool:
+        return super().is_server_ready() and self.warmup.is_ready()
+
+
+class WarmupServerMainLoop(ServerMainLoop):
+    """Server main loop starting the RAG warmup before the server starts serving."""
+
+    def parse_args(self):
+        super().parse_args()
+        if os.getenv("RAG_WARMUP", "true").lower() not in ("1", "true", "yes"):
+            return
+        server_status: ServerStatus = self.server_context.get_server_status()
+        self.server_context.set_server_status(WarmupServerStatus(server_status, RAG_WARMUP))
+        RAG_WARMUP.start(find_warmup_targets())
+
+
+if __name__ == "__main__":
+    WarmupServerMainLoop().main_loop()
@@ -38,6 +38,7 @@ PACKAGE_INSTALL=${PACKAGE_INSTALL:-.}
 echo "PACKAGE_INSTALL is ${PACKAGE_INSTALL}"
 
 echo "Starting service with args '$1'..."
-${PYTHON} "${PACKAGE_INSTALL}"/neuro_san/service/main_loop/server_main_loop.py "$@"
+# Same server, which also warms up the RAG tools of the manifest before reporting ready
+${PYTHON} -m coded_tools.rag.warmup_server "$@"
 
 echo "Done."
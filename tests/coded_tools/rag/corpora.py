@@ -0,0 +1,43 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Synthetic embedding corpora, shared by the vector store tests and benchmarks.
+"""
+
+import numpy as np
+
+
+def make_clustered_corpus(size: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """
+    Embeddings of real documents are clustered by topic, unlike uniformly random vectors.
+
+    :param size: Number of vectors
+    :param dimensions: Dimensions of each vector
+    :param clusters: Number of topics the vectors are drawn around
+    :param seed: Random seed
+    :return: (size, dimensions) float32 array of vectors
+    """
+    rng = np.random.default_rng(seed)
+    centers: np.ndarray = rng.standard_normal((clusters, dimensions), dtype=np.float32)
+    noise: np.ndarray = rng.standard_normal((size, dimensions), dtype=np.float32) * 0.5
+    return centers[rng.integers(0, clusters, size)] + noise
+
+
+def make_matryoshka_corpus(size: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """
+    :param size: Number of vectors
+    :param dimensions: Dimensions of each vector
+    :param clusters: Number of topics the vectors are drawn around
+    :param seed: Random seed
+    :return: (size, dimensions) float32 array of clustered vectors whose scale decays with the dimension index
+    """
+    scales: np.ndarray = 1.0 / np.sqrt(1.0 + np.arange(dimensions, dtype=np.float32) / 64.0)
+    return make_clustered_corpus(size, dimensions, clusters, seed) * scales
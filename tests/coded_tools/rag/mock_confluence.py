@@ -0,0 +1,208 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+"""
+Local mock Confluence server and loader, shared by the Confluence fetcher tests and benchmark.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+from langchain_community.document_loaders.confluence import ConfluenceLoader
+
+CONTEXT_PATH = "/wiki"
+NO_RESTRICTIONS = {"read": {"restrictions": {"user": {"results": []}, "group": {"results": []}}}}
+
+
+def make_page(page_id: int, space_key: str = "BENCH") -> Dict[str, Any]:
+    """
+    :param page_id: Id of the page
+    :param space_key: Key of the space of the page
+    :return: The page as returned by the Confluence REST API with its storage body and version expanded
+    """
+    return {
+        "id": str(page_id),
+        "type": "page",
+        "status": "current",
+        "title": f"Page {page_id}",
+        "body": {"storage": {"value": f"<p>Body of page {page_id}</p>", "representation": "storage"}},
+        "version": {"number": 1, "when": "2025-01-01T00:00:00.000Z"},
+        "_links": {"webui": f"/spaces/{space_key}/pages/{page_id}"},
+    }
+
+
+# pylint: disable=too-many-instance-attributes
+class MockConfluenceServer:
+    """
+    Local HTTP server answering the Confluence REST API requests of ConfluenceFetcher from an in-memory space.
+    Use as a context manager to serve from a background thread.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        pages: int = 100,
+        page_size: int = 25,
+        latency_ms: float = 0.0,
+        max_concurrent: int = 0,
+        requests_per_second: float = 0.0,
+        retry_after: str = "1",
+    ):
+        """
+        :param pages: Number of pages of the space
+        :param page_size: Maximum number of pages returned per request, whatever the requested limit
+        :param latency_ms: Latency added to every request, in milliseconds
+        :param max_concurrent: Requests in flight beyond which requests are throttled, 0 for no limit
+        :param requests_per_second: Request rate beyond which requests are throttled, 0 for no limit
+        :param retry_after: Retry-After header of throttled responses
+        """
+        self.pages: List[Dict[str, Any]] = [make_page(page_id) for page_id in range(1, pages + 1)]
+        self.page_size: int = page_size
+        self.latency_ms: float = latency_ms
+        self.max_concurrent: int = max_concurrent
+        self.requests_per_second: float = requests_per_second
+        self.retry_after: str = retry_after
+        self.requests: int = 0
+        self.throttled: int = 0
+        self.peak_concurrent: int = 0
+        self._in_flight: int = 0
+        self._request_times: List[float] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to give to ConfluenceLoader."""
+        return f"http://127.0.0.1:{self._server.server_port}{CONTEXT_PATH}/"
+
+    def admit(self) -> bool:
+        """
+        Count a new request in flight.
+
+        :return: False if the request is over the concurrency or rate limit
+        """
+        with self._lock:
+            now: float = time.monotonic()
+            self.requests += 1
+            self._request_times = [sent for sent in self._request_times if now - sent < 1.0]
+            over_rate: bool = 0 < self.requests_per_second <= len(self._request_times)
+            over_concurrency: bool = 0 < self.max_concurrent <= self._in_flight
+            if over_rate or over_concurrency:
+                self.throttled += 1
+                return False
+            self._request_times.append(now)
+            self._in_flight += 1
+            self.peak_concurrent = max(self.peak_concurrent, self._in_flight)
+            return True
+
+    def done(self):
+        """Count the end of a request admitted by admit()."""
+        with self._lock:
+            self._in_flight -= 1
+
+    # pylint: disable=too-many-return-statements
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+        """
+        :param path: Path of the request below the context path
+        :param query: Query parameters of the request
+        :return: JSON body of the response, or None for a 404
+        """
+        parts: List[str] = path.strip("/").split("/")
+        start: int = int(query.get("start", query.get("cursor", ["0"]))[0])
+        limit: int = min(int(query.get("limit", ["25"])[0]), self.page_size)
+        if parts[:3] != ["rest", "api", "content"]:
+            return None
+        if len(parts) == 3 or parts[3] == "search":
+            results: List[Dict[str, Any]] = self.pages[start : start + limit]
+            links: Dict[str, str] = {}
+            if start + limit < len(self.pages):
+                next_query: str = f"limit={limit}&" + ("start" if len(parts) == 3 else "cursor") + f"={start + limit}"
+                links["next"] = f"/{'/'.join(parts)}?{next_query}"
+            return {"results": results, "size": len(results), "start": start, "limit": limit, "_links": links}
+        page_index: int = int(parts[3]) - 1
+        if not 0 <= page_index < len(self.pages):
+            return None
+        if len(parts) == 4:
+            return self.pages[page_index]
+        if parts[4:] == ["restriction", "byOperation"]:
+            return NO_RESTRICTIONS
+        if parts[4:] == ["child", "attachment"]:
+            return {"results": [], "size": 0}
+        return None
+
+    def __enter__(self) -> "MockConfluenceServer":
+        mock: MockConfluenceServer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Serves the requests from the mock space."""
+
+            # pylint: disable=invalid-name
+            def do_GET(self):
+                """Answer a GET request, after the latency, or throttle it."""
+                if not mock.admit():
+                    self._send(429, {"message": "Rate limit exceeded"}, {"Retry-After": mock.retry_after})
+                    return
+                try:
+                    time.sleep(mock.latency_ms / 1000.0)
+                    url = urlparse(self.path)
+                    body: Optional[Dict[str, Any]] = mock.respond(url.path[len(CONTEXT_PATH) :], parse_qs(url.query))
+                    if body is None:
+                        self._send(404, {"message": "Not found"})
+                    else:
+                        self._send(200, body)
+                finally:
+                    mock.done()
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                payload: bytes = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args: Any):
+                """Keep the test and benchmark output quiet."""
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_loader(url: str, space_key: str = "BENCH", **loader_args: Any) -> ConfluenceLoader:
+    """
+    :param url: Base URL of the Confluence server
+    :param space_key: Key of the space to load
+    :return: Loader of the space, which lets throttled responses through to the fetcher
+    """
+    return ConfluenceLoader(
+        url=url,
+        username="benchmark",
+        api_key="benchmark",
+        space_key=space_key,
+        confluence_kwargs={"retry_with_header": False},
+        **loader_args,
+    )
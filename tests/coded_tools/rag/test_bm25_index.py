@@ -0,0 +1,68 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+from unittest import TestCase
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.rag.bm25_index import Bm25Index
+from coded_tools.rag.bm25_index import reciprocal_rank_fusion
+from coded_tools.rag.bm25_index import tokenize
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+
+TEXTS = [
+    "The warranty covers part AB-1234 for two years.",
+    "Travel expenses are reimbursed within thirty days.",
+    "Part CD-5678 replaces part AB-1234 in newer models. Part AB-1234 is discontinued.",
+    "The travel policy applies to all employees.",
+]
+
+
+class TestBm25Index(TestCase):
+    """
+    Unit tests for the Bm25Index class and reciprocal rank fusion.
+    """
+
+    def test_tokenize(self):
+        """
+        Identifiers should be kept whole and also split into their parts.
+        """
+        self.assertEqual(tokenize("Order AB-1234, v2.1!"), ["order", "ab-1234", "ab", "1234", "v2.1", "v2", "1"])
+
+    def test_search(self):
+        """
+        Rows should be ranked by BM25 score, and rows without any query term left out.
+        """
+        index = Bm25Index()
+        index.add_texts(TEXTS)
+        rows = [row for row, _ in index.search("ab-1234", k=4)]
+        # Row 2 mentions the part twice
+        self.assertEqual(rows, [2, 0])
+        self.assertEqual([row for row, _ in index.search("travel policy", k=1)], [3])
+        self.assertEqual(index.search("unknown words"), [])
+
+    def test_vector_store_lexical_search(self):
+        """
+        The lexical index of a vector store should follow rows added and deleted after it was built.
+        """
+        store = NumpyVectorStore.from_texts(TEXTS[:2], DeterministicFakeEmbedding(size=8), ids=["a", "b"])
+        self.assertEqual([doc.id for doc in store.lexical_search("travel")], ["b"])
+        store.add_texts(TEXTS[2:], ids=["c", "d"])
+        self.assertEqual([doc.id for doc in store.lexical_search("travel policy")], ["d", "b"])
+        store.delete(["d"])
+        self.assertEqual([doc.id for doc in store.lexical_search("travel policy")], ["b"])
+
+    def test_reciprocal_rank_fusion(self):
+        """
+        Documents ranked well in both rankings should come first.
+        """
+        a, b, c, d = (Document(id=doc_id, page_content=doc_id) for doc_id in "abcd")
+        fused = reciprocal_rank_fusion([[a, b, c], [c, d, b]], limit=3)
+        self.assertEqual([doc.id for doc in fused], ["c", "b", "a"])
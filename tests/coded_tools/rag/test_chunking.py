@@ -0,0 +1,108 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+from unittest import TestCase
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from coded_tools.rag.chunking import ChunkingConfig
+from coded_tools.rag.chunking import get_text_splitter
+
+TEXT = """1. Introduction
+
+The travel policy applies to every employee.
+
+It covers flights and hotels.
+
+2. Expenses
+
+Meals are reimbursed up to a daily limit.
+"""
+
+
+# pylint: disable=too-few-public-methods
+class WordTokenizer:
+    """Tokenizer counting words, which needs no encoding download."""
+
+    @staticmethod
+    def encode(text: str, disallowed_special=()):
+        """One token per word."""
+        del disallowed_special
+        return text.split()
+
+
+class TestChunking(TestCase):
+    """
+    Unit tests for the chunking strategies.
+    """
+
+    def setUp(self):
+        get_text_splitter.cache_clear()
+        self.tokenizer_patch = patch("coded_tools.rag.chunking.get_tokenizer", return_value=WordTokenizer())
+        self.tokenizer_patch.start()
+
+    def tearDown(self):
+        self.tokenizer_patch.stop()
+        get_text_splitter.cache_clear()
+
+    def split(self, **config):
+        """Split TEXT as one document with the given configuration."""
+        splitter = get_text_splitter(ChunkingConfig(**config))
+        return splitter.split_documents([Document(page_content=TEXT, metadata={"page": 0})])
+
+    def test_invalid_config(self):
+        """
+        Unknown strategies, unknown keys and overlaps not smaller than the chunk size should be rejected.
+        """
+        with self.assertRaises(ValueError):
+            ChunkingConfig.from_dict({"strategy": "sentences"})
+        with self.assertRaises(ValueError):
+            ChunkingConfig.from_dict({"size": 100})
+        with self.assertRaises(ValueError):
+            ChunkingConfig.from_dict({"chunk_size": 100, "chunk_overlap": 100})
+        self.assertEqual(ChunkingConfig.from_dict(None), ChunkingConfig())
+
+    def test_page(self):
+        """
+        A page smaller than a chunk should stay whole.
+        """
+        chunks = self.split(strategy="page", chunk_size=100, chunk_overlap=0)
+        self.assertEqual([chunk.page_content for chunk in chunks], [TEXT.strip()])
+
+    def test_paragraph(self):
+        """
+        Chunks should only end at paragraph boundaries.
+        """
+        chunks = self.split(strategy="paragraph", chunk_size=12, chunk_overlap=0)
+        self.assertEqual(
+            [chunk.page_content for chunk in chunks],
+            [
+                "1. Introduction\n\nThe travel policy applies to every employee.",
+                "It covers flights and hotels.\n\n2. Expenses",
+                "Meals are reimbursed up to a daily limit.",
+            ],
+        )
+
+    def test_heading(self):
+        """
+        Chunks should not span sections and should carry their heading.
+        """
+        chunks = self.split(strategy="heading", chunk_size=100, chunk_overlap=0)
+        self.assertEqual(
+            [(chunk.metadata["heading"], chunk.page_content) for chunk in chunks],
+            [
+                (
+                    "1. Introduction",
+                    "1. Introduction\n\nThe travel policy applies to every employee.\n\nIt covers flights and hotels.",
+                ),
+                ("2. Expenses", "2. Expenses\n\nMeals are reimbursed up to a daily limit."),
+            ],
+        )
+        self.assertEqual(chunks[0].metadata["page"], 0)
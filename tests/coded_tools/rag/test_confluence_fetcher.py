@@ -0,0 +1,90 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+
+from requests.exceptions import HTTPError
+
+from coded_tools.rag.confluence_fetcher import AdaptiveConcurrency
+from coded_tools.rag.confluence_fetcher import ConfluenceFetcher
+from coded_tools.rag.confluence_fetcher import parse_retry_after
+from tests.coded_tools.rag.mock_confluence import MockConfluenceServer
+from tests.coded_tools.rag.mock_confluence import make_loader
+
+
+class TestConfluenceFetcher(TestCase):
+    """
+    Unit tests for the ConfluenceFetcher and AdaptiveConcurrency classes, against a local mock Confluence server.
+    """
+
+    def test_adaptive_concurrency(self):
+        """
+        Throttling should halve the limit down to 1, and successes grow it back up to the maximum.
+        """
+
+        async def run():
+            concurrency = AdaptiveConcurrency(max_concurrency=8)
+            for _ in range(5):
+                await concurrency.acquire()
+                await concurrency.release(throttled=True)
+            throttled_limit = concurrency.limit
+            for _ in range(100):
+                await concurrency.acquire()
+                await concurrency.release()
+            return throttled_limit, concurrency.limit
+
+        self.assertEqual(asyncio.run(run()), (1.0, 8.0))
+
+        async def run_burst():
+            now = [0.0]
+            concurrency = AdaptiveConcurrency(max_concurrency=8, clock=lambda: now[0])
+            for _ in range(8):
+                await concurrency.acquire()
+            # A burst of requests throttled in the same pause halves the limit once
+            for _ in range(4):
+                await concurrency.release(throttled=True, pause=1.0)
+            burst_limit = concurrency.limit
+            now[0] = 2.0
+            await concurrency.release(throttled=True, pause=1.0)
+            return burst_limit, concurrency.limit, concurrency.throttled
+
+        self.assertEqual(asyncio.run(run_burst()), (4.0, 2.0, 5))
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", clock=lambda: 1445412480.0), 10.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_fetch_space(self):
+        """
+        All pages of a space should be fetched in order, despite the server capping the page size
+        and throttling the requests beyond its concurrency limit.
+        """
+        with MockConfluenceServer(pages=120, page_size=20, latency_ms=5, max_concurrent=3, retry_after="0") as server:
+            fetcher = ConfluenceFetcher(make_loader(server.url, limit=50), max_concurrency=8)
+            documents = asyncio.run(fetcher.aload())
+            self.assertEqual([document.metadata["id"] for document in documents], [str(i) for i in range(1, 121)])
+            self.assertEqual(documents[0].page_content, "Body of page 1")
+            self.assertEqual(documents[0].metadata["source"], f"{server.url.rstrip('/')}/spaces/BENCH/pages/1")
+            self.assertGreater(fetcher.concurrency.throttled, 0)
+            self.assertLessEqual(server.peak_concurrent, 3)
+
+            # Page ids are fetched one request each, and unknown pages fail
+            by_id = ConfluenceFetcher(make_loader(server.url, space_key=None, page_ids=["7", "3"]))
+            self.assertEqual([document.page_content for document in asyncio.run(by_id.aload())][0], "Body of page 7")
+            with self.assertRaises(HTTPError):
+                asyncio.run(ConfluenceFetcher(make_loader(server.url, space_key=None, page_ids=["999"])).aload())
+
+    def test_search_all_pages(self):
+        """
+        A search should stop at the max_pages of the loader, unless all matching pages are requested.
+        """
+        with MockConfluenceServer(pages=120, page_size=20, latency_ms=0) as server:
+            fetcher = ConfluenceFetcher(make_loader(server.url, limit=50, max_pages=30))
+            self.assertEqual(len(asyncio.run(fetcher.search('space = "BENCH"'))), 30)
+            self.assertEqual(len(asyncio.run(fetcher.search('space = "BENCH"', all_pages=True))), 120)
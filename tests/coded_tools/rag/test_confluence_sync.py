@@ -0,0 +1,187 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from coded_tools.confluence_rag import ConfluenceRag
+from coded_tools.rag.confluence_sync import ConfluenceSyncState
+from coded_tools.rag.confluence_sync import changed_since_cql
+from coded_tools.rag.confluence_sync import scope_cql
+from coded_tools.rag.vector_store_cache import VECTOR_STORE_CACHE
+from tests.coded_tools.rag.test_chunking import WordTokenizer
+
+
+def make_page(page_id: str, when: str, text: str) -> Document:
+    """
+    :return: A page as loaded by ConfluenceLoader
+    """
+    return Document(page_content=text, metadata={"id": page_id, "title": f"Page {page_id}", "when": when})
+
+
+class TestConfluenceSync(TestCase):
+    """
+    Unit tests for the incremental sync of Confluence pages.
+    """
+
+    def test_cql(self):
+        """
+        Page selection arguments should become one CQL query, searched from a margin before the cursor.
+        """
+        self.assertEqual(scope_cql({"space_key": "DAI"}), '(space = "DAI" and type = page)')
+        self.assertEqual(
+            scope_cql({"space_key": "DAI", "page_ids": ["12", 34]}),
+            '((space = "DAI" and type = page) or id in (12, 34))',
+        )
+        self.assertEqual(
+            changed_since_cql('label = "faq"', "2025-03-02T10:15:30.000+02:00"),
+            'label = "faq" and lastmodified >= "2025-03-01 08:15"',
+        )
+        with self.assertRaises(ValueError):
+            scope_cql({"url": "https://example.atlassian.net/wiki/"})
+
+    def test_sync_documents(self):
+        """
+        Later syncs should only store modified pages, drop deleted ones, and advance the cursor.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rag = ConfluenceRag()
+            rag.configure_sync_state(os.path.join(temp_dir, "sync.sqlite"))
+            loader_args = {"url": "https://example.atlassian.net/wiki/", "space_key": "DAI", "api_key": "secret"}
+            first = [
+                make_page("1", "2025-03-01T09:00:00Z", "one"),
+                make_page("2", "2025-03-01T10:00:00Z", "two"),
+                make_page("4", "2025-03-01T08:00:00Z", "four"),
+            ]
+
+            with patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=first)) as load_pages:
+                docs = asyncio.run(rag.load_documents(loader_args))
+            self.assertEqual([doc.page_content for doc in docs], ["one", "two", "four"])
+            self.assertNotIn("cql", load_pages.call_args.args[0])
+
+            source = ConfluenceSyncState.make_source(rag.get_source_identity(loader_args))
+            self.assertEqual(rag.sync_state.get_cursor(source), "2025-03-01T10:00:00+00:00")
+
+            # Page 4 was found again through the overlap of the search, page 1 was modified,
+            # page 3 created and page 2 deleted
+            changed = [
+                make_page("1", "2025-03-05T08:00:00Z", "one v2"),
+                make_page("3", "2025-03-04T08:00:00Z", "three"),
+                make_page("4", "2025-03-01T08:00:00Z", "four"),
+            ]
+            with (
+                patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=changed)) as load_pages,
+                patch.object(ConfluenceRag, "_list_page_ids", AsyncMock(return_value={"1", "3", "4"})),
+                patch.object(ConfluenceSyncState, "put_documents", wraps=rag.sync_state.put_documents) as put,
+            ):
+                docs = asyncio.run(rag.load_documents(loader_args))
+            self.assertIn('lastmodified >= "2025-02-28 10:00"', load_pages.call_args.args[0]["cql"])
+            self.assertNotIn("space_key", load_pages.call_args.args[0])
+            self.assertEqual([doc.metadata["id"] for doc in put.call_args.args[1]], ["1", "3"])
+            self.assertEqual([doc.page_content for doc in docs], ["one v2", "three", "four"])
+            self.assertEqual(rag.sync_state.get_cursor(source), "2025-03-05T08:00:00+00:00")
+
+            # Modified pages are still stored, but none removed, when the pages in scope cannot all be listed
+            modified = [make_page("3", "2025-03-06T08:00:00Z", "3b")]
+            with (
+                patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=modified)),
+                patch.object(ConfluenceRag, "_list_page_ids", AsyncMock(return_value=None)),
+            ):
+                docs = asyncio.run(rag.load_documents(loader_args))
+            self.assertEqual([doc.page_content for doc in docs], ["one v2", "3b", "four"])
+
+            # Stored pages are kept when Confluence cannot be reached
+            with patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=None)):
+                docs = asyncio.run(rag.load_documents(loader_args))
+            self.assertEqual(len(docs), 3)
+            rag.sync_state.close()
+
+    def test_sync_before_cache(self):
+        """
+        Every call should sync, and reuse the cached vector store only while no synced page changed.
+        """
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("coded_tools.rag.chunking.get_tokenizer", return_value=WordTokenizer()),
+        ):
+            rag = ConfluenceRag()
+            rag.min_sync_interval = 0
+            rag.configure_sync_state(os.path.join(temp_dir, "sync.sqlite"))
+            rag.configure_embeddings({"provider": "hashing", "dimensions": 32})
+            loader_args = {"url": "https://example.atlassian.net/wiki/", "space_key": "SYNC"}
+            pages = [make_page("1", "2025-03-01T09:00:00Z", "one"), make_page("2", "2025-03-01T10:00:00Z", "two")]
+
+            with patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=pages)):
+                first = asyncio.run(rag.generate_vector_store(loader_args))
+            with (
+                patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=[])) as load_pages,
+                patch.object(ConfluenceRag, "_list_page_ids", AsyncMock(return_value={"1", "2"})),
+            ):
+                unchanged = asyncio.run(rag.generate_vector_store(loader_args))
+            self.assertTrue(load_pages.called)
+            self.assertIs(unchanged, first)
+
+            with (
+                patch.object(
+                    ConfluenceRag, "_load_pages", AsyncMock(return_value=[make_page("3", "2025-03-02T09:00:00Z", "x")])
+                ),
+                patch.object(ConfluenceRag, "_list_page_ids", AsyncMock(return_value={"1", "2", "3"})),
+            ):
+                changed = asyncio.run(rag.generate_vector_store(loader_args))
+            self.assertIsNot(changed, first)
+            self.assertEqual(len(changed), 3)
+            self.assertIs(VECTOR_STORE_CACHE.get(rag.get_vector_store_cache_key(loader_args)), changed)
+            rag.sync_state.close()
+
+    def test_min_sync_interval(self):
+        """
+        Calls within the minimum sync interval should serve the cached vector store without syncing.
+        """
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("coded_tools.rag.chunking.get_tokenizer", return_value=WordTokenizer()),
+        ):
+            rag = ConfluenceRag()
+            rag.configure_sync_state(os.path.join(temp_dir, "sync.sqlite"))
+            rag.configure_embeddings({"provider": "hashing", "dimensions": 32})
+            loader_args = {"url": "https://example.atlassian.net/wiki/", "space_key": "INTERVAL"}
+            source = ConfluenceSyncState.make_source(rag.get_source_identity(loader_args))
+            pages = [make_page("1", "2025-03-01T09:00:00Z", "one"), make_page("2", "2025-03-01T10:00:00Z", "two")]
+
+            with patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=pages)):
+                first = asyncio.run(rag.generate_vector_store(loader_args))
+            self.assertIsNotNone(rag.sync_state.get_synced_at(source))
+
+            with patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=[])) as load_pages:
+                cached = asyncio.run(rag.generate_vector_store(loader_args))
+            self.assertFalse(load_pages.called)
+            self.assertIs(cached, first)
+
+            # Pages synced by another process sharing the file are picked up without syncing
+            rag.sync_state.put_documents(source, [make_page("3", "2025-03-02T09:00:00Z", "three")])
+            with patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=[])) as load_pages:
+                rebuilt = asyncio.run(rag.generate_vector_store(loader_args))
+            self.assertFalse(load_pages.called)
+            self.assertIsNot(rebuilt, first)
+            self.assertEqual(len(rebuilt), 3)
+
+            rag.min_sync_interval = 0
+            with (
+                patch.object(ConfluenceRag, "_load_pages", AsyncMock(return_value=[])) as load_pages,
+                patch.object(ConfluenceRag, "_list_page_ids", AsyncMock(return_value={"1", "2", "3"})),
+            ):
+                asyncio.run(rag.generate_vector_store(loader_args))
+            self.assertTrue(load_pages.called)
+            rag.sync_state.close()
@@ -0,0 +1,130 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_postgres import PGVectorStore
+
+from coded_tools.pdf_rag import PdfRag
+from coded_tools.rag.context_assembler import ContextConfig
+from coded_tools.rag.context_assembler import merge_overlapping
+from coded_tools.rag.context_assembler import mmr_rerank
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.query_cache import QUERY_CACHE
+from tests.coded_tools.rag.test_chunking import WordTokenizer
+
+
+class TestContextAssembler(TestCase):
+    """
+    Unit tests for the reranking, merging and token budget of the assembled context.
+    """
+
+    def setUp(self):
+        self.tokenizer_patch = patch("coded_tools.rag.chunking.get_tokenizer", return_value=WordTokenizer())
+        self.tokenizer_patch.start()
+
+    def tearDown(self):
+        self.tokenizer_patch.stop()
+
+    def test_mmr_and_merge(self):
+        """
+        MMR should prefer a less relevant but novel candidate to a near duplicate,
+        and consecutive overlapping chunks should merge whichever comes first.
+        """
+        query = np.array([1.0, 0.0, 0.0])
+        vectors = np.array([[0.9, 0.1, 0.0], [0.9, 0.12, 0.0], [0.7, 0.0, 0.7]])
+        self.assertEqual([index for index, _ in mmr_rerank(query, vectors, lambda_mult=0.5)], [0, 2, 1])
+        self.assertEqual([index for index, _ in mmr_rerank(query, vectors, lambda_mult=1.0)], [0, 1, 2])
+
+        first = "The warranty covers parts and labour for two years from the date of purchase."
+        second = "two years from the date of purchase. Batteries are covered for one year."
+        merged = "The warranty covers parts and labour for two years from the date of purchase. " + second[37:]
+        self.assertEqual(merge_overlapping(first, second), merged)
+        self.assertEqual(merge_overlapping(second, first), merged)
+        self.assertIsNone(merge_overlapping(first, "Batteries are covered for one year."))
+
+        with self.assertRaises(ValueError):
+            ContextConfig.from_dict({"token_budget": 100, "top_k": 3})
+
+    def test_query_vectorstore(self):
+        """
+        The context should merge the overlapping chunks of a source, show sources and scores, and fit the budget.
+        """
+        rag = PdfRag()
+        rag.configure_embeddings({"provider": "hashing", "dimensions": 1024})
+        rag.configure_context({"token_budget": 40, "fetch_k": 10})
+        texts = [
+            "Refunds are paid within 30 days of the return of the goods to the store.",
+            "of the return of the goods to the store. Refunds exclude the delivery costs.",
+            "Delivery is free for orders above 50 euros in the whole country.",
+            "Opening hours are nine to five on weekdays and closed on public holidays.",
+        ]
+        metadatas = [{"source": "policy.pdf", "page": 1}] * 2 + [{"source": "faq.pdf", "page": 2}] * 2
+        store = NumpyVectorStore.from_texts(texts, rag.embeddings, metadatas, ids=["a", "b", "c", "d"])
+
+        context = asyncio.run(rag.assemble_context(store, "When are refunds paid after the return of the goods?"))
+        self.assertLessEqual(context.tokens, 40)
+        self.assertEqual(context.passages[0].source, "policy.pdf")
+        self.assertEqual(context.passages[0].chunks, 2)
+        self.assertEqual(context.passages[0].text.count("of the return of the goods"), 1)
+        self.assertLess(context.tokens, context.candidate_tokens)
+
+        text = asyncio.run(rag.query_vectorstore(store, "When are refunds paid after the return of the goods?"))
+        self.assertTrue(text.startswith("[source: policy.pdf, page 1 | score: "))
+        self.assertEqual(text, context.to_text())
+
+        # A vector store that could not be created is reported rather than queried
+        text = asyncio.run(rag.query_vectorstore(None, "refunds"))
+        self.assertTrue(text.startswith("Failed to create vector store"))
+        self.assertEqual(asyncio.run(rag.retrieve(None, "refunds")), [])
+
+    def test_embeddings_reused(self):
+        """
+        The query embedding of the search and the stored embeddings of the candidates should be reused.
+        """
+        rag = PdfRag()
+        rag.configure_embeddings({"provider": "hashing", "dimensions": 64})
+        rag.configure_context({"token_budget": 40, "fetch_k": 3})
+        rag.query_cache_namespace = "test_embeddings_reused"
+        texts = ["Refunds are paid within 30 days.", "Delivery is free above 50 euros.", "Shops close on Sundays."]
+        store = NumpyVectorStore.from_texts(texts, rag.embeddings, ids=["a", "b", "c"])
+
+        with (
+            patch.object(rag.embeddings, "aembed_query", wraps=rag.embeddings.aembed_query) as embed_query,
+            patch.object(rag.embeddings, "aembed_documents") as embed_documents,
+        ):
+            first = asyncio.run(rag.assemble_context(store, "When are refunds paid?"))
+            second = asyncio.run(rag.assemble_context(store, "When are refunds paid?"))
+        self.assertEqual(embed_query.call_count, 1)
+        embed_documents.assert_not_called()
+        self.assertEqual(first.to_text(), second.to_text())
+        QUERY_CACHE.invalidate(rag.query_cache_namespace)
+
+        # Postgres candidates are read back from their table
+        rag.use_query_cache = False
+        rag.postgres_table = (MagicMock(), "vectorstore")
+        pg_store = MagicMock(spec=PGVectorStore)
+        pg_store.asimilarity_search_by_vector = AsyncMock(
+            return_value=[Document(id=doc_id, page_content=text) for doc_id, text in zip(["a", "b", "c"], texts)]
+        )
+        stored = store.get_vectors_by_ids(["a", "b", "c"])
+        with (
+            patch("coded_tools.base_rag.fetch_embeddings", AsyncMock(return_value=stored)) as fetch,
+            patch.object(rag.embeddings, "aembed_documents") as embed_documents,
+        ):
+            context = asyncio.run(rag.assemble_context(pg_store, "When are refunds paid?"))
+        self.assertEqual(fetch.call_args.args[2], ["a", "b", "c"])
+        embed_documents.assert_not_called()
+        self.assertEqual(context.to_text(), first.to_text())
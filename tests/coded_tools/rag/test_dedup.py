@@ -0,0 +1,97 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from coded_tools.pdf_rag import PdfRag
+from coded_tools.rag.dedup import DUPLICATE_SOURCES_KEY
+from coded_tools.rag.dedup import ChunkDeduplicator
+from coded_tools.rag.dedup import DedupConfig
+from coded_tools.rag.dedup import choose_bands
+from tests.coded_tools.rag.test_chunking import WordTokenizer
+
+DISCLAIMER = (
+    "This document is provided for information only and does not constitute legal advice. "
+    "All rights reserved. Do not distribute without the written permission of the legal department."
+)
+
+
+class TestDedup(TestCase):
+    """
+    Unit tests for the elimination of near-duplicate chunks before embedding.
+    """
+
+    def test_config(self):
+        """
+        Dedup should be disabled by default, and invalid arguments rejected.
+        """
+        self.assertFalse(DedupConfig().enabled)
+        self.assertTrue(DedupConfig.from_dict({"threshold": 0.9}).enabled)
+        for dedup_args in ({"threshold": 1.5}, {"num_perm": 0}, {"window": 3}):
+            with self.assertRaises(ValueError):
+                DedupConfig.from_dict(dedup_args)
+        self.assertEqual(choose_bands(128, 0.9), (8, 16))
+        self.assertEqual(choose_bands(128, 1.0), (1, 128))
+
+    def test_deduplicator(self):
+        """
+        Near-duplicates should be dropped with their sources recorded on the kept chunk, other chunks kept.
+        """
+        deduplicator = ChunkDeduplicator(DedupConfig(threshold=0.8))
+        chunks = [
+            Document(page_content=DISCLAIMER, metadata={"source": "a.pdf", "page": 1}),
+            Document(page_content="Refunds are paid within 30 days of the return of the goods.", metadata={}),
+            Document(page_content=DISCLAIMER.replace("All rights", "all rights"), metadata={"source": "b.pdf"}),
+            Document(page_content=DISCLAIMER + " Version 2.", metadata={"source": "c.pdf", "page": 7}),
+        ]
+        kept = [chunk for chunk in chunks if not deduplicator.is_duplicate(chunk)]
+
+        self.assertEqual(kept, chunks[:2])
+        deduplicator.apply_provenance(kept)
+        self.assertEqual(
+            kept[0].metadata[DUPLICATE_SOURCES_KEY], [{"source": "b.pdf"}, {"source": "c.pdf", "page": 7}]
+        )
+        self.assertNotIn(DUPLICATE_SOURCES_KEY, kept[1].metadata)
+        self.assertEqual((deduplicator.stats.chunks, deduplicator.stats.duplicates), (4, 2))
+        self.assertEqual(deduplicator.stats.saved_bytes(0), len(chunks[2].page_content) + len(chunks[3].page_content))
+
+    def test_in_memory_vector_store(self):
+        """
+        The vector store should hold one chunk per repeated disclaimer, listing the pages of its copies.
+        """
+        pages = [
+            Document(
+                page_content=f"Section {page} covers topic number {page}.\n\n{DISCLAIMER}", metadata={"page": page}
+            )
+            for page in range(3)
+        ]
+
+        async def iter_documents(_rag, _loader_args):
+            for page in pages:
+                yield page
+
+        with (
+            patch("coded_tools.rag.chunking.get_tokenizer", return_value=WordTokenizer()),
+            patch.object(PdfRag, "iter_documents", autospec=True, side_effect=iter_documents),
+        ):
+            rag = PdfRag()
+            rag.configure_embeddings({"provider": "hashing", "dimensions": 64})
+            rag.configure_chunking({"strategy": "paragraph", "chunk_size": 30, "chunk_overlap": 0})
+            rag.configure_dedup({"threshold": 0.9})
+            rag.use_vector_store_cache = False
+            store = asyncio.run(rag.generate_vector_store({"urls": ["handbook.pdf"]}))
+
+        self.assertEqual(len(store), 4)
+        disclaimer = store.similarity_search("legal advice rights reserved", k=1)[0]
+        self.assertEqual(disclaimer.page_content, DISCLAIMER)
+        self.assertEqual(disclaimer.metadata[DUPLICATE_SOURCES_KEY], [{"page": 1}, {"page": 2}])
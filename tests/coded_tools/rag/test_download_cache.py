@@ -0,0 +1,85 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import List
+from unittest import TestCase
+
+from langchain_core.documents import Document
+
+from coded_tools.rag.download_cache import DownloadCache
+
+
+class TestDownloadCache(TestCase):
+    """
+    Unit tests for the DownloadCache class, against a local HTTP server honoring If-None-Match.
+    """
+
+    def test_fetch(self):
+        """
+        An unchanged file should be revalidated with a 304, a changed one downloaded again,
+        and the cached copy used when the server is down.
+        """
+        content: List[bytes] = [b"%PDF-1.4 first version"]
+        statuses: List[int] = []
+
+        class Handler(BaseHTTPRequestHandler):
+            """Serves the current content with its hash as ETag."""
+
+            # pylint: disable=invalid-name
+            def do_GET(self):
+                """Answer 304 when the ETag of the request matches the content."""
+                etag: str = '"' + hashlib.sha256(content[0]).hexdigest() + '"'
+                status: int = 304 if self.headers.get("If-None-Match") == etag else 200
+                statuses.append(status)
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0" if status == 304 else str(len(content[0])))
+                self.end_headers()
+                if status == 200:
+                    self.wfile.write(content[0])
+
+            def log_message(self, *args: Any):
+                """Keep the test output quiet."""
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/rfp.pdf"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(temp_dir, timeout=5)
+            first = cache.fetch(url)
+            self.assertFalse(first.from_cache)
+            self.assertEqual(first.content_hash, hashlib.sha256(content[0]).hexdigest())
+
+            second = cache.fetch(url)
+            self.assertTrue(second.from_cache)
+            self.assertEqual(second.content_hash, first.content_hash)
+
+            content[0] = b"%PDF-1.4 second version"
+            third = cache.fetch(url)
+            self.assertNotEqual(third.content_hash, first.content_hash)
+            with open(third.path, "rb") as downloaded:
+                self.assertEqual(downloaded.read(), content[0])
+            self.assertEqual(statuses, [200, 304, 200])
+
+            cache.put_documents(third.content_hash, [Document(page_content="page", metadata={"page": 0})])
+            self.assertEqual(cache.get_documents(third.content_hash)[0].metadata, {"page": 0})
+            self.assertIsNone(cache.get_documents(first.content_hash))
+
+            server.shutdown()
+            server.server_close()
+            offline = cache.fetch(url)
+            self.assertTrue(offline.from_cache)
+            self.assertEqual(offline.content_hash, third.content_hash)
+            self.assertEqual(cache.stats(), {"downloads": 2, "not_modified": 1, "stale": 1})
@@ -0,0 +1,120 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from typing import List
+from unittest import TestCase
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.rag.embedding_batcher import EmbeddingBatcher
+from coded_tools.rag.embedding_batcher import RateLimiter
+
+
+class RecordingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings backend recording the size of each request."""
+
+    batch_sizes: List[int] = []
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.batch_sizes.append(len(texts))
+        await asyncio.sleep(0.001)
+        return self.embed_documents(texts)
+
+
+class FakeClock:
+    """Clock advanced only by sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        """Advance the clock instead of waiting."""
+        self.now += seconds
+
+
+class TestEmbeddingBatcher(TestCase):
+    """
+    Unit tests for the EmbeddingBatcher and RateLimiter classes.
+    """
+
+    def test_coalesces_concurrent_requests(self):
+        """
+        Concurrent requests should share batches and each get the embeddings of its own texts.
+        """
+        backend = RecordingEmbeddings(size=8, batch_sizes=[])
+        callers = [[f"caller {caller} text {index}" for index in range(3)] for caller in range(10)]
+
+        async def run():
+            batcher = EmbeddingBatcher(backend, max_batch_tokens=10_000, max_batch_size=12, max_wait=0.05)
+            return batcher, await asyncio.gather(*(batcher.embed(texts) for texts in callers))
+
+        batcher, results = asyncio.run(run())
+
+        for texts, vectors in zip(callers, results):
+            self.assertEqual(vectors, backend.embed_documents(texts))
+        self.assertEqual(backend.batch_sizes, [12, 12, 6])
+        self.assertEqual(batcher.stats()["requests"], 10)
+
+    def test_token_limit_splits_requests(self):
+        """
+        A request larger than the token limit should be sent as several batches.
+        """
+        backend = RecordingEmbeddings(size=8, batch_sizes=[])
+        texts = ["x" * 40] * 5
+
+        async def run():
+            batcher = EmbeddingBatcher(backend, max_batch_tokens=25, max_wait=0.0, token_counter=len)
+            return await batcher.embed(texts)
+
+        self.assertEqual(len(asyncio.run(run())), 5)
+        self.assertEqual(backend.batch_sizes, [1, 1, 1, 1, 1])
+
+    def test_rate_limiter(self):
+        """
+        Requests beyond the per-minute budgets should wait for the buckets to refill.
+        """
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=3, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+        async def run():
+            return [await limiter.acquire(tokens) for tokens in (100, 100, 100, 900, 1)]
+
+        waits = asyncio.run(run())
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        # An oversized request waits for the whole token bucket to refill
+        self.assertAlmostEqual(waits[3], 30.0)
+        # The next request waits for the request bucket to refill
+        self.assertAlmostEqual(waits[4], 10.0)
+
+    def test_cancelled_flush_resolves_callers(self):
+        """
+        Callers waiting on batches not yet sent should not hang when the flushing task is cancelled.
+        """
+        backend = RecordingEmbeddings(size=8, batch_sizes=[])
+
+        async def never_refill(_seconds: float):
+            await asyncio.Event().wait()
+
+        async def run():
+            limiter = RateLimiter(requests_per_minute=1, sleep=never_refill)
+            batcher = EmbeddingBatcher(backend, max_batch_size=1, max_wait=0.0, rate_limiter=limiter)
+            callers = [asyncio.ensure_future(batcher.embed([f"text {index}"])) for index in range(3)]
+            await asyncio.sleep(0.05)
+            batcher._flusher.cancel()  # pylint: disable=protected-access
+            return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1.0)
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results[0]), 1)
+        self.assertIsInstance(results[1], asyncio.CancelledError)
+        self.assertIsInstance(results[2], asyncio.CancelledError)
+        self.assertEqual(backend.batch_sizes, [1])
@@ -0,0 +1,117 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import sqlite3
+import tempfile
+from typing import List
+from unittest import TestCase
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.rag.embedding_cache import CachedEmbeddings
+from coded_tools.rag.embedding_cache import EmbeddingCache
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """
+    Fake embeddings that record how many texts were embedded.
+    """
+
+    embedded: int = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+class TestEmbeddingCache(TestCase):
+    """
+    Unit tests for the EmbeddingCache and CachedEmbeddings classes.
+    """
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "embeddings.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_new_chunks_are_embedded(self):
+        """
+        Re-embedding unchanged texts should be served from the cache.
+        """
+        backend = CountingEmbeddings(size=8)
+        embeddings = CachedEmbeddings(backend, EmbeddingCache(self.path))
+
+        first = embeddings.embed_documents(["a", "b"])
+        self.assertEqual(backend.embedded, 2)
+
+        second = asyncio.run(embeddings.aembed_documents(["a", "b", "c"]))
+        self.assertEqual(backend.embedded, 3)
+        self.assertEqual(len(second), 3)
+        for cached, original in zip(second[:2], first):
+            self.assertEqual(len(cached), len(original))
+            self.assertAlmostEqual(cached[0], original[0], places=5)
+
+        stats = embeddings.cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 3)
+
+    def test_cache_survives_reopen(self):
+        """
+        Embeddings should persist on disk.
+        """
+        CachedEmbeddings(CountingEmbeddings(size=8), EmbeddingCache(self.path)).embed_documents(["a"])
+        backend = CountingEmbeddings(size=8)
+        CachedEmbeddings(backend, EmbeddingCache(self.path)).embed_documents(["a"])
+        self.assertEqual(backend.embedded, 0)
+
+    def test_size_cap(self):
+        """
+        The least recently used embeddings should be evicted once over the size cap.
+        """
+        cache = EmbeddingCache(self.path, max_entries=2)
+        cache.put_many([("a", [1.0]), ("b", [2.0])])
+        cache.get_many(["a"])
+        cache.put_many([("c", [3.0])])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(set(cache.get_many(["a", "b", "c"])), {"a", "c"})
+
+    def test_amortized_eviction(self):
+        """
+        Evictions should wait for the slack over the size cap, then evict back to the cap.
+        """
+        cache = EmbeddingCache(self.path, max_entries=100)
+        cache.put_many([(str(index), [float(index)]) for index in range(101)])
+        cache.put_many([("0", [0.0])])
+        self.assertEqual(len(cache), 101)
+        self.assertEqual(cache.stats()["entries"], 101)
+        cache.put_many([("101", [101.0])])
+        self.assertEqual(len(cache), 100)
+        self.assertEqual(EmbeddingCache(self.path, max_entries=100).stats()["entries"], 100)
+
+    def test_lookups_are_read_only(self):
+        """
+        Access times of cache hits should only be written with the next write.
+        """
+        cache = EmbeddingCache(self.path)
+        cache.put_many([("a", [1.0])])
+        with sqlite3.connect(self.path) as reader:
+            stored = reader.execute("SELECT last_access FROM embeddings WHERE key = 'a'").fetchone()[0]
+            cache.get_many(["a"])
+            self.assertEqual(
+                reader.execute("SELECT last_access FROM embeddings WHERE key = 'a'").fetchone()[0], stored
+            )
+            cache.put_many([("b", [2.0])])
+            self.assertGreater(
+                reader.execute("SELECT last_access FROM embeddings WHERE key = 'a'").fetchone()[0], stored
+            )
@@ -0,0 +1,60 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.rag.embeddings_provider import HashingEmbeddings
+from coded_tools.rag.embeddings_provider import create_embeddings
+from coded_tools.rag.embeddings_provider import register_embeddings_provider
+
+
+class TestEmbeddingsProvider(TestCase):
+    """
+    Unit tests for the embeddings provider registry and the hashing embeddings.
+    """
+
+    def test_hashing_embeddings(self):
+        """
+        Hashing embeddings should be deterministic unit vectors, closer for texts sharing words.
+        """
+        embeddings = HashingEmbeddings(dimensions=128)
+        vectors = np.array(
+            embeddings.embed_documents(["refund policy for lost baggage", "lost baggage refund", "engine maintenance"])
+        )
+        self.assertEqual(vectors.shape, (3, 128))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+        self.assertGreater(vectors[0] @ vectors[1], vectors[0] @ vectors[2])
+
+        query = asyncio.run(HashingEmbeddings(dimensions=128, latency_ms=1).aembed_query("lost baggage refund"))
+        np.testing.assert_allclose(query, vectors[1], rtol=1e-6)
+        self.assertEqual(len(embeddings.embed_query("")), 128)
+
+    def test_registry(self):
+        """
+        Providers should be selected by name, or by environment variable, and invalid ones rejected.
+        """
+        embeddings = create_embeddings({"provider": "hashing", "dimensions": 64})
+        self.assertEqual((embeddings.model, embeddings.dimensions), ("hashing", 64))
+
+        with patch.dict(os.environ, {"RAG_EMBEDDINGS_PROVIDER": "hashing"}):
+            self.assertIsInstance(create_embeddings(), HashingEmbeddings)
+
+        register_embeddings_provider("fake", lambda size=32: DeterministicFakeEmbedding(size=size))
+        self.assertIsInstance(create_embeddings({"provider": "fake", "size": 8}), DeterministicFakeEmbedding)
+
+        with self.assertRaises(ValueError):
+            create_embeddings({"provider": "unknown"})
+        with self.assertRaises(ValueError):
+            create_embeddings({"provider": "hashing", "model": "other"})
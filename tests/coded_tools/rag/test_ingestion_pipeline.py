@@ -0,0 +1,103 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import CharacterTextSplitter
+
+from coded_tools.rag.ingestion_pipeline import IngestionPipeline
+
+DOCUMENTS = 20
+CHUNKS_PER_DOCUMENT = 5
+
+
+class TestIngestionPipeline(TestCase):
+    """
+    Unit tests for the IngestionPipeline class.
+    """
+
+    def setUp(self):
+        self.loaded = 0
+        self.splitter = CharacterTextSplitter(separator=" ", chunk_size=6, chunk_overlap=0)
+
+    async def documents(self):
+        """Yield documents of five chunks each, counting how many were loaded."""
+        for index in range(DOCUMENTS):
+            self.loaded += 1
+            yield Document(page_content=" ".join(f"d{index:02d}c{chunk}" for chunk in range(CHUNKS_PER_DOCUMENT)))
+
+    def test_batches_in_order_with_backpressure(self):
+        """
+        Chunks should reach the sink in order and in fixed-size batches, without loading running far ahead.
+        """
+        pipeline = IngestionPipeline(
+            DeterministicFakeEmbedding(size=8), self.splitter, batch_size=4, queue_size=2, embed_concurrency=2
+        )
+        received = []
+        loaded_ahead = []
+
+        async def sink(chunks, vectors):
+            self.assertEqual(len(chunks), len(vectors))
+            received.append([chunk.page_content for chunk in chunks])
+            loaded_ahead.append(self.loaded * CHUNKS_PER_DOCUMENT - sum(len(batch) for batch in received))
+            await asyncio.sleep(0.001)
+
+        stats = asyncio.run(pipeline.run(self.documents(), sink))
+
+        expected = [f"d{index:02d}c{chunk}" for index in range(DOCUMENTS) for chunk in range(CHUNKS_PER_DOCUMENT)]
+        self.assertEqual([chunk for batch in received for chunk in batch], expected)
+        self.assertEqual({len(batch) for batch in received}, {4})
+        # Queued batches, batches being embedded, the batch being filled and the rest of the current document
+        self.assertLessEqual(max(loaded_ahead), (2 + 1 + 2 + 1) * 4 + CHUNKS_PER_DOCUMENT)
+        self.assertEqual((stats.load.items, stats.split.items, stats.embed.items), (DOCUMENTS, 100, 100))
+
+    def test_sink_failure_is_raised(self):
+        """
+        A failing stage should stop the pipeline and raise its error.
+        """
+        pipeline = IngestionPipeline(DeterministicFakeEmbedding(size=8), self.splitter, batch_size=4, queue_size=1)
+
+        async def sink(chunks, vectors):
+            raise ValueError("store is down")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(pipeline.run(self.documents(), sink))
+        self.assertLess(self.loaded, DOCUMENTS)
+
+    def test_concurrent_embedding(self):
+        """
+        Several embedding requests should be in flight at once, and batches stored while the next ones are embedded.
+        """
+        in_flight = []
+        events = []
+
+        class SlowEmbeddings(DeterministicFakeEmbedding):
+            """Fake embeddings recording how many requests overlap."""
+
+            async def aembed_documents(self, texts):
+                in_flight.append(1)
+                events.append(("embed", len(in_flight)))
+                await asyncio.sleep(0.01)
+                in_flight.pop()
+                return self.embed_documents(texts)
+
+        async def sink(chunks, vectors):
+            self.assertEqual(len(chunks), len(vectors))
+            events.append(("store", len(in_flight)))
+            await asyncio.sleep(0.005)
+
+        pipeline = IngestionPipeline(SlowEmbeddings(size=8), self.splitter, batch_size=4, embed_concurrency=3)
+        stats = asyncio.run(pipeline.run(self.documents(), sink))
+
+        self.assertEqual(max(count for event, count in events if event == "embed"), 3)
+        self.assertTrue(any(count > 0 for event, count in events if event == "store"))
+        self.assertEqual(stats.store.items, DOCUMENTS * CHUNKS_PER_DOCUMENT)
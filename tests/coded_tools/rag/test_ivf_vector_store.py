@@ -0,0 +1,82 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from coded_tools.rag.ivf_vector_store import IvfVectorStore
+from coded_tools.rag.ivf_vector_store import ivf_path
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+
+ROWS = 2000
+DIMENSIONS = 32
+
+
+class TestIvfVectorStore(TestCase):
+    """
+    Unit tests for the IvfVectorStore class.
+    """
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.embeddings = FakeEmbeddings(size=DIMENSIONS)
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((ROWS, DIMENSIONS), dtype=np.float32)
+        self.queries = rng.standard_normal((10, DIMENSIONS), dtype=np.float32).tolist()
+        self.texts = [f"chunk {i}" for i in range(ROWS)]
+        self.ids = [str(i) for i in range(ROWS)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_store(self, n_probe: int) -> IvfVectorStore:
+        """Build an IvfVectorStore with 16 lists holding the test vectors."""
+        store = IvfVectorStore(embedding=self.embeddings, n_lists=16, n_probe=n_probe)
+        store.add_vectors(self.vectors, self.texts, ids=self.ids)
+        return store
+
+    def test_probing_all_lists_matches_exact_search(self):
+        """
+        Probing every list should return the results of an exact search, whether n_probe is
+        set on the store or passed to the search.
+        """
+        exact_store = NumpyVectorStore(embedding=self.embeddings)
+        exact_store.add_vectors(self.vectors, self.texts, ids=self.ids)
+        ivf_store = self.make_store(n_probe=16)
+        probed_store = self.make_store(n_probe=1)
+
+        expected = exact_store.batch_similarity_search_with_score_by_vector(self.queries, k=5)
+        actual = ivf_store.batch_similarity_search_with_score_by_vector(self.queries, k=5)
+        probed = probed_store.batch_similarity_search_with_score_by_vector(self.queries, k=5, n_probe=16)
+        for expected_results, actual_results, probed_results in zip(expected, actual, probed):
+            self.assertEqual([doc.id for doc, _ in actual_results], [doc.id for doc, _ in expected_results])
+            self.assertEqual([doc.id for doc, _ in probed_results], [doc.id for doc, _ in expected_results])
+        self.assertEqual(probed_store.n_probe, 1)
+
+    def test_save_and_load_index(self):
+        """
+        A saved store should load with its index instead of retraining it.
+        """
+        path = os.path.join(self.temp_dir.name, "store.npy")
+        store = self.make_store(n_probe=2)
+        expected = store.batch_similarity_search_with_score_by_vector(self.queries, k=5)
+        store.save(path)
+        self.assertTrue(os.path.exists(ivf_path(os.path.realpath(path))))
+
+        loaded = IvfVectorStore.load(path, self.embeddings)
+        loaded.n_probe = 2
+        self.assertEqual(loaded.n_lists, 16)  # pylint: disable=no-member
+        actual = loaded.batch_similarity_search_with_score_by_vector(self.queries, k=5)
+        for expected_results, actual_results in zip(expected, actual):
+            self.assertEqual([doc.id for doc, _ in actual_results], [doc.id for doc, _ in expected_results])
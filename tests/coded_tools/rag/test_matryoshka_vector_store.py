@@ -0,0 +1,95 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from coded_tools.rag.matryoshka_vector_store import MatryoshkaVectorStore
+from coded_tools.rag.matryoshka_vector_store import prefix_path
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from tests.coded_tools.rag.corpora import make_matryoshka_corpus
+
+
+class TestMatryoshkaVectorStore(TestCase):
+    """
+    Unit tests for the two-stage search of the MatryoshkaVectorStore.
+    """
+
+    def setUp(self):
+        corpus = make_matryoshka_corpus(2020, 256, clusters=50)
+        self.vectors = corpus[:2000]
+        self.queries = corpus[2000:].tolist()
+        self.texts = [f"chunk {i}" for i in range(2000)]
+        self.ids = [str(i) for i in range(2000)]
+
+    def test_two_stage_search(self):
+        """
+        Prefiltering on 32 of 256 dimensions should find nearly all results of an exact search.
+        """
+        exact = NumpyVectorStore(embedding=FakeEmbeddings(size=256))
+        exact.add_vectors(self.vectors, self.texts, ids=self.ids)
+        store = MatryoshkaVectorStore(embedding=FakeEmbeddings(size=256), prefilter_dimensions=32)
+        store.add_vectors(self.vectors, self.texts, ids=self.ids)
+
+        found = 0
+        for query in self.queries:
+            results = store.similarity_search_with_score_by_vector(query, k=10)
+            expected = exact.similarity_search_with_score_by_vector(query, k=10)
+            found += len({doc.id for doc, _ in results} & {doc.id for doc, _ in expected})
+            # Scores are those of the full vectors
+            self.assertAlmostEqual(results[0][1], expected[0][1], places=5)
+        self.assertGreaterEqual(found / (10 * len(self.queries)), 0.95)
+        self.assertEqual(store.prefix_matrix.shape, (2000, 32))
+
+        store.prefilter_dimensions = 64
+        store.similarity_search_by_vector(self.queries[0], k=10)
+        self.assertEqual(store.prefix_matrix.shape, (2000, 64))
+
+    def test_search_parameters(self):
+        """
+        Parameters passed to a search should only apply to that search, not change the shared store.
+        """
+        store = MatryoshkaVectorStore(embedding=FakeEmbeddings(size=256), prefilter_dimensions=32)
+        store.add_vectors(self.vectors, self.texts, ids=self.ids)
+
+        default_results = store.similarity_search_by_vector(self.queries[0], k=10)
+        results = store.similarity_search_by_vector(self.queries[0], k=10, prefilter_dimensions=64, rerank_factor=20)
+        self.assertEqual(store.prefilter_dimensions, 32)
+        self.assertEqual(store.rerank_factor, 10)
+        self.assertEqual(store.prefix_matrix.shape, (2000, 32))
+        # Both prefilter matrices are kept, so that alternating callers do not rebuild them
+        self.assertEqual(sorted(store._prefixes), [32, 64])  # pylint: disable=protected-access
+        self.assertGreaterEqual(len({doc.id for doc in results} & {doc.id for doc in default_results}), 8)
+
+    def test_save_and_load(self):
+        """
+        The prefilter matrix should be saved next to the store and memory-mapped on load.
+        """
+        store = MatryoshkaVectorStore(embedding=FakeEmbeddings(size=256), prefilter_dimensions=32)
+        store.add_vectors(self.vectors, self.texts, ids=self.ids)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "store.npy")
+            store.save(path)
+            self.assertTrue(os.path.exists(prefix_path(os.path.realpath(path))))
+
+            # The configured prefilter dimensions win over those the matrix was saved with
+            loaded = MatryoshkaVectorStore.load(path, FakeEmbeddings(size=256))
+            self.assertIsNone(loaded.prefix_matrix)  # pylint: disable=no-member
+            self.assertEqual(loaded.prefilter_dimensions, 256)  # pylint: disable=no-member
+
+            loaded = MatryoshkaVectorStore.load(path, FakeEmbeddings(size=256), prefilter_dimensions=32)
+            self.assertIsInstance(loaded.prefix_matrix, np.memmap)  # pylint: disable=no-member
+            self.assertEqual(
+                [doc.id for doc in loaded.similarity_search_by_vector(self.queries[0], k=5)],
+                [doc.id for doc in store.similarity_search_by_vector(self.queries[0], k=5)],
+            )
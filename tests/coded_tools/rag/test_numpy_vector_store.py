@@ -0,0 +1,159 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.numpy_vector_store import convert_json_to_npy
+from coded_tools.rag.numpy_vector_store import sidecar_paths
+from coded_tools.rag.numpy_vector_store import top_k_indices
+from coded_tools.rag.numpy_vector_store import validate_dtype
+
+TEXTS = ["apples and pears", "the quarterly budget", "travel policy for employees", "pears are green"]
+
+
+class TestNumpyVectorStore(TestCase):
+    """
+    Unit tests for the NumpyVectorStore class.
+    """
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_matches_in_memory_vector_store(self):
+        """
+        Search results should match those of InMemoryVectorStore.
+        """
+        metadatas = [{"source": str(i)} for i in range(len(TEXTS))]
+        in_memory_store = InMemoryVectorStore.from_texts(TEXTS, self.embeddings, metadatas=metadatas)
+        numpy_store = NumpyVectorStore.from_in_memory(in_memory_store)
+
+        for query in TEXTS:
+            expected = in_memory_store.similarity_search_with_score(query, k=3)
+            actual = numpy_store.similarity_search_with_score(query, k=3)
+            self.assertEqual([doc.page_content for doc, _ in actual], [doc.page_content for doc, _ in expected])
+            for (_, actual_score), (_, expected_score) in zip(actual, expected):
+                self.assertAlmostEqual(actual_score, expected_score, places=5)
+
+    def test_save_and_memory_mapped_load(self):
+        """
+        A saved store should load memory-mapped and return the same documents.
+        """
+        path = os.path.join(self.temp_dir.name, "store.npy")
+        store = NumpyVectorStore.from_texts(TEXTS, self.embeddings, metadatas=[{"page": i} for i in range(4)])
+        store.save(path, dtype="float16")
+
+        loaded = NumpyVectorStore.load(path, self.embeddings)
+        self.assertIsInstance(loaded.matrix, np.memmap)
+        self.assertEqual(loaded.matrix.dtype, np.float16)
+        self.assertEqual(len(loaded), len(TEXTS))
+        self.assertEqual(loaded.similarity_search(TEXTS[2], k=1)[0].page_content, TEXTS[2])
+        self.assertEqual(loaded.similarity_search(TEXTS[2], k=1)[0].metadata, {"page": 2})
+
+        # Modifying a memory-mapped store copies it into memory and leaves the files untouched
+        loaded.add_texts(["new text"])
+        self.assertEqual(len(loaded), len(TEXTS) + 1)
+        self.assertEqual(len(NumpyVectorStore.load(path, self.embeddings)), len(TEXTS))
+
+    def test_invalid_files(self):
+        """
+        Unsupported dtypes and sidecars that do not match the matrix should raise a ValueError.
+        """
+        self.assertEqual(validate_dtype("float16"), "float16")
+        with self.assertRaises(ValueError):
+            validate_dtype("int8")
+
+        path = os.path.join(self.temp_dir.name, "store.npy")
+        other_path = os.path.join(self.temp_dir.name, "other.npy")
+        NumpyVectorStore.from_texts(TEXTS, self.embeddings).save(path)
+        NumpyVectorStore.from_texts(TEXTS[:2], self.embeddings).save(other_path)
+        for sidecar, other_sidecar in zip(
+            sidecar_paths(os.path.realpath(path)), sidecar_paths(os.path.realpath(other_path))
+        ):
+            os.replace(other_sidecar, sidecar)
+        with self.assertRaises(ValueError):
+            NumpyVectorStore.load(path, self.embeddings)
+
+    def test_save_replaces_all_files_at_once(self):
+        """
+        Each save should be linked at once, and a store loaded from an earlier save should stay usable.
+        """
+        path = os.path.join(self.temp_dir.name, "store.npy")
+        NumpyVectorStore.from_texts(TEXTS, self.embeddings).save(path)
+        first = NumpyVectorStore.load(path, self.embeddings)
+        first_path = os.path.realpath(path)
+
+        NumpyVectorStore.from_texts(TEXTS[:2], self.embeddings).save(path)
+        self.assertNotEqual(os.path.realpath(path), first_path)
+        self.assertEqual(len(NumpyVectorStore.load(path, self.embeddings)), 2)
+        NumpyVectorStore.from_texts(TEXTS[:3], self.embeddings).save(path)
+        self.assertEqual(len(NumpyVectorStore.load(path, self.embeddings)), 3)
+        self.assertEqual(len(os.listdir(path + ".versions")), 2)
+        self.assertEqual(first.similarity_search(TEXTS[3], k=1)[0].page_content, TEXTS[3])
+
+    def test_delete(self):
+        """
+        Deleted documents should no longer be returned.
+        """
+        store = NumpyVectorStore.from_texts(TEXTS, self.embeddings, ids=["a", "b", "c", "d"])
+        store.delete(["c"])
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.get_by_ids(["c"]), [])
+        self.assertNotIn(TEXTS[2], [doc.page_content for doc in store.similarity_search(TEXTS[2], k=3)])
+
+    def test_convert_json_to_npy(self):
+        """
+        A JSON dump should convert to the binary format without re-embedding.
+        """
+        json_path = os.path.join(self.temp_dir.name, "store.json")
+        npy_path = os.path.join(self.temp_dir.name, "store.npy")
+        InMemoryVectorStore.from_texts(TEXTS, self.embeddings).dump(json_path)
+
+        convert_json_to_npy(json_path, npy_path)
+
+        loaded = NumpyVectorStore.load(npy_path, self.embeddings)
+        self.assertEqual(sorted(doc.page_content for doc in loaded.similarity_search(TEXTS[0], k=4)), sorted(TEXTS))
+
+    def test_batch_search(self):
+        """
+        A batched search should return the same results as one search per query.
+        """
+        store = NumpyVectorStore.from_texts(TEXTS, self.embeddings)
+        queries = [self.embeddings.embed_query(text) for text in TEXTS]
+        batched = store.batch_similarity_search_with_score_by_vector(queries, k=2)
+        for query, results in zip(queries, batched):
+            expected = store.similarity_search_with_score_by_vector(query, k=2)
+            self.assertEqual([doc.id for doc, _ in results], [doc.id for doc, _ in expected])
+
+    def test_filter(self):
+        """
+        Filtered searches should only return documents passing the filter.
+        """
+        store = NumpyVectorStore.from_texts(TEXTS, self.embeddings, metadatas=[{"page": i} for i in range(4)])
+        results = store.similarity_search(TEXTS[0], k=2, filter=lambda doc: doc.metadata["page"] % 2 == 1)
+        self.assertEqual(sorted(doc.metadata["page"] for doc in results), [1, 3])
+
+    def test_top_k_indices(self):
+        """
+        top_k_indices should return the indices of the highest scores, highest first.
+        """
+        scores = np.array([[0.1, 0.9, 0.5, 0.7], [0.4, 0.3, 0.2, 0.1]])
+        self.assertEqual(top_k_indices(scores, 2).tolist(), [[1, 3], [0, 1]])
+        self.assertEqual(top_k_indices(scores, 10).tolist(), [[1, 3, 2, 0], [0, 1, 2, 3]])
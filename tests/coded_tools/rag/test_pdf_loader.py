@@ -0,0 +1,174 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+import pymupdf
+
+from coded_tools.rag import pdf_loader
+from coded_tools.rag.pdf_loader import load_pdfs
+from coded_tools.rag.pdf_loader import loader_concurrency
+from coded_tools.rag.pdf_loader import parse_pdf
+
+
+def slow_parse_pdf(url: str, timeout: float):
+    """Stand-in parser that never finishes in time."""
+    time.sleep(1.0)
+    return parse_pdf(url, timeout)
+
+
+def stuck_parse_pdf(url: str, timeout: float):
+    """Stand-in parser stuck on the first file only, run in a worker process."""
+    if url.endswith("file_0.pdf"):
+        time.sleep(60.0)
+    return parse_pdf(url, timeout)
+
+
+def delayed_parse_pdf(url: str, timeout: float):
+    """Stand-in parser taking most of the timeout, run in a worker process."""
+    time.sleep(0.6)
+    return parse_pdf(url, timeout)
+
+
+class TricklingHandler(BaseHTTPRequestHandler):
+    """Serves a PDF one byte at a time, too slowly to finish."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Send the headers, then trickle the body."""
+        self.send_response(200)
+        self.send_header("Content-Length", "1000")
+        self.end_headers()
+        for _ in range(1000):
+            self.wfile.write(b"%")
+            self.wfile.flush()
+            time.sleep(0.05)
+
+    def log_message(self, *args):
+        """Keep the test output quiet."""
+
+
+class TestPdfLoader(TestCase):
+    """
+    Unit tests for the concurrent PDF loader.
+    """
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index in range(4):
+            path = os.path.join(self.temp_dir.name, f"file_{index}.pdf")
+            document = pymupdf.open()
+            for page in range(index + 1):
+                document.new_page().insert_text((72, 72), f"file {index} page {page}")
+            document.save(path)
+            document.close()
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_loads_in_order_and_skips_missing_files(self):
+        """
+        Pages should come back in the order of the urls, without the missing file.
+        """
+        urls = [self.paths[2], os.path.join(self.temp_dir.name, "missing.pdf"), self.paths[0], self.paths[3]]
+        docs = asyncio.run(load_pdfs(urls, max_concurrency=2))
+        self.assertEqual(
+            [doc.page_content.strip() for doc in docs],
+            [f"file {index} page {page}" for index in (2, 0, 3) for page in range(index + 1)],
+        )
+
+    def test_timeout(self):
+        """
+        A file that does not load in time should be skipped without failing the others.
+        """
+        with patch.dict(os.environ, {"RAG_PDF_LOADER_PROCESSES": "0"}), patch.object(
+            pdf_loader, "parse_pdf", slow_parse_pdf
+        ):
+            docs = asyncio.run(load_pdfs(self.paths[:1], timeout=0.1))
+        self.assertEqual(docs, [])
+
+    def test_timeout_in_worker(self):
+        """
+        A file that does not load in time should only fail its own job, without restarting the pool.
+        """
+        with (
+            patch.dict(os.environ, {"RAG_PDF_LOADER_PROCESSES": "2"}),
+            patch.object(pdf_loader, "_process_pool", None),
+            patch.object(pdf_loader, "parse_pdf", stuck_parse_pdf),
+        ):
+            pool = pdf_loader.get_process_pool()
+            try:
+                start = time.monotonic()
+                docs = asyncio.run(load_pdfs(self.paths[:3], timeout=1.0))
+                self.assertLess(time.monotonic() - start, 30.0)
+                self.assertEqual(
+                    [doc.page_content.strip() for doc in docs],
+                    [f"file {index} page {page}" for index in (1, 2) for page in range(index + 1)],
+                )
+                self.assertIs(pdf_loader.get_process_pool(), pool)
+            finally:
+                pool.shutdown()
+
+    def test_timeout_excludes_queueing(self):
+        """
+        The timeout of a file should only start once a worker loads it, not while it waits for one.
+        """
+        with (
+            patch.dict(os.environ, {"RAG_PDF_LOADER_PROCESSES": "1"}),
+            patch.object(pdf_loader, "_process_pool", None),
+            patch.object(pdf_loader, "parse_pdf", delayed_parse_pdf),
+        ):
+            pool = pdf_loader.get_process_pool()
+
+            async def load_concurrently():
+                return await asyncio.gather(*(load_pdfs([path], timeout=1.0) for path in self.paths[:2]))
+
+            try:
+                first, second = asyncio.run(load_concurrently())
+            finally:
+                pool.shutdown()
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 2)
+
+    def test_download_timeout(self):
+        """
+        A server sending bytes too slowly to finish should not hold the worker past the timeout.
+        """
+        server = ThreadingHTTPServer(("127.0.0.1", 0), TricklingHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/file.pdf"
+            start = time.monotonic()
+            with patch.dict(os.environ, {"RAG_PDF_LOADER_PROCESSES": "0"}):
+                docs = asyncio.run(load_pdfs([url], timeout=0.5))
+            self.assertEqual(docs, [])
+            self.assertLess(time.monotonic() - start, 2.0)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_concurrency_capped_to_workers(self):
+        """
+        No more PDFs should be loaded at once than there are workers to parse them.
+        """
+        with patch.dict(os.environ, {"RAG_PDF_LOADER_PROCESSES": "2"}):
+            self.assertEqual(loader_concurrency(8), 2)
+        with patch.dict(os.environ, {"RAG_PDF_LOADER_PROCESSES": "0"}):
+            self.assertEqual(loader_concurrency(8), 8)
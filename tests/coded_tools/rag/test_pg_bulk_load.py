@@ -0,0 +1,91 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import json
+import uuid
+from unittest import TestCase
+
+from langchain_core.documents import Document
+
+from coded_tools.rag.pg_bulk_load import COPY_COLUMNS
+from coded_tools.rag.pg_bulk_load import PgBulkLoader
+from coded_tools.rag.pg_bulk_load import asyncpg_dsn
+
+
+class FakeConnection:
+    """
+    Records the COPY statements an asyncpg connection would run.
+    """
+
+    def __init__(self):
+        self.codecs = []
+        self.copies = []
+        self.closed = False
+
+    async def set_type_codec(self, type_name, **kwargs):
+        """Record the codec registered for a type."""
+        self.codecs.append((type_name, kwargs["format"]))
+
+    async def copy_records_to_table(self, table_name, records, columns, schema_name):
+        """Record a COPY statement."""
+        self.copies.append((schema_name, table_name, columns, records))
+
+    async def close(self):
+        """Record that the connection was closed."""
+        self.closed = True
+
+
+class TestPgBulkLoader(TestCase):
+    """
+    Unit tests for the PgBulkLoader class.
+    """
+
+    def test_asyncpg_dsn(self):
+        """
+        The SQLAlchemy driver name should be removed from connection strings.
+        """
+        self.assertEqual(asyncpg_dsn("postgresql+asyncpg://u:p@host:5432/db"), "postgresql://u:p@host:5432/db")
+        self.assertEqual(asyncpg_dsn("postgresql://u:p@host/db"), "postgresql://u:p@host/db")
+
+    def test_batches(self):
+        """
+        Rows should be sent in binary COPY batches, with the remainder sent on exit.
+        """
+        connection = FakeConnection()
+        dsns = []
+
+        async def connect(dsn):
+            dsns.append(dsn)
+            return connection
+
+        chunk_id = str(uuid.uuid4())
+        chunks = [Document(id=chunk_id, page_content="a", metadata={"page": 1})] + [
+            Document(page_content=text) for text in "bcde"
+        ]
+
+        async def load():
+            async with PgBulkLoader("postgresql+asyncpg://db", "chunks", batch_size=2, connect=connect) as loader:
+                await loader.add(chunks[:3], [[1.0, 0.0]] * 3)
+                await loader.add(chunks[3:], [[0.0, 1.0]] * 2)
+            return loader
+
+        loader = asyncio.run(load())
+        self.assertEqual(dsns, ["postgresql://db"])
+        self.assertEqual(connection.codecs[0], ("vector", "binary"))
+        self.assertEqual([len(copy[3]) for copy in connection.copies], [3, 2])
+        self.assertEqual(loader.rows, 5)
+        self.assertTrue(connection.closed)
+
+        schema_name, table_name, columns, records = connection.copies[0]
+        self.assertEqual((schema_name, table_name, columns), ("public", "chunks", list(COPY_COLUMNS)))
+        self.assertEqual(records[0][0], uuid.UUID(chunk_id))
+        self.assertEqual(records[0][1], "a")
+        self.assertEqual(records[0][2].tolist(), [1.0, 0.0])
+        self.assertEqual(json.loads(records[0][3]), {"page": 1})
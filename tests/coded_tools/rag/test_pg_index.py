@@ -0,0 +1,137 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from langchain_postgres.v2.indexes import HNSWQueryOptions
+from langchain_postgres.v2.indexes import IVFFlatQueryOptions
+from sqlalchemy.exc import ProgrammingError
+
+from coded_tools.rag.pg_engine_registry import PG_ENGINE_REGISTRY
+from coded_tools.rag.pg_index import VectorIndexConfig
+from coded_tools.rag.pg_index import aensure_vector_index
+from coded_tools.rag.pg_index import default_ivfflat_lists
+from coded_tools.rag.pg_index import index_matches
+from coded_tools.rag.pg_index import parse_plan
+
+
+class TestVectorIndexConfig(TestCase):
+    """
+    Unit tests for the VectorIndexConfig class and the index helpers.
+    """
+
+    def test_index_settings(self):
+        """
+        Indexes and search settings should follow the configuration, sizing IVFFlat from the rows.
+        """
+        hnsw = VectorIndexConfig.from_dict({"m": 32, "ef_search": 100})
+        self.assertEqual(hnsw.build_index(0).index_options(), "(m = 32, ef_construction = 64)")
+        self.assertEqual(hnsw.query_options(), HNSWQueryOptions(ef_search=100))
+
+        ivfflat = VectorIndexConfig.from_dict({"type": "ivfflat"})
+        self.assertEqual(ivfflat.build_index(400_000).lists, 400)
+        self.assertEqual(ivfflat.query_options(400), IVFFlatQueryOptions(probes=20))
+        self.assertEqual(default_ivfflat_lists(4_000_000), 2000)
+
+        self.assertIsNone(VectorIndexConfig(type="none").build_index(10))
+        with self.assertRaises(ValueError):
+            VectorIndexConfig.from_dict({"type": "diskann"})
+        with self.assertRaises(ValueError):
+            VectorIndexConfig.from_dict({"ef_search": 0})
+        with self.assertRaises(ValueError):
+            VectorIndexConfig.from_dict({"efsearch": 10})
+
+    def test_index_matches(self):
+        """
+        An index should be kept only when built as configured, and IVFFlat rebuilt once the table outgrew it.
+        """
+        hnsw = VectorIndexConfig()
+        self.assertTrue(index_matches(hnsw, "hnsw", {}, 0))
+        self.assertFalse(index_matches(VectorIndexConfig(m=32), "hnsw", {"m": "16"}, 0))
+        self.assertFalse(index_matches(hnsw, "ivfflat", {"lists": "100"}, 0))
+
+        ivfflat = VectorIndexConfig(type="ivfflat")
+        self.assertTrue(index_matches(ivfflat, "ivfflat", {"lists": "100"}, 150_000))
+        self.assertFalse(index_matches(ivfflat, "ivfflat", {"lists": "100"}, 500_000))
+        self.assertFalse(index_matches(VectorIndexConfig(type="ivfflat", lists=50), "ivfflat", {"lists": "100"}, 0))
+
+    def test_parse_plan(self):
+        """
+        The nodes, index and timings of an EXPLAIN output should be extracted.
+        """
+        explain_output = (
+            '[{"Plan": {"Node Type": "Limit", "Plans": [{"Node Type": "Index Scan", '
+            '"Index Name": "vectorstorelangchainvectorindex"}]}, "Planning Time": 0.2, "Execution Time": 1.5}]'
+        )
+        plan = parse_plan(explain_output)
+        self.assertEqual(plan.node_types, ["Limit", "Index Scan"])
+        self.assertTrue(plan.uses_index)
+        self.assertEqual(plan.execution_ms, 1.5)
+        self.assertFalse(parse_plan([{"Plan": {"Node Type": "Seq Scan"}}]).uses_index)
+
+
+class TestEnsureVectorIndex(TestCase):
+    """
+    Unit tests for aensure_vector_index, with the catalog queries mocked.
+    """
+
+    def setUp(self):
+        self.vector_store = MagicMock(aapply_vector_index=AsyncMock(), adrop_vector_index=AsyncMock())
+        self.connection_string = f"postgresql+asyncpg://test/{self.id()}"
+
+    def tearDown(self):
+        PG_ENGINE_REGISTRY.forget_table(self.connection_string, "table")
+
+    def ensure(self, config: VectorIndexConfig, describe: AsyncMock, rows: int = 0):
+        """Run aensure_vector_index with the given description of the index of the table."""
+        with patch("coded_tools.rag.pg_index.adescribe_vector_index", describe), patch(
+            "coded_tools.rag.pg_index.aestimate_rows", AsyncMock(return_value=rows)
+        ):
+            return asyncio.run(
+                aensure_vector_index(self.vector_store, MagicMock(), self.connection_string, "table", config)
+            )
+
+    def test_creates_missing_index_once(self):
+        """
+        A missing index should be created concurrently, and later calls should not check the table again.
+        """
+        describe = AsyncMock(return_value=None)
+        self.assertEqual(self.ensure(VectorIndexConfig(), describe), HNSWQueryOptions(ef_search=40))
+        self.vector_store.aapply_vector_index.assert_awaited_once()
+        self.assertTrue(self.vector_store.aapply_vector_index.await_args.kwargs["concurrently"])
+
+        self.assertEqual(self.ensure(VectorIndexConfig(ef_search=80), describe), HNSWQueryOptions(ef_search=80))
+        describe.assert_awaited_once()
+        self.vector_store.aapply_vector_index.assert_awaited_once()
+
+    def test_keeps_other_index(self):
+        """
+        An index built differently should be searched as it is, unless a rebuild is asked for.
+        """
+        describe = AsyncMock(return_value=("ivfflat", {"lists": "400"}))
+        self.assertEqual(self.ensure(VectorIndexConfig(), describe), IVFFlatQueryOptions(probes=20))
+        self.vector_store.adrop_vector_index.assert_not_awaited()
+        self.vector_store.aapply_vector_index.assert_not_awaited()
+
+        self.assertEqual(self.ensure(VectorIndexConfig(rebuild=True), describe), HNSWQueryOptions(ef_search=40))
+        self.vector_store.adrop_vector_index.assert_awaited_once()
+        self.vector_store.aapply_vector_index.assert_awaited_once()
+
+    def test_lost_race(self):
+        """
+        When another process created the index first, its index should be searched.
+        """
+        self.vector_store.aapply_vector_index.side_effect = ProgrammingError("CREATE INDEX", {}, Exception("exists"))
+        describe = AsyncMock(side_effect=[None, ("ivfflat", {"lists": "400"})])
+        config = VectorIndexConfig(type="ivfflat")
+        self.assertEqual(self.ensure(config, describe, rows=100_000), IVFFlatQueryOptions(probes=20))
@@ -0,0 +1,120 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+
+from langchain_core.documents import Document
+
+from coded_tools.pdf_rag import PdfRag
+from coded_tools.rag.ivf_vector_store import DEFAULT_N_PROBE
+from coded_tools.rag.ivf_vector_store import IvfVectorStore
+from coded_tools.rag.query_cache import QUERY_CACHE
+from coded_tools.rag.query_cache import QueryCache
+
+EMBEDDINGS = {
+    "what is the deadline?": [1.0, 0.0, 0.0],
+    "what's the deadline?": [0.99, 0.05, 0.0],
+    "who is the vendor?": [0.0, 1.0, 0.0],
+}
+
+
+class TestQueryCache(TestCase):
+    """
+    Unit tests for the QueryCache class.
+    """
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = QueryCache(max_entries=8, ttl_seconds=60, similarity_threshold=0.95, clock=lambda: self.now)
+        self.embedded = []
+        self.searched = []
+
+    async def _embed(self, query):
+        self.embedded.append(query)
+        return EMBEDDINGS[query.strip().lower()]
+
+    async def _search(self, embedding):
+        self.searched.append(embedding)
+        return [Document(page_content=f"result {len(self.searched)}")]
+
+    def _retrieve(self, query, namespace="store"):
+        results = asyncio.run(self.cache.aretrieve(namespace, query, self._embed, self._search))
+        return [doc.page_content for doc in results]
+
+    def test_exact_and_semantic_tiers(self):
+        """
+        A repeated query should skip the embedding, and a near-identical one the search.
+        """
+        self.assertEqual(self._retrieve("What is the deadline?"), ["result 1"])
+        self.assertEqual(self._retrieve("  what is   the DEADLINE? "), ["result 1"])
+        self.assertEqual(len(self.embedded), 1)
+
+        self.assertEqual(self._retrieve("What's the deadline?"), ["result 1"])
+        self.assertEqual(len(self.embedded), 2)
+        self.assertEqual(len(self.searched), 1)
+
+        self.assertEqual(self._retrieve("Who is the vendor?"), ["result 2"])
+        stats = self.cache.stats()
+        self.assertEqual((stats["exact_hits"], stats["semantic_hits"], stats["misses"]), (1, 1, 2))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_ttl_and_invalidation(self):
+        """
+        Results should expire after the TTL, be dropped on invalidation,
+        and searches started before an invalidation should not be cached.
+        """
+        self._retrieve("What is the deadline?")
+        self.now = 61.0
+        self.assertEqual(self._retrieve("What is the deadline?"), ["result 2"])
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+        self.cache.invalidate("store")
+        self.assertIsNone(self.cache.get("store", "What is the deadline?"))
+
+        generation = self.cache.generation("store")
+        self.cache.invalidate("store")
+        self.cache.put("store", "Who is the vendor?", [0.0, 1.0, 0.0], [Document(page_content="stale")], generation)
+        self.assertIsNone(self.cache.get("store", "Who is the vendor?"))
+
+        # Reloading the same version of a vector store file keeps its cached queries
+        self._retrieve("What is the deadline?")
+        self.assertTrue(self.cache.invalidate_on_change("store", "1:100"))
+        self._retrieve("What is the deadline?")
+        self.assertFalse(self.cache.invalidate_on_change("store", "1:100"))
+        self.assertIsNotNone(self.cache.get("store", "What is the deadline?"))
+        self.assertTrue(self.cache.invalidate_on_change("store", "2:100"))
+        self.assertIsNone(self.cache.get("store", "What is the deadline?"))
+
+        # Other vector stores are not affected
+        self._retrieve("Who is the vendor?", namespace="other")
+        self.cache.invalidate("store")
+        self.assertIsNotNone(self.cache.get("other", "Who is the vendor?"))
+
+    def test_search_parameters_in_variant(self):
+        """
+        Results found with other search parameters of the same vector store should not be reused.
+        """
+        rag = PdfRag()
+        rag.configure_embeddings({"provider": "hashing", "dimensions": 32})
+        rag.query_cache_namespace = "test_search_parameters_in_variant"
+        store = IvfVectorStore.from_texts([f"chunk number {i}" for i in range(50)], rag.embeddings)
+        store.n_lists = 5
+
+        asyncio.run(rag.retrieve(store, "chunk number 7"))
+        hits = QUERY_CACHE.stats()["exact_hits"]
+        asyncio.run(rag.retrieve(store, "chunk number 7"))
+        self.assertEqual(QUERY_CACHE.stats()["exact_hits"], hits + 1)
+        hits += 1
+        rag.ivf_probes = 5
+        asyncio.run(rag.retrieve(store, "chunk number 7"))
+        self.assertEqual(QUERY_CACHE.stats()["exact_hits"], hits)
+        # The probes of a call are passed to its searches, the shared vector store is left unchanged
+        self.assertEqual(store.n_probe, DEFAULT_N_PROBE)
+        QUERY_CACHE.invalidate(rag.query_cache_namespace)
@@ -0,0 +1,86 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import numpy as np
+from langchain_core.documents import Document
+
+from coded_tools.pdf_rag import PdfRag
+from coded_tools.rag.embeddings_provider import HashingEmbeddings
+from coded_tools.rag.numpy_vector_store import NumpyVectorStore
+from coded_tools.rag.shared_vector_store import SharedVectorStores
+from coded_tools.rag.shared_vector_store import get_shared_vector_stores
+from tests.coded_tools.rag.test_chunking import WordTokenizer
+
+
+class TestSharedVectorStores(TestCase):
+    """
+    Unit tests for the vector stores shared by worker processes through memory-mapped files.
+    """
+
+    def test_publish_and_swap(self):
+        """
+        Other processes should attach to the published version read-only, and swap to a newer one.
+        """
+        embedding = HashingEmbeddings(dimensions=64)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            builder = SharedVectorStores(temp_dir)
+            worker = SharedVectorStores(temp_dir)
+            self.assertIsNone(worker.attach("key", NumpyVectorStore, embedding))
+
+            builder.publish("key", NumpyVectorStore.from_texts(["red apples", "green pears"], embedding))
+            attached = worker.attach("key", NumpyVectorStore, embedding)
+            self.assertIsInstance(attached.matrix, np.memmap)
+            self.assertEqual(attached.similarity_search("apples", k=1)[0].page_content, "red apples")
+            self.assertIs(worker.attach("key", NumpyVectorStore, embedding), attached)
+
+            on_swap = MagicMock()
+            for texts in (["yellow bananas"], ["blue berries"]):
+                builder.publish("key", NumpyVectorStore.from_texts(texts, embedding))
+            swapped = worker.attach("key", NumpyVectorStore, embedding, on_swap=on_swap)
+            self.assertEqual(swapped.similarity_search("berries", k=1)[0].page_content, "blue berries")
+            on_swap.assert_called_once()
+            # The first version is removed, its mapping stays readable by searches in flight
+            self.assertEqual(len([entry for entry in os.scandir(os.path.join(temp_dir, "key")) if entry.is_dir()]), 2)
+            self.assertEqual(len(attached), 2)
+            self.assertEqual(attached.similarity_search("apples", k=1)[0].page_content, "red apples")
+
+    def test_generate_vector_store(self):
+        """
+        Only the first worker should load and embed the documents, the others attach to its vector store.
+        """
+        documents = [Document(page_content="Refunds are paid within 30 days.", metadata={"source": "policy.pdf"})]
+
+        async def iter_documents(_rag, _loader_args):
+            for document in documents:
+                yield document
+
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("coded_tools.rag.chunking.get_tokenizer", return_value=WordTokenizer()),
+            patch.object(PdfRag, "iter_documents", autospec=True, side_effect=iter_documents) as loads,
+        ):
+            stores = []
+            for _ in range(2):
+                rag = PdfRag()
+                rag.configure_embeddings({"provider": "hashing", "dimensions": 64})
+                rag.configure_shared_vector_store(temp_dir)
+                stores.append(asyncio.run(rag.generate_vector_store({"urls": ["policy.pdf"]})))
+                # As if the next call came from another process
+                get_shared_vector_stores(temp_dir)._attached.clear()  # pylint: disable=protected-access
+
+            self.assertEqual(loads.call_count, 1)
+            self.assertIsInstance(stores[1].matrix, np.memmap)
+            self.assertEqual(stores[1].similarity_search("refunds", k=1)[0].page_content, documents[0].page_content)
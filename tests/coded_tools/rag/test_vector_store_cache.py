@@ -0,0 +1,82 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+from unittest import TestCase
+
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from coded_tools.rag.vector_store_cache import VectorStoreCache
+from coded_tools.rag.vector_store_cache import estimate_vector_store_bytes
+
+
+class TestVectorStoreCache(TestCase):
+    """
+    Unit tests for the VectorStoreCache class.
+    """
+
+    def setUp(self):
+        self.embeddings = FakeEmbeddings(size=8)
+
+    def _make_store(self, texts):
+        return InMemoryVectorStore.from_texts(texts, embedding=self.embeddings)
+
+    def test_make_key(self):
+        """
+        Keys must be stable for the same inputs and change with any of them.
+        """
+        key = VectorStoreCache.make_key({"urls": ["a.pdf"]}, 100, 50, "model", 1536)
+        self.assertEqual(key, VectorStoreCache.make_key({"urls": ["a.pdf"]}, 100, 50, "model", 1536))
+        self.assertNotEqual(key, VectorStoreCache.make_key({"urls": ["b.pdf"]}, 100, 50, "model", 1536))
+        self.assertNotEqual(key, VectorStoreCache.make_key({"urls": ["a.pdf"]}, 200, 50, "model", 1536))
+        self.assertNotEqual(key, VectorStoreCache.make_key({"urls": ["a.pdf"]}, 100, 50, "model", 256))
+
+    def test_hits_and_misses(self):
+        """
+        Lookups should be counted as hits or misses.
+        """
+        cache = VectorStoreCache()
+        store = self._make_store(["hello"])
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", store)
+        self.assertIs(cache.get("key"), store)
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_lru_eviction(self):
+        """
+        The least recently used store should be evicted once over the entry budget.
+        """
+        cache = VectorStoreCache(max_entries=2)
+        cache.put("a", self._make_store(["a"]))
+        cache.put("b", self._make_store(["b"]))
+        # Touch "a" so that "b" becomes the least recently used entry
+        cache.get("a")
+        cache.put("c", self._make_store(["c"]))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_memory_budget_eviction(self):
+        """
+        Stores should be evicted once over the memory budget, and oversized stores never cached.
+        """
+        store_size = estimate_vector_store_bytes(self._make_store(["x"]))
+        cache = VectorStoreCache(max_entries=10, max_bytes=store_size * 2)
+        cache.put("a", self._make_store(["x"]))
+        cache.put("b", self._make_store(["y"]))
+        cache.put("c", self._make_store(["z"]))
+        self.assertIsNone(cache.get("a"))
+        self.assertLessEqual(cache.stats()["bytes"], store_size * 2)
+
+        cache.put("big", self._make_store(["x"]), size_bytes=store_size * 3)
+        self.assertIsNone(cache.get("big"))
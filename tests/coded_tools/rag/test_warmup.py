@@ -0,0 +1,73 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+from unittest import TestCase
+
+from coded_tools.rag.warmup import RagWarmup
+from coded_tools.rag.warmup import find_warmup_targets
+
+NETWORK = """
+{
+    "tools": [
+        {
+            "name": "Assistant",
+            "function": {"description": "Answer the query."},
+            "instructions": "Use your tools.",
+            "tools": ["docs_retriever", "calculator"]
+        },
+        {
+            "name": "docs_retriever",
+            "toolbox": "pdf_rag",
+            "args": {"vector_store_path": "vector_store.npy"}
+        },
+        {
+            "name": "calculator",
+            "function": {"description": "Calculate."},
+            "class": "advanced_calculator.calculator_tool.CalculatorCodedTool"
+        }
+    ]
+}
+"""
+
+
+class TestWarmup(TestCase):
+    """
+    Unit tests for the discovery and warmup of the RAG tools of a manifest.
+    """
+
+    def test_warmup(self):
+        """
+        Only the RAG tools of enabled networks should be warmed up, and a failing tool should not block readiness.
+        """
+        toolbox_info_file = os.path.join(os.path.dirname(__file__), "../../../toolbox/toolbox_info.hocon")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ("docs.hocon", "disabled.hocon"):
+                with open(os.path.join(temp_dir, name), "w", encoding="utf-8") as network_file:
+                    network_file.write(NETWORK)
+            manifest_file = os.path.join(temp_dir, "manifest.hocon")
+            with open(manifest_file, "w", encoding="utf-8") as manifest:
+                manifest.write('{"docs.hocon": true, "disabled.hocon": false}')
+
+            targets = find_warmup_targets(manifest_file, os.path.abspath(toolbox_info_file))
+
+        self.assertEqual(
+            [(target.name, target.class_ref) for target in targets], [("docs/docs_retriever", "pdf_rag.PdfRag")]
+        )
+        self.assertEqual(targets[0].args, {"vector_store_path": "vector_store.npy"})
+
+        warmup = RagWarmup()
+        self.assertTrue(warmup.is_ready())
+        warmup.start(targets)
+        self.assertTrue(warmup.wait(timeout=30))
+        status = warmup.status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["targets"]["docs/docs_retriever"]["state"], "failed")
+        self.assertIn("urls", status["targets"]["docs/docs_retriever"]["error"])